@@ -1,5 +1,4 @@
-from flask import Flask, jsonify, send_file
-import mimetypes
+from flask import Flask, jsonify, request
 from datetime import timedelta
 from flask_jwt_extended import JWTManager
 from extensions import limiter
@@ -14,6 +13,7 @@ if BASE_DIR not in sys.path:
 # 👆 HASTA AQUÍ
 
 from config import SecretKey
+from models.indice_imagenes import indice as indice_imagenes, responder as responder_imagen
 
 from ws.estudiante import ws_estudiante
 from ws.usuario import ws_usuario
@@ -82,6 +82,239 @@ def _migrar_columnas_recursos():
 _migrar_columnas_recursos()
 
 
+def _migrar_version_banco():
+    """
+    Contador de versión del banco de ejercicios (models/banco_ejercicios.py).
+    Los triggers lo incrementan ante cualquier cambio en ejercicios, opciones
+    o competencias, venga de esta API o del CRUD web. Idempotente.
+    """
+    try:
+        from conexionBD import Conexion
+        con = Conexion()
+        cur = con.cursor()
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS banco_ejercicios_version (
+                id          SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+                version     BIGINT    NOT NULL DEFAULT 0,
+                actualizado TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+        """)
+        cur.execute(
+            "INSERT INTO banco_ejercicios_version (id) VALUES (1) "
+            "ON CONFLICT (id) DO NOTHING"
+        )
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION fn_banco_ejercicios_version()
+            RETURNS trigger AS $$
+            BEGIN
+                UPDATE banco_ejercicios_version
+                SET version = version + 1, actualizado = NOW()
+                WHERE id = 1;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        for tabla in ("ejercicios", "opciones_ejercicio", "competencias"):
+            cur.execute(f"""
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_trigger
+                        WHERE tgname = 'trg_banco_version_{tabla}'
+                    ) THEN
+                        CREATE TRIGGER trg_banco_version_{tabla}
+                        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {tabla}
+                        FOR EACH STATEMENT
+                        EXECUTE PROCEDURE fn_banco_ejercicios_version();
+                    END IF;
+                END
+                $$
+            """)
+        con.commit()
+        cur.close()
+        con.close()
+        print("✅ Migración banco: versión + triggers listos")
+    except Exception as _e:
+        print(f"⚠️  Migración banco (ignorado): {_e}")
+
+_migrar_version_banco()
+
+
+def _migrar_estadisticas_puntajes():
+    """
+    Tabla puntajes_estadisticas + trigger en puntajes para las features del
+    árbol (models/estadisticas_puntajes.py). Backfill solo la primera vez.
+    """
+    try:
+        from conexionBD import Conexion
+        from models.estadisticas_puntajes import instalar
+        con = Conexion()
+        cur = con.cursor()
+        instalar(cur)
+        con.commit()
+        cur.close()
+        con.close()
+        print("✅ Migración estadísticas de puntajes: tabla + trigger listos")
+    except Exception as _e:
+        print(f"⚠️  Migración estadísticas de puntajes (ignorado): {_e}")
+
+_migrar_estadisticas_puntajes()
+
+
+def _migrar_dashboard_agregado():
+    """
+    Agregados del dashboard docente + triggers que los mantienen
+    (models/dashboard_agregado.py). Las filas se crean en la primera lectura.
+    """
+    try:
+        from conexionBD import Conexion
+        from models.dashboard_agregado import instalar
+        con = Conexion()
+        cur = con.cursor()
+        instalar(cur)
+        con.commit()
+        cur.close()
+        con.close()
+        print("✅ Migración dashboard docente: agregados + triggers listos")
+    except Exception as _e:
+        print(f"⚠️  Migración dashboard docente (ignorado): {_e}")
+
+_migrar_dashboard_agregado()
+
+
+def _migrar_version_materiales():
+    """
+    Contador de versión de material_estudio + trigger, para el índice de
+    material sugerido tras un error (models/indice_materiales.py).
+    """
+    try:
+        from conexionBD import Conexion
+        from models.indice_materiales import instalar
+        con = Conexion()
+        cur = con.cursor()
+        instalar(cur)
+        con.commit()
+        cur.close()
+        con.close()
+        print("✅ Migración material: versión + trigger listos")
+    except Exception as _e:
+        print(f"⚠️  Migración material (ignorado): {_e}")
+
+_migrar_version_materiales()
+
+
+def _migrar_indices_historial():
+    """
+    Índices para /progreso/historial: página por (id_estudiante, id_progreso)
+    y respuestas del alumno por ejercicio. IF NOT EXISTS → idempotente.
+    """
+    try:
+        from conexionBD import Conexion
+        con = Conexion()
+        cur = con.cursor()
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_progreso_estudiante_id "
+            "ON progreso (id_estudiante, id_progreso DESC)"
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_respuestas_estudiante_ejercicio "
+            "ON respuestas_estudiantes (id_estudiante, id_ejercicio)"
+        )
+        con.commit()
+        cur.close()
+        con.close()
+        print("✅ Migración historial: índices listos")
+    except Exception as _e:
+        print(f"⚠️  Migración historial (ignorado): {_e}")
+
+_migrar_indices_historial()
+
+
+def _migrar_almacen_imagenes():
+    """
+    Tablas del almacén de imágenes por contenido (models/almacen_imagenes.py).
+    """
+    try:
+        from conexionBD import Conexion
+        from models.almacen_imagenes import instalar
+        con = Conexion()
+        cur = con.cursor()
+        instalar(cur)
+        con.commit()
+        cur.close()
+        con.close()
+        print("✅ Migración almacén de imágenes: tablas listas")
+    except Exception as _e:
+        print(f"⚠️  Migración almacén de imágenes (ignorado): {_e}")
+
+_migrar_almacen_imagenes()
+
+
+def _migrar_rachas():
+    """
+    Contadores de racha, resumen de respuestas recientes y eventos de alerta
+    al docente + triggers que los mantienen (models/rachas.py).
+    """
+    try:
+        from conexionBD import Conexion
+        from models.rachas import instalar
+        con = Conexion()
+        cur = con.cursor()
+        instalar(cur)
+        con.commit()
+        cur.close()
+        con.close()
+        print("✅ Migración rachas y alertas: tablas + triggers listos")
+    except Exception as _e:
+        print(f"⚠️  Migración rachas y alertas (ignorado): {_e}")
+
+_migrar_rachas()
+
+
+def _migrar_respuestas_lote():
+    """idCliente de /tutor/responder_lote para reenvíos idempotentes (models/registro_lote.py)."""
+    try:
+        from conexionBD import Conexion
+        from models.registro_lote import instalar
+        con = Conexion()
+        cur = con.cursor()
+        instalar(cur)
+        con.commit()
+        cur.close()
+        con.close()
+        print("✅ Migración respuestas en lote: tabla de idCliente lista")
+    except Exception as _e:
+        print(f"⚠️  Migración respuestas en lote (ignorado): {_e}")
+
+_migrar_respuestas_lote()
+
+
+def _migrar_asignaciones_nec():
+    """Registro de puntajes asignados por el docente para recalcular_nec.py (models/recalculo_nec.py)."""
+    try:
+        from conexionBD import Conexion
+        from models.recalculo_nec import instalar
+        con = Conexion()
+        cur = con.cursor()
+        instalar(cur)
+        con.commit()
+        cur.close()
+        con.close()
+        print("✅ Migración asignaciones NEC: tabla lista")
+    except Exception as _e:
+        print(f"⚠️  Migración asignaciones NEC (ignorado): {_e}")
+
+_migrar_asignaciones_nec()
+
+# Con --preload este import corre en el master: soltar las conexiones del pool
+# antes del fork para que cada worker abra las suyas.
+try:
+    from conexionBD import cerrar_pool
+    cerrar_pool()
+except Exception as _e:
+    print(f"⚠️  No se pudo cerrar el pool tras la migración: {_e}")
+
+
 app.register_blueprint(ws_estudiante)
 app.register_blueprint(ws_usuario)
 app.register_blueprint(ws_docente)
@@ -115,10 +348,12 @@ print("📁 Ejercicios ayuda:", _EJERCICIOS_AYUDA, "| existe:", os.path.exists(_
 print("📁 Desarrollos alumno:", _DESARROLLOS_ALUMNO, "| existe:", os.path.exists(_DESARROLLOS_ALUMNO))
 
 
-def _servir_imagen(carpeta, filename):
+def _servir_imagen(carpeta, filename, inmutable=False):
     """
     Sirve un archivo de imagen desde la carpeta indicada.
     Previene path traversal: solo acepta nombres de archivo sin subdirectorios.
+    Usa el índice en memoria de la carpeta (models/indice_imagenes.py):
+    ETag por contenido, 304 y Range.
     """
     try:
         # Sanear filename: eliminar cualquier componente de directorio (../../ etc.)
@@ -127,12 +362,14 @@ def _servir_imagen(carpeta, filename):
             # El filename original contenía barras u otros componentes → rechazar
             return jsonify({"error": "Nombre de archivo inválido"}), 400
 
-        filepath = os.path.join(carpeta, safe_name)
-        if not os.path.exists(filepath):
-            return jsonify({"error": "Imagen no encontrada"}), 404
-        mime_type, _ = mimetypes.guess_type(safe_name)
-        mime_type = mime_type or 'image/jpeg'
-        return send_file(filepath, mimetype=mime_type, max_age=3600)
+        idx     = indice_imagenes(carpeta, inmutable)
+        entrada = idx.buscar(safe_name)
+        try:
+            if entrada is not None:
+                return responder_imagen(entrada)
+        except FileNotFoundError:
+            idx.registrar(safe_name)   # se borró antes de la re-verificación
+        return jsonify({"error": "Imagen no encontrada"}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -142,6 +379,24 @@ def servir_imagen_ejercicio(filename):
     return _servir_imagen(_EJERCICIOS_AYUDA, filename)
 
 
+@app.route('/imagenes/<filename>')
+def servir_imagen_almacen(filename):
+    """
+    Blobs del almacén por contenido (<sha256>.<ext>, models/almacen_imagenes.py).
+    ?tam=media|mini sirve la variante. Se cachean como inmutables.
+    """
+    from models.almacen_imagenes import CARPETA, es_blob
+    from models.imagenes_desarrollo import TAMANOS, nombre_variante
+    if not es_blob(filename):
+        return jsonify({"error": "Nombre de archivo inválido"}), 400
+    tam = request.args.get("tam")
+    if tam in TAMANOS:
+        variante = nombre_variante(filename, tam)
+        if indice_imagenes(CARPETA, True).buscar(variante) is not None:
+            return _servir_imagen(CARPETA, variante, inmutable=True)
+    return _servir_imagen(CARPETA, filename, inmutable=True)
+
+
 @app.route('/desarrollos/imagen/<filename>')
 def servir_imagen_desarrollo(filename):
     """
@@ -150,14 +405,29 @@ def servir_imagen_desarrollo(filename):
       1. _DESARROLLOS_ALUMNO  (Railway Volume o carpeta configurada por env var)
       2. static/desarrollos_alumno/ del repo (fotos comprometidas en git, datos de demo)
     Así funcionan tanto las fotos antiguas (en git) como las nuevas (en el volumen).
+
+    ?tam=media|mini sirve la variante reducida (se genera si la foto es antigua).
     """
+    from models.imagenes_desarrollo import TAMANOS, nombre_variante, variante
+    static_git = os.path.join(BASE_DIR, "static", "desarrollos_alumno")
+    tam        = request.args.get("tam")
+
+    if tam in TAMANOS and os.path.basename(filename) == filename:
+        for carpeta in (_DESARROLLOS_ALUMNO, static_git):
+            idx    = indice_imagenes(carpeta)
+            nombre = nombre_variante(filename, tam)
+            if idx.buscar(nombre) is None and idx.buscar(filename) is not None:
+                # Foto anterior a las variantes: se genera una vez
+                nombre = variante(carpeta, filename, tam)
+                idx.registrar(nombre)
+            if idx.buscar(nombre) is not None:
+                return _servir_imagen(carpeta, nombre)
+
     # 1. Carpeta principal (Railway Volume cuando DESARROLLOS_ALUMNO_PATH está seteada)
-    ruta_principal = os.path.join(_DESARROLLOS_ALUMNO, filename)
-    if os.path.exists(ruta_principal):
+    if indice_imagenes(_DESARROLLOS_ALUMNO).buscar(os.path.basename(filename)) is not None:
         return _servir_imagen(_DESARROLLOS_ALUMNO, filename)
 
     # 2. Fallback: carpeta estática del repo (datos de demo comprometidos en git)
-    static_git = os.path.join(BASE_DIR, "static", "desarrollos_alumno")
     return _servir_imagen(static_git, filename)
 
 
@@ -168,7 +438,44 @@ def home():
 
 @app.route('/health')
 def health():
-    return jsonify({"status": "ok", "service": "TutorMath API", "version": "1.0"}), 200
+    from ws.tutor import MODELO_VERSION
+    return jsonify({"status": "ok", "service": "TutorMath API", "version": "1.0",
+                    "modelo": MODELO_VERSION}), 200
+
+
+@app.route('/health/pool')
+def health_pool():
+    """Métricas del pool de conexiones del worker que atiende la petición."""
+    from conexionBD import metricas_pool
+    return jsonify({"status": "ok", "pool": metricas_pool()}), 200
+
+
+@app.route('/health/cache')
+def health_cache():
+    """Hits/misses del caché de respuestas del worker que atiende la petición."""
+    from models.cache_respuestas import metricas_cache
+    return jsonify({"status": "ok", "cache": metricas_cache()}), 200
+
+
+@app.route('/health/cola')
+def health_cola():
+    """Ejercicios servidos desde la cola de sesión del worker que atiende la petición."""
+    from models.cola_ejercicios import metricas_cola
+    return jsonify({"status": "ok", "cola": metricas_cola()}), 200
+
+
+@app.route('/health/modelo')
+def health_modelo():
+    """Versión del modelo del tutor y recargas en caliente del worker que atiende la petición."""
+    from ws.tutor import metricas_modelo
+    return jsonify({"status": "ok", "modelo": metricas_modelo()}), 200
+
+
+@app.route('/health/eventos')
+def health_eventos():
+    """Eventos publicados/entregados y conexiones SSE del worker que atiende la petición."""
+    from ws.docente import metricas_eventos
+    return jsonify({"status": "ok", "eventos": metricas_eventos()}), 200
 
 if __name__ == '__main__':
     # Solo para tu PC
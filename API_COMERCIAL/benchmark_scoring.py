@@ -0,0 +1,66 @@
+"""
+Micro-benchmark de models/scoring.py: funciones escalares en un bucle de
+Python contra las versiones por columnas (NumPy), con los mismos datos.
+Verifica la paridad antes de medir. No necesita la base de datos.
+
+Ejecución:
+    python benchmark_scoring.py            # 100 000 respuestas
+    python benchmark_scoring.py 1000000
+"""
+import sys
+import time
+
+import numpy as np
+
+from models.scoring import (
+    calcular_delta, calcular_deltas, clasificar_tiempo, clasificar_tiempos,
+    score_to_nivel, scores_to_niveles,
+)
+
+
+def _medir(funcion, repeticiones=3):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+
+def main(n=100_000):
+    rng      = np.random.default_rng(0)
+    scores   = rng.uniform(0, 100, n).round(1)
+    tiempos  = rng.integers(10, 1200, n).astype(float)
+    niveles  = rng.integers(1, 8, n)
+    correcta = rng.random(n) < 0.6
+    pistas   = rng.random(n) < 0.2
+
+    pruebas = [
+        ("score_to_nivel",
+         lambda: [score_to_nivel(s) for s in scores.tolist()],
+         lambda: scores_to_niveles(scores)),
+        ("clasificar_tiempo",
+         lambda: [clasificar_tiempo(t, k) for t, k in zip(tiempos.tolist(), niveles.tolist())],
+         lambda: clasificar_tiempos(tiempos, niveles)),
+        ("calcular_delta",
+         lambda: [calcular_delta(c, t, k, p) for c, t, k, p in
+                  zip(correcta.tolist(), tiempos.tolist(), niveles.tolist(), pistas.tolist())],
+         lambda: calcular_deltas(correcta, tiempos, niveles, pistas)),
+    ]
+
+    print(f"📊 {n} respuestas (mejor de 3)")
+    for nombre, escalar, columnas in pruebas:
+        t_esc, r_esc = _medir(escalar)
+        t_col, r_col = _medir(columnas)
+        if list(r_col.tolist()) != r_esc:
+            print(f"❌ {nombre}: la versión por columnas no coincide con la escalar")
+            return 1
+        print(f"   {nombre:<18} escalar {t_esc * 1000:9.1f} ms │ "
+              f"columnas {t_col * 1000:7.1f} ms │ x{t_esc / max(t_col, 1e-9):.0f}")
+    print("✅ Paridad verificada")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
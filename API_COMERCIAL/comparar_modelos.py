@@ -13,16 +13,24 @@ Métricas calculadas por modelo:
     - Validación cruzada 3-fold (accuracy media ± std)
     - Matriz de confusión
 
+La validación cruzada de todos los candidatos (los 3 modelos + la búsqueda
+de profundidad/hojas del árbol) corre en paralelo y se cachea por fold
+(models/seleccion_modelos.py). El ranking queda en reporte_modelos.json.
+
 Al final imprime una JUSTIFICACION COMPLETA de por qué se elige
 el Árbol de Decisión, evaluando criterios técnicos Y pedagógicos
 propios de un Sistema Tutor Inteligente (STI).
 
 Ejecución:
     (venv) python comparar_modelos.py
+    (venv) python comparar_modelos.py --busqueda aleatoria --iteraciones 30 --procesos 4
 """
 
+import argparse
+import json
+
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
     classification_report,
     confusion_matrix,
@@ -30,11 +38,12 @@ from sklearn.metrics import (
     f1_score,
 )
 from sklearn.preprocessing import LabelEncoder
-from sklearn.tree import DecisionTreeClassifier, export_text
-from sklearn.linear_model import LogisticRegression
-from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import export_text
 
 from datos_ml import cargar_datos_desde_bd
+from models.seleccion_modelos import (
+    construir, escribir_reporte, evaluar, muestreo, numero_folds, rejilla,
+)
 
 SEP  = "=" * 65
 SEP2 = "-" * 65
@@ -231,7 +240,13 @@ def mostrar_justificacion(resultados_acc, resultados_f1, resultados_cv,
 
 
 # ─────────────────────────────────────────────────────────────────────
-def comparar_modelos():
+def comparar_modelos(busqueda="rejilla", iteraciones=20, procesos=None,
+                     reporte="reporte_modelos.json"):
+    """
+    busqueda: "rejilla" (todo ESPACIO_ARBOL), "aleatoria" (`iteraciones`
+    combinaciones) o "ninguna". La validación cruzada de todos los
+    candidatos corre en `procesos` procesos (None = todos los núcleos).
+    """
     # 1) Cargar datos desde BD
     X, y = cargar_datos_desde_bd()
 
@@ -260,12 +275,30 @@ def comparar_modelos():
     print(f"  Prueba           : {len(X_test)} muestras")
 
     # 4) Definir modelos
+    params_base = {"arbol": {"max_depth": 5}, "logreg": {}, "knn": {"n_neighbors": 3}}
     modelos_def = {
-        "arbol" : ("Árbol de Decisión",   DecisionTreeClassifier(random_state=42, max_depth=5)),
-        "logreg": ("Regresión Logística",  LogisticRegression(max_iter=1000)),
-        "knn"   : ("KNN (k=3)",            KNeighborsClassifier(n_neighbors=3)),
+        "arbol" : ("Árbol de Decisión",   construir("arbol",  params_base["arbol"])),
+        "logreg": ("Regresión Logística",  construir("logreg", params_base["logreg"])),
+        "knn"   : ("KNN (k=3)",            construir("knn",    params_base["knn"])),
     }
 
+    # 5) Validación cruzada en paralelo: modelos base + búsqueda del árbol
+    if busqueda == "rejilla":
+        busqueda_arbol = rejilla()
+    elif busqueda == "aleatoria":
+        busqueda_arbol = muestreo(iteraciones)
+    else:
+        busqueda_arbol = []
+    candidatos = list(params_base.items()) + [("arbol", p) for p in busqueda_arbol
+                                              if p != params_base["arbol"]]
+    n_folds    = numero_folds(len(X), len(clases))
+    evaluacion = evaluar(candidatos, X, y_enc, n_folds=n_folds, procesos=procesos)
+    print(f"  Validacion cruzada : {len(candidatos)} candidatos x {n_folds} folds "
+          f"({evaluacion['entrenados']} entrenados, {evaluacion['desde_cache']} desde cache, "
+          f"{evaluacion['segundos']:.1f} s)")
+    cv_por_candidato = {(r["modelo"], json.dumps(r["params"], sort_keys=True)): r
+                        for r in evaluacion["resultados"]}
+
     resultados_acc = {}
     resultados_f1  = {}
     resultados_cv  = {}
@@ -273,7 +306,7 @@ def comparar_modelos():
     feature_names  = ["total_intentos", "promedio_puntaje",
                       "min_puntaje", "max_puntaje", "tasa_aprobados"]
 
-    # 5) Entrenar y evaluar cada modelo
+    # 6) Entrenar y evaluar cada modelo en el conjunto de prueba
     for key, (nombre, modelo) in modelos_def.items():
         print(f"\n{SEP}")
         print(f"  Modelo: {nombre}")
@@ -286,11 +319,9 @@ def comparar_modelos():
             acc = accuracy_score(y_test, y_pred)
             f1  = f1_score(y_test, y_pred, average="weighted", zero_division=0)
 
-            # Validacion cruzada 3-fold sobre todo el dataset
-            n_folds = min(3, len(X) // max(len(clases), 1))
-            n_folds = max(n_folds, 2)
-            cv_scores = cross_val_score(modelo, X, y_enc, cv=n_folds, scoring="accuracy")
-            cv_mean, cv_std = float(cv_scores.mean()), float(cv_scores.std())
+            # Validacion cruzada sobre todo el dataset (calculada arriba)
+            cv = cv_por_candidato[(key, json.dumps(params_base[key], sort_keys=True))]
+            cv_mean, cv_std = cv["cv_media"] or 0.0, cv["cv_std"] or 0.0
 
             resultados_acc[key] = acc
             resultados_f1[key]  = f1
@@ -326,7 +357,25 @@ def comparar_modelos():
         except Exception as exc:
             print(f"  ERROR: {exc}")
 
-    # 6) Resumen de accuracy
+    # 7) Búsqueda de hiperparámetros del árbol
+    if busqueda_arbol:
+        arboles = [r for r in evaluacion["resultados"]
+                   if r["modelo"] == "arbol" and r["cv_media"] is not None]
+        print(f"\n{SEP}")
+        print(f"  BUSQUEDA DE HIPERPARAMETROS DEL ARBOL ({busqueda}, {len(busqueda_arbol)} combinaciones)")
+        print(SEP)
+        for r in arboles[:5]:
+            print(f"  {r['cv_media']:.4f} +/- {r['cv_std']:.4f}  {r['params']}")
+
+    if reporte:
+        escribir_reporte(
+            reporte, evaluacion, busqueda=busqueda, muestras=len(X), clases=clases,
+            prueba={k: {"accuracy": resultados_acc.get(k), "f1": resultados_f1.get(k)}
+                    for k in modelos_def},
+        )
+        print(f"\n  Reporte: {reporte}")
+
+    # 8) Resumen de accuracy
     print(f"\n{SEP}")
     print("  RESUMEN RAPIDO DE ACCURACY")
     print(SEP)
@@ -337,7 +386,7 @@ def comparar_modelos():
         marca = "  <-- MEJOR" if acc == max_acc else ""
         print(f"  {nombre:<24} {barra} {acc:.4f}{marca}")
 
-    # 7) Justificación completa
+    # 9) Justificación completa
     if modelo_arbol is not None:
         mostrar_justificacion(
             resultados_acc, resultados_f1, resultados_cv,
@@ -346,4 +395,14 @@ def comparar_modelos():
 
 
 if __name__ == "__main__":
-    comparar_modelos()
+    parser = argparse.ArgumentParser(description="Compara modelos para el STI")
+    parser.add_argument("--busqueda", choices=["rejilla", "aleatoria", "ninguna"],
+                        default="rejilla", help="búsqueda de hiperparámetros del árbol")
+    parser.add_argument("--iteraciones", type=int, default=20,
+                        help="combinaciones para la búsqueda aleatoria")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="procesos para la validación cruzada (por defecto, todos los núcleos)")
+    parser.add_argument("--reporte", default="reporte_modelos.json",
+                        help="ruta del reporte JSON")
+    args = parser.parse_args()
+    comparar_modelos(args.busqueda, args.iteraciones, args.procesos, args.reporte)
@@ -0,0 +1,69 @@
+"""
+Compila modelo_tutor.pkl → modelo_tutor.npz (predictor sin scikit-learn).
+
+ws/tutor.py carga modelo_tutor.npz en runtime (ver models/arbol_compilado.py).
+train_model.py ya lo genera al entrenar; este script es para recompilar un
+pickle existente. Antes de guardar verifica que el árbol compilado prediga
+exactamente lo mismo que sklearn sobre el dataset de entrenamiento (si hay
+BD) y sobre los puntos frontera de cada umbral.
+
+Al terminar publica el .npz como versión nueva del registro de modelos
+(models/registro_modelos.py): la API la toma sin reiniciar.
+
+Ejecución:
+    python compilar_modelo.py
+    python compilar_modelo.py --sin-publicar     # solo escribe modelo_tutor.npz
+"""
+
+import pickle
+import sys
+import numpy as np
+from models.arbol_compilado import compilar, verificar_paridad
+from models.registro_modelos import CARPETA as CARPETA_MODELOS, publicar
+
+RUTA_PKL = "modelo_tutor.pkl"
+RUTA_NPZ = "modelo_tutor.npz"
+
+
+def main():
+    with open(RUTA_PKL, "rb") as f:
+        datos = pickle.load(f)
+    if isinstance(datos, dict):
+        modelo, encoder = datos.get("modelo"), datos.get("encoder")
+        feature_names   = datos.get("feature_names")
+    else:
+        modelo, encoder = datos
+        feature_names   = None
+
+    compilado = compilar(modelo, encoder, feature_names)
+    print(f"🌳 Árbol: {len(compilado.feature)} nodos · clases {sorted(set(compilado.etiqueta.tolist()))}")
+
+    try:
+        from train_model import cargar_datos_desde_bd
+        X, _ = cargar_datos_desde_bd()
+    except Exception as e:
+        # Sin BD: perfiles aleatorios en los rangos de las 7 features
+        print(f"⚠️  Sin dataset de entrenamiento, se usan perfiles aleatorios: {e}")
+        rng = np.random.default_rng(42)
+        X = np.column_stack([
+            rng.integers(1, 30, 5000),            # total_intentos
+            rng.uniform(0, 100, (5000, 3)),       # promedio, min, max
+            rng.uniform(0, 50, 5000),             # std
+            rng.uniform(0, 1, 5000),              # tasa_aprobados
+            rng.uniform(-1, 1, 5000),             # tendencia
+        ])
+
+    total, distintos = verificar_paridad(modelo, encoder, compilado, X)
+    if distintos:
+        print(f"❌ Paridad FALLIDA: {len(distintos)}/{total} predicciones difieren. No se guarda.")
+        sys.exit(1)
+
+    compilado.guardar(RUTA_NPZ)
+    print(f"✅ Paridad OK en {total} filas. {RUTA_NPZ} guardado.")
+    if "--sin-publicar" not in sys.argv:
+        version = publicar(RUTA_NPZ, meta={"script": "compilar_modelo.py"})
+        print(f"✅ Versión {version} publicada en {CARPETA_MODELOS}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,271 @@
 import os
+import time
+import threading
 import psycopg2
 import psycopg2.extras
 from config import Config
 
 
+def _abrir_conexion():
+    """
+    Prioriza DATABASE_URL (Railway / Render la inyectan automáticamente).
+    - LOCAL   : sin SSL (localhost / 127.0.0.1)
+    - NUBE    : con sslmode='require' (Railway, Render, etc.)
+    - Si no hay DATABASE_URL, usa los parámetros separados de Config.
+    """
+    db_url = os.getenv("DATABASE_URL")
+
+    if db_url:
+        # Modo nube: determina si es local o producción
+        es_local = "localhost" in db_url or "127.0.0.1" in db_url
+        if es_local:
+            return psycopg2.connect(db_url)
+        return psycopg2.connect(db_url, sslmode="require")
+
+    # Modo local: conexión por parámetros separados (sin SSL)
+    return psycopg2.connect(
+        host=Config.DB_HOST,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD,
+        dbname=Config.DB_NAME,
+        port=Config.DB_PORT,
+    )
+
+
+class PoolAgotado(Exception):
+    """No se liberó ninguna conexión dentro de DB_POOL_TIMEOUT_SEG."""
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones por proceso (un pool por worker de gunicorn).
+
+    - checkout : reutiliza la conexión ociosa más reciente (LIFO); si está
+                 cerrada, superó la vida máxima o lleva mucho tiempo ociosa
+                 y no responde a SELECT 1, se descarta y se abre otra.
+    - devolver : hace rollback de lo no confirmado y la deja ociosa; si el
+                 pool ya tiene `max_ociosas`, la cierra.
+    - Si hay `max_conexiones` prestadas, el checkout espera hasta
+      `timeout_espera` segundos y luego lanza PoolAgotado.
+    """
+
+    def __init__(self, fabrica=_abrir_conexion, max_conexiones=None,
+                 max_ociosas=None, vida_max_seg=None, ping_ocioso_seg=None,
+                 timeout_espera=None):
+        self._fabrica         = fabrica
+        self.max_conexiones   = int(max_conexiones  or Config.DB_POOL_MAX)
+        self.max_ociosas      = int(max_ociosas     or Config.DB_POOL_MAX_OCIOSAS)
+        self.vida_max_seg     = float(vida_max_seg    or Config.DB_POOL_VIDA_MAX_SEG)
+        self.ping_ocioso_seg  = float(ping_ocioso_seg or Config.DB_POOL_PING_OCIOSO_SEG)
+        self.timeout_espera   = float(timeout_espera  or Config.DB_POOL_TIMEOUT_SEG)
+        self.pid              = os.getpid()
+
+        self._cond     = threading.Condition(threading.Lock())
+        self._ociosas  = []      # [(conexion, creada_en, devuelta_en)]
+        self._creada   = {}      # id(conexion) → creada_en
+        self._prestadas = 0
+        self._metricas = {
+            "checkouts":           0,
+            "devoluciones":        0,
+            "creadas":             0,
+            "recicladas_vida_max": 0,
+            "descartadas_ping":    0,
+            "descartadas_rotas":   0,
+            "esperas":             0,
+            "timeouts":            0,
+        }
+
+    # ── Ciclo de vida ─────────────────────────────────────────────────────
+    def obtener(self):
+        with self._cond:
+            self._metricas["checkouts"] += 1
+            if self._prestadas >= self.max_conexiones:
+                self._metricas["esperas"] += 1
+                limite = time.monotonic() + self.timeout_espera
+                while self._prestadas >= self.max_conexiones:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self._metricas["timeouts"] += 1
+                        raise PoolAgotado(
+                            "Pool de conexiones agotado "
+                            f"({self.max_conexiones} en uso)"
+                        )
+                    self._cond.wait(restante)
+            self._prestadas += 1
+
+        try:
+            while True:
+                with self._cond:
+                    item = self._ociosas.pop() if self._ociosas else None
+                if item is None:
+                    return self._crear()
+                conexion, creada_en, devuelta_en = item
+                if self._sana(conexion, creada_en, devuelta_en):
+                    return conexion
+                self._cerrar(conexion)
+        except Exception:
+            with self._cond:
+                self._prestadas -= 1
+                self._cond.notify()
+            raise
+
+    def devolver(self, conexion):
+        reutilizable = False
+        try:
+            if not conexion.closed:
+                estado = conexion.get_transaction_status()
+                if estado != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conexion.rollback()
+                reutilizable = (
+                    conexion.get_transaction_status()
+                    == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+                )
+        except Exception:
+            reutilizable = False
+
+        with self._cond:
+            self._metricas["devoluciones"] += 1
+            self._prestadas = max(0, self._prestadas - 1)
+            creada_en = self._creada.get(id(conexion))
+            if reutilizable and creada_en is not None \
+                    and len(self._ociosas) < self.max_ociosas:
+                self._ociosas.append((conexion, creada_en, time.monotonic()))
+                conexion = None
+            self._cond.notify()
+
+        if conexion is not None:
+            self._cerrar(conexion)
+
+    def cerrar_todo(self):
+        """Cierra las conexiones ociosas (las prestadas se cierran al devolverse)."""
+        with self._cond:
+            ociosas, self._ociosas = self._ociosas, []
+        for conexion, _, _ in ociosas:
+            self._cerrar(conexion)
+
+    def metricas(self):
+        with self._cond:
+            datos = dict(self._metricas)
+            datos.update({
+                "pid":            self.pid,
+                "prestadas":      self._prestadas,
+                "ociosas":        len(self._ociosas),
+                "maxConexiones":  self.max_conexiones,
+            })
+        return datos
+
+    # ── Internos ──────────────────────────────────────────────────────────
+    def _crear(self):
+        conexion = self._fabrica()
+        with self._cond:
+            self._creada[id(conexion)] = time.monotonic()
+            self._metricas["creadas"] += 1
+        return conexion
+
+    def _sana(self, conexion, creada_en, devuelta_en):
+        if conexion.closed:
+            self._contar("descartadas_rotas")
+            return False
+        ahora = time.monotonic()
+        if ahora - creada_en > self.vida_max_seg:
+            self._contar("recicladas_vida_max")
+            return False
+        if ahora - devuelta_en > self.ping_ocioso_seg:
+            try:
+                cur = conexion.cursor()
+                cur.execute("SELECT 1")
+                cur.close()
+                conexion.rollback()
+            except Exception:
+                self._contar("descartadas_ping")
+                return False
+        return True
+
+    def _cerrar(self, conexion):
+        with self._cond:
+            self._creada.pop(id(conexion), None)
+        try:
+            conexion.close()
+        except Exception:
+            pass
+
+    def _contar(self, clave):
+        with self._cond:
+            self._metricas[clave] += 1
+
+
+# ── Pool del proceso ─────────────────────────────────────────────────────
+# Con `gunicorn --preload` la app se importa en el master (la migración de
+# app.py abre conexiones ahí) y luego se hace fork. Un socket de PostgreSQL
+# no puede compartirse entre procesos: cada hijo arranca con un pool vacío y
+# las conexiones heredadas se conservan sin cerrar (cerrarlas enviaría el
+# mensaje Terminate por el socket que sigue usando el master).
+_pool_lock    = threading.Lock()
+_pool         = None
+_heredadas    = []
+
+
+def obtener_pool():
+    global _pool
+    pool = _pool
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            if _pool is not None:
+                _heredadas.append(_pool)
+            _pool = PoolConexiones()
+        return _pool
+
+
+def cerrar_pool():
+    """Cierra las conexiones ociosas del pool del proceso actual."""
+    pool = _pool
+    if pool is not None and pool.pid == os.getpid():
+        pool.cerrar_todo()
+
+
+def metricas_pool():
+    pool = _pool
+    if pool is None or pool.pid != os.getpid():
+        return {"pid": os.getpid(), "prestadas": 0, "ociosas": 0}
+    return pool.metricas()
+
+
+def _reiniciar_pool_tras_fork():
+    global _pool
+    if _pool is not None:
+        _heredadas.append(_pool)
+    _pool = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_pool_tras_fork)
+
+
 class Conexion:
     def __init__(self):
         """
-        Prioriza DATABASE_URL (Railway / Render la inyectan automáticamente).
-        - LOCAL   : sin SSL (localhost / 127.0.0.1)
-        - NUBE    : con sslmode='require' (Railway, Render, etc.)
-        - Si no hay DATABASE_URL, usa los parámetros separados de Config.
+        Toma una conexión del pool del proceso (ver PoolConexiones).
+        close() la devuelve al pool en lugar de cerrarla; lo no confirmado
+        con commit() se descarta igual que al cerrar una conexión real.
         """
-        db_url = os.getenv("DATABASE_URL")
-
-        if db_url:
-            # Modo nube: determina si es local o producción
-            es_local = "localhost" in db_url or "127.0.0.1" in db_url
-            if es_local:
-                self.dblink = psycopg2.connect(db_url)
-            else:
-                self.dblink = psycopg2.connect(db_url, sslmode="require")
-        else:
-            # Modo local: conexión por parámetros separados (sin SSL)
-            self.dblink = psycopg2.connect(
-                host=Config.DB_HOST,
-                user=Config.DB_USER,
-                password=Config.DB_PASSWORD,
-                dbname=Config.DB_NAME,
-                port=Config.DB_PORT,
-            )
+        self._pool  = obtener_pool()
+        self.dblink = self._pool.obtener()
 
     def cursor(self):
         return self.dblink.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
+    def cursor_servidor(self, nombre, filas_por_viaje=5000):
+        """
+        Cursor con nombre (del lado del servidor): las filas llegan en bloques
+        de `filas_por_viaje` en lugar de cargarse todas en memoria. Devuelve
+        tuplas. Solo vive dentro de la transacción: hacer commit al final.
+        """
+        cur = self.dblink.cursor(name=nombre)
+        cur.itersize = filas_por_viaje
+        return cur
+
     def commit(self):
         self.dblink.commit()
 
@@ -41,4 +273,16 @@ class Conexion:
         self.dblink.rollback()
 
     def close(self):
-        self.dblink.close()
+        if self.dblink is None:
+            return
+        dblink, self.dblink = self.dblink, None
+        self._pool.devolver(dblink)
+
+    def __del__(self):
+        # Handlers que salen por excepción sin llamar close() (p.ej. dominio.py)
+        # no deben dejar la conexión prestada para siempre.
+        try:
+            if getattr(self, "dblink", None) is not None:
+                self.close()
+        except Exception:
+            pass
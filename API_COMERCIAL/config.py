@@ -17,6 +17,49 @@ class Config:
     DB_PASSWORD = os.getenv("PGPASSWORD", "hola1")
     DB_NAME     = os.getenv("PGDATABASE", "bd_ejemplo")
 
+    # Hilos por worker de gunicorn: debe coincidir con --threads (Procfile y railway.toml)
+    WEB_THREADS = int(os.getenv("WEB_THREADS", "8"))
+
+    # Pool de conexiones POR WORKER de gunicorn (ver conexionBD.PoolConexiones).
+    # Cada hilo de petición y cada hilo de subida (SUBIDAS_WORKERS) puede tener
+    # una conexión prestada: con menos, los hilos esperan DB_POOL_TIMEOUT_SEG y
+    # fallan con PoolAgotado. Por defecto WEB_THREADS + SUBIDAS_WORKERS = 10;
+    # con --workers 2 el total de conexiones a Postgres es 2 × DB_POOL_MAX = 20.
+    DB_POOL_MAX             = int(os.getenv("DB_POOL_MAX",
+                                            str(WEB_THREADS + int(os.getenv("SUBIDAS_WORKERS", "2")))))
+    DB_POOL_MAX_OCIOSAS     = int(os.getenv("DB_POOL_MAX_OCIOSAS",     "3"))
+    DB_POOL_VIDA_MAX_SEG    = int(os.getenv("DB_POOL_VIDA_MAX_SEG",    "1800"))
+    DB_POOL_PING_OCIOSO_SEG = int(os.getenv("DB_POOL_PING_OCIOSO_SEG", "30"))
+    DB_POOL_TIMEOUT_SEG     = int(os.getenv("DB_POOL_TIMEOUT_SEG",     "10"))
+
+    # Caché de respuestas GET por alumno, POR WORKER (ver models/cache_respuestas.py)
+    CACHE_TTL_SEG      = int(os.getenv("CACHE_TTL_SEG",      "60"))
+    CACHE_MAX_ENTRADAS = int(os.getenv("CACHE_MAX_ENTRADAS", "2048"))
+
+    # Subidas a Cloudinary en segundo plano, POR WORKER (ver models/subidas_desarrollo.py)
+    SUBIDAS_WORKERS         = int(os.getenv("SUBIDAS_WORKERS",         "2"))
+    SUBIDAS_REINTENTOS      = int(os.getenv("SUBIDAS_REINTENTOS",      "4"))
+    SUBIDAS_ESPERA_BASE_SEG = float(os.getenv("SUBIDAS_ESPERA_BASE_SEG", "2"))
+    SUBIDAS_LEASE_SEG       = int(os.getenv("SUBIDAS_LEASE_SEG",       "600"))
+    SUBIDAS_REVISION_SEG    = int(os.getenv("SUBIDAS_REVISION_SEG",    "300"))
+
+    # Eventos en vivo del docente por SSE, POR WORKER (ver models/eventos_docente.py).
+    # Cada conexión ocupa un hilo de gunicorn (--threads): el máximo deja hilos
+    # libres para el resto de la API; al llegar a la duración el cliente reconecta.
+    EVENTOS_MAX_CONEXIONES = int(os.getenv("EVENTOS_MAX_CONEXIONES", "4"))
+    EVENTOS_DURACION_SEG   = int(os.getenv("EVENTOS_DURACION_SEG",   "300"))
+    EVENTOS_PING_SEG       = int(os.getenv("EVENTOS_PING_SEG",       "15"))
+
+    # Cada cuánto mira cada worker si se publicó otra versión del modelo
+    # (ver models/registro_modelos.py; la carpeta se define con MODELOS_PATH)
+    MODELO_REVISION_SEG = float(os.getenv("MODELO_REVISION_SEG", "5"))
+
+    # Cola de próximos ejercicios por sesión de repaso, POR WORKER
+    # (ver models/cola_ejercicios.py; se pide con /tutor/ejercicio_siguiente?cola=N)
+    COLA_TAMANO_MAX   = int(os.getenv("COLA_TAMANO_MAX",   "5"))
+    COLA_TTL_SEG      = int(os.getenv("COLA_TTL_SEG",      "300"))
+    COLA_MAX_ENTRADAS = int(os.getenv("COLA_MAX_ENTRADAS", "2048"))
+
 
 class SecretKey:
     # ⚠️  En producción (Railway) define JWT_SECRET_KEY con un valor largo y aleatorio.
@@ -19,88 +19,26 @@ Etiqueta (y):
     - 'alto'  si promedio >= 70
 """
 
-import numpy as np
-from conexionBD import Conexion
+from models.dataset_ml import cargar_dataset, etiquetas_por_promedio, features_basicas
+
+# tasa_aprobados cuenta puntaje >= 70 (igual que el umbral de "alto")
+UMBRAL_APROBADO = 70.0
+UMBRAL_BAJO     = 40.0
+UMBRAL_MEDIO    = 70.0
 
 
 def cargar_datos_desde_bd():
     """
-    Lee los datos de la tabla PUNTAJES y construye X, y.
+    Lee los datos de la tabla PUNTAJES (models/dataset_ml, con caché .npz)
+    y construye X, y.
 
     Devuelve:
         X: np.array de shape (n_muestras, 5)
         y: np.array de shape (n_muestras,)
     """
-    con = Conexion()
-    cur = con.cursor()
-
-    cur.execute(
-        """
-        SELECT
-            p.id_estudiante,
-            p.id_competencia,
-            COUNT(*)                             AS total_intentos,
-            AVG(p.puntaje)                       AS promedio_puntaje,
-            MIN(p.puntaje)                       AS min_puntaje,
-            MAX(p.puntaje)                       AS max_puntaje,
-            AVG(CASE WHEN p.puntaje >= 70
-                     THEN 1 ELSE 0 END)         AS tasa_aprobados
-        FROM puntajes p
-        GROUP BY p.id_estudiante, p.id_competencia
-        HAVING COUNT(*) >= 1
-        """
-    )
-
-    rows = cur.fetchall()
-    cur.close()
-    con.close()
-
-    X = []
-    y = []
-
-    for row in rows:
-        total_intentos = row["total_intentos"] or 0
-        prom = row["promedio_puntaje"]
-        min_p = row["min_puntaje"]
-        max_p = row["max_puntaje"]
-        tasa = row["tasa_aprobados"]
-
-        # Si no hay promedio, no usamos esta fila
-        if prom is None:
-            continue
-
-        prom = float(prom)
-        min_p = float(min_p) if min_p is not None else 0.0
-        max_p = float(max_p) if max_p is not None else 0.0
-        tasa = float(tasa) if tasa is not None else 0.0
-
-        # Normalizamos el promedio al rango 0..100 por seguridad
-        if prom < 0:
-            prom = 0.0
-        if prom > 100:
-            prom = 100.0
-
-        # Etiqueta segun el promedio
-        if prom < 40:
-            nivel = "bajo"
-        elif prom < 70:
-            nivel = "medio"
-        else:
-            nivel = "alto"
-
-        X.append(
-            [
-                float(total_intentos),
-                prom,
-                min_p,
-                max_p,
-                tasa,
-            ]
-        )
-        y.append(nivel)
-
-    X = np.array(X, dtype=float)
-    y = np.array(y, dtype=object)
+    datos = cargar_dataset(UMBRAL_APROBADO)
+    X = features_basicas(datos)
+    y = etiquetas_por_promedio(datos["promedio"], UMBRAL_BAJO, UMBRAL_MEDIO)
 
     print("✅ Datos cargados desde BD (datos_ml.cargar_datos_desde_bd):")
     print("   - X.shape:", X.shape)
@@ -1,7 +1,6 @@
 
 
 from conexionBD import Conexion
-import json
 
 
 class Area:
@@ -17,9 +16,9 @@ class Area:
                 ORDER BY id_area;
             """)
             datos = cursor.fetchall()
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -37,11 +36,11 @@ class Area:
             dato = cursor.fetchone()
 
             if not dato:
-                return json.dumps({"status": False, "message": "Área no encontrada"})
+                return {"status": False, "message": "Área no encontrada"}
 
-            return json.dumps({"status": True, "data": dato})
+            return {"status": True, "data": dato}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -58,10 +57,10 @@ class Area:
             """, (nombre, descripcion))
             nuevo_id = cursor.fetchone()["id_area"]
             con.commit()
-            return json.dumps({"status": True, "id": nuevo_id, "message": "Área creada"})
+            return {"status": True, "id": nuevo_id, "message": "Área creada"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -77,10 +76,10 @@ class Area:
                 WHERE id_area = %s;
             """, (nombre, descripcion, id_area))
             con.commit()
-            return json.dumps({"status": True, "message": "Área actualizada"})
+            return {"status": True, "message": "Área actualizada"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -92,10 +91,10 @@ class Area:
         try:
             cursor.execute("DELETE FROM area WHERE id_area = %s;", (id_area,))
             con.commit()
-            return json.dumps({"status": True, "message": "Área eliminada"})
+            return {"status": True, "message": "Área eliminada"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
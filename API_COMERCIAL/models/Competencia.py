@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 
 class Competencia:
@@ -15,9 +14,9 @@ class Competencia:
                 ORDER BY id_competencia;
             """)
             datos = cursor.fetchall()
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -35,11 +34,11 @@ class Competencia:
             dato = cursor.fetchone()
 
             if not dato:
-                return json.dumps({"status": False, "message": "Competencia no encontrada"})
+                return {"status": False, "message": "Competencia no encontrada"}
 
-            return json.dumps({"status": True, "data": dato})
+            return {"status": True, "data": dato}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -56,10 +55,10 @@ class Competencia:
             """, (descripcion, area, nivel))
             nuevo_id = cursor.fetchone()["id_competencia"]
             con.commit()
-            return json.dumps({"status": True, "id": nuevo_id, "message": "Competencia creada"})
+            return {"status": True, "id": nuevo_id, "message": "Competencia creada"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -75,10 +74,10 @@ class Competencia:
                 WHERE id_competencia = %s;
             """, (descripcion, area, nivel, id_competencia))
             con.commit()
-            return json.dumps({"status": True, "message": "Competencia actualizada"})
+            return {"status": True, "message": "Competencia actualizada"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -90,10 +89,10 @@ class Competencia:
         try:
             cursor.execute("DELETE FROM competencias WHERE id_competencia = %s;", (id_competencia,))
             con.commit()
-            return json.dumps({"status": True, "message": "Competencia eliminada"})
+            return {"status": True, "message": "Competencia eliminada"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
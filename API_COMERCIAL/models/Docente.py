@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 class Docente:
     def __init__(self, id_docente=None, especialidad=None, id_usuario=None):
@@ -19,9 +18,9 @@ class Docente:
             cursor.execute(sql, (self.especialidad, self.id_usuario))
             nuevo_id = cursor.fetchone()['id_docente']
             con.commit()
-            return json.dumps({'status': True, 'id_docente': nuevo_id, 'message': 'Docente creado'})
+            return {'status': True, 'id_docente': nuevo_id, 'message': 'Docente creado'}
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
@@ -40,9 +39,9 @@ class Docente:
             """
             cursor.execute(sql)
             datos = cursor.fetchall()
-            return json.dumps({'status': True, 'data': datos})
+            return {'status': True, 'data': datos}
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
@@ -62,11 +61,11 @@ class Docente:
             cursor.execute(sql, (id_docente,))
             datos = cursor.fetchone()
             if datos:
-                return json.dumps({'status': True, 'data': datos})
+                return {'status': True, 'data': datos}
             else:
-                return json.dumps({'status': False, 'message': 'Docente no encontrado'})
+                return {'status': False, 'message': 'Docente no encontrado'}
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
@@ -83,9 +82,9 @@ class Docente:
             """
             cursor.execute(sql, (self.especialidad, self.id_docente))
             con.commit()
-            return json.dumps({'status': True, 'message': 'Docente actualizado'})
+            return {'status': True, 'message': 'Docente actualizado'}
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
@@ -99,9 +98,9 @@ class Docente:
             sql = "DELETE FROM docente WHERE id_docente = %s;"
             cursor.execute(sql, (id_docente,))
             con.commit()
-            return json.dumps({'status': True, 'message': 'Docente eliminado'})
+            return {'status': True, 'message': 'Docente eliminado'}
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
@@ -125,7 +124,7 @@ class Docente:
             salones = cursor.fetchall()
 
             if not salones:
-                return json.dumps({
+                return {
                     "status": True,
                     "data": {
                         "estudiantesActivos": 0,
@@ -133,7 +132,7 @@ class Docente:
                         "temaMasDificultad": None,
                         "actividadReciente": []
                     }
-                })
+                }
 
             ids_salones = [s["id_salon"] for s in salones]
 
@@ -147,7 +146,7 @@ class Docente:
             estudiantes = cursor.fetchall()
 
             if not estudiantes:
-                return json.dumps({
+                return {
                     "status": True,
                     "data": {
                         "estudiantesActivos": 0,
@@ -155,7 +154,7 @@ class Docente:
                         "temaMasDificultad": None,
                         "actividadReciente": []
                     }
-                })
+                }
 
             ids_estudiantes = [e["id_estudiante"] for e in estudiantes]
 
@@ -210,7 +209,7 @@ class Docente:
                 })
 
             # JSON FINAL COMPATIBLE
-            return json.dumps({
+            return {
                 "status": True,
                 "data": {
                     "estudiantesActivos": estudiantes_activos,
@@ -218,10 +217,10 @@ class Docente:
                     "temaMasDificultad": tema_mas_dificultad,
                     "actividadReciente": actividad
                 }
-            })
+            }
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 
 class DocenteSalon:
@@ -17,10 +16,10 @@ class DocenteSalon:
             """, (id_docente,))
             
             datos = cursor.fetchall()
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -37,10 +36,10 @@ class DocenteSalon:
             """, (id_docente, id_salon))
             
             con.commit()
-            return json.dumps({"status": True, "message": "Salón asignado correctamente"})
+            return {"status": True, "message": "Salón asignado correctamente"}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 
 class Ejercicio:
@@ -35,14 +34,14 @@ class Ejercicio:
             new_id = cursor.fetchone()["id_ejercicio"]
             con.commit()
 
-            return json.dumps({
+            return {
                 "status": True,
                 "message": "Ejercicio registrado correctamente",
                 "id_ejercicio": new_id
-            })
+            }
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -77,10 +76,10 @@ class Ejercicio:
                 cursor.execute(sql)
 
             data = cursor.fetchall()
-            return json.dumps({"status": True, "data": data})
+            return {"status": True, "data": data}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -105,12 +104,12 @@ class Ejercicio:
             row = cursor.fetchone()
 
             if not row:
-                return json.dumps({"status": False, "message": "Ejercicio no encontrado"})
+                return {"status": False, "message": "Ejercicio no encontrado"}
 
-            return json.dumps({"status": True, "data": row})
+            return {"status": True, "data": row}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -128,13 +127,13 @@ class Ejercicio:
             cursor.execute(sql, (id_ejercicio,))
             con.commit()
 
-            return json.dumps({
+            return {
                 "status": True,
                 "message": "Ejercicio eliminado correctamente"
-            })
+            }
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 
 class Estudiante:
@@ -54,16 +53,14 @@ class Estudiante:
             nuevo_id = cursor.fetchone()["id_estudiante"]
             con.commit()
 
-            return json.dumps(
-                {
-                    "status": True,
-                    "message": "Estudiante registrado correctamente",
-                    "id_estudiante": nuevo_id,
-                }
-            )
+            return {
+                "status": True,
+                "message": "Estudiante registrado correctamente",
+                "id_estudiante": nuevo_id,
+            }
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -97,10 +94,10 @@ class Estudiante:
             cursor.execute(sql)
             datos = cursor.fetchall()
 
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -135,14 +132,12 @@ class Estudiante:
             dato = cursor.fetchone()
 
             if not dato:
-                return json.dumps(
-                    {"status": False, "message": "Estudiante no encontrado"}
-                )
+                return {"status": False, "message": "Estudiante no encontrado"}
 
-            return json.dumps({"status": True, "data": dato})
+            return {"status": True, "data": dato}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -183,9 +178,7 @@ class Estudiante:
             dato = cursor.fetchone()
 
             if not dato:
-                return json.dumps(
-                    {"status": False, "message": "Estudiante no encontrado para ese usuario"}
-                )
+                return {"status": False, "message": "Estudiante no encontrado para ese usuario"}
 
             # Importante: nombres que Android espera
             dto = {
@@ -201,10 +194,10 @@ class Estudiante:
                 "apellidos": dato["apellidos"],
             }
 
-            return json.dumps({"status": True, "data": dto})
+            return {"status": True, "data": dto}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -241,12 +234,10 @@ class Estudiante:
             )
             con.commit()
 
-            return json.dumps(
-                {"status": True, "message": "Estudiante actualizado correctamente"}
-            )
+            return {"status": True, "message": "Estudiante actualizado correctamente"}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -264,12 +255,10 @@ class Estudiante:
             cursor.execute(sql, (id_estudiante,))
             con.commit()
 
-            return json.dumps(
-                {"status": True, "message": "Estudiante eliminado correctamente"}
-            )
+            return {"status": True, "message": "Estudiante eliminado correctamente"}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
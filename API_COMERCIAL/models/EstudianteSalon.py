@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 class EstudianteSalon:
     @staticmethod
@@ -10,9 +9,9 @@ class EstudianteSalon:
             sql = "INSERT INTO estudiante_salones (id_estudiante, id_salon) VALUES (%s, %s)"
             cursor.execute(sql, (id_estudiante, id_salon))
             con.commit()
-            return json.dumps({"status": True, "message": "Estudiante asignado al salón correctamente"})
+            return {"status": True, "message": "Estudiante asignado al salón correctamente"}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -32,9 +31,9 @@ class EstudianteSalon:
             """
             cursor.execute(sql)
             datos = cursor.fetchall()
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -47,9 +46,9 @@ class EstudianteSalon:
             sql = "DELETE FROM estudiante_salones WHERE id_estudiante = %s AND id_salon = %s"
             cursor.execute(sql, (id_estudiante, id_salon))
             con.commit()
-            return json.dumps({"status": True, "message": "Asignación eliminada correctamente"})
+            return {"status": True, "message": "Asignación eliminada correctamente"}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 
 class HistorialMaterial:
@@ -19,15 +18,13 @@ class HistorialMaterial:
             """
             cursor.execute(sql, (id_estudiante, id_material, tiempo_visualizacion))
             con.commit()
-            return json.dumps(
-                {
-                    "status": True,
-                    "message": "Historial de material registrado correctamente",
-                }
-            )
+            return {
+                "status": True,
+                "message": "Historial de material registrado correctamente",
+            }
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -58,9 +55,9 @@ class HistorialMaterial:
             """
             cursor.execute(sql, (id_estudiante,))
             datos = cursor.fetchall()
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 
 class Material:
@@ -50,16 +49,14 @@ class Material:
             )
             nuevo_id = cursor.fetchone()["id_material"]
             con.commit()
-            return json.dumps(
-                {
-                    "status": True,
-                    "message": "Material registrado correctamente",
-                    "id_material": nuevo_id,
-                }
-            )
+            return {
+                "status": True,
+                "message": "Material registrado correctamente",
+                "id_material": nuevo_id,
+            }
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -86,9 +83,9 @@ class Material:
             """
             cursor.execute(sql)
             datos = cursor.fetchall()
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -116,12 +113,10 @@ class Material:
             cursor.execute(sql, (id_material,))
             dato = cursor.fetchone()
             if not dato:
-                return json.dumps(
-                    {"status": False, "message": "Material no encontrado"}
-                )
-            return json.dumps({"status": True, "data": dato})
+                return {"status": False, "message": "Material no encontrado"}
+            return {"status": True, "data": dato}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -131,9 +126,7 @@ class Material:
     # ===============================
     def actualizar(self):
         if not self.id_material:
-            return json.dumps(
-                {"status": False, "message": "id_material es obligatorio para actualizar"}
-            )
+            return {"status": False, "message": "id_material es obligatorio para actualizar"}
 
         con = Conexion()
         cursor = con.cursor()
@@ -165,12 +158,10 @@ class Material:
                 ),
             )
             con.commit()
-            return json.dumps(
-                {"status": True, "message": "Material actualizado correctamente"}
-            )
+            return {"status": True, "message": "Material actualizado correctamente"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -186,12 +177,10 @@ class Material:
             sql = "DELETE FROM material_estudio WHERE id_material = %s;"
             cursor.execute(sql, (id_material,))
             con.commit()
-            return json.dumps(
-                {"status": True, "message": "Material eliminado correctamente"}
-            )
+            return {"status": True, "message": "Material eliminado correctamente"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -1,6 +1,5 @@
 # models/MaterialEstudio.py
 from conexionBD import Conexion
-import json
 
 class MaterialEstudio:
     @staticmethod
@@ -14,9 +13,9 @@ class MaterialEstudio:
             """
             cursor.execute(sql, (titulo, tipo, url, tiempo_estimado, id_competencia, nivel))
             con.commit()
-            return json.dumps({"status": True, "message": "Material registrado correctamente"})
+            return {"status": True, "message": "Material registrado correctamente"}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -49,9 +48,9 @@ class MaterialEstudio:
                 ),
             )
             con.commit()
-            return json.dumps({"status": True, "message": "Material actualizado correctamente"})
+            return {"status": True, "message": "Material actualizado correctamente"}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
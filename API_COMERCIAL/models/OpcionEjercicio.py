@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 class OpcionEjercicio:
 
@@ -31,17 +30,17 @@ class OpcionEjercicio:
             new_id = cursor.fetchone()["id_opcion"]
             con.commit()
 
-            return json.dumps({
+            return {
                 "status": True,
                 "message": "Opción registrada correctamente",
                 "id_opcion": new_id
-            })
+            }
 
         except Exception as e:
-            return json.dumps({
+            return {
                 "status": False,
                 "message": str(e)
-            })
+            }
 
         finally:
             cursor.close()
@@ -64,16 +63,16 @@ class OpcionEjercicio:
             cursor.execute(sql, (id_ejercicio,))
             data = cursor.fetchall()
 
-            return json.dumps({
+            return {
                 "status": True,
                 "data": data
-            })
+            }
 
         except Exception as e:
-            return json.dumps({
+            return {
                 "status": False,
                 "message": str(e)
-            })
+            }
 
         finally:
             cursor.close()
@@ -120,16 +119,16 @@ class OpcionEjercicio:
             cursor.execute(sql, (id_opcion,))
             con.commit()
 
-            return json.dumps({
+            return {
                 "status": True,
                 "message": "Opción eliminada correctamente"
-            })
+            }
 
         except Exception as e:
-            return json.dumps({
+            return {
                 "status": False,
                 "message": str(e)
-            })
+            }
 
         finally:
             cursor.close()
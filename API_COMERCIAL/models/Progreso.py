@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 class Progreso:
 
@@ -26,16 +25,16 @@ class Progreso:
             ))
             con.commit()
 
-            return json.dumps({
+            return {
                 "status": True,
                 "message": "Progreso registrado correctamente"
-            })
+            }
 
         except Exception as e:
-            return json.dumps({
+            return {
                 "status": False,
                 "message": str(e)
-            })
+            }
 
         finally:
             cursor.close()
@@ -68,16 +67,16 @@ class Progreso:
             cursor.execute(sql)
             datos = cursor.fetchall()
 
-            return json.dumps({
+            return {
                 "status": True,
                 "data": datos
-            })
+            }
 
         except Exception as e:
-            return json.dumps({
+            return {
                 "status": False,
                 "message": str(e)
-            })
+            }
 
         finally:
             cursor.close()
@@ -109,16 +108,16 @@ class Progreso:
             cursor.execute(sql, (id_estudiante,))
             datos = cursor.fetchall()
 
-            return json.dumps({
+            return {
                 "status": True,
                 "data": datos
-            })
+            }
 
         except Exception as e:
-            return json.dumps({
+            return {
                 "status": False,
                 "message": str(e)
-            })
+            }
 
         finally:
             cursor.close()
@@ -133,20 +132,22 @@ class Progreso:
         cursor = con.cursor()
 
         try:
-            sql = "DELETE FROM progreso WHERE id_progreso = %s"
+            sql = "DELETE FROM progreso WHERE id_progreso = %s RETURNING id_estudiante"
             cursor.execute(sql, (id_progreso,))
+            row = cursor.fetchone()
             con.commit()
 
-            return json.dumps({
+            return {
                 "status": True,
-                "message": "Registro de progreso eliminado"
-            })
+                "message": "Registro de progreso eliminado",
+                "id_estudiante": row["id_estudiante"] if row else None
+            }
 
         except Exception as e:
-            return json.dumps({
+            return {
                 "status": False,
                 "message": str(e)
-            })
+            }
 
         finally:
             cursor.close()
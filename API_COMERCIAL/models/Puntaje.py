@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 import datetime
 
 
@@ -29,9 +28,7 @@ class Puntaje:
             resultado = cursor.fetchone()
 
             if not resultado:
-                return json.dumps(
-                    {'status': False, 'message': 'Opción o ejercicio no encontrado'}
-                )
+                return {'status': False, 'message': 'Opción o ejercicio no encontrado'}
 
             es_correcta = bool(resultado['es_correcta'])
             id_competencia = resultado['id_competencia']
@@ -49,12 +46,10 @@ class Puntaje:
             )
 
             con.commit()
-            return json.dumps(
-                {'status': True, 'message': 'Puntaje registrado correctamente'}
-            )
+            return {'status': True, 'message': 'Puntaje registrado correctamente'}
 
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
@@ -82,9 +77,9 @@ class Puntaje:
             """
             cursor.execute(sql)
             datos = cursor.fetchall()
-            return json.dumps({'status': True, 'data': datos})
+            return {'status': True, 'data': datos}
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
@@ -108,9 +103,9 @@ class Puntaje:
             """
             cursor.execute(sql, (id_estudiante,))
             datos = cursor.fetchall()
-            return json.dumps({'status': True, 'data': datos})
+            return {'status': True, 'data': datos}
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 
 class Recomendacion:
@@ -18,14 +17,14 @@ class Recomendacion:
             nuevo_id = cursor.fetchone()["id_recomendacion"]
             con.commit()
 
-            return json.dumps({
+            return {
                 "status": True,
                 "message": "Recomendación registrada",
                 "id_recomendacion": nuevo_id
-            })
+            }
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -50,10 +49,10 @@ class Recomendacion:
             cursor.execute(sql, (id_estudiante,))
             datos = cursor.fetchall()
 
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
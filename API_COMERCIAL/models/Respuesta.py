@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 
 class Respuesta:
@@ -35,15 +34,13 @@ class Respuesta:
             )
             nuevo_id = cursor.fetchone()["id_respuesta"]
             con.commit()
-            return json.dumps(
-                {
-                    "status": True,
-                    "id_respuesta": nuevo_id,
-                    "message": "Respuesta registrada",
-                }
-            )
+            return {
+                "status": True,
+                "id_respuesta": nuevo_id,
+                "message": "Respuesta registrada",
+            }
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -78,9 +75,9 @@ class Respuesta:
             """
             cursor.execute(sql)
             datos = cursor.fetchall()
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -116,13 +113,11 @@ class Respuesta:
             cursor.execute(sql, (id_respuesta,))
             datos = cursor.fetchone()
             if datos:
-                return json.dumps({"status": True, "data": datos})
+                return {"status": True, "data": datos}
             else:
-                return json.dumps(
-                    {"status": False, "message": "Respuesta no encontrada"}
-                )
+                return {"status": False, "message": "Respuesta no encontrada"}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -138,9 +133,9 @@ class Respuesta:
             sql = "DELETE FROM respuestas_estudiantes WHERE id_respuesta = %s;"
             cursor.execute(sql, (id_respuesta,))
             con.commit()
-            return json.dumps({"status": True, "message": "Respuesta eliminada"})
+            return {"status": True, "message": "Respuesta eliminada"}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
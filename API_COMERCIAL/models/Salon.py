@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 
 class Salon:
@@ -15,9 +14,9 @@ class Salon:
                 ORDER BY id_salon;
             """)
             datos = cursor.fetchall()
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -34,10 +33,10 @@ class Salon:
             """, (id_salon,))
             dato = cursor.fetchone()
             if not dato:
-                return json.dumps({"status": False, "message": "Salón no encontrado"})
-            return json.dumps({"status": True, "data": dato})
+                return {"status": False, "message": "Salón no encontrado"}
+            return {"status": True, "data": dato}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -54,10 +53,10 @@ class Salon:
             """, (nombre, grado, seccion, estado))
             nuevo_id = cursor.fetchone()["id_salon"]
             con.commit()
-            return json.dumps({"status": True, "id": nuevo_id, "message": "Salón creado"})
+            return {"status": True, "id": nuevo_id, "message": "Salón creado"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -73,10 +72,10 @@ class Salon:
                 WHERE id_salon = %s;
             """, (nombre, grado, seccion, estado, id_salon))
             con.commit()
-            return json.dumps({"status": True, "message": "Salón actualizado"})
+            return {"status": True, "message": "Salón actualizado"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -88,10 +87,10 @@ class Salon:
         try:
             cursor.execute("DELETE FROM salon WHERE id_salon = %s;", (id_salon,))
             con.commit()
-            return json.dumps({"status": True, "message": "Salón eliminado"})
+            return {"status": True, "message": "Salón eliminado"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 
 class Salon:
@@ -15,10 +14,10 @@ class Salon:
                 ORDER BY id_salon;
             """)
             datos = cursor.fetchall()
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -38,12 +37,12 @@ class Salon:
             dato = cursor.fetchone()
 
             if not dato:
-                return json.dumps({"status": False, "message": "Salón no encontrado"})
+                return {"status": False, "message": "Salón no encontrado"}
 
-            return json.dumps({"status": True, "data": dato})
+            return {"status": True, "data": dato}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
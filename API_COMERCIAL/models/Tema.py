@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 
 class Tema:
@@ -15,10 +14,10 @@ class Tema:
                 ORDER BY id_tema;
             """)
             datos = cursor.fetchall()
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -38,12 +37,12 @@ class Tema:
             dato = cursor.fetchone()
 
             if not dato:
-                return json.dumps({"status": False, "message": "Tema no encontrado"})
+                return {"status": False, "message": "Tema no encontrado"}
 
-            return json.dumps({"status": True, "data": dato})
+            return {"status": True, "data": dato}
 
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -63,11 +62,11 @@ class Tema:
             new_id = cursor.fetchone()["id_tema"]
             con.commit()
 
-            return json.dumps({"status": True, "id": new_id, "message": "Tema creado"})
+            return {"status": True, "id": new_id, "message": "Tema creado"}
 
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
@@ -80,11 +79,11 @@ class Tema:
         try:
             cursor.execute("DELETE FROM tema WHERE id_tema = %s;", (id_tema,))
             con.commit()
-            return json.dumps({"status": True, "message": "Tema eliminado"})
+            return {"status": True, "message": "Tema eliminado"}
 
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
 
         finally:
             cursor.close()
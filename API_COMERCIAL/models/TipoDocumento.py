@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 
 class TipoDocumento:
@@ -15,9 +14,9 @@ class TipoDocumento:
                 ORDER BY id_tipo_doc;
             """)
             datos = cursor.fetchall()
-            return json.dumps({"status": True, "data": datos})
+            return {"status": True, "data": datos}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -34,10 +33,10 @@ class TipoDocumento:
             """, (id_tipo_doc,))
             dato = cursor.fetchone()
             if not dato:
-                return json.dumps({"status": False, "message": "Tipo documento no encontrado"})
-            return json.dumps({"status": True, "data": dato})
+                return {"status": False, "message": "Tipo documento no encontrado"}
+            return {"status": True, "data": dato}
         except Exception as e:
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -54,10 +53,10 @@ class TipoDocumento:
             """, (descripcion,))
             nuevo_id = cursor.fetchone()["id_tipo_doc"]
             con.commit()
-            return json.dumps({"status": True, "id": nuevo_id, "message": "Tipo documento creado"})
+            return {"status": True, "id": nuevo_id, "message": "Tipo documento creado"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -73,10 +72,10 @@ class TipoDocumento:
                 WHERE id_tipo_doc = %s;
             """, (descripcion, id_tipo_doc))
             con.commit()
-            return json.dumps({"status": True, "message": "Tipo documento actualizado"})
+            return {"status": True, "message": "Tipo documento actualizado"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
@@ -88,10 +87,10 @@ class TipoDocumento:
         try:
             cursor.execute("DELETE FROM tipo_documento WHERE id_tipo_doc = %s;", (id_tipo_doc,))
             con.commit()
-            return json.dumps({"status": True, "message": "Tipo documento eliminado"})
+            return {"status": True, "message": "Tipo documento eliminado"}
         except Exception as e:
             con.rollback()
-            return json.dumps({"status": False, "message": str(e)})
+            return {"status": False, "message": str(e)}
         finally:
             cursor.close()
             con.close()
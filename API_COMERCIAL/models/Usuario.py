@@ -1,5 +1,4 @@
 from conexionBD import Conexion
-import json
 
 class Usuario:
     def __init__(self, id_usuario=None, nombre=None, apellidos=None, correo=None, contrasena=None, rol=None, estado_usuario='activo'):
@@ -23,9 +22,9 @@ class Usuario:
             cursor.execute(sql, (self.nombre, self.apellidos, self.correo, self.contrasena, self.rol, self.estado_usuario))
             nuevo_id = cursor.fetchone()['id_usuario']
             con.commit()
-            return json.dumps({'status': True, 'id_usuario': nuevo_id, 'message': 'Usuario creado'})
+            return {'status': True, 'id_usuario': nuevo_id, 'message': 'Usuario creado'}
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
@@ -39,9 +38,9 @@ class Usuario:
             sql = "SELECT id_usuario, nombre, apellidos, correo, rol, estado_usuario FROM usuarios;"
             cursor.execute(sql)
             datos = cursor.fetchall()
-            return json.dumps({'status': True, 'data': datos})
+            return {'status': True, 'data': datos}
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
@@ -56,11 +55,11 @@ class Usuario:
             cursor.execute(sql, (id_usuario,))
             datos = cursor.fetchone()
             if datos:
-                return json.dumps({'status': True, 'data': datos})
+                return {'status': True, 'data': datos}
             else:
-                return json.dumps({'status': False, 'message': 'Usuario no encontrado'})
+                return {'status': False, 'message': 'Usuario no encontrado'}
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
@@ -77,9 +76,9 @@ class Usuario:
             """
             cursor.execute(sql, (self.nombre, self.apellidos, self.correo, self.rol, self.estado_usuario, self.id_usuario))
             con.commit()
-            return json.dumps({'status': True, 'message': 'Usuario actualizado'})
+            return {'status': True, 'message': 'Usuario actualizado'}
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
@@ -93,9 +92,9 @@ class Usuario:
             sql = "DELETE FROM usuarios WHERE id_usuario = %s;"
             cursor.execute(sql, (id_usuario,))
             con.commit()
-            return json.dumps({'status': True, 'message': 'Usuario eliminado'})
+            return {'status': True, 'message': 'Usuario eliminado'}
         except Exception as e:
-            return json.dumps({'status': False, 'message': str(e)})
+            return {'status': False, 'message': str(e)}
         finally:
             cursor.close()
             con.close()
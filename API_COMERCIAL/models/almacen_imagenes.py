@@ -0,0 +1,149 @@
+"""
+Almacén de imágenes direccionado por contenido.
+
+Las fotos del desarrollo se guardaban como resp_<id>.<ext>: la misma foto
+enviada dos veces (reintento del celular, o la misma hoja para dos
+respuestas) se guardaba y subía dos veces, y como el nombre se reutiliza al
+volver a subir, el navegador no podía cachearla como inmutable. Ahora:
+
+  - cada imagen (ya normalizada, ver imagenes_desarrollo.py) se guarda como
+    <carpeta>/<sha256>.<ext>, con sus variantes <sha256>__media.webp, ...;
+  - si el blob ya existe no se vuelve a escribir (ni a subir a Cloudinary:
+    imagenes_contenido.url_nube guarda la URL de la primera subida);
+  - respuestas_imagen relaciona id_respuesta → hash;
+  - /imagenes/<sha256>.<ext> se sirve con Cache-Control immutable y el
+    ETag es el propio hash (no hay que leer el archivo para calcularlo);
+  - verificar() recalcula los hashes: el nombre del archivo es su checksum
+    (python verificar_imagenes.py).
+"""
+import hashlib
+import os
+import re
+
+from models.imagenes_desarrollo import TAMANOS, nombre_variante
+
+# Por defecto dentro de la carpeta de desarrollos (volumen en Railway)
+CARPETA = os.getenv(
+    "IMAGENES_CAS_PATH",
+    os.path.join(os.getenv("DESARROLLOS_ALUMNO_PATH",
+                           os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                                        "static", "desarrollos_alumno")),
+                 "cas")
+)
+_NOMBRE_BLOB = re.compile(r"^([0-9a-f]{64})(\.[a-z0-9]+)$")
+
+SQL_TABLAS = [
+    """
+    CREATE TABLE IF NOT EXISTS imagenes_contenido (
+        hash       CHAR(64)    PRIMARY KEY,
+        extension  VARCHAR(8)  NOT NULL,
+        tamano     INTEGER     NOT NULL,
+        url_nube   TEXT,
+        creado     TIMESTAMP   NOT NULL DEFAULT NOW()
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS respuestas_imagen (
+        id_respuesta INTEGER   PRIMARY KEY
+                     REFERENCES respuestas_estudiantes(id_respuesta) ON DELETE CASCADE,
+        hash         CHAR(64)  NOT NULL REFERENCES imagenes_contenido(hash),
+        actualizado  TIMESTAMP NOT NULL DEFAULT NOW()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_respuestas_imagen_hash ON respuestas_imagen (hash)",
+]
+
+
+def instalar(cursor):
+    for sql in SQL_TABLAS:
+        cursor.execute(sql)
+
+
+def hash_archivo(ruta):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 16), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def es_blob(nombre):
+    """True si `nombre` tiene la forma <sha256>.<ext> (o una variante)."""
+    base, ext = os.path.splitext(nombre)
+    return bool(_NOMBRE_BLOB.match(base.split("__")[0] + ext))
+
+
+class AlmacenImagenes:
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        os.makedirs(carpeta, exist_ok=True)
+
+    def ruta(self, nombre):
+        return os.path.join(self.carpeta, nombre)
+
+    def guardar(self, ruta_origen):
+        """
+        Mueve `ruta_origen` (y sus variantes <base>__<tam>.webp, si existen)
+        al almacén. Retorna (nombre_blob, nuevo). Si el contenido ya estaba,
+        descarta los temporales.
+        """
+        ext    = os.path.splitext(ruta_origen)[1].lower()
+        digest = hash_archivo(ruta_origen)
+        nombre = digest + ext
+        nuevo  = not os.path.exists(self.ruta(nombre))
+
+        origen_dir, origen_nombre = os.path.split(ruta_origen)
+        pares = [(ruta_origen, nombre)]
+        for tam in TAMANOS:
+            if tam != "original":
+                pares.append((os.path.join(origen_dir, nombre_variante(origen_nombre, tam)),
+                              nombre_variante(nombre, tam)))
+
+        for origen, destino in pares:
+            if not os.path.exists(origen):
+                continue
+            if os.path.exists(self.ruta(destino)):
+                os.remove(origen)           # mismo contenido ya almacenado
+            else:
+                os.replace(origen, self.ruta(destino))
+        return nombre, nuevo
+
+    def registrar(self, cursor, nombre, id_respuesta):
+        """
+        Registra el blob y lo asocia a la respuesta. Retorna url_nube si
+        el contenido ya se subió antes (no hay que volver a subirlo).
+        """
+        digest, ext = os.path.splitext(nombre)
+        cursor.execute("""
+            WITH ins AS (
+                INSERT INTO imagenes_contenido (hash, extension, tamano)
+                VALUES (%(hash)s, %(ext)s, %(tamano)s)
+                ON CONFLICT (hash) DO NOTHING
+            ),
+            rel AS (
+                INSERT INTO respuestas_imagen (id_respuesta, hash)
+                VALUES (%(id)s, %(hash)s)
+                ON CONFLICT (id_respuesta) DO UPDATE SET
+                    hash = EXCLUDED.hash, actualizado = NOW()
+            )
+            SELECT url_nube FROM imagenes_contenido WHERE hash = %(hash)s
+        """, {"hash": digest, "ext": ext, "id": id_respuesta,
+              "tamano": os.path.getsize(self.ruta(nombre))})
+        return (cursor.fetchone() or {}).get("url_nube")
+
+    def verificar(self):
+        """Nombres de blobs cuyo contenido ya no coincide con su hash."""
+        corruptos = []
+        for nombre in sorted(os.listdir(self.carpeta)):
+            m = _NOMBRE_BLOB.match(nombre)
+            if m and hash_archivo(self.ruta(nombre)) != m.group(1):
+                corruptos.append(nombre)
+        return corruptos
+
+
+def guardar_url_nube(cursor, digest, url):
+    cursor.execute(
+        "UPDATE imagenes_contenido SET url_nube = %s WHERE hash = %s AND url_nube IS NULL",
+        (url, digest)
+    )
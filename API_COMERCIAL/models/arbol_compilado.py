@@ -0,0 +1,131 @@
+"""
+Árbol de decisión del tutor compilado a arreglos planos (sin scikit-learn).
+
+predecir_nivel_competencia llamaba a MODELO_TUTOR.predict(X) por cada fila
+1x7: la validación de entrada de sklearn cuesta más que recorrer el árbol,
+y des-serializar el pickle carga sklearn/scipy en cada worker.
+
+compilar_modelo.py (o train_model.py al terminar) convierte el
+DecisionTreeClassifier de modelo_tutor.pkl en modelo_tutor.npz:
+
+  feature[i], umbral[i]  → condición del nodo i (X[feature] <= umbral)
+  izq[i], der[i]         → hijos (-1 en las hojas)
+  etiqueta[i]            → clase ya decodificada ("bajo"/"medio"/"alto")
+
+En runtime solo se necesita numpy. Igual que sklearn, las features se
+comparan en float32 para que las predicciones sean idénticas.
+"""
+import numpy as np
+
+HOJA = -1
+
+
+class ArbolCompilado:
+
+    def __init__(self, feature, umbral, izq, der, etiqueta, feature_names, n_features):
+        self.feature  = np.asarray(feature,  dtype=np.int64)
+        self.umbral   = np.asarray(umbral,   dtype=np.float64)
+        self.izq      = np.asarray(izq,      dtype=np.int64)
+        self.der      = np.asarray(der,      dtype=np.int64)
+        self.etiqueta = np.asarray(etiqueta, dtype=str)
+        self.feature_names  = list(feature_names)
+        self.n_features_in_ = int(n_features)
+        # Listas de Python para el recorrido fila a fila (más rápido que indexar numpy)
+        self._nodos = list(zip(self.feature.tolist(), self.umbral.tolist(),
+                               self.izq.tolist(), self.der.tolist()))
+        self._etiquetas = self.etiqueta.tolist()
+
+    def predecir_fila(self, fila):
+        """Etiqueta para UNA fila de features."""
+        fila = np.asarray(fila, dtype=np.float32).tolist()
+        nodo = 0
+        feat, umbral, izq, der = self._nodos[0]
+        while izq != HOJA:
+            nodo = izq if fila[feat] <= umbral else der
+            feat, umbral, izq, der = self._nodos[nodo]
+        return self._etiquetas[nodo]
+
+    def predict(self, X):
+        """Misma firma que sklearn, pero devuelve las etiquetas ya decodificadas."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        if len(X) == 1:
+            return np.array([self.predecir_fila(X[0])], dtype=str)
+        # Todas las filas bajan un nivel por iteración (tantas vueltas como
+        # profundidad del árbol, no como filas)
+        nodo    = np.zeros(len(X), dtype=np.int64)
+        activas = np.flatnonzero(self.izq[nodo] != HOJA)
+        while activas.size:
+            n = nodo[activas]
+            valores = X[activas, self.feature[n]].astype(np.float64)
+            nodo[activas] = np.where(valores <= self.umbral[n], self.izq[n], self.der[n])
+            activas = activas[self.izq[nodo[activas]] != HOJA]
+        return self.etiqueta[nodo]
+
+    def guardar(self, ruta):
+        np.savez(ruta, feature=self.feature, umbral=self.umbral,
+                 izq=self.izq, der=self.der, etiqueta=self.etiqueta,
+                 feature_names=np.asarray(self.feature_names, dtype=str),
+                 n_features=self.n_features_in_)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta, allow_pickle=False) as d:
+            return cls(d["feature"], d["umbral"], d["izq"], d["der"],
+                       d["etiqueta"], d["feature_names"].tolist(), d["n_features"])
+
+
+def compilar(modelo, encoder=None, feature_names=None):
+    """
+    DecisionTreeClassifier entrenado → ArbolCompilado. No importa sklearn:
+    solo lee los arreglos de modelo.tree_.
+    """
+    arbol  = modelo.tree_
+    clases = np.asarray(modelo.classes_)[np.argmax(arbol.value[:, 0, :], axis=1)]
+    if encoder is not None:
+        clases = encoder.inverse_transform(clases)
+    return ArbolCompilado(
+        feature=np.where(arbol.children_left == HOJA, 0, arbol.feature),
+        umbral=arbol.threshold,
+        izq=arbol.children_left,
+        der=arbol.children_right,
+        etiqueta=[str(c) for c in clases],
+        feature_names=feature_names or [],
+        n_features=modelo.n_features_in_,
+    )
+
+
+def puntos_frontera(compilado):
+    """
+    Filas con cada feature justo en, bajo y sobre cada umbral del árbol:
+    los casos donde una diferencia de redondeo cambiaría la rama.
+    """
+    n = compilado.n_features_in_
+    internos = compilado.izq != HOJA
+    filas = []
+    for feat, umbral in zip(compilado.feature[internos], compilado.umbral[internos]):
+        u32 = np.float32(umbral)
+        for valor in (umbral, u32, np.nextafter(u32, np.float32(-np.inf)),
+                      np.nextafter(u32, np.float32(np.inf))):
+            fila = np.zeros(n)
+            fila[feat] = valor
+            filas.append(fila)
+    return np.array(filas, dtype=float).reshape(-1, n)
+
+
+def verificar_paridad(modelo, encoder, compilado, X):
+    """
+    Compara sklearn vs compilado sobre X (más los puntos frontera).
+    Retorna (total, lista de índices que difieren).
+    """
+    X = np.asarray(X, dtype=float)
+    frontera = puntos_frontera(compilado)
+    if X.size and frontera.size:
+        X = np.vstack([X, frontera])
+    elif frontera.size:
+        X = frontera
+    esperado = modelo.predict(X)
+    if encoder is not None:
+        esperado = encoder.inverse_transform(esperado)
+    obtenido = compilado.predict(X)
+    distintos = [i for i, (a, b) in enumerate(zip(esperado, obtenido)) if str(a) != b]
+    return len(X), distintos
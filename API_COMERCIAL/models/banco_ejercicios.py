@@ -0,0 +1,230 @@
+"""
+Índice en memoria del banco de ejercicios (uno por worker de gunicorn).
+
+ejercicio_siguiente y sugerencias_ejercicios elegían con ORDER BY RANDOM()
+sobre ejercicios JOIN competencias + NOT EXISTS por alumno, y con dos
+consultas más de fallback cuando la primera no devolvía nada: cada petición
+ordenaba la tabla completa. El banco cambia muy poco, así que:
+
+  - El índice guarda los ejercicios CON opciones (ya precargadas) agrupados
+    por (competencia, nivel del alumno) según NIVEL_EJERCICIO_RANGO, que es
+    la misma banda de dificultad que NIVEL_EJERCICIO_WHERE.
+  - Cada ejercicio tiene una posición fija en el índice; lo que el alumno ya
+    resolvió se representa como un bitset (int de Python) sobre esas
+    posiciones, y elegir es un muestreo aleatorio que descarta los bits
+    marcados (O(1) esperado; si casi todo está resuelto, filtra la lista).
+  - Se recarga cuando cambia banco_ejercicios_version.version, que suben los
+    triggers de ejercicios / opciones_ejercicio / competencias (ver
+    _migrar_version_banco en app.py). Así también se ven los cambios del
+    CRUD web y de los otros workers.
+"""
+import random
+import threading
+import time
+
+from models.scoring import NIVEL_EJERCICIO_RANGO
+from models.estado_nec import SQL_FILAS_NEC, EstadoNEC
+
+# Si la petición no trae la versión (ver leer_estado_estudiante), se consulta
+# como máximo una vez cada N segundos.
+SEG_VERIFICAR_VERSION = 5.0
+
+# Intentos de muestreo aleatorio antes de filtrar la lista completa
+_INTENTOS_MUESTREO = 8
+
+
+class _Indice:
+    """Foto inmutable del banco: se reemplaza entera al recargar."""
+
+    def __init__(self, version, ejercicios, opciones):
+        self.version    = version
+        self.ejercicios = {}          # id_ejercicio → dict (con "opciones")
+        self.posicion   = {}          # id_ejercicio → bit del bitset
+        self.grupos     = {}          # (id_competencia|None, nivel|None) → tupla de ids
+
+        opc_map = {}
+        for o in opciones:
+            opc_map.setdefault(o["id_ejercicio"], []).append({
+                "idOpcion": o["id_opcion"], "letra": o["letra"], "texto": o["descripcion"]
+            })
+
+        for e in ejercicios:
+            opc = opc_map.get(e["id_ejercicio"])
+            if not opc:
+                continue
+            ej = dict(e)
+            ej["nivel_ejercicio"] = int(ej.get("nivel_ejercicio") or 1)
+            ej["opciones"]        = opc
+            self.posicion[ej["id_ejercicio"]]  = len(self.posicion)
+            self.ejercicios[ej["id_ejercicio"]] = ej
+
+        competencias = {e["id_competencia"] for e in self.ejercicios.values()}
+        for comp in list(competencias) + [None]:
+            for nivel in list(NIVEL_EJERCICIO_RANGO) + [None]:
+                self.grupos[(comp, nivel)] = tuple(
+                    id_ej for id_ej, e in self.ejercicios.items()
+                    if (comp is None or e["id_competencia"] == comp)
+                    and _en_banda(e["nivel_ejercicio"], nivel)
+                )
+
+    def bitset(self, ids):
+        mascara = 0
+        for id_ej in ids or ():
+            pos = self.posicion.get(id_ej)
+            if pos is not None:
+                mascara |= 1 << pos
+        return mascara
+
+    def _libre(self, id_ej, excluir_bits, excluir_id):
+        return id_ej != excluir_id and not (excluir_bits >> self.posicion[id_ej]) & 1
+
+    def elegir(self, id_competencia=None, nivel=None, excluir_bits=0, excluir_id=None):
+        """Un ejercicio al azar del grupo que no esté en excluir_bits (o None)."""
+        candidatos = self.grupos.get((id_competencia, nivel), ())
+        if not candidatos:
+            return None
+        for _ in range(_INTENTOS_MUESTREO):
+            id_ej = candidatos[random.randrange(len(candidatos))]
+            if self._libre(id_ej, excluir_bits, excluir_id):
+                return self.ejercicios[id_ej]
+        libres = [i for i in candidatos if self._libre(i, excluir_bits, excluir_id)]
+        return self.ejercicios[random.choice(libres)] if libres else None
+
+    def muestrear(self, id_competencia, nivel, k, excluir_bits=0):
+        """Hasta k ejercicios distintos al azar del grupo, sin los de excluir_bits."""
+        candidatos = self.grupos.get((id_competencia, nivel), ())
+        libres = [i for i in candidatos if self._libre(i, excluir_bits, None)]
+        return [self.ejercicios[i] for i in random.sample(libres, min(k, len(libres)))]
+
+    def elegir_de(self, ids, excluir_bits=0):
+        """Uno al azar entre ids concretos (grupos pre-seleccionados de evaluación)."""
+        libres = [i for i in ids if i in self.posicion and self._libre(i, excluir_bits, None)]
+        return self.ejercicios[random.choice(libres)] if libres else None
+
+
+def _en_banda(dificultad, nivel):
+    if nivel is None:
+        return True
+    minimo, maximo = NIVEL_EJERCICIO_RANGO[nivel]
+    return ((minimo is None or dificultad >= minimo)
+            and (maximo is None or dificultad <= maximo))
+
+
+class BancoEjercicios:
+
+    def __init__(self):
+        self._lock          = threading.Lock()
+        self._indice        = None
+        self._verificado_en = 0.0
+
+    def indice(self, cursor, version=None):
+        """
+        Devuelve el índice vigente, recargándolo si `version` (o la leída de
+        la BD) no coincide con la del índice cargado.
+        """
+        indice = self._indice
+        if version is None:
+            ahora = time.monotonic()
+            if indice is not None and ahora - self._verificado_en < SEG_VERIFICAR_VERSION:
+                return indice
+            cursor.execute("SELECT version FROM banco_ejercicios_version WHERE id = 1")
+            version = (cursor.fetchone() or {}).get("version")
+            self._verificado_en = ahora
+        else:
+            self._verificado_en = time.monotonic()
+
+        if indice is not None and indice.version == version:
+            return indice
+
+        with self._lock:
+            indice = self._indice
+            if indice is None or indice.version != version:
+                indice = self._cargar(cursor, version)
+                self._indice = indice
+        return indice
+
+    def invalidar(self):
+        self._indice = None
+
+    def version_cargada(self):
+        """Versión del índice en memoria (None si aún no se cargó). Sin consultas."""
+        indice = self._indice
+        return indice.version if indice is not None else None
+
+    def _cargar(self, cursor, version):
+        # La versión se lee ANTES que las filas: si el banco cambia entre
+        # ambas lecturas, la siguiente petición verá otra versión y recargará.
+        cursor.execute("""
+            SELECT e.id_ejercicio,
+                   e.descripcion  AS enunciado,
+                   e.imagen_url,
+                   e.pista,
+                   COALESCE(e.nivel_logro, e.nivel, 1) AS nivel_ejercicio,
+                   c.id_competencia,
+                   c.descripcion  AS competencia
+            FROM ejercicios e
+            JOIN competencias c ON e.id_competencia = c.id_competencia
+        """)
+        ejercicios = cursor.fetchall()
+        cursor.execute("""
+            SELECT id_opcion, letra, descripcion, id_ejercicio
+            FROM opciones_ejercicio
+            ORDER BY id_ejercicio, letra
+        """)
+        opciones = cursor.fetchall()
+        indice = _Indice(version, ejercicios, opciones)
+        print(f"📚 Banco de ejercicios cargado: v{version} · {len(indice.ejercicios)} ejercicios")
+        return indice
+
+
+BANCO = BancoEjercicios()
+
+
+def leer_estado_estudiante(cursor, id_estudiante):
+    """
+    Una consulta con lo que la selección necesita del alumno: diagnóstico,
+    versión del banco, ejercicios que ya resolvió/intentó/respondió y su
+    estado NEC (models/estado_nec.py).
+    Si el alumno no existe, sin_diagnostico queda en False (como antes).
+    """
+    cursor.execute(f"""
+        SELECT (est.id_estudiante IS NOT NULL
+                AND est.cantidad IS NULL
+                AND est.regularidad_equivalencia_cambio IS NULL
+                AND est.forma_movimiento_localizacion   IS NULL
+                AND est.gestion_datos_incertidumbre     IS NULL) AS sin_diagnostico,
+               (SELECT version FROM banco_ejercicios_version WHERE id = 1) AS version_banco,
+               hist.resueltos_repaso,
+               hist.intentados_repaso,
+               hist.respondidos_evaluacion,
+               ({SQL_FILAS_NEC}) AS nec
+        FROM (SELECT 1) AS uno
+        LEFT JOIN estudiante est ON est.id_estudiante = %(id)s
+        -- Una sola pasada por las respuestas del alumno, agrupada por (ejercicio, modo)
+        LEFT JOIN LATERAL (
+            SELECT ARRAY_AGG(g.id_ejercicio) FILTER (WHERE g.modo = 'repaso' AND g.acerto)
+                       AS resueltos_repaso,
+                   ARRAY_AGG(g.id_ejercicio) FILTER (WHERE g.modo = 'repaso')
+                       AS intentados_repaso,
+                   ARRAY_AGG(g.id_ejercicio) FILTER (WHERE g.modo = 'evaluacion')
+                       AS respondidos_evaluacion
+            FROM (
+                SELECT r.id_ejercicio, r.modo,
+                       COALESCE(BOOL_OR(op_r.es_correcta), FALSE) AS acerto
+                FROM respuestas_estudiantes r
+                LEFT JOIN opciones_ejercicio op_r ON op_r.id_opcion = r.id_opcion
+                WHERE r.id_estudiante = %(id)s
+                  AND r.modo IN ('repaso', 'evaluacion')
+                GROUP BY r.id_ejercicio, r.modo
+            ) AS g
+        ) AS hist ON TRUE
+    """, {"id": id_estudiante})
+    row = cursor.fetchone() or {}
+    return {
+        "sin_diagnostico":        bool(row.get("sin_diagnostico")),
+        "version_banco":          row.get("version_banco"),
+        "resueltos_repaso":       row.get("resueltos_repaso") or [],
+        "intentados_repaso":      row.get("intentados_repaso") or [],
+        "respondidos_evaluacion": row.get("respondidos_evaluacion") or [],
+        "nec":                    EstadoNEC(id_estudiante, row.get("nec")),
+    }
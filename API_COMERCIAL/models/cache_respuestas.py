@@ -0,0 +1,182 @@
+"""
+Caché de respuestas GET por (endpoint, estudiante), uno por worker.
+
+La app Android consulta /progreso/resumen, /progreso/por_competencia,
+/dashboard/mini/<id>, /dominio/temas/<id> y /tutor/nivel_actual en cada
+cambio de pantalla, pero esos datos solo cambian cuando el alumno responde
+o abre material. Se guarda el cuerpo de la respuesta 200:
+
+  - clave    : (endpoint, id_estudiante, query string)
+  - TTL      : CACHE_TTL_SEG (también acota cualquier escritura no cubierta,
+               p.ej. cambios del docente desde el CRUD web)
+  - LRU      : como máximo CACHE_MAX_ENTRADAS por worker
+  - invalidar_estudiante(id) lo llaman /tutor/responder, /tutor/responder_lote,
+    /tutor/material/abrir, /puntaje, /historial, POST y DELETE /progreso y
+    POST /respuestas.
+
+Con gunicorn hay varios workers y cada uno tiene su caché. Para que una
+escritura atendida por un worker invalide también a los demás, hay una
+"generación" por alumno en memoria compartida (mmap anónimo creado antes del
+fork con --preload): invalidar la incrementa y una entrada solo vale si se
+llenó con la generación vigente. Sin --preload cada worker tiene su propio
+mmap y queda el TTL como cota.
+"""
+import functools
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import request, make_response, Response
+
+from config import Config
+
+_RANURAS = 4096          # generaciones compartidas (hash del id del alumno)
+_BYTES   = 8
+
+
+class _Generaciones:
+    """Contadores por alumno compartidos entre procesos hijos del mismo master."""
+
+    def __init__(self, ranuras=_RANURAS):
+        self._ranuras = ranuras
+        self._mem     = mmap.mmap(-1, ranuras * _BYTES)
+        self._vista   = memoryview(self._mem).cast("Q")
+
+    def _ranura(self, id_estudiante):
+        return hash(int(id_estudiante)) % self._ranuras
+
+    def leer(self, id_estudiante):
+        return self._vista[self._ranura(id_estudiante)]
+
+    def incrementar(self, id_estudiante):
+        # No es atómico entre procesos; si dos workers chocan, el valor igual
+        # cambia y las entradas llenadas antes quedan inválidas.
+        i = self._ranura(id_estudiante)
+        self._vista[i] = (self._vista[i] + 1) % (1 << 64)
+
+
+class CacheRespuestas:
+
+    def __init__(self, ttl_seg=None, max_entradas=None, generaciones=None):
+        self.ttl_seg      = float(ttl_seg or Config.CACHE_TTL_SEG)
+        self.max_entradas = int(max_entradas or Config.CACHE_MAX_ENTRADAS)
+        self._gen         = generaciones or _Generaciones()
+        self._lock        = threading.Lock()
+        self._entradas    = OrderedDict()   # clave → (expira, generación, cuerpo, status, mimetype)
+        self._pid         = os.getpid()
+        self._metricas    = {"hits": 0, "misses": 0, "guardadas": 0,
+                             "expiradas": 0, "invalidadas": 0, "desalojadas": 0}
+
+    def _verificar_fork(self):
+        # Tras el fork el hijo hereda una copia: se vacía (las métricas también)
+        if self._pid != os.getpid():
+            self._pid      = os.getpid()
+            self._entradas = OrderedDict()
+            self._metricas = dict.fromkeys(self._metricas, 0)
+
+    def obtener(self, clave, id_estudiante):
+        with self._lock:
+            self._verificar_fork()
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self._metricas["misses"] += 1
+                return None
+            expira, generacion = entrada[0], entrada[1]
+            if time.monotonic() >= expira:
+                motivo = "expiradas"
+            elif generacion != self._gen.leer(id_estudiante):
+                motivo = "invalidadas"
+            else:
+                self._entradas.move_to_end(clave)
+                self._metricas["hits"] += 1
+                return entrada[2:]
+            del self._entradas[clave]
+            self._metricas[motivo]  += 1
+            self._metricas["misses"] += 1
+            return None
+
+    def guardar(self, clave, id_estudiante, generacion, cuerpo, status, mimetype):
+        with self._lock:
+            self._verificar_fork()
+            if generacion != self._gen.leer(id_estudiante):
+                return   # hubo una escritura mientras se calculaba la respuesta
+            self._entradas[clave] = (time.monotonic() + self.ttl_seg, generacion,
+                                     cuerpo, status, mimetype)
+            self._entradas.move_to_end(clave)
+            self._metricas["guardadas"] += 1
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self._metricas["desalojadas"] += 1
+
+    def generacion(self, id_estudiante):
+        return self._gen.leer(id_estudiante)
+
+    def invalidar_estudiante(self, id_estudiante):
+        if id_estudiante is None:
+            return
+        try:
+            self._gen.incrementar(int(id_estudiante))
+        except (TypeError, ValueError):
+            pass
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def metricas(self):
+        with self._lock:
+            self._verificar_fork()
+            m = dict(self._metricas)
+            m.update(pid=os.getpid(), entradas=len(self._entradas),
+                     ttl_seg=self.ttl_seg, max_entradas=self.max_entradas)
+            total = m["hits"] + m["misses"]
+            m["tasa_hits"] = round(m["hits"] / total, 3) if total else 0.0
+            return m
+
+
+CACHE = CacheRespuestas()
+
+
+def _id_estudiante_de_peticion():
+    valor = (request.view_args or {}).get("id_estudiante")
+    if valor is None:
+        valor = request.args.get("idEstudiante", type=int)
+    return valor
+
+
+def cache_por_estudiante(vista):
+    """
+    Decorador para GET por alumno (va debajo de @jwt_required). Sin id de
+    alumno en la ruta o en ?idEstudiante no cachea; solo guarda respuestas 200.
+    """
+    @functools.wraps(vista)
+    def envoltura(*args, **kwargs):
+        id_estudiante = _id_estudiante_de_peticion()
+        if id_estudiante is None:
+            return vista(*args, **kwargs)
+
+        clave = (request.endpoint, int(id_estudiante),
+                 request.query_string.decode("utf-8", "replace"))
+        guardada = CACHE.obtener(clave, id_estudiante)
+        if guardada is not None:
+            cuerpo, status, mimetype = guardada
+            return Response(cuerpo, status=status, mimetype=mimetype)
+
+        generacion = CACHE.generacion(id_estudiante)
+        resp = make_response(vista(*args, **kwargs))
+        if resp.status_code == 200:
+            CACHE.guardar(clave, id_estudiante, generacion,
+                          resp.get_data(), resp.status_code, resp.mimetype)
+        return resp
+
+    return envoltura
+
+
+def invalidar_estudiante(id_estudiante):
+    CACHE.invalidar_estudiante(id_estudiante)
+
+
+def metricas_cache():
+    return CACHE.metricas()
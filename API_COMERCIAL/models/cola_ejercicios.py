@@ -0,0 +1,148 @@
+"""
+Cola de próximos ejercicios por sesión de repaso, una por worker.
+
+Cada toque de "siguiente" en /tutor/ejercicio_siguiente lee el estado del
+alumno (diagnóstico, resueltos, NEC), predice el nivel con el modelo, lee
+la racha y elige del banco. Entre dos respuestas que no mueven el nivel ni
+la racha, todo eso da el mismo filtro: con ?cola=N la primera petición
+elige N ejercicios del nivel (sin intentar primero, luego los fallados) y
+guarda los N-1 siguientes aquí. Las siguientes peticiones de la misma
+sesión (alumno, competencia) sacan el primero de la cola sin ir a la BD.
+
+La cola deja de valer cuando:
+  - una respuesta cambia el nivel NEC o la categoría de racha que usa
+    detectar_racha (invalidar_si_cambia, desde /responder y
+    /responder_lote), o el docente asigna un puntaje;
+  - el banco de ejercicios cargado en el worker es otra versión;
+  - pasa COLA_TTL_SEG.
+
+Igual que en models/cache_respuestas.py, la invalidación es una generación
+por alumno en memoria compartida entre workers (mmap creado antes del fork
+con --preload). Cada worker tiene su propia cola: si el alumno alterna de
+worker puede recibir un ejercicio que ya vio en el otro, como cuando se
+elegía al azar en cada petición.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+from models.cache_respuestas import _Generaciones
+
+N_RACHA = 3      # mismo n que detectar_racha (ws/tutor.py)
+
+
+def categoria_racha(racha, n=N_RACHA):
+    if racha >= n:
+        return "positiva"
+    if racha <= -n:
+        return "negativa"
+    return None
+
+
+def cambia_seleccion(res):
+    """¿La respuesta evaluada (evaluar_respuesta) cambia el filtro de selección?"""
+    return (res["nuevo_nivel"] != res["nivel_anterior"]
+            or categoria_racha(res["racha"]) != categoria_racha(res["racha_anterior"]))
+
+
+class ColaEjercicios:
+
+    def __init__(self, ttl_seg=None, max_entradas=None, generaciones=None):
+        self.ttl_seg      = float(ttl_seg or Config.COLA_TTL_SEG)
+        self.max_entradas = int(max_entradas or Config.COLA_MAX_ENTRADAS)
+        self._gen         = generaciones or _Generaciones()
+        self._lock        = threading.Lock()
+        self._colas       = OrderedDict()   # (alumno, competencia) → (expira, gen, versión, [ejercicios])
+        self._pid         = os.getpid()
+        self._metricas    = {"servidos": 0, "vacias": 0, "expiradas": 0,
+                             "invalidadas": 0, "guardadas": 0, "desalojadas": 0}
+
+    def _verificar_fork(self):
+        if self._pid != os.getpid():
+            self._pid      = os.getpid()
+            self._colas    = OrderedDict()
+            self._metricas = dict.fromkeys(self._metricas, 0)
+
+    def tomar(self, id_estudiante, id_dominio, version_banco):
+        """
+        Saca el siguiente de la cola de la sesión. Retorna (ejercicio,
+        restantes) o None si no hay cola vigente.
+        """
+        clave = (int(id_estudiante), id_dominio)
+        with self._lock:
+            self._verificar_fork()
+            entrada = self._colas.get(clave)
+            if entrada is None:
+                self._metricas["vacias"] += 1
+                return None
+            expira, generacion, version, ejercicios = entrada
+            if time.monotonic() >= expira:
+                motivo = "expiradas"
+            elif generacion != self._gen.leer(id_estudiante) or version != version_banco:
+                motivo = "invalidadas"
+            else:
+                siguiente = ejercicios.pop(0)
+                if ejercicios:
+                    self._colas.move_to_end(clave)
+                else:
+                    del self._colas[clave]
+                self._metricas["servidos"] += 1
+                return siguiente, list(ejercicios)
+            del self._colas[clave]
+            self._metricas[motivo]  += 1
+            self._metricas["vacias"] += 1
+            return None
+
+    def guardar(self, id_estudiante, id_dominio, generacion, version_banco, ejercicios):
+        clave = (int(id_estudiante), id_dominio)
+        with self._lock:
+            self._verificar_fork()
+            if not ejercicios or generacion != self._gen.leer(id_estudiante):
+                self._colas.pop(clave, None)   # hubo una respuesta mientras se elegía
+                return
+            self._colas[clave] = (time.monotonic() + self.ttl_seg, generacion,
+                                  version_banco, list(ejercicios))
+            self._colas.move_to_end(clave)
+            self._metricas["guardadas"] += 1
+            while len(self._colas) > self.max_entradas:
+                self._colas.popitem(last=False)
+                self._metricas["desalojadas"] += 1
+
+    def generacion(self, id_estudiante):
+        return self._gen.leer(id_estudiante)
+
+    def invalidar_estudiante(self, id_estudiante):
+        if id_estudiante is None:
+            return
+        try:
+            self._gen.incrementar(int(id_estudiante))
+        except (TypeError, ValueError):
+            pass
+
+    def invalidar_si_cambia(self, id_estudiante, resultados):
+        """Invalida si alguna respuesta del alumno cambió nivel o racha."""
+        if any(res is not None and cambia_seleccion(res) for res in resultados):
+            self.invalidar_estudiante(id_estudiante)
+
+    def limpiar(self):
+        with self._lock:
+            self._colas.clear()
+
+    def metricas(self):
+        with self._lock:
+            self._verificar_fork()
+            m = dict(self._metricas)
+            m.update(pid=os.getpid(), colas=len(self._colas), ttl_seg=self.ttl_seg,
+                     max_entradas=self.max_entradas)
+            total = m["servidos"] + m["vacias"]
+            m["tasa_servidos"] = round(m["servidos"] / total, 3) if total else 0.0
+            return m
+
+
+COLA = ColaEjercicios()
+
+
+def metricas_cola():
+    return COLA.metricas()
@@ -0,0 +1,335 @@
+"""
+Agregados materializados del dashboard del docente (GET /dashboard/docente/<id>).
+
+dashboard_docente hacía 5 consultas que volvían a unir docente_salones →
+salones → estudiante_salones → estudiante y recorrían puntajes / progreso /
+NEC de todos sus alumnos en cada recarga. Ahora la tabla
+dashboard_docente_agregado guarda, por docente:
+
+  estudiantes_activos, progreso_promedio, tema_mas_dificultad
+  actividad  → las últimas N_ACTIVIDAD entradas de progreso (buffer circular)
+
+La fila de un docente la comparten todos sus alumnos: si cada respuesta la
+actualizara, las transacciones de /tutor/responder se encolarían en ella
+(y con varios docentes por alumno, riesgo de deadlock). Por eso el camino
+de la respuesta no toca filas compartidas:
+
+  - INSERT en progreso, cambios en puntajes / NEC → los triggers solo
+    AGREGAN una fila a dashboard_docente_eventos (id_estudiante y, si es
+    progreso, id_progreso).
+  - Cambios de matrícula, estado del alumno o competencias → un evento con
+    id_estudiante NULL, que vale para todos los docentes.
+  - La lectura (fn_dashboard_docente) pliega los eventos nuevos de sus
+    alumnos: la actividad siempre (queda al día), y el promedio/tema con un
+    recálculo completo como mucho una vez cada SEG_REFRESCO segundos.
+  - El recálculo se hace bajo pg_try_advisory_xact_lock por docente, no con
+    un bloqueo de fila: si otra lectura ya lo está haciendo se devuelve la
+    fila como está.
+  - Los eventos de más de HORAS_EVENTOS se borran desde el trigger de
+    progreso, no desde la lectura (la tabla no debe crecer aunque nadie abra
+    el dashboard): uno de cada PODA_CADA INSERT borra como mucho PODA_MAX
+    eventos viejos, bajo un pg_try_advisory_xact_lock global para que dos
+    respuestas no poden a la vez. Una fila de docente más vieja que
+    HORAS_EVENTOS se recalcula entera aunque no vea eventos.
+
+Como los id de la secuencia no llegan en orden de commit, un evento puede
+quedar por debajo de la marca `visto`; se recoge en el siguiente recálculo
+del docente. Toda la lectura es una sola llamada a la BD.
+"""
+
+N_ACTIVIDAD   = 3
+SEG_REFRESCO  = 30
+HORAS_EVENTOS = 24
+PODA_CADA     = 100    # cada respuesta agrega ~3 eventos: 1000 por cada 100 alcanza
+PODA_MAX      = 1000
+
+SQL_TABLA = """
+    CREATE TABLE IF NOT EXISTS dashboard_docente_agregado (
+        id_docente          INTEGER          PRIMARY KEY,
+        estudiantes_activos INTEGER          NOT NULL DEFAULT 0,
+        progreso_promedio   DOUBLE PRECISION NOT NULL DEFAULT 0,
+        tema_mas_dificultad TEXT,
+        actividad           JSONB            NOT NULL DEFAULT '[]',
+        visto               BIGINT,          -- último evento incluido en el recálculo
+        visto_actividad     BIGINT,          -- último evento plegado en actividad
+        actualizado         TIMESTAMP        NOT NULL DEFAULT NOW()
+    );
+    ALTER TABLE dashboard_docente_agregado ADD COLUMN IF NOT EXISTS visto BIGINT;
+    ALTER TABLE dashboard_docente_agregado ADD COLUMN IF NOT EXISTS visto_actividad BIGINT;
+    ALTER TABLE dashboard_docente_agregado DROP COLUMN IF EXISTS sucio;
+
+    -- Solo INSERT desde los triggers: ninguna fila compartida en la respuesta
+    CREATE TABLE IF NOT EXISTS dashboard_docente_eventos (
+        id            BIGSERIAL PRIMARY KEY,
+        id_estudiante INTEGER,              -- NULL: afecta a todos los docentes
+        id_progreso   INTEGER,
+        creado        TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+    CREATE INDEX IF NOT EXISTS idx_dashboard_docente_eventos_creado
+        ON dashboard_docente_eventos (creado);
+"""
+
+# Alumnos de los salones del docente p_docente
+_ALUMNOS_DEL_DOCENTE = """
+    SELECT es.id_estudiante
+    FROM docente_salones ds
+    JOIN estudiante_salones es ON es.id_salon = ds.id_salon
+    WHERE ds.id_docente = p_docente
+"""
+
+# Eventos posteriores a v_desde que afectan al docente
+_EVENTOS_DEL_DOCENTE = f"""
+    WHERE ev.id > v_desde
+      AND (ev.id_estudiante IS NULL OR ev.id_estudiante IN ({_ALUMNOS_DEL_DOCENTE}))
+"""
+
+# Mismas consultas que el dashboard anterior, ahora dentro del recálculo
+SQL_FN_REFRESCAR = f"""
+    DROP FUNCTION IF EXISTS fn_refrescar_dashboard_docente(INTEGER);
+    CREATE OR REPLACE FUNCTION fn_refrescar_dashboard_docente(p_docente INTEGER, p_visto BIGINT)
+    RETURNS void AS $$
+    BEGIN
+        -- Quien llama tiene el advisory lock del docente; p_visto se leyó
+        -- ANTES de calcular: los eventos que lleguen mientras tanto quedan
+        -- por encima y se verán en la próxima lectura.
+        UPDATE dashboard_docente_agregado SET
+            estudiantes_activos = (
+                SELECT COUNT(DISTINCT e.id_estudiante)
+                FROM docente_salones ds
+                JOIN estudiante_salones es ON es.id_salon = ds.id_salon
+                JOIN estudiante e ON e.id_estudiante = es.id_estudiante
+                WHERE ds.id_docente = p_docente
+                  AND e.estado_estudiante = 'activo'
+            ),
+            progreso_promedio = (
+                SELECT COALESCE(AVG(sub.prom_est), 0)
+                FROM (
+                    SELECT e.id_estudiante, AVG(p.puntaje) AS prom_est
+                    FROM docente_salones ds
+                    JOIN estudiante_salones es ON es.id_salon = ds.id_salon
+                    JOIN estudiante e ON e.id_estudiante = es.id_estudiante
+                    LEFT JOIN puntajes p ON p.id_estudiante = e.id_estudiante
+                        AND p.id_competencia BETWEEN 1 AND 4
+                    WHERE ds.id_docente = p_docente
+                      AND e.estado_estudiante = 'activo'
+                    GROUP BY e.id_estudiante
+                ) sub
+            ),
+            tema_mas_dificultad = (
+                SELECT c.descripcion
+                FROM docente_salones ds
+                JOIN estudiante_salones es ON es.id_salon = ds.id_salon
+                JOIN nivel_estudiante_competencia nec
+                    ON nec.id_estudiante = es.id_estudiante
+                JOIN competencias c ON c.id_competencia = nec.id_competencia
+                WHERE ds.id_docente = p_docente
+                GROUP BY c.descripcion
+                ORDER BY AVG(nec.promedio_puntaje) ASC
+                LIMIT 1
+            ),
+            actividad = COALESCE((
+                SELECT jsonb_agg(a.entrada ORDER BY a.fecha DESC)
+                FROM (
+                    SELECT p.fecha,
+                           jsonb_build_object(
+                               'estudiante', TRIM(u.apellidos) || ', ' || TRIM(u.nombre),
+                               'tema',       c.descripcion,
+                               'fecha',      p.fecha,
+                               'estado',     p.estado) AS entrada
+                    FROM progreso p
+                    JOIN estudiante e   ON e.id_estudiante   = p.id_estudiante
+                    JOIN usuarios u     ON u.id_usuario      = e.id_usuario
+                    JOIN ejercicios ej  ON ej.id_ejercicio   = p.id_ejercicio
+                    JOIN competencias c ON c.id_competencia  = ej.id_competencia
+                    WHERE e.id_estudiante IN ({_ALUMNOS_DEL_DOCENTE})
+                    ORDER BY p.fecha DESC
+                    LIMIT {N_ACTIVIDAD}
+                ) a
+            ), '[]'::jsonb),
+            visto           = p_visto,
+            visto_actividad = GREATEST(p_visto, visto_actividad),
+            actualizado     = NOW()
+        WHERE id_docente = p_docente;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+# Entradas de actividad de los eventos de progreso en (v_desde, v_hasta]
+_ACTIVIDAD_NUEVA = f"""
+    SELECT jsonb_agg(jsonb_build_object(
+               'estudiante', TRIM(u.apellidos) || ', ' || TRIM(u.nombre),
+               'tema',       c.descripcion,
+               'fecha',      p.fecha,
+               'estado',     p.estado))
+    FROM dashboard_docente_eventos ev
+    JOIN progreso p     ON p.id_progreso    = ev.id_progreso
+    JOIN estudiante e   ON e.id_estudiante  = p.id_estudiante
+    JOIN usuarios u     ON u.id_usuario     = e.id_usuario
+    JOIN ejercicios ej  ON ej.id_ejercicio  = p.id_ejercicio
+    JOIN competencias c ON c.id_competencia = ej.id_competencia
+    {_EVENTOS_DEL_DOCENTE}
+      AND ev.id <= v_hasta
+"""
+
+SQL_FN_LEER = f"""
+    CREATE OR REPLACE FUNCTION fn_dashboard_docente(p_docente INTEGER, p_seg_refresco INTEGER)
+    RETURNS SETOF dashboard_docente_agregado AS $$
+    DECLARE
+        v_fila  dashboard_docente_agregado%ROWTYPE;
+        v_max   BIGINT;
+        v_desde BIGINT;
+        v_hasta BIGINT;
+    BEGIN
+        INSERT INTO dashboard_docente_agregado (id_docente) VALUES (p_docente)
+        ON CONFLICT (id_docente) DO NOTHING;
+
+        -- Un solo recálculo por docente a la vez. Si ya hay otro en curso se
+        -- devuelve la fila como está; solo la primera lectura lo espera.
+        IF NOT pg_try_advisory_xact_lock(hashtext('dashboard_docente'), p_docente) THEN
+            SELECT * INTO v_fila FROM dashboard_docente_agregado WHERE id_docente = p_docente;
+            IF v_fila.visto IS NOT NULL THEN
+                RETURN NEXT v_fila;
+                RETURN;
+            END IF;
+            PERFORM pg_advisory_xact_lock(hashtext('dashboard_docente'), p_docente);
+        END IF;
+
+        SELECT * INTO v_fila FROM dashboard_docente_agregado WHERE id_docente = p_docente;
+        v_desde := COALESCE(v_fila.visto, 0);
+        SELECT MAX(ev.id) INTO v_max
+        FROM dashboard_docente_eventos ev {_EVENTOS_DEL_DOCENTE};
+
+        IF v_fila.visto IS NULL
+           OR v_fila.actualizado < NOW() - make_interval(hours => {HORAS_EVENTOS})
+           OR (v_max IS NOT NULL
+               AND v_fila.actualizado < NOW() - make_interval(secs => p_seg_refresco)) THEN
+            PERFORM fn_refrescar_dashboard_docente(p_docente, GREATEST(v_max, v_desde));
+        ELSIF v_max > COALESCE(v_fila.visto_actividad, v_desde) THEN
+            -- Promedio/tema esperan al próximo recálculo; la actividad no
+            v_desde := COALESCE(v_fila.visto_actividad, v_desde);
+            v_hasta := v_max;
+            UPDATE dashboard_docente_agregado a SET
+                actividad = (
+                    SELECT COALESCE(jsonb_agg(x.entrada ORDER BY x.entrada->>'fecha' DESC), '[]'::jsonb)
+                    FROM (
+                        SELECT t.entrada
+                        FROM jsonb_array_elements(
+                                 COALESCE(({_ACTIVIDAD_NUEVA}), '[]'::jsonb) || a.actividad
+                             ) AS t(entrada)
+                        ORDER BY t.entrada->>'fecha' DESC
+                        LIMIT {N_ACTIVIDAD}
+                    ) x
+                ),
+                visto_actividad = v_hasta
+            WHERE a.id_docente = p_docente;
+        END IF;
+
+        RETURN QUERY
+            SELECT * FROM dashboard_docente_agregado WHERE id_docente = p_docente;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+# INSERT en progreso: evento con la fila nueva (la actividad se arma al leer)
+# y, una de cada PODA_CADA veces, poda acotada de los eventos viejos
+SQL_FN_PROGRESO = f"""
+    CREATE OR REPLACE FUNCTION fn_dashboard_progreso()
+    RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO dashboard_docente_eventos (id_estudiante, id_progreso)
+        VALUES (NEW.id_estudiante, NEW.id_progreso);
+        IF NEW.id_progreso % {PODA_CADA} = 0
+           AND pg_try_advisory_xact_lock(hashtext('dashboard_docente'), 0) THEN
+            DELETE FROM dashboard_docente_eventos
+            WHERE id IN (
+                SELECT id FROM dashboard_docente_eventos
+                WHERE creado < NOW() - make_interval(hours => {HORAS_EVENTOS})
+                ORDER BY creado
+                LIMIT {PODA_MAX}
+            );
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+# Puntajes / NEC de un alumno: evento del alumno
+SQL_FN_SUCIO_ALUMNO = """
+    CREATE OR REPLACE FUNCTION fn_dashboard_sucio_alumno()
+    RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO dashboard_docente_eventos (id_estudiante) VALUES (OLD.id_estudiante);
+        ELSE
+            INSERT INTO dashboard_docente_eventos (id_estudiante) VALUES (NEW.id_estudiante);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+# Matrícula, estado de alumnos, competencias: raros → evento para todos
+SQL_FN_SUCIO_TODOS = """
+    CREATE OR REPLACE FUNCTION fn_dashboard_sucio_todos()
+    RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO dashboard_docente_eventos (id_estudiante) VALUES (NULL);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+# (nombre, tabla, evento, nivel, función)
+TRIGGERS = [
+    ("trg_dashboard_progreso",        "progreso",                     "INSERT",                            "ROW",       "fn_dashboard_progreso"),
+    ("trg_dashboard_progreso_cambio", "progreso",                     "UPDATE OR DELETE",                  "STATEMENT", "fn_dashboard_sucio_todos"),
+    ("trg_dashboard_puntajes",        "puntajes",                     "INSERT OR UPDATE OR DELETE",        "ROW",       "fn_dashboard_sucio_alumno"),
+    ("trg_dashboard_nec",             "nivel_estudiante_competencia", "INSERT OR UPDATE OR DELETE",        "ROW",       "fn_dashboard_sucio_alumno"),
+    ("trg_dashboard_est_salones",     "estudiante_salones",           "INSERT OR UPDATE OR DELETE",        "STATEMENT", "fn_dashboard_sucio_todos"),
+    ("trg_dashboard_doc_salones",     "docente_salones",              "INSERT OR UPDATE OR DELETE",        "STATEMENT", "fn_dashboard_sucio_todos"),
+    # estudiante se actualiza en cada respuesta (progreso_general): solo el estado importa
+    ("trg_dashboard_estudiante",      "estudiante",                   "INSERT OR DELETE OR UPDATE OF estado_estudiante", "STATEMENT", "fn_dashboard_sucio_todos"),
+    ("trg_dashboard_competencias",    "competencias",                 "INSERT OR UPDATE OR DELETE",        "STATEMENT", "fn_dashboard_sucio_todos"),
+]
+
+
+def _sql_trigger(nombre, tabla, evento, nivel, funcion):
+    return f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = '{nombre}') THEN
+                CREATE TRIGGER {nombre}
+                AFTER {evento} ON {tabla}
+                FOR EACH {nivel} EXECUTE PROCEDURE {funcion}();
+            END IF;
+        END
+        $$
+    """
+
+
+def instalar(cursor):
+    """Tabla + funciones + triggers. Idempotente; las filas se crean al leer."""
+    cursor.execute(SQL_TABLA)
+    for sql in (SQL_FN_REFRESCAR, SQL_FN_LEER, SQL_FN_PROGRESO,
+                SQL_FN_SUCIO_ALUMNO, SQL_FN_SUCIO_TODOS):
+        cursor.execute(sql)
+    for trigger in TRIGGERS:
+        cursor.execute(_sql_trigger(*trigger))
+
+
+def leer_dashboard_docente(cursor, id_docente):
+    """
+    Datos del docente + agregados (recalculados si hacía falta) en una sola
+    consulta. None si el docente no existe.
+    """
+    cursor.execute("""
+        SELECT u.nombre, u.apellidos,
+               a.estudiantes_activos, a.progreso_promedio,
+               a.tema_mas_dificultad, a.actividad
+        FROM docente d
+        JOIN usuarios u ON u.id_usuario = d.id_usuario
+        CROSS JOIN LATERAL fn_dashboard_docente(d.id_docente, %s) a
+        WHERE d.id_docente = %s
+        LIMIT 1
+    """, (SEG_REFRESCO, id_docente))
+    return cursor.fetchone()
@@ -0,0 +1,206 @@
+"""
+Dataset de entrenamiento por (id_estudiante, id_competencia) desde PUNTAJES.
+
+train_model.py, datos_ml.py y validar_modelo.py traían el GROUP BY completo
+con fetchall() (una lista de RealDictRow) y armaban X fila por fila en
+Python, recortando cada valor a mano. Ahora:
+
+  - el agregado se lee con un cursor del servidor (Conexion.cursor_servidor)
+    en bloques, directo a arreglos NumPy reservados de antemano (el número
+    de grupos sale de la consulta de instantánea);
+  - el recorte (0-100, tendencia en [-1, 1]) y las reglas de etiqueta se
+    aplican a columnas enteras;
+  - el resultado se guarda en un .npz comprimido con la clave de la
+    instantánea de los datos y el umbral de aprobado: si nada cambió en
+    puntajes, volver a entrenar o validar lee el .npz y no repite el
+    GROUP BY. La instantánea no recorre puntajes: sale de
+    puntajes_estadisticas (una fila por grupo, mantenida por trigger:
+    filas = SUM(n), grupos y el último `actualizado`, que cambia con
+    cualquier INSERT/UPDATE/DELETE) más MAX(id_puntaje) por índice.
+
+Las columnas crudas (COLUMNAS) son las mismas para los tres scripts; cada
+uno arma sus features con features_tutor() o features_basicas().
+"""
+import os
+
+import numpy as np
+
+from conexionBD import Conexion
+
+FILAS_POR_VIAJE = 2000
+CARPETA_CACHE = os.getenv(
+    "DATASET_ML_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache_ml")
+)
+_VERSION = 1      # subir si cambia SQL_AGREGADO o COLUMNAS
+
+COLUMNAS = ("id_estudiante", "id_competencia", "total", "promedio", "minimo",
+            "maximo", "std", "aprobados", "tendencia")
+
+# grupos (2.ª columna) también sirve para reservar los arreglos de leer_agregados
+SQL_INSTANTANEA = """
+    SELECT COALESCE(SUM(pe.n), 0)                                   AS filas,
+           COUNT(*)                                                 AS grupos,
+           (SELECT COALESCE(MAX(id_puntaje), 0) FROM puntajes)      AS max_id,
+           MAX(pe.actualizado)                                      AS actualizado
+    FROM puntajes_estadisticas pe
+"""
+
+SQL_AGREGADO = """
+    SELECT
+        p.id_estudiante,
+        p.id_competencia,
+        COUNT(*),
+        AVG(p.puntaje),
+        MIN(p.puntaje),
+        MAX(p.puntaje),
+        COALESCE(STDDEV(p.puntaje), 0),
+        SUM(CASE WHEN p.puntaje >= %s THEN 1 ELSE 0 END),
+        CORR(EXTRACT(EPOCH FROM p.fecha_registro), p.puntaje)
+    FROM puntajes p
+    GROUP BY p.id_estudiante, p.id_competencia
+    ORDER BY p.id_estudiante, p.id_competencia
+"""
+
+
+def _clave(instantanea, umbral_aprobado):
+    partes = [str(v) for v in instantanea] + [f"u={float(umbral_aprobado):g}", f"v{_VERSION}"]
+    return "|".join(partes)
+
+
+def _ruta_cache(umbral_aprobado, carpeta=None):
+    return os.path.join(carpeta or CARPETA_CACHE,
+                        f"puntajes_u{float(umbral_aprobado):g}.npz")
+
+
+def _leer_cache(ruta, clave):
+    try:
+        with np.load(ruta, allow_pickle=False) as d:
+            if str(d["clave"]) != clave:
+                return None
+            return {c: d[c] for c in COLUMNAS}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _guardar_cache(ruta, clave, datos):
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = ruta + ".tmp"
+        with open(temporal, "wb") as f:
+            np.savez_compressed(f, clave=np.asarray(clave), **datos)
+        os.replace(temporal, ruta)
+    except OSError as e:
+        print(f"⚠️  No se pudo guardar la caché del dataset ({ruta}): {e}")
+
+
+def leer_agregados(cursor, grupos, filas_por_viaje=FILAS_POR_VIAJE):
+    """
+    Vuelca el resultado de SQL_AGREGADO (ya ejecutado en `cursor`) a un
+    arreglo por columna. Reserva `grupos` filas y solo crece si llegaron
+    más (respuestas insertadas entre la instantánea y la lectura).
+    """
+    n_cols = len(COLUMNAS)
+    bloque = np.empty((max(int(grupos), 1), n_cols), dtype=float)
+    n = 0
+    while True:
+        filas = cursor.fetchmany(filas_por_viaje)
+        if not filas:
+            break
+        k = len(filas)
+        if n + k > len(bloque):
+            bloque = np.resize(bloque, (max(2 * len(bloque), n + k), n_cols))
+        # None → NaN, Decimal → float en una sola conversión por bloque
+        bloque[n:n + k] = np.asarray(filas, dtype=float)
+        n += k
+    bloque = bloque[:n]
+    return {c: bloque[:, i] for i, c in enumerate(COLUMNAS)}
+
+
+def limpiar(crudos):
+    """
+    Descarta grupos sin promedio y recorta a rangos válidos (lo que hacían
+    los bucles de los scripts, por columnas).
+    """
+    total    = np.nan_to_num(crudos["total"], nan=0.0)
+    promedio = crudos["promedio"]
+    validos  = ~np.isnan(promedio) & (total > 0)
+
+    datos = {c: crudos[c][validos] for c in COLUMNAS}
+    datos["id_estudiante"]  = datos["id_estudiante"].astype(np.int64)
+    datos["id_competencia"] = datos["id_competencia"].astype(np.int64)
+    datos["total"]     = total[validos]
+    for c in ("promedio", "minimo", "maximo"):
+        datos[c] = np.clip(np.nan_to_num(datos[c], nan=0.0), 0.0, 100.0)
+    datos["std"]       = np.maximum(np.nan_to_num(datos["std"], nan=0.0), 0.0)
+    datos["aprobados"] = np.nan_to_num(datos["aprobados"], nan=0.0)
+    # CORR es NULL si todos los puntajes son iguales → sin tendencia
+    datos["tendencia"] = np.clip(np.nan_to_num(datos["tendencia"], nan=0.0), -1.0, 1.0)
+    return datos
+
+
+def cargar_dataset(umbral_aprobado, usar_cache=True, carpeta_cache=None,
+                   filas_por_viaje=FILAS_POR_VIAJE):
+    """
+    Columnas limpias (ver limpiar) de todos los grupos con puntaje. Con
+    usar_cache, solo consulta la instantánea si el .npz sigue vigente.
+    """
+    con = Conexion()
+    cur = con.cursor()
+    try:
+        cur.execute(SQL_INSTANTANEA)
+        fila = cur.fetchone()
+        instantanea = tuple(fila.values()) if isinstance(fila, dict) else tuple(fila)
+        clave = _clave(instantanea, umbral_aprobado)
+        ruta  = _ruta_cache(umbral_aprobado, carpeta_cache)
+
+        if usar_cache:
+            datos = _leer_cache(ruta, clave)
+            if datos is not None:
+                print(f"✅ Dataset desde caché ({ruta}): {len(datos['total'])} grupos")
+                return datos
+
+        servidor = con.cursor_servidor("dataset_ml", filas_por_viaje)
+        servidor.execute(SQL_AGREGADO, (umbral_aprobado,))
+        crudos = leer_agregados(servidor, instantanea[1], filas_por_viaje)
+        servidor.close()
+        con.commit()
+    finally:
+        cur.close()
+        con.close()
+
+    datos = limpiar(crudos)
+    if usar_cache:
+        _guardar_cache(ruta, clave, datos)
+    return datos
+
+
+def tasa_aprobados(datos):
+    return datos["aprobados"] / datos["total"]
+
+
+def features_tutor(datos):
+    """[total, promedio, min, max, std, tasa, tendencia] (modelo del tutor)."""
+    return np.column_stack([datos["total"], datos["promedio"], datos["minimo"],
+                            datos["maximo"], datos["std"], tasa_aprobados(datos),
+                            datos["tendencia"]])
+
+
+def features_basicas(datos):
+    """[total, promedio, min, max, tasa] (comparar_modelos / validar_modelo)."""
+    return np.column_stack([datos["total"], datos["promedio"], datos["minimo"],
+                            datos["maximo"], tasa_aprobados(datos)])
+
+
+def etiquetas_tutor(datos):
+    """Reglas de train_model.py: tasa de aprobados + tendencia."""
+    tasa, tendencia = tasa_aprobados(datos), datos["tendencia"]
+    alto = (tasa >= 0.70) & (tendencia >= -0.30)
+    bajo = (tasa < 0.35) | ((tasa < 0.55) & (tendencia < -0.30))
+    return np.select([alto, bajo], ["alto", "bajo"], "medio").astype(object)
+
+
+def etiquetas_por_promedio(promedio, umbral_bajo, umbral_medio):
+    """bajo < umbral_bajo ≤ medio < umbral_medio ≤ alto."""
+    return np.select([promedio < umbral_bajo, promedio < umbral_medio],
+                     ["bajo", "medio"], "alto").astype(object)
@@ -0,0 +1,222 @@
+"""
+Estadísticas incrementales de puntajes por (id_estudiante, id_competencia).
+
+calcular_features_competencia (ws/tutor.py) recalculaba COUNT/AVG/MIN/MAX/
+STDDEV/CORR sobre TODO el historial de puntajes en cada predicción: el costo
+crecía con el uso de la app. Ahora la tabla puntajes_estadisticas guarda los
+acumulados y se mantiene con un trigger en puntajes:
+
+  - INSERT          → actualización incremental (Welford) de media/varianza
+                      del puntaje y del tiempo, co-momento tiempo×puntaje
+                      (para CORR), mínimo, máximo y aprobados.
+  - UPDATE / DELETE → recálculo completo de la clave afectada (son raros:
+                      correcciones del docente).
+
+Así se cubren también los inserts del CRUD web, no solo los de esta API.
+Con eso las 7 features salen de una lectura por clave primaria.
+
+Se consideran las filas con puntaje y fecha_registro no nulos (todas las
+inserciones usan NOW()); total_intentos cuenta todas las filas, igual que
+el COUNT(*) anterior. El umbral de aprobado queda fijo en el trigger: si se
+cambia UMBRAL_APROBADO hay que reinstalar y reconstruir
+(python reconstruir_estadisticas.py).
+"""
+
+UMBRAL_APROBADO = 60.0
+
+COLUMNAS = """
+    id_estudiante, id_competencia, n, n_p, media_p, m2_p, min_p, max_p,
+    aprobados, media_t, m2_t, c_tp, actualizado
+"""
+
+# Agregado equivalente a las estadísticas incrementales (backfill / recálculo).
+# VAR_POP·n y COVAR_POP·n son los acumulados M2 y C de Welford.
+_SQL_AGREGADO = f"""
+    SELECT id_estudiante, id_competencia,
+           COUNT(*)                                   AS n,
+           COUNT(y)                                   AS n_p,
+           COALESCE(AVG(y), 0)                        AS media_p,
+           COALESCE(VAR_POP(y) * COUNT(y), 0)         AS m2_p,
+           MIN(y)                                     AS min_p,
+           MAX(y)                                     AS max_p,
+           COUNT(*) FILTER (WHERE y >= {UMBRAL_APROBADO}) AS aprobados,
+           COALESCE(AVG(x), 0)                        AS media_t,
+           COALESCE(VAR_POP(x) * COUNT(y), 0)         AS m2_t,
+           COALESCE(COVAR_POP(x, y) * COUNT(y), 0)    AS c_tp,
+           NOW()                                      AS actualizado
+    FROM (
+        SELECT id_estudiante, id_competencia,
+               CASE WHEN fecha_registro IS NOT NULL
+                    THEN puntaje::DOUBLE PRECISION END                  AS y,
+               CASE WHEN puntaje IS NOT NULL
+                    THEN EXTRACT(EPOCH FROM fecha_registro)::DOUBLE PRECISION END AS x
+        FROM puntajes
+        {{filtro}}
+    ) p
+    GROUP BY id_estudiante, id_competencia
+"""
+
+SQL_TABLA = """
+    CREATE TABLE IF NOT EXISTS puntajes_estadisticas (
+        id_estudiante  INTEGER          NOT NULL,
+        id_competencia INTEGER          NOT NULL,
+        n              INTEGER          NOT NULL DEFAULT 0,
+        n_p            INTEGER          NOT NULL DEFAULT 0,
+        media_p        DOUBLE PRECISION NOT NULL DEFAULT 0,
+        m2_p           DOUBLE PRECISION NOT NULL DEFAULT 0,
+        min_p          DOUBLE PRECISION,
+        max_p          DOUBLE PRECISION,
+        aprobados      INTEGER          NOT NULL DEFAULT 0,
+        media_t        DOUBLE PRECISION NOT NULL DEFAULT 0,
+        m2_t           DOUBLE PRECISION NOT NULL DEFAULT 0,
+        c_tp           DOUBLE PRECISION NOT NULL DEFAULT 0,
+        actualizado    TIMESTAMP        NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (id_estudiante, id_competencia)
+    )
+"""
+
+_AGREGADO_CLAVE = _SQL_AGREGADO.format(
+    filtro="WHERE id_estudiante = p_estudiante AND id_competencia = p_competencia"
+)
+_AGREGADO_SI_VACIA = _SQL_AGREGADO.format(
+    filtro="WHERE NOT EXISTS (SELECT 1 FROM puntajes_estadisticas)"
+)
+_AGREGADO_TODO = _SQL_AGREGADO.format(filtro="")
+
+SQL_FN_RECALCULAR = f"""
+    CREATE OR REPLACE FUNCTION fn_recalcular_puntajes_estadisticas(
+        p_estudiante INTEGER, p_competencia INTEGER
+    ) RETURNS void AS $$
+    BEGIN
+        DELETE FROM puntajes_estadisticas
+        WHERE id_estudiante = p_estudiante AND id_competencia = p_competencia;
+        INSERT INTO puntajes_estadisticas ({COLUMNAS})
+        {_AGREGADO_CLAVE};
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+SQL_FN_TRIGGER = f"""
+    CREATE OR REPLACE FUNCTION fn_puntajes_estadisticas()
+    RETURNS trigger AS $$
+    DECLARE
+        s  puntajes_estadisticas%ROWTYPE;
+        x  DOUBLE PRECISION;
+        y  DOUBLE PRECISION;
+        dx DOUBLE PRECISION;
+        dy DOUBLE PRECISION;
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM fn_recalcular_puntajes_estadisticas(OLD.id_estudiante, OLD.id_competencia);
+            IF TG_OP = 'UPDATE'
+               AND (NEW.id_estudiante, NEW.id_competencia)
+                   IS DISTINCT FROM (OLD.id_estudiante, OLD.id_competencia) THEN
+                PERFORM fn_recalcular_puntajes_estadisticas(NEW.id_estudiante, NEW.id_competencia);
+            END IF;
+            RETURN NULL;
+        END IF;
+
+        INSERT INTO puntajes_estadisticas (id_estudiante, id_competencia)
+        VALUES (NEW.id_estudiante, NEW.id_competencia)
+        ON CONFLICT (id_estudiante, id_competencia) DO NOTHING;
+
+        SELECT * INTO s FROM puntajes_estadisticas
+        WHERE id_estudiante = NEW.id_estudiante AND id_competencia = NEW.id_competencia
+        FOR UPDATE;
+
+        s.n := s.n + 1;
+        IF NEW.puntaje IS NOT NULL AND NEW.fecha_registro IS NOT NULL THEN
+            y  := NEW.puntaje;
+            x  := EXTRACT(EPOCH FROM NEW.fecha_registro);
+            s.n_p     := s.n_p + 1;
+            dy        := y - s.media_p;
+            dx        := x - s.media_t;
+            s.media_p := s.media_p + dy / s.n_p;
+            s.media_t := s.media_t + dx / s.n_p;
+            s.m2_p    := s.m2_p + dy * (y - s.media_p);
+            s.m2_t    := s.m2_t + dx * (x - s.media_t);
+            s.c_tp    := s.c_tp + dx * (y - s.media_p);
+            s.min_p   := LEAST(s.min_p, y);
+            s.max_p   := GREATEST(s.max_p, y);
+            IF y >= {UMBRAL_APROBADO} THEN
+                s.aprobados := s.aprobados + 1;
+            END IF;
+        END IF;
+
+        UPDATE puntajes_estadisticas SET
+            n = s.n, n_p = s.n_p, media_p = s.media_p, m2_p = s.m2_p,
+            min_p = s.min_p, max_p = s.max_p, aprobados = s.aprobados,
+            media_t = s.media_t, m2_t = s.m2_t, c_tp = s.c_tp,
+            actualizado = NOW()
+        WHERE id_estudiante = NEW.id_estudiante AND id_competencia = NEW.id_competencia;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+SQL_TRIGGER = """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_trigger WHERE tgname = 'trg_puntajes_estadisticas'
+        ) THEN
+            CREATE TRIGGER trg_puntajes_estadisticas
+            AFTER INSERT OR UPDATE OR DELETE ON puntajes
+            FOR EACH ROW EXECUTE PROCEDURE fn_puntajes_estadisticas();
+        END IF;
+    END
+    $$
+"""
+
+# Backfill inicial: solo si la tabla está vacía (primera instalación)
+SQL_BACKFILL_INICIAL = f"""
+    INSERT INTO puntajes_estadisticas ({COLUMNAS})
+    {_AGREGADO_SI_VACIA}
+    ON CONFLICT (id_estudiante, id_competencia) DO NOTHING
+"""
+
+# Lectura de las 7 features con los MISMOS nombres de columna que el agregado
+# anterior: calcular_features_competencia no cambia su post-proceso.
+# Las 7 features del árbol desde los acumulados; {t} = alias de la tabla
+# (con punto) para usarlas en un JOIN (models/prediccion_salon.py).
+COLUMNAS_FEATURES = """
+           {t}n                                           AS total_intentos,
+           CASE WHEN {t}n_p > 0 THEN {t}media_p END       AS promedio_puntaje,
+           {t}min_p                                       AS min_puntaje,
+           {t}max_p                                       AS max_puntaje,
+           CASE WHEN {t}n_p > 1
+                THEN SQRT(GREATEST({t}m2_p, 0) / ({t}n_p - 1))
+                ELSE 0 END                                AS std_puntaje,
+           {t}aprobados                                   AS num_aprobados,
+           CASE WHEN {t}m2_t > 0 AND {t}m2_p > 0
+                THEN {t}c_tp / SQRT({t}m2_t * {t}m2_p) END AS tendencia
+"""
+
+SQL_FEATURES = f"""
+    SELECT {COLUMNAS_FEATURES.format(t="")}
+    FROM puntajes_estadisticas
+    WHERE id_estudiante = %s AND id_competencia = %s
+"""
+
+
+def instalar(cursor):
+    """Tabla + funciones + trigger + backfill si la tabla es nueva. Idempotente."""
+    cursor.execute(SQL_TABLA)
+    cursor.execute(SQL_FN_RECALCULAR)
+    cursor.execute(SQL_FN_TRIGGER)
+    # Crear el trigger bloquea las escrituras en puntajes hasta el commit:
+    # el backfill de la misma transacción no se cruza con inserts nuevos.
+    cursor.execute(SQL_TRIGGER)
+    cursor.execute(SQL_BACKFILL_INICIAL)
+
+
+def reconstruir(cursor):
+    """
+    Recalcula toda la tabla desde puntajes (p.ej. tras cambiar el umbral).
+    Bloquea las escrituras en puntajes durante la transacción.
+    Retorna el número de claves (estudiante, competencia) escritas.
+    """
+    cursor.execute("LOCK TABLE puntajes IN SHARE ROW EXCLUSIVE MODE")
+    cursor.execute("DELETE FROM puntajes_estadisticas")
+    cursor.execute(f"INSERT INTO puntajes_estadisticas ({COLUMNAS}) {_AGREGADO_TODO}")
+    return cursor.rowcount
@@ -0,0 +1,107 @@
+"""
+Estado NEC (nivel_estudiante_competencia) de UN alumno durante una petición.
+
+ejercicio_siguiente leía NEC con leer_nec() hasta tres veces (nivel base,
+dentro de predecir_nivel_competencia y para mostrar el nivel en la UI) más
+un AVG(nivel_actual) aparte cuando no venía idDominio. EstadoNEC trae todas
+las filas del alumno de una vez y responde en memoria:
+
+  leer(id_competencia)    → (nivel, score), misma semántica que leer_nec():
+                            sin fila se inicializa desde AVG(puntajes) y
+                            queda pendiente un INSERT ... DO NOTHING.
+  nivel_promedio()        → ROUND(AVG(nivel_actual)) de las competencias 1-4.
+  guardar(cursor)         → UNA sentencia con las inicializaciones pendientes.
+
+Las filas se leen dentro de leer_estado_estudiante (SQL_FILAS_NEC).
+
+El flujo de /tutor/responder ya lee y escribe NEC en sus dos viajes
+(models/registro_respuesta.py) y no usa esta clase.
+"""
+import math
+
+from models.scoring import score_to_nivel
+
+# Fragmento para incluir en otra consulta (ver leer_estado_estudiante):
+# filas NEC del alumno + promedio de puntajes de las competencias sin NEC.
+# Requiere el parámetro nombrado %(id)s.
+SQL_FILAS_NEC = """
+    SELECT json_agg(json_build_object(
+               'id_competencia', x.id_competencia,
+               'nivel',          x.nivel_actual,
+               'score',          x.score,
+               'existe',         x.existe,
+               'avg_p',          x.avg_p))
+    FROM (
+        SELECT n.id_competencia, n.nivel_actual,
+               COALESCE(n.promedio_puntaje, 0) AS score,
+               TRUE AS existe, NULL::DOUBLE PRECISION AS avg_p
+        FROM nivel_estudiante_competencia n
+        WHERE n.id_estudiante = %(id)s
+        UNION ALL
+        SELECT p.id_competencia, NULL, 0, FALSE, AVG(p.puntaje)::DOUBLE PRECISION
+        FROM puntajes p
+        WHERE p.id_estudiante = %(id)s
+          AND NOT EXISTS (
+              SELECT 1 FROM nivel_estudiante_competencia n2
+              WHERE n2.id_estudiante  = p.id_estudiante
+                AND n2.id_competencia = p.id_competencia
+          )
+        GROUP BY p.id_competencia
+    ) x
+"""
+
+
+class EstadoNEC:
+
+    def __init__(self, id_estudiante, filas):
+        self.id_estudiante = id_estudiante
+        self._niveles      = {}     # id_competencia → (nivel, score) con fila en NEC
+        self._avg_puntajes = {}     # id_competencia → AVG(puntajes) sin fila en NEC
+        self._nuevos       = set()  # pendientes de INSERT ... DO NOTHING
+        for f in filas or []:
+            comp = int(f["id_competencia"])
+            if f.get("existe"):
+                self._niveles[comp] = (int(f.get("nivel") or 1), float(f.get("score") or 0))
+            else:
+                self._avg_puntajes[comp] = float(f.get("avg_p") or 0)
+
+    def leer(self, id_competencia):
+        """(nivel_actual, score). Inicializa en memoria si no hay fila."""
+        if id_competencia not in self._niveles:
+            score_ini = self._avg_puntajes.get(id_competencia, 0.0)
+            self._niveles[id_competencia] = (score_to_nivel(score_ini), score_ini)
+            self._nuevos.add(id_competencia)
+        return self._niveles[id_competencia]
+
+    def nivel_promedio(self):
+        """COALESCE(ROUND(AVG(nivel_actual))::int, 1) sobre competencias 1-4."""
+        niveles = [nivel for comp, (nivel, _) in self._niveles.items() if 1 <= comp <= 4]
+        if not niveles:
+            return 1
+        # ROUND de PostgreSQL redondea .5 hacia arriba (round() de Python no)
+        return int(math.floor(sum(niveles) / len(niveles) + 0.5))
+
+    @property
+    def pendiente(self):
+        return bool(self._nuevos)
+
+    def guardar(self, cursor):
+        """Escribe lo pendiente en una sola sentencia. No hace commit."""
+        if not self.pendiente:
+            return
+        params  = {"id": self.id_estudiante}
+        valores = []
+        for i, comp in enumerate(sorted(self._nuevos)):
+            nivel, score = self._niveles[comp]
+            params[f"c{i}"] = comp
+            params[f"n{i}"] = nivel
+            params[f"s{i}"] = score
+            valores.append(f"(%(id)s, %(c{i})s, %(n{i})s, %(s{i})s, 0, NOW())")
+        cursor.execute(f"""
+            INSERT INTO nivel_estudiante_competencia
+                (id_estudiante, id_competencia, nivel_actual,
+                 promedio_puntaje, ejercicios_considerados, fecha_ultimo_update)
+            VALUES {", ".join(valores)}
+            ON CONFLICT (id_estudiante, id_competencia) DO NOTHING
+        """, params)
+        self._nuevos.clear()
@@ -0,0 +1,192 @@
+"""
+Eventos en vivo para el docente: alertas de racha y actividad de la clase.
+
+El panel del docente consultaba /docentes/<id>/alertas y
+/dashboard/docente/<id> cada pocos segundos para ver quién estaba atascado.
+Ahora /tutor/responder publica, después del commit:
+
+  actividad → cada respuesta (alumno, competencia, estado, fecha)
+  alerta    → cuando una racha negativa llega a N_RACHA_ALERTA (el mismo
+              momento en que el trigger escribe alertas_docente, ver rachas.py)
+
+y GET /docentes/<id>/eventos los entrega por Server-Sent Events, filtrados
+por los alumnos del docente.
+
+Publicar y suscribirse es en memoria (BusEventos). Para que un evento
+publicado por un worker de gunicorn llegue a los suscriptores de los demás,
+el bus escribe en un AnilloCompartido: un buffer circular en un mmap anónimo
+creado antes del fork (--preload), igual que las generaciones de
+cache_respuestas.py. El mismo proceso despierta a sus suscriptores al
+instante; los demás workers lo ven en la siguiente consulta al anillo (cada
+ESPERA_SEG). Es la versión local de un pub/sub externo (Redis, LISTEN/NOTIFY):
+sin --preload cada worker tiene su anillo y solo ve sus propios eventos.
+
+El número de secuencia del anillo es el `id:` del evento SSE: un cliente que
+se reconecta con Last-Event-ID recibe lo que se perdió, si sigue en el anillo.
+"""
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+import threading
+import time
+
+from models.rachas import N_RACHA_ALERTA
+
+RANURAS     = 1024
+TAM_RANURA  = 1024        # bytes por evento, cabecera incluida
+ESPERA_SEG  = 0.5         # cada cuánto se mira el anillo por eventos de otros workers
+
+_CABECERA = struct.Struct("Q")      # última secuencia publicada
+_RANURA   = struct.Struct("QI")     # secuencia de la ranura, longitud del JSON
+
+
+class AnilloCompartido:
+    """
+    Buffer circular de eventos compartido entre procesos hijos del mismo
+    master. Un solo escritor a la vez (lock entre procesos); los lectores no
+    bloquean: cada ranura lleva su secuencia antes y después de copiarla, y se
+    descarta si otro escritor la pisó mientras tanto.
+    """
+
+    def __init__(self, ranuras=RANURAS, tam_ranura=TAM_RANURA):
+        self.ranuras    = ranuras
+        self.tam_ranura = tam_ranura
+        self._mem       = mmap.mmap(-1, _CABECERA.size + ranuras * tam_ranura)
+        try:
+            self._lock = multiprocessing.Lock()
+        except (OSError, ImportError):     # pragma: no cover - sin semáforos POSIX
+            self._lock = threading.Lock()
+
+    def _offset(self, seq):
+        return _CABECERA.size + (seq % self.ranuras) * self.tam_ranura
+
+    def ultimo(self):
+        return _CABECERA.unpack_from(self._mem, 0)[0]
+
+    def publicar(self, datos):
+        """Escribe `datos` (bytes). Retorna la secuencia, o None si no cabe."""
+        if len(datos) > self.tam_ranura - _RANURA.size:
+            return None
+        # Con timeout: un worker muerto con el lock no bloquea a los demás
+        if not self._lock.acquire(timeout=1):
+            return None
+        try:
+            seq = self.ultimo() + 1
+            off = self._offset(seq)
+            _RANURA.pack_into(self._mem, off, 0, 0)
+            inicio = off + _RANURA.size
+            self._mem[inicio:inicio + len(datos)] = datos
+            _RANURA.pack_into(self._mem, off, seq, len(datos))
+            _CABECERA.pack_into(self._mem, 0, seq)
+            return seq
+        finally:
+            self._lock.release()
+
+    def leer_desde(self, desde):
+        """(última secuencia, [(seq, bytes)]) con los eventos posteriores a `desde`."""
+        hasta = self.ultimo()
+        desde = max(desde, hasta - self.ranuras)
+        eventos = []
+        for seq in range(desde + 1, hasta + 1):
+            off = self._offset(seq)
+            antes, n = _RANURA.unpack_from(self._mem, off)
+            if antes != seq:
+                continue
+            inicio = off + _RANURA.size
+            datos  = bytes(self._mem[inicio:inicio + n])
+            if _RANURA.unpack_from(self._mem, off)[0] == seq:
+                eventos.append((seq, datos))
+        return hasta, eventos
+
+
+class BusEventos:
+
+    def __init__(self, anillo=None, espera_seg=ESPERA_SEG):
+        self.anillo      = anillo or AnilloCompartido()
+        self.espera_seg  = espera_seg
+        self._cond       = threading.Condition()
+        self._pid        = os.getpid()
+        self._metricas   = {"publicados": 0, "descartados": 0, "entregados": 0}
+
+    def _verificar_fork(self):
+        if self._pid != os.getpid():
+            self._pid      = os.getpid()
+            self._metricas = dict.fromkeys(self._metricas, 0)
+
+    def publicar(self, tipo, id_estudiante, datos):
+        """Publica un evento para los docentes del alumno. Retorna la secuencia o None."""
+        evento = {"tipo": tipo, "idEstudiante": int(id_estudiante), "datos": datos}
+        seq = self.anillo.publicar(json.dumps(evento, default=str).encode("utf-8"))
+        with self._cond:
+            self._verificar_fork()
+            self._metricas["publicados" if seq else "descartados"] += 1
+            self._cond.notify_all()
+        return seq
+
+    def ultimo(self):
+        return self.anillo.ultimo()
+
+    def esperar(self, desde, timeout, ids_estudiantes=None):
+        """
+        Espera hasta `timeout` segundos por eventos posteriores a `desde`.
+        Retorna (nueva posición, [(seq, evento)]) filtrando por alumnos.
+        """
+        limite = time.monotonic() + timeout
+        while True:
+            hasta, crudos = self.anillo.leer_desde(desde)
+            eventos = []
+            for seq, datos in crudos:
+                evento = json.loads(datos)
+                if ids_estudiantes is None or evento["idEstudiante"] in ids_estudiantes:
+                    eventos.append((seq, evento))
+            restante = limite - time.monotonic()
+            if eventos or restante <= 0:
+                with self._cond:
+                    self._verificar_fork()
+                    self._metricas["entregados"] += len(eventos)
+                return hasta, eventos
+            desde = hasta
+            with self._cond:
+                if self.anillo.ultimo() == desde:
+                    self._cond.wait(min(self.espera_seg, restante))
+
+    def metricas(self):
+        with self._cond:
+            self._verificar_fork()
+            return dict(self._metricas, pid=os.getpid(), ultimo=self.ultimo())
+
+
+BUS = BusEventos()
+
+
+def publicar_respuesta(id_estudiante, res, modo):
+    """Eventos de una respuesta ya confirmada (/tutor/responder). Nunca lanza."""
+    try:
+        BUS.publicar("actividad", id_estudiante, {
+            "idCompetencia": res["id_competencia"],
+            "estado":        res["estado"],
+            "modo":          modo,
+            "fecha":         time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+        # Solo al cruzar el umbral en repaso (evaluación no mueve la racha)
+        if modo == "repaso" and res["racha_anterior"] > -N_RACHA_ALERTA >= res["racha"]:
+            BUS.publicar("alerta", id_estudiante, {
+                "idCompetencia": res["id_competencia"],
+                "tipo":          "racha_negativa",
+                "longitud":      N_RACHA_ALERTA,
+            })
+    except Exception as e:
+        print(f"⚠️  No se pudo publicar el evento de la respuesta: {e}")
+
+
+def formato_sse(evento, seq=None, nombre=None):
+    """Un mensaje SSE (id, event, data) terminado en línea en blanco."""
+    lineas = []
+    if seq is not None:
+        lineas.append(f"id: {seq}")
+    if nombre:
+        lineas.append(f"event: {nombre}")
+    lineas.append("data: " + json.dumps(evento, default=str, ensure_ascii=False))
+    return "\n".join(lineas) + "\n\n"
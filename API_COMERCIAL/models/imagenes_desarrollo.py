@@ -0,0 +1,111 @@
+"""
+Normalización de las fotos del desarrollo y variantes por tamaño.
+
+Las fotos llegaban con la resolución de la cámara del celular (3-10 MB) y
+/desarrollos/imagen/<archivo> servía siempre el original, también en las
+pantallas del docente que muestran la foto de toda una clase. Al recibirlas:
+
+  - se aplica la orientación EXIF y se descarta el resto de metadatos
+    (ubicación, modelo del celular, ...),
+  - se reduce a TAMANOS["original"] px en el lado mayor,
+  - se re-codifica a WebP (FORMATO) y
+  - se generan las variantes "media" y "mini" (<base>__media.webp, ...).
+
+/desarrollos/imagen/<archivo>?tam=mini sirve la variante; si la foto es
+anterior a este cambio, la variante se genera en la primera petición.
+
+PDF y GIF se guardan tal cual. Pillow es opcional: si no está instalado
+(o la imagen no se puede leer) se conserva el archivo original.
+"""
+import os
+
+try:
+    from PIL import Image, ImageOps
+    Image.MAX_IMAGE_PIXELS = 60_000_000     # ~60 MP: más que cualquier cámara de celular
+except ImportError:                          # pragma: no cover - depende del entorno
+    Image = ImageOps = None
+
+TAMANOS = {"original": 1600, "media": 800, "mini": 240}   # lado mayor en px
+FORMATO = "WEBP"
+EXTENSION = ".webp"
+CALIDAD = 80
+EXT_NORMALIZABLES = {".jpg", ".jpeg", ".png", ".webp"}
+_SEPARADOR = "__"
+
+
+def pillow_disponible():
+    return Image is not None
+
+
+def nombre_variante(nombre, tam):
+    """resp_5.webp + "mini" → resp_5__mini.webp ("original" devuelve el mismo)."""
+    if tam == "original":
+        return nombre
+    base, _ = os.path.splitext(nombre)
+    return f"{base}{_SEPARADOR}{tam}{EXTENSION}"
+
+
+def _abrir(ruta):
+    img = Image.open(ruta)
+    # JPEG: decodificar ya reducido (mucho más rápido que abrir a 12 MP)
+    img.draft("RGB", (TAMANOS["original"], TAMANOS["original"]))
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        fondo = Image.new("RGB", img.size, (255, 255, 255))
+        fondo.paste(img, mask=img.getchannel("A"))
+        return fondo
+    return img.convert("RGB")
+
+
+def _guardar(img, lado, ruta):
+    copia = img.copy()
+    copia.thumbnail((lado, lado), Image.LANCZOS)
+    temporal = ruta + ".tmp"
+    # Sin exif=...: Pillow no copia metadatos al re-codificar
+    copia.save(temporal, FORMATO, quality=CALIDAD, method=4)
+    os.replace(temporal, ruta)
+
+
+def normalizar(ruta_origen, carpeta, base):
+    """
+    Normaliza `ruta_origen` y genera las variantes en `carpeta` como
+    <base>.webp, <base>__media.webp, <base>__mini.webp. Borra el origen.
+    Retorna el nombre principal, o None si no se pudo (el origen queda intacto).
+    """
+    ext = os.path.splitext(ruta_origen)[1].lower()
+    if not pillow_disponible() or ext not in EXT_NORMALIZABLES:
+        return None
+    try:
+        img = _abrir(ruta_origen)
+        principal = base + EXTENSION
+        for tam, lado in TAMANOS.items():
+            _guardar(img, lado, os.path.join(carpeta, nombre_variante(principal, tam)))
+    except Exception as e:
+        print(f"⚠️  No se pudo normalizar {os.path.basename(ruta_origen)}: {e}")
+        return None
+    if os.path.abspath(ruta_origen) != os.path.abspath(os.path.join(carpeta, principal)):
+        os.remove(ruta_origen)
+    return principal
+
+
+def variante(carpeta, nombre, tam):
+    """
+    Nombre del archivo a servir para `nombre` en el tamaño `tam`. Genera la
+    variante si falta (fotos anteriores). Si no se puede, devuelve `nombre`.
+    """
+    if tam not in TAMANOS or tam == "original":
+        return nombre
+    destino = nombre_variante(nombre, tam)
+    if os.path.exists(os.path.join(carpeta, destino)):
+        return destino
+    origen = os.path.join(carpeta, nombre)
+    if (not pillow_disponible() or not os.path.exists(origen)
+            or os.path.splitext(nombre)[1].lower() not in EXT_NORMALIZABLES):
+        return nombre
+    try:
+        _guardar(_abrir(origen), TAMANOS[tam], os.path.join(carpeta, destino))
+        return destino
+    except Exception as e:
+        print(f"⚠️  No se pudo generar {destino}: {e}")
+        return nombre
@@ -0,0 +1,187 @@
+"""
+Índice en memoria de las carpetas de imágenes (ejercicios_ayuda y
+desarrollos_alumno) para /ejercicios/imagen/ y /desarrollos/imagen/.
+
+Antes cada petición hacía os.path.exists (dos veces para los desarrollos,
+una por carpeta), adivinaba el mimetype y respondía el archivo completo con
+un ETag derivado de la ruta. Ahora:
+
+  - la carpeta se lista una vez (os.scandir) y cada entrada guarda tamaño,
+    mtime, mimetype y un ETag fuerte (sha256 del contenido, calculado la
+    primera vez que se sirve y reutilizado mientras tamaño/mtime no cambien);
+  - una entrada se re-verifica con os.stat como máximo cada REVALIDAR_SEG
+    (otro worker pudo reemplazarla); un nombre que no está en el índice se
+    busca en disco (archivos nuevos de otro worker) como máximo cada
+    AUSENTE_SEG: así el fallback de /desarrollos/imagen/ a la carpeta del
+    repo no prueba la carpeta principal en cada petición;
+  - If-None-Match / If-Modified-Since → 304 sin abrir el archivo;
+  - Range → 206 (send_file con conditional=True).
+
+Los archivos que escribe este proceso (subidas, variantes) se registran con
+registrar() para no esperar a la re-verificación.
+"""
+import hashlib
+import mimetypes
+import os
+import stat
+import threading
+import time
+
+from flask import request, send_file
+
+REVALIDAR_SEG = 5.0
+MAX_AGE_INMUTABLE_SEG = 365 * 24 * 3600
+AUSENTE_SEG   = 1.0     # un nombre que no existe no se vuelve a buscar en disco antes de esto
+MAX_AGE_SEG   = 3600
+
+
+class Entrada:
+    __slots__ = ("nombre", "ruta", "tamano", "mtime_ns", "mimetype", "_etag",
+                 "verificada", "inmutable")
+
+    def __init__(self, nombre, ruta, st, inmutable=False):
+        self.nombre     = nombre
+        self.ruta       = ruta
+        self.tamano     = st.st_size
+        self.mtime_ns   = st.st_mtime_ns
+        self.mimetype   = mimetypes.guess_type(nombre)[0] or "image/jpeg"
+        # En el almacén por contenido el nombre ya es el hash
+        self._etag      = os.path.splitext(nombre)[0] if inmutable else None
+        self.verificada = time.monotonic()
+        self.inmutable  = inmutable
+
+    @property
+    def mtime(self):
+        return self.mtime_ns / 1e9
+
+    @property
+    def etag(self):
+        if self._etag is None:
+            h = hashlib.sha256()
+            with open(self.ruta, "rb") as f:
+                for bloque in iter(lambda: f.read(1 << 16), b""):
+                    h.update(bloque)
+            self._etag = h.hexdigest()[:32]
+        return self._etag
+
+    def igual(self, st):
+        return self.tamano == st.st_size and self.mtime_ns == st.st_mtime_ns
+
+
+class IndiceCarpeta:
+
+    def __init__(self, carpeta, revalidar_seg=REVALIDAR_SEG, inmutable=False):
+        self.carpeta       = carpeta
+        self.revalidar_seg = revalidar_seg
+        self.inmutable     = inmutable
+        self._lock         = threading.Lock()
+        self._entradas     = None      # se llena en el primer uso (después del fork)
+        self._ausentes     = {}        # nombre → monotonic de la última búsqueda fallida
+
+    def _escanear(self):
+        entradas = {}
+        try:
+            with os.scandir(self.carpeta) as it:
+                for d in it:
+                    if d.is_file() and not d.name.startswith("."):
+                        entradas[d.name] = Entrada(d.name, d.path, d.stat(), self.inmutable)
+        except FileNotFoundError:
+            pass
+        return entradas
+
+    def _stat(self, nombre):
+        try:
+            return os.stat(os.path.join(self.carpeta, nombre))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    def buscar(self, nombre):
+        """Entrada vigente para `nombre` o None. `nombre` ya debe estar saneado."""
+        with self._lock:
+            if self._entradas is None:
+                self._entradas = self._escanear()
+            ahora   = time.monotonic()
+            entrada = self._entradas.get(nombre)
+            if entrada is not None and ahora - entrada.verificada < self.revalidar_seg:
+                return entrada
+            if entrada is None and ahora - self._ausentes.get(nombre, -AUSENTE_SEG) < AUSENTE_SEG:
+                return None
+
+        st = self._stat(nombre)
+        with self._lock:
+            if st is None or not stat.S_ISREG(st.st_mode):
+                self._entradas.pop(nombre, None)
+                if len(self._ausentes) > 4096:
+                    self._ausentes.clear()
+                self._ausentes[nombre] = time.monotonic()
+                return None
+            self._ausentes.pop(nombre, None)
+            if entrada is not None and entrada.igual(st):
+                entrada.verificada = time.monotonic()
+                return entrada
+            entrada = Entrada(nombre, os.path.join(self.carpeta, nombre), st, self.inmutable)
+            self._entradas[nombre] = entrada
+            return entrada
+
+    def registrar(self, nombre):
+        """Un archivo nuevo o reemplazado por este proceso."""
+        with self._lock:
+            if self._entradas is not None:
+                self._entradas.pop(nombre, None)
+            self._ausentes.pop(nombre, None)
+        return self.buscar(nombre)
+
+    def metricas(self):
+        with self._lock:
+            return {"carpeta": self.carpeta,
+                    "entradas": len(self._entradas or {})}
+
+
+_INDICES = {}
+_INDICES_LOCK = threading.Lock()
+
+
+def indice(carpeta, inmutable=False):
+    """
+    Índice único por carpeta en este proceso. inmutable=True para el almacén
+    por contenido: ETag = nombre y Cache-Control immutable. Pedir la misma
+    carpeta con otro `inmutable` es un error: el primero que la tocara
+    decidiría cómo se sirve para todos.
+    """
+    clave = os.path.abspath(carpeta)
+    with _INDICES_LOCK:
+        if clave not in _INDICES:
+            _INDICES[clave] = IndiceCarpeta(clave, inmutable=inmutable)
+        idx = _INDICES[clave]
+    if idx.inmutable != inmutable:
+        raise ValueError(f"Índice de {clave} ya creado con inmutable={idx.inmutable}")
+    return idx
+
+
+def registrar(carpeta, nombre, inmutable=False):
+    return indice(carpeta, inmutable).registrar(nombre)
+
+
+def responder(entrada):
+    """Respuesta para la entrada: 304 si el cliente ya la tiene, 206 con Range, o 200."""
+    etag = entrada.etag
+    if request.if_none_match:
+        no_modificado = request.if_none_match.contains(etag)
+    else:
+        ims = request.if_modified_since
+        no_modificado = ims is not None and int(entrada.mtime) <= ims.timestamp()
+
+    max_age = MAX_AGE_INMUTABLE_SEG if entrada.inmutable else MAX_AGE_SEG
+    if no_modificado:
+        from flask import current_app
+        rv = current_app.response_class(status=304)
+        rv.set_etag(etag)
+        rv.last_modified = entrada.mtime
+        rv.cache_control.public  = True
+        rv.cache_control.max_age = max_age
+    else:
+        rv = send_file(entrada.ruta, mimetype=entrada.mimetype, etag=etag,
+                       last_modified=entrada.mtime, max_age=max_age, conditional=True)
+    if entrada.inmutable:
+        rv.cache_control.immutable = True
+    return rv
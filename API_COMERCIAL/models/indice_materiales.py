@@ -0,0 +1,153 @@
+"""
+Índice en memoria del material de estudio para sugerir tras un error (uno
+por worker de gunicorn).
+
+Al fallar en repaso, la lectura de contexto de /tutor/responder (y la de
+/tutor/responder_lote) armaba con json_agg todo el material candidato
+(el enlazado al ejercicio y el genérico de la competencia) en cada
+respuesta, y se elegía uno al azar sin mirar qué había abierto ya el
+alumno. El material cambia muy poco, así que:
+
+  - el índice guarda el material agrupado por ejercicio y, el genérico
+    (sin ejercicio), por competencia ordenado por nivel;
+  - se recarga cuando cambia material_estudio_version.version, que sube un
+    trigger de material_estudio (instalar, llamado desde app.py): también
+    se ven los cambios del CRUD web y de los otros workers;
+  - la lectura de contexto solo trae la versión y los materiales que el
+    alumno ya abrió (historial_material_estudio), y la elección es un
+    muestreo ponderado: lo no abierto pesa PESO_NO_ABIERTO veces más.
+"""
+import random
+import threading
+
+# Peso de un material que el alumno aún no abrió frente a uno ya abierto (1)
+PESO_NO_ABIERTO = 4
+
+SQL_VERSION = "(SELECT version FROM material_estudio_version WHERE id = 1)"
+
+_SQL_INSTALAR = """
+    CREATE TABLE IF NOT EXISTS material_estudio_version (
+        id          SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+        version     BIGINT    NOT NULL DEFAULT 0,
+        actualizado TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+    INSERT INTO material_estudio_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+
+    CREATE OR REPLACE FUNCTION fn_material_estudio_version()
+    RETURNS trigger AS $$
+    BEGIN
+        UPDATE material_estudio_version
+        SET version = version + 1, actualizado = NOW()
+        WHERE id = 1;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_trigger WHERE tgname = 'trg_material_estudio_version'
+        ) THEN
+            CREATE TRIGGER trg_material_estudio_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON material_estudio
+            FOR EACH STATEMENT
+            EXECUTE PROCEDURE fn_material_estudio_version();
+        END IF;
+    END
+    $$;
+"""
+
+
+def instalar(cursor):
+    """Tabla de versión + trigger en material_estudio. Idempotente."""
+    cursor.execute(_SQL_INSTALAR)
+
+
+class _Indice:
+    """Foto inmutable del material: se reemplaza entera al recargar."""
+
+    def __init__(self, version, filas):
+        self.version = version
+
+        por_ejercicio, por_competencia = {}, {}
+        for fila in filas:
+            m = {"id_material":    fila["id_material"],
+                 "titulo":         fila["titulo"],
+                 "tipo":           fila["tipo"],
+                 "url":            fila["url"],
+                 "nivel":          fila["nivel"],
+                 "id_ejercicio":   fila["id_ejercicio"] or None,
+                 "id_competencia": fila["id_competencia"]}
+            if m["id_ejercicio"]:
+                por_ejercicio.setdefault(m["id_ejercicio"], []).append(m)
+            else:
+                por_competencia.setdefault(m["id_competencia"], []).append(m)
+
+        # id_ejercicio → materiales enlazados; id_competencia → genéricos por nivel
+        self.por_ejercicio   = {k: tuple(v) for k, v in por_ejercicio.items()}
+        self.por_competencia = {
+            k: tuple(sorted(v, key=lambda m: (m["nivel"] is None, m["nivel"] or 0,
+                                              m["id_material"])))
+            for k, v in por_competencia.items()
+        }
+
+    def candidatos(self, id_ejercicio, id_competencia):
+        """El material enlazado al ejercicio + el genérico de la competencia."""
+        return (list(self.por_ejercicio.get(id_ejercicio, ()))
+                + list(self.por_competencia.get(id_competencia, ())))
+
+    def candidatos_lote(self, ids_ejercicio, ids_competencia):
+        materiales = []
+        for id_ej in ids_ejercicio:
+            materiales.extend(self.por_ejercicio.get(id_ej, ()))
+        for comp in ids_competencia:
+            materiales.extend(self.por_competencia.get(comp, ()))
+        return materiales
+
+
+def muestreo_ponderado(capa, abiertos=()):
+    """Un material de `capa`; los que el alumno no abrió pesan PESO_NO_ABIERTO."""
+    if not capa:
+        return None
+    pesos = [1 if m.get("id_material") in abiertos else PESO_NO_ABIERTO for m in capa]
+    return random.choices(capa, weights=pesos)[0]
+
+
+class IndiceMateriales:
+
+    def __init__(self):
+        self._lock   = threading.Lock()
+        self._indice = None
+
+    def indice(self, cursor, version):
+        """
+        Devuelve el índice vigente, recargándolo si `version` (la que trajo la
+        lectura de contexto con SQL_VERSION) no coincide con la del cargado.
+        """
+        indice = self._indice
+        if indice is not None and indice.version == version:
+            return indice
+
+        with self._lock:
+            indice = self._indice
+            if indice is None or indice.version != version:
+                indice = self._cargar(cursor, version)
+                self._indice = indice
+        return indice
+
+    def invalidar(self):
+        self._indice = None
+
+    def _cargar(self, cursor, version):
+        cursor.execute("""
+            SELECT id_material, titulo, tipo, url, nivel, id_ejercicio, id_competencia
+            FROM material_estudio
+        """)
+        indice = _Indice(version, cursor.fetchall() or [])
+        print(f"📚 Material de estudio cargado: v{version} · "
+              f"{sum(map(len, indice.por_ejercicio.values()))} por ejercicio, "
+              f"{sum(map(len, indice.por_competencia.values()))} por competencia")
+        return indice
+
+
+MATERIALES = IndiceMateriales()
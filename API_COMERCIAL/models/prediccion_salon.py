@@ -0,0 +1,148 @@
+"""
+Predicción del nivel por competencia de todos los alumnos de un salón.
+
+predecir_nivel_competencia (ws/tutor.py) atiende a un alumno y una
+competencia: lee NEC, lee sus features y llama al modelo con una fila.
+Para la pantalla del docente eso eran 2 consultas y una predicción por
+cada (alumno, competencia). Aquí:
+
+  - SQL_SALON trae en una sola consulta, por (alumno, competencia 1-4), el
+    nivel NEC y las 7 features de puntajes_estadisticas (las mismas
+    expresiones que SQL_FEATURES);
+  - la matriz de features se arma y limpia por columnas, con las mismas
+    reglas que calcular_features_competencia;
+  - el modelo se llama una vez con todas las filas válidas;
+  - el ajuste ±1 sobre el nivel NEC se aplica a todo el arreglo.
+
+Es solo lectura: si un alumno no tiene fila en NEC se informa el nivel que
+le daría leer_nec (desde su promedio de puntajes) pero no se inserta.
+"""
+import numpy as np
+
+from models.estadisticas_puntajes import COLUMNAS_FEATURES
+from models.scoring import NIVEL_DISPLAY, scores_to_niveles
+
+NIVELES_UI = ("bajo", "medio", "alto")
+_INDICE_UI = {n: i for i, n in enumerate(NIVELES_UI)}
+
+SQL_SALON = f"""
+    SELECT e.id_estudiante,
+           TRIM(u.apellidos) || ', ' || TRIM(u.nombre) AS nombre,
+           c.id_competencia,
+           nec.id_estudiante IS NOT NULL                AS tiene_nec,
+           nec.nivel_actual,
+           {COLUMNAS_FEATURES.format(t="pe.")}
+    FROM estudiante_salones es
+    JOIN estudiante e ON e.id_estudiante = es.id_estudiante
+    JOIN usuarios u   ON u.id_usuario    = e.id_usuario
+    CROSS JOIN competencias c
+    LEFT JOIN nivel_estudiante_competencia nec
+           ON nec.id_estudiante = e.id_estudiante AND nec.id_competencia = c.id_competencia
+    LEFT JOIN puntajes_estadisticas pe
+           ON pe.id_estudiante = e.id_estudiante AND pe.id_competencia = c.id_competencia
+    WHERE es.id_salon = %s
+      AND e.estado_estudiante = 'activo'
+      AND c.id_competencia BETWEEN 1 AND 4
+    ORDER BY nombre, e.id_estudiante, c.id_competencia
+"""
+
+_FEATURES = ("total_intentos", "promedio_puntaje", "min_puntaje", "max_puntaje",
+             "std_puntaje", "num_aprobados", "tendencia")
+
+
+def _columnas(filas):
+    """Filas de SQL_SALON → un arreglo float por feature (NULL → NaN)."""
+    crudo = np.array([[np.nan if f[c] is None else float(f[c]) for c in _FEATURES]
+                      for f in filas], dtype=float).reshape(len(filas), len(_FEATURES))
+    return {c: crudo[:, i] for i, c in enumerate(_FEATURES)}
+
+
+def matriz_features(cols):
+    """
+    (X, validas): X con las 7 features del árbol por fila y la máscara de
+    filas que calcular_features_competencia no habría descartado.
+    """
+    total    = np.nan_to_num(cols["total_intentos"], nan=0.0)
+    promedio = cols["promedio_puntaje"]
+    validas  = (total > 0) & ~np.isnan(promedio)
+    divisor  = np.where(total > 0, total, 1.0)
+    X = np.column_stack([
+        total,
+        np.clip(np.nan_to_num(promedio, nan=0.0), 0.0, 100.0),
+        np.clip(np.nan_to_num(cols["min_puntaje"], nan=0.0), 0.0, 100.0),
+        np.clip(np.nan_to_num(cols["max_puntaje"], nan=0.0), 0.0, 100.0),
+        np.maximum(np.nan_to_num(cols["std_puntaje"], nan=0.0), 0.0),
+        np.nan_to_num(cols["num_aprobados"], nan=0.0) / divisor,
+        # CORR NULL (puntajes iguales) → 0; fuera de [-1, 1] por redondeo → recortar
+        np.clip(np.nan_to_num(cols["tendencia"], nan=0.0), -1.0, 1.0),
+    ])
+    return X, validas
+
+
+def niveles_nec(filas, promedios):
+    """nivel_actual de NEC; sin fila, el que calcularía leer_nec desde el promedio."""
+    iniciales = scores_to_niveles(np.nan_to_num(promedios, nan=0.0))
+    return np.array([int(f["nivel_actual"] or 1) if f["tiene_nec"] else int(ini)
+                     for f, ini in zip(filas, iniciales)], dtype=np.int64)
+
+
+def acotar(base_idx, ml_idx):
+    """El ML puede bajar libremente pero subir como mucho un nivel sobre NEC."""
+    return np.minimum(ml_idx, base_idx + 1)
+
+
+def predecir(filas, modelo=None):
+    """
+    Niveles de cada fila de SQL_SALON. Retorna (nivel_nec, base, ml, final):
+    nivel_nec en escala 1-7 y los demás como texto UI (ml None sin predicción).
+    """
+    n = len(filas)
+    cols = _columnas(filas)
+    nivel_nec = niveles_nec(filas, cols["promedio_puntaje"])
+    base_idx  = np.array([_INDICE_UI[NIVEL_DISPLAY.get(int(v), "bajo")] for v in nivel_nec],
+                         dtype=np.int64)
+    ml = np.full(n, None, dtype=object)
+    final_idx = base_idx.copy()
+
+    X, validas = matriz_features(cols)
+    if modelo is not None and validas.any():
+        try:
+            y_pred = modelo.predict(X[validas])
+            ml[validas] = [str(y) for y in y_pred]
+            ml_idx = np.array([_INDICE_UI.get(str(y), b)
+                               for y, b in zip(y_pred, base_idx[validas])], dtype=np.int64)
+            final_idx[validas] = acotar(base_idx[validas], ml_idx)
+        except Exception as e:
+            print("Error predicción ML (salón):", e)
+            ml[:] = None
+            final_idx = base_idx.copy()
+
+    ui = np.array(NIVELES_UI, dtype=object)
+    return nivel_nec, ui[base_idx], ml, ui[final_idx]
+
+
+def predecir_salon(cursor, id_salon, modelo=None):
+    """
+    Alumnos activos del salón con el nivel de cada competencia:
+    [{id_estudiante, nombre, competencias: [{idCompetencia, nivelNec,
+      nivelBase, nivelMl, nivelFinal}]}], en el orden de la lista del salón.
+    """
+    cursor.execute(SQL_SALON, (id_salon,))
+    filas = cursor.fetchall() or []
+    if not filas:
+        return []
+    nivel_nec, base, ml, final = predecir(filas, modelo)
+
+    alumnos = []
+    for i, f in enumerate(filas):
+        if not alumnos or alumnos[-1]["id_estudiante"] != f["id_estudiante"]:
+            alumnos.append({"id_estudiante": f["id_estudiante"], "nombre": f["nombre"],
+                            "competencias": []})
+        alumnos[-1]["competencias"].append({
+            "idCompetencia": f["id_competencia"],
+            "nivelNec":      int(nivel_nec[i]),
+            "nivelBase":     base[i],
+            "nivelMl":       ml[i],
+            "nivelFinal":    final[i],
+        })
+    return alumnos
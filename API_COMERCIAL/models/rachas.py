@@ -0,0 +1,249 @@
+"""
+Rachas por (alumno, competencia) y eventos de alerta al docente.
+
+Antes cada respuesta de repaso leía las últimas respuestas del alumno en la
+competencia (respuestas_estudiantes ⨝ opciones_ejercicio ⨝ ejercicios,
+ORDER BY fecha DESC) para saber si llevaba 3 fallos seguidos; detectar_racha
+repetía el recorrido al pedir ejercicio, y /docentes/<id>/alertas contaba los
+fallos de las últimas 5 entradas de progreso con ROW_NUMBER() por alumno.
+Ahora todo se mantiene con triggers en O(1) por respuesta:
+
+  racha_estudiante_competencia  → racha con signo: +n = n aciertos seguidos,
+                                  -n = n fallos seguidos (solo modo repaso).
+  alertas_docente               → un evento cada vez que una racha negativa
+                                  llega a N_RACHA_ALERTA (se lee por id_alerta).
+  resumen_respuestas_estudiante → bits de las últimas N_RECIENTES entradas de
+                                  progreso (1 = incorrecta; bit 0 = la más
+                                  reciente) y fecha de la última actividad.
+
+Las lecturas son por clave primaria. Los triggers solo siguen los INSERT:
+si se borran o corrigen respuestas a mano, reconstruir() (python
+reconstruir_rachas.py) recalcula las tablas desde el historial.
+"""
+
+# Mismo umbral que models/registro_respuesta.py (alerta al docente)
+N_RACHA_ALERTA = 3
+N_RECIENTES    = 5
+_MASCARA       = (1 << N_RECIENTES) - 1
+
+SQL_TABLAS = [
+    """
+    CREATE TABLE IF NOT EXISTS racha_estudiante_competencia (
+        id_estudiante  INTEGER   NOT NULL,
+        id_competencia INTEGER   NOT NULL,
+        racha          INTEGER   NOT NULL DEFAULT 0,
+        actualizado    TIMESTAMP NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (id_estudiante, id_competencia)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS alertas_docente (
+        id_alerta      SERIAL      PRIMARY KEY,
+        id_estudiante  INTEGER     NOT NULL,
+        id_competencia INTEGER     NOT NULL,
+        tipo           VARCHAR(30) NOT NULL DEFAULT 'racha_negativa',
+        longitud       INTEGER     NOT NULL,
+        id_respuesta   INTEGER,
+        creado         TIMESTAMP   NOT NULL DEFAULT NOW()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_alertas_docente_estudiante "
+    "ON alertas_docente (id_estudiante, id_alerta)",
+    """
+    CREATE TABLE IF NOT EXISTS resumen_respuestas_estudiante (
+        id_estudiante    INTEGER   PRIMARY KEY,
+        ultimas          SMALLINT  NOT NULL DEFAULT 0,
+        ultima_actividad TIMESTAMP
+    )
+    """,
+]
+
+# INSERT en respuestas_estudiantes (modo repaso): opción y ejercicio por PK
+SQL_FN_RESPUESTA = f"""
+    CREATE OR REPLACE FUNCTION fn_racha_respuesta()
+    RETURNS trigger AS $$
+    DECLARE
+        v_correcta BOOLEAN;
+        v_comp     INTEGER;
+        v_racha    INTEGER;
+    BEGIN
+        IF NEW.modo IS DISTINCT FROM 'repaso' THEN
+            RETURN NULL;
+        END IF;
+        SELECT COALESCE(o.es_correcta, FALSE) INTO v_correcta
+        FROM opciones_ejercicio o WHERE o.id_opcion = NEW.id_opcion;
+        SELECT e.id_competencia INTO v_comp
+        FROM ejercicios e WHERE e.id_ejercicio = NEW.id_ejercicio;
+        IF v_comp IS NULL THEN
+            RETURN NULL;
+        END IF;
+
+        INSERT INTO racha_estudiante_competencia AS r
+            (id_estudiante, id_competencia, racha, actualizado)
+        VALUES (NEW.id_estudiante, v_comp,
+                CASE WHEN COALESCE(v_correcta, FALSE) THEN 1 ELSE -1 END, NOW())
+        ON CONFLICT (id_estudiante, id_competencia) DO UPDATE SET
+            racha = CASE WHEN COALESCE(v_correcta, FALSE)
+                         THEN GREATEST(r.racha, 0) + 1
+                         ELSE LEAST(r.racha, 0) - 1 END,
+            actualizado = NOW()
+        RETURNING racha INTO v_racha;
+
+        IF v_racha = -{N_RACHA_ALERTA} THEN
+            INSERT INTO alertas_docente
+                (id_estudiante, id_competencia, tipo, longitud, id_respuesta)
+            VALUES (NEW.id_estudiante, v_comp, 'racha_negativa',
+                    {N_RACHA_ALERTA}, NEW.id_respuesta);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+# INSERT en progreso: desplaza los bits de las últimas respuestas
+SQL_FN_PROGRESO = f"""
+    CREATE OR REPLACE FUNCTION fn_resumen_progreso()
+    RETURNS trigger AS $$
+    DECLARE
+        v_bit INTEGER := CASE WHEN NEW.estado ILIKE 'incorrecto%' THEN 1 ELSE 0 END;
+    BEGIN
+        INSERT INTO resumen_respuestas_estudiante AS r
+            (id_estudiante, ultimas, ultima_actividad)
+        VALUES (NEW.id_estudiante, v_bit, COALESCE(NEW.fecha, NOW()))
+        ON CONFLICT (id_estudiante) DO UPDATE SET
+            ultimas          = ((r.ultimas << 1) | v_bit) & {_MASCARA},
+            ultima_actividad = GREATEST(r.ultima_actividad, EXCLUDED.ultima_actividad);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+# (nombre, tabla, evento, nivel, función) — mismo formato que dashboard_agregado
+TRIGGERS = [
+    ("trg_racha_respuesta",  "respuestas_estudiantes", "INSERT", "ROW", "fn_racha_respuesta"),
+    ("trg_resumen_progreso", "progreso",               "INSERT", "ROW", "fn_resumen_progreso"),
+]
+
+# Racha actual desde el historial: longitud del último tramo de respuestas
+# de repaso con el mismo resultado (islas sobre ROW_NUMBER).
+_RACHAS_HISTORIAL = """
+    WITH r AS (
+        SELECT r.id_estudiante, e.id_competencia,
+               COALESCE(o.es_correcta, FALSE) AS es_correcta,
+               ROW_NUMBER() OVER (PARTITION BY r.id_estudiante, e.id_competencia
+                                  ORDER BY r.fecha DESC, r.id_respuesta DESC) AS rn
+        FROM respuestas_estudiantes r
+        JOIN opciones_ejercicio o ON o.id_opcion    = r.id_opcion
+        JOIN ejercicios e         ON e.id_ejercicio = r.id_ejercicio
+        WHERE r.modo = 'repaso'
+    ),
+    ultima AS (
+        SELECT id_estudiante, id_competencia, es_correcta FROM r WHERE rn = 1
+    ),
+    corte AS (
+        SELECT r.id_estudiante, r.id_competencia, MIN(r.rn) AS rn
+        FROM r JOIN ultima u USING (id_estudiante, id_competencia)
+        WHERE r.es_correcta <> u.es_correcta
+        GROUP BY r.id_estudiante, r.id_competencia
+    ),
+    total AS (
+        SELECT id_estudiante, id_competencia, COUNT(*) AS n
+        FROM r GROUP BY id_estudiante, id_competencia
+    )
+    SELECT u.id_estudiante, u.id_competencia,
+           (CASE WHEN u.es_correcta THEN 1 ELSE -1 END)
+           * COALESCE(c.rn - 1, t.n)::INTEGER AS racha,
+           NOW()
+    FROM ultima u
+    JOIN total t      USING (id_estudiante, id_competencia)
+    LEFT JOIN corte c USING (id_estudiante, id_competencia)
+"""
+
+_RESUMEN_HISTORIAL = f"""
+    SELECT id_estudiante,
+           SUM(CASE WHEN rn <= {N_RECIENTES} AND estado ILIKE 'incorrecto%'
+                    THEN 1 << (rn - 1)::INT ELSE 0 END)::SMALLINT,
+           MAX(fecha)
+    FROM (
+        SELECT id_estudiante, estado, fecha,
+               ROW_NUMBER() OVER (PARTITION BY id_estudiante
+                                  ORDER BY fecha DESC, id_progreso DESC) AS rn
+        FROM progreso
+    ) sub
+    GROUP BY id_estudiante
+"""
+
+SQL_BACKFILL_INICIAL = [
+    f"""
+    INSERT INTO racha_estudiante_competencia (id_estudiante, id_competencia, racha, actualizado)
+    SELECT * FROM ({_RACHAS_HISTORIAL}) h
+    WHERE NOT EXISTS (SELECT 1 FROM racha_estudiante_competencia)
+    ON CONFLICT (id_estudiante, id_competencia) DO NOTHING
+    """,
+    f"""
+    INSERT INTO resumen_respuestas_estudiante (id_estudiante, ultimas, ultima_actividad)
+    SELECT * FROM ({_RESUMEN_HISTORIAL}) h
+    WHERE NOT EXISTS (SELECT 1 FROM resumen_respuestas_estudiante)
+    ON CONFLICT (id_estudiante) DO NOTHING
+    """,
+]
+
+
+def _sql_trigger(nombre, tabla, evento, nivel, funcion):
+    return f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = '{nombre}') THEN
+                CREATE TRIGGER {nombre}
+                AFTER {evento} ON {tabla}
+                FOR EACH {nivel} EXECUTE PROCEDURE {funcion}();
+            END IF;
+        END
+        $$
+    """
+
+
+def instalar(cursor):
+    """Tablas + funciones + triggers + backfill si las tablas son nuevas. Idempotente."""
+    for sql in SQL_TABLAS:
+        cursor.execute(sql)
+    cursor.execute(SQL_FN_RESPUESTA)
+    cursor.execute(SQL_FN_PROGRESO)
+    # Los triggers bloquean las escrituras hasta el commit: el backfill de la
+    # misma transacción no se cruza con respuestas nuevas.
+    for trigger in TRIGGERS:
+        cursor.execute(_sql_trigger(*trigger))
+    for sql in SQL_BACKFILL_INICIAL:
+        cursor.execute(sql)
+
+
+def reconstruir(cursor):
+    """
+    Recalcula rachas y resúmenes desde el historial. Bloquea las escrituras
+    de respuestas y progreso durante la transacción. Los eventos de
+    alertas_docente se conservan. Retorna (rachas, resumenes) escritos.
+    """
+    cursor.execute("LOCK TABLE respuestas_estudiantes, progreso IN SHARE ROW EXCLUSIVE MODE")
+    cursor.execute("DELETE FROM racha_estudiante_competencia")
+    cursor.execute("INSERT INTO racha_estudiante_competencia "
+                   "(id_estudiante, id_competencia, racha, actualizado) " + _RACHAS_HISTORIAL)
+    rachas = cursor.rowcount
+    cursor.execute("DELETE FROM resumen_respuestas_estudiante")
+    cursor.execute("INSERT INTO resumen_respuestas_estudiante "
+                   "(id_estudiante, ultimas, ultima_actividad) " + _RESUMEN_HISTORIAL)
+    return rachas, cursor.rowcount
+
+
+def leer_racha(cursor, id_estudiante, id_competencia):
+    """Racha con signo del alumno en la competencia (0 si no hay respuestas)."""
+    cursor.execute("""
+        SELECT racha FROM racha_estudiante_competencia
+        WHERE id_estudiante = %s AND id_competencia = %s
+    """, (id_estudiante, id_competencia))
+    row = cursor.fetchone()
+    return int(row["racha"]) if row else 0
+
+
+def contar_incorrectas(ultimas):
+    """Número de fallos en los bits de resumen_respuestas_estudiante.ultimas."""
+    return bin(int(ultimas or 0) & _MASCARA).count("1")
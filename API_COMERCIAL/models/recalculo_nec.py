@@ -0,0 +1,253 @@
+"""
+Recálculo del NEC (nivel_estudiante_competencia) reproduciendo el historial.
+
+Al ajustar DELTA_SCORE, TIEMPO_THRESHOLDS, PENALIZACION_PISTA o
+SCORE_BRACKETS en models/scoring.py, las filas de NEC ya guardadas quedaban
+calculadas con las reglas anteriores. Este motor:
+
+  1. recorre respuestas_estudiantes (solo repaso, que es lo único que mueve
+     el NEC) ⨝ opciones ⨝ ejercicios con un cursor del servidor, ordenado por
+     (alumno, competencia, fecha): nunca tiene todo el historial en memoria;
+  2. calcula los deltas de cada bloque de filas con scoring.calcular_deltas
+     y los acumula por (alumno, competencia), recortando a [0, 100] igual que
+     evaluar_respuesta;
+  3. compara con el NEC actual y, con aplicar=True, hace upsert solo de los
+     pares que cambiaron (execute_values) y recalcula progreso_general.
+
+Sin aplicar es un ensayo: informa qué cambiaría y no escribe nada.
+
+El historial también trae filas de "reinicio" (el score pasa a ser ese
+valor, sin delta), para que el punto de partida sea el de la aplicación:
+
+  - semilla: AVG(puntajes) anteriores a la primera respuesta de repaso del
+    par, que es como leer_nec inicializa el NEC (SCORE_INICIAL si no hay);
+  - asignación del docente: POST/PUT /puntaje fija el NEC a mano y lo deja
+    registrado en nec_asignaciones_docente (instalar, registrar_asignacion);
+    la reproducción lo aplica en su fecha. Las asignaciones anteriores a
+    esa tabla no se conocen y siguen perdiéndose.
+"""
+import time
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from models import scoring
+
+SCORE_INICIAL   = 0.0
+FILAS_POR_VIAJE = 5000
+
+SQL_HISTORIAL = """
+    WITH resp AS (
+        SELECT r.id_estudiante,
+               e.id_competencia,
+               r.fecha,
+               r.id_respuesta                          AS orden,
+               COALESCE(o.es_correcta, FALSE)          AS correcta,
+               r.tiempo_respuesta                      AS tiempo,
+               COALESCE(r.uso_pista, FALSE)            AS pista,
+               COALESCE(e.nivel_logro, e.nivel, 1)     AS nivel,
+               NULL::DOUBLE PRECISION                  AS reinicio
+        FROM respuestas_estudiantes r
+        JOIN opciones_ejercicio o ON o.id_opcion    = r.id_opcion
+        JOIN ejercicios e         ON e.id_ejercicio = r.id_ejercicio
+        WHERE r.modo = 'repaso' {filtro_r}
+    ),
+    primera AS (
+        SELECT id_estudiante, id_competencia, MIN(fecha) AS fecha
+        FROM resp
+        GROUP BY id_estudiante, id_competencia
+    )
+    SELECT id_estudiante, id_competencia, correcta, tiempo, pista, nivel, reinicio
+    FROM (
+        SELECT * FROM resp
+        UNION ALL
+        -- Semilla: puntajes previos a la primera respuesta (como leer_nec)
+        SELECT p.id_estudiante, p.id_competencia, '-infinity'::timestamp, 0,
+               FALSE, NULL, FALSE, 1, AVG(p.puntaje)::DOUBLE PRECISION
+        FROM puntajes p
+        JOIN primera f ON f.id_estudiante  = p.id_estudiante
+                      AND f.id_competencia = p.id_competencia
+        WHERE p.fecha_registro < f.fecha
+        GROUP BY p.id_estudiante, p.id_competencia
+        UNION ALL
+        -- Asignaciones del docente, en su fecha
+        SELECT a.id_estudiante, a.id_competencia, a.fecha, 0,
+               FALSE, NULL, FALSE, 1, a.score
+        FROM nec_asignaciones_docente a
+        WHERE TRUE {filtro_a}
+    ) h
+    ORDER BY id_estudiante, id_competencia, fecha, orden
+"""
+
+SQL_TABLA_ASIGNACIONES = """
+    CREATE TABLE IF NOT EXISTS nec_asignaciones_docente (
+        id_asignacion  BIGSERIAL        PRIMARY KEY,
+        id_estudiante  INTEGER          NOT NULL,
+        id_competencia INTEGER          NOT NULL,
+        score          DOUBLE PRECISION NOT NULL,
+        fecha          TIMESTAMP        NOT NULL DEFAULT NOW()
+    );
+    CREATE INDEX IF NOT EXISTS idx_nec_asignaciones_docente_par
+        ON nec_asignaciones_docente (id_estudiante, id_competencia, fecha);
+"""
+
+# Fragmento para encadenar tras el upsert del NEC (ws/puntaje.py): una sola sentencia
+SQL_REGISTRAR_ASIGNACION = """
+    INSERT INTO nec_asignaciones_docente (id_estudiante, id_competencia, score)
+    VALUES (%(id_estudiante)s, %(id_competencia)s, %(score)s)
+"""
+
+
+def instalar(cursor):
+    """Registro de asignaciones del docente. Idempotente."""
+    cursor.execute(SQL_TABLA_ASIGNACIONES)
+
+
+def _acumular(score, deltas):
+    """Score tras aplicar `deltas` en orden, recortando a [0, 100] en cada paso."""
+    if deltas.size == 0:
+        return score
+    parcial = score + np.cumsum(deltas)
+    if parcial.min() >= 0 and parcial.max() <= 100:
+        return float(parcial[-1])                        # nunca tocó los límites
+    for d in deltas.tolist():
+        score = max(0.0, min(100.0, score + d))
+    return score
+
+
+def recalcular(bloques):
+    """
+    `bloques`: iterable de listas de filas (SQL_HISTORIAL) ya ordenadas.
+    Genera (id_estudiante, id_competencia, score, nivel, respuestas) por par;
+    un par puede venir partido entre dos bloques. Una fila con `reinicio`
+    fija el score y no cuenta como respuesta.
+    """
+    actual = None                                         # [clave, score, n]
+    for filas in bloques:
+        if not filas:
+            continue
+        est, comp, correctas, tiempos, pistas, niveles, reinicios = zip(*filas)
+        est  = np.asarray(est, dtype=np.int64)
+        comp = np.asarray(comp, dtype=np.int64)
+        deltas = scoring.calcular_deltas(correctas, tiempos, niveles, pistas)
+        con_reinicio = np.flatnonzero([r is not None for r in reinicios])
+
+        cortes = np.flatnonzero((est[1:] != est[:-1]) | (comp[1:] != comp[:-1])) + 1
+        limites = [0, *cortes.tolist(), len(filas)]
+        for a, b in zip(limites[:-1], limites[1:]):
+            clave = (int(est[a]), int(comp[a]))
+            if actual is None or actual[0] != clave:
+                if actual is not None:
+                    yield (*actual[0], actual[1], scoring.score_to_nivel(actual[1]), actual[2])
+                actual = [clave, SCORE_INICIAL, 0]
+            desde = a
+            for i in con_reinicio[(con_reinicio >= a) & (con_reinicio < b)].tolist():
+                actual[1] = float(reinicios[i])          # lo anterior ya no cuenta
+                actual[2] += i - desde
+                desde = i + 1
+            actual[1] = _acumular(actual[1], deltas[desde:b])
+            actual[2] += b - desde
+    if actual is not None:
+        yield (*actual[0], actual[1], scoring.score_to_nivel(actual[1]), actual[2])
+
+
+def _bloques(cursor, tam):
+    while True:
+        filas = cursor.fetchmany(tam)
+        if not filas:
+            return
+        yield filas
+
+
+def _sql_progreso_general():
+    """Misma fórmula que evaluar_respuesta: suma de NIVEL_PROGRESO / 4."""
+    casos = " ".join(f"WHEN {n} THEN {p}" for n, p in scoring.NIVEL_PROGRESO.items())
+    return f"""
+        UPDATE estudiante e
+        SET progreso_general = sub.progreso
+        FROM (
+            SELECT id_estudiante,
+                   ROUND(SUM(CASE nivel_actual {casos} ELSE 0 END) / 4.0) AS progreso
+            FROM nivel_estudiante_competencia
+            WHERE id_estudiante = ANY(%s)
+            GROUP BY id_estudiante
+        ) sub
+        WHERE e.id_estudiante = sub.id_estudiante
+    """
+
+
+def ejecutar(con, aplicar=False, estudiantes=None, filas_por_viaje=FILAS_POR_VIAJE):
+    """
+    Recalcula el NEC de todos los alumnos (o de `estudiantes`). Sin aplicar
+    no escribe nada. Retorna el informe: totales, cambios y rendimiento.
+    """
+    inicio = time.perf_counter()
+    cur    = con.cursor()
+    params = (list(estudiantes),) if estudiantes else ()
+    filtros = {"filtro_r": "", "filtro_a": ""}
+    if estudiantes:
+        filtros = {"filtro_r": "AND r.id_estudiante = ANY(%(estudiantes)s)",
+                   "filtro_a": "AND a.id_estudiante = ANY(%(estudiantes)s)"}
+
+    if aplicar:
+        # Nadie responde mientras tanto: el NEC leído es el que se reemplaza
+        cur.execute("LOCK TABLE respuestas_estudiantes IN SHARE ROW EXCLUSIVE MODE")
+    cur.execute(
+        "SELECT id_estudiante, id_competencia, nivel_actual, promedio_puntaje "
+        "FROM nivel_estudiante_competencia"
+        + (" WHERE id_estudiante = ANY(%s)" if estudiantes else ""), params
+    )
+    anterior = {(r["id_estudiante"], r["id_competencia"]):
+                (int(r["nivel_actual"] or 1), float(r["promedio_puntaje"] or 0))
+                for r in (cur.fetchall() or [])}
+
+    historial = con.cursor_servidor("recalculo_nec", filas_por_viaje)
+    historial.execute(SQL_HISTORIAL.format(**filtros),
+                      {"estudiantes": list(estudiantes)} if estudiantes else None)
+    filas, pares, cambios = 0, 0, []
+    for est, comp, score, nivel, n in recalcular(_bloques(historial, filas_por_viaje)):
+        filas += n
+        pares += 1
+        nivel_ant, score_ant = anterior.get((est, comp), (None, None))
+        if nivel_ant != nivel or score_ant is None or abs(score_ant - score) > 1e-6:
+            cambios.append({"id_estudiante": est, "id_competencia": comp,
+                            "nivel_anterior": nivel_ant, "score_anterior": score_ant,
+                            "nivel": nivel, "score": score, "respuestas": n})
+    historial.close()
+
+    if aplicar and cambios:
+        execute_values(cur, """
+            INSERT INTO nivel_estudiante_competencia
+                (id_estudiante, id_competencia, nivel_actual, promedio_puntaje,
+                 ejercicios_considerados, fecha_ultimo_update)
+            VALUES %s
+            ON CONFLICT (id_estudiante, id_competencia) DO UPDATE SET
+                nivel_actual            = EXCLUDED.nivel_actual,
+                promedio_puntaje        = EXCLUDED.promedio_puntaje,
+                ejercicios_considerados = EXCLUDED.ejercicios_considerados,
+                fecha_ultimo_update     = NOW()
+        """, [(c["id_estudiante"], c["id_competencia"], c["nivel"], c["score"],
+               c["respuestas"]) for c in cambios],
+            template="(%s, %s, %s, %s, %s, NOW())", page_size=1000)
+        cur.execute(_sql_progreso_general(),
+                    (sorted({c["id_estudiante"] for c in cambios}),))
+    if aplicar:
+        con.commit()
+    else:
+        con.rollback()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "aplicado":      bool(aplicar),
+        "respuestas":    filas,
+        "pares":         pares,
+        "cambios":       len(cambios),
+        "niveles":       sum(1 for c in cambios if c["nivel"] != c["nivel_anterior"]),
+        "suben":         sum(1 for c in cambios
+                             if c["nivel_anterior"] is not None and c["nivel"] > c["nivel_anterior"]),
+        "bajan":         sum(1 for c in cambios
+                             if c["nivel_anterior"] is not None and c["nivel"] < c["nivel_anterior"]),
+        "segundos":      round(segundos, 3),
+        "filas_por_seg": round(filas / segundos) if segundos > 0 else None,
+        "detalle":       cambios,
+    }
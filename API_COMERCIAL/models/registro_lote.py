@@ -0,0 +1,387 @@
+"""
+Registro de respuestas en lote (POST /tutor/responder_lote).
+
+Con el Wi-Fi inestable de los colegios la app acumula respuestas sin conexión
+y luego las envía de golpe: N llamadas a /tutor/responder son 2N viajes a la
+BD y N commits. Aquí el lote ordenado de un alumno se procesa así:
+
+  1. leer_contexto_lote() → un SELECT trae las opciones del lote, NEC, rachas,
+                            promedios (competencias sin NEC), versión del
+                            material y lo que el alumno ya abrió (el material
+                            sale de models/indice_materiales.py).
+  2. en memoria, respuesta por respuesta, evaluar_respuesta() (la misma de
+     registro_respuesta.py) con el NEC y la racha que dejó la anterior.
+  3. escribir_lote() → inserts masivos (execute_values) de respuestas,
+                       progreso, puntajes y evaluaciones, y un upsert del
+                       NEC final por competencia; el endpoint hace UN commit.
+
+Los triggers de rachas.py, estadisticas_puntajes.py y dashboard_agregado.py
+son por fila: ven las respuestas en el orden del lote, igual que si hubieran
+llegado una a una.
+
+Si la conexión se corta después del commit la app reenvía el lote. Cada
+respuesta trae un idCliente (generado en el dispositivo) y antes de nada se
+reclama en respuestas_lote_cliente (PK id_estudiante + id_cliente, INSERT
+... ON CONFLICT DO NOTHING): solo se evalúan y escriben las reclamadas. Para
+las demás se devuelve el resultado guardado la primera vez. Un reenvío
+simultáneo espera en la clave única al commit del primero.
+"""
+import json
+from collections import defaultdict
+
+from psycopg2.extras import execute_values
+
+from models.indice_materiales import MATERIALES, SQL_VERSION as SQL_VERSION_MATERIALES
+from models.registro_respuesta import evaluar_respuesta, respuesta_json
+from models.scoring import score_to_nivel
+
+LOTE_MAX = 200
+ID_CLIENTE_MAX = 64
+
+SQL_TABLA = """
+    CREATE TABLE IF NOT EXISTS respuestas_lote_cliente (
+        id_estudiante INTEGER   NOT NULL,
+        id_cliente    TEXT      NOT NULL,
+        id_respuesta  INTEGER,
+        resultado     JSONB,
+        creado        TIMESTAMP NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (id_estudiante, id_cliente)
+    )
+"""
+
+RESULTADO_OPCION_INVALIDA = {"status": False, "error": "Opción no válida"}
+
+
+def instalar(cursor):
+    """Tabla de idempotencia de /tutor/responder_lote. Idempotente."""
+    cursor.execute(SQL_TABLA)
+
+
+def reclamar_lote(cursor, id_estudiante, respuestas):
+    """ids de cliente del lote que nadie había registrado (ya quedan reclamados)."""
+    filas = execute_values(cursor, """
+        INSERT INTO respuestas_lote_cliente (id_estudiante, id_cliente)
+        VALUES %s
+        ON CONFLICT (id_estudiante, id_cliente) DO NOTHING
+        RETURNING id_cliente
+    """, [(id_estudiante, r["id_cliente"]) for r in respuestas],
+        page_size=len(respuestas), fetch=True)
+    return {f["id_cliente"] for f in filas}
+
+
+def leer_previas(cursor, id_estudiante, ids_cliente):
+    """{id_cliente: resultado guardado} de respuestas ya registradas."""
+    cursor.execute("""
+        SELECT id_cliente, resultado
+        FROM respuestas_lote_cliente
+        WHERE id_estudiante = %s AND id_cliente = ANY(%s)
+    """, (id_estudiante, list(ids_cliente)))
+    return {f["id_cliente"]: f["resultado"] for f in cursor.fetchall() or []}
+
+
+def guardar_resultados(cursor, id_estudiante, respuestas, resultados):
+    """Guarda el JSON de cada respuesta reclamada para devolverlo en un reenvío."""
+    execute_values(cursor, """
+        UPDATE respuestas_lote_cliente c SET
+            id_respuesta = v.id_respuesta,
+            resultado    = v.resultado::jsonb
+        FROM (VALUES %s) AS v(id_estudiante, id_cliente, id_respuesta, resultado)
+        WHERE c.id_estudiante = v.id_estudiante AND c.id_cliente = v.id_cliente
+    """, [
+        (id_estudiante, r["id_cliente"], res["id_respuesta"] if res else None,
+         json.dumps(respuesta_json(res, r["modo"]) if res else RESULTADO_OPCION_INVALIDA,
+                    default=str))
+        for r, res in zip(respuestas, resultados)
+    ], template="(%s, %s, %s::integer, %s)", page_size=len(respuestas))
+
+
+def leer_contexto_lote(cursor, id_estudiante, respuestas):
+    """
+    Un solo SELECT con lo que necesita todo el lote. Retorna
+    (opciones por id, NEC por competencia, promedios, rachas, versión del
+    material y materiales ya abiertos).
+    """
+    ids_opcion = sorted({r["id_opcion"] for r in respuestas})
+    cursor.execute(f"""
+        WITH op AS (
+            SELECT o.id_opcion,
+                   o.es_correcta,
+                   e.id_competencia,
+                   COALESCE(e.nivel_logro, e.nivel, 1) AS nivel_ejercicio,
+                   e.pista,
+                   e.palabras_clave
+            FROM opciones_ejercicio o
+            JOIN ejercicios e ON e.id_ejercicio = o.id_ejercicio
+            WHERE o.id_opcion = ANY(%(opciones)s)
+        )
+        SELECT
+            (SELECT json_agg(row_to_json(op)) FROM op)            AS opciones,
+            (
+                SELECT json_agg(json_build_object(
+                           'id_competencia', n.id_competencia,
+                           'nivel',          n.nivel_actual,
+                           'score',          COALESCE(n.promedio_puntaje, 0)))
+                FROM nivel_estudiante_competencia n
+                WHERE n.id_estudiante = %(id_estudiante)s
+            )                                                     AS nec,
+            (
+                SELECT json_object_agg(p.id_competencia, p.promedio)
+                FROM (
+                    SELECT id_competencia, AVG(puntaje) AS promedio
+                    FROM puntajes
+                    WHERE id_estudiante  = %(id_estudiante)s
+                      AND id_competencia IN (SELECT id_competencia FROM op)
+                    GROUP BY id_competencia
+                ) p
+            )                                                     AS avg_puntajes,
+            (
+                SELECT json_object_agg(rc.id_competencia, rc.racha)
+                FROM racha_estudiante_competencia rc
+                WHERE rc.id_estudiante = %(id_estudiante)s
+            )                                                     AS rachas,
+            -- Material candidato: índice en memoria (models/indice_materiales.py)
+            {SQL_VERSION_MATERIALES}                              AS version_materiales,
+            ARRAY(
+                SELECT h.id_material
+                FROM historial_material_estudio h
+                WHERE h.id_estudiante = %(id_estudiante)s
+            )                                                     AS materiales_abiertos
+    """, {"opciones": ids_opcion, "id_estudiante": id_estudiante})
+    row = cursor.fetchone() or {}
+    return {
+        "opciones":     {o["id_opcion"]: o for o in (row.get("opciones") or [])},
+        "nec":          {n["id_competencia"]: n for n in (row.get("nec") or [])},
+        "avg_puntajes": {int(k): v for k, v in (row.get("avg_puntajes") or {}).items()},
+        "rachas":       {int(k): int(v) for k, v in (row.get("rachas") or {}).items()},
+        "version_materiales":  row.get("version_materiales"),
+        "materiales_abiertos": set(row.get("materiales_abiertos") or ()),
+        "materiales":          [],
+    }
+
+
+def _materiales_de(materiales, id_ejercicio, id_competencia):
+    """Los candidatos que leer_contexto traería para esta respuesta."""
+    return [
+        m for m in materiales
+        if m.get("id_ejercicio") == id_ejercicio
+        or (m.get("id_competencia") == id_competencia and not m.get("id_ejercicio"))
+    ]
+
+
+def evaluar_lote(datos, respuestas):
+    """
+    Cálculo en memoria de todo el lote, en orden. Cada respuesta ve el NEC y
+    la racha que dejó la anterior. Retorna una lista con el dict de
+    evaluar_respuesta() por respuesta (None si la opción no existe).
+    """
+    # Estado por competencia: (nivel, score, existe) + niveles 1-4 para el global
+    estado = {
+        c: (int(n.get("nivel") or 1), float(n.get("score") or 0), True)
+        for c, n in datos["nec"].items()
+    }
+    niveles = {c: int(n.get("nivel") or 1) for c, n in datos["nec"].items() if 1 <= c <= 4}
+    rachas  = dict(datos["rachas"])
+
+    resultados = []
+    for r in respuestas:
+        op = datos["opciones"].get(r["id_opcion"])
+        if op is None:
+            resultados.append(None)
+            continue
+        comp      = op["id_competencia"]
+        es_repaso = (r["modo"] == "repaso")
+        if comp not in estado:
+            # Sin registro NEC: se inicializa desde los puntajes (leer_nec)
+            score = float(datos["avg_puntajes"].get(comp) or 0)
+            estado[comp] = (score_to_nivel(score), score, False)
+        nivel, score, existe = estado[comp]
+
+        ctx = {
+            "es_correcta":     bool(op["es_correcta"]),
+            "id_competencia":  comp,
+            "nivel_ejercicio": op["nivel_ejercicio"],
+            "pista":           (op.get("pista") or "").strip(),
+            "palabras_clave":  (op.get("palabras_clave") or "").strip(),
+            "nec_existe":      existe,
+            "nivel_actual":    nivel,
+            "score_actual":    score,
+            "niveles_nec":     dict(niveles),
+            "racha":           rachas.get(comp, 0),
+            "materiales":      (_materiales_de(datos["materiales"], r["id_ejercicio"], comp)
+                                if es_repaso and not op["es_correcta"] else []),
+            "materiales_abiertos": datos.get("materiales_abiertos") or (),
+        }
+        res = evaluar_respuesta(ctx, r["id_ejercicio"], r["tiempo_respuesta"],
+                                r["uso_pista"], es_repaso)
+        res["nec_existia"] = existe
+
+        # Lo que escribiría esta respuesta queda como estado para la siguiente
+        estado[comp] = (res["nuevo_nivel"], res["nuevo_score"], True)
+        if 1 <= int(comp) <= 4:
+            niveles[int(comp)] = res["nuevo_nivel"]
+        rachas[comp] = res["racha"]
+        resultados.append(res)
+    return resultados
+
+
+def escribir_lote(cursor, id_estudiante, respuestas, resultados):
+    """
+    Inserts masivos del lote (solo las respuestas con resultado). Asigna
+    'id_respuesta' a cada resultado. No hace commit.
+    """
+    validas = [(r, res) for r, res in zip(respuestas, resultados) if res is not None]
+    if not validas:
+        return
+
+    filas = [
+        (r["fecha"], float(r["tiempo_respuesta"]) if r["tiempo_respuesta"] else None,
+         bool(r["uso_pista"]), id_estudiante, r["id_ejercicio"], r["id_opcion"], r["modo"])
+        for r, _ in validas
+    ]
+    ids = execute_values(cursor, """
+        INSERT INTO respuestas_estudiantes
+            (fecha, tiempo_respuesta, uso_pista,
+             id_estudiante, id_ejercicio, id_opcion, modo)
+        VALUES %s
+        RETURNING id_respuesta
+    """, filas, template="(COALESCE(%s::timestamp, CURRENT_TIMESTAMP), %s, %s, %s, %s, %s, %s)",
+        page_size=len(filas), fetch=True)
+    for (_, res), fila in zip(validas, ids):
+        res["id_respuesta"] = fila["id_respuesta"]
+
+    execute_values(cursor, """
+        INSERT INTO progreso
+            (fecha, nivel_actual, estado, tiempo_respuesta,
+             id_estudiante, id_ejercicio, modo)
+        VALUES %s
+    """, [
+        (r["fecha"], f"Nivel {res['nivel_ejercicio']}" if res["nivel_ejercicio"] else None,
+         res["estado"], float(r["tiempo_respuesta"]) if r["tiempo_respuesta"] else None,
+         id_estudiante, r["id_ejercicio"], r["modo"])
+        for r, res in validas
+    ], template="(COALESCE(%s::timestamp, CURRENT_TIMESTAMP), %s, %s, %s, %s, %s, %s)",
+        page_size=len(validas))
+
+    repaso = [(r, res) for r, res in validas if r["modo"] == "repaso"]
+    if repaso:
+        # Puntaje binario → SOLO repaso alimenta el historial del ML
+        execute_values(cursor, """
+            INSERT INTO puntajes (puntaje, fecha_registro, id_competencia, id_estudiante)
+            VALUES %s
+        """, [
+            (100 if res["es_correcta"] else 0, r["fecha"], res["id_competencia"], id_estudiante)
+            for r, res in repaso
+        ], template="(%s, COALESCE(%s::timestamp, NOW()), %s, %s)", page_size=len(repaso))
+
+    # NEC: solo importa el valor final por competencia
+    nec_final, nec_inicial = {}, {}
+    for r, res in validas:
+        if r["modo"] == "repaso":
+            nec_final[res["id_competencia"]] = (res["nuevo_nivel"], res["nuevo_score"])
+        elif not res["nec_existia"]:
+            nec_inicial.setdefault(res["id_competencia"], (res["nuevo_nivel"], res["nuevo_score"]))
+    for comp in nec_final:
+        nec_inicial.pop(comp, None)
+    for filas_nec, conflicto in ((nec_final, """DO UPDATE SET
+                nivel_actual        = EXCLUDED.nivel_actual,
+                promedio_puntaje    = EXCLUDED.promedio_puntaje,
+                fecha_ultimo_update = EXCLUDED.fecha_ultimo_update"""),
+                                 (nec_inicial, "DO NOTHING")):
+        if filas_nec:
+            execute_values(cursor, f"""
+                INSERT INTO nivel_estudiante_competencia
+                    (id_estudiante, id_competencia, nivel_actual,
+                     promedio_puntaje, ejercicios_considerados, fecha_ultimo_update)
+                VALUES %s
+                ON CONFLICT (id_estudiante, id_competencia) {conflicto}
+            """, [(id_estudiante, c, n, s) for c, (n, s) in filas_nec.items()],
+                template="(%s, %s, %s, %s, 0, NOW())")
+
+    progreso_general = [res["progreso_general"] for r, res in repaso
+                        if res["progreso_general"] is not None]
+    if progreso_general:
+        cursor.execute(
+            "UPDATE estudiante SET progreso_general = %s WHERE id_estudiante = %s",
+            (progreso_general[-1], id_estudiante)
+        )
+
+    evaluacion = [(r, res) for r, res in validas
+                  if r["modo"] != "repaso" and r["id_evaluacion"]]
+    if evaluacion:
+        execute_values(cursor, """
+            INSERT INTO evaluacion_respuestas
+                (id_evaluacion, id_estudiante, id_ejercicio, id_opcion, es_correcta, fecha)
+            VALUES %s
+            ON CONFLICT (id_evaluacion, id_estudiante, id_ejercicio) DO NOTHING
+        """, [
+            (r["id_evaluacion"], id_estudiante, r["id_ejercicio"], r["id_opcion"],
+             res["es_correcta"], r["fecha"])
+            for r, res in evaluacion
+        ], template="(%s, %s, %s, %s, %s, COALESCE(%s::timestamp, NOW()))")
+
+        # Mismo acumulado que escribir_respuesta, sumado por evaluación
+        totales = defaultdict(lambda: [0, 0])
+        for r, res in evaluacion:
+            totales[r["id_evaluacion"]][0] += 1 if res["es_correcta"] else 0
+            totales[r["id_evaluacion"]][1] += 1
+        execute_values(cursor, """
+            INSERT INTO evaluacion_resultados
+                (id_evaluacion, id_estudiante, estado,
+                 total_correctas, total_preguntas, puntaje_total)
+            VALUES %s
+            ON CONFLICT (id_evaluacion, id_estudiante) DO UPDATE SET
+                total_correctas = evaluacion_resultados.total_correctas
+                                + EXCLUDED.total_correctas,
+                total_preguntas = evaluacion_resultados.total_preguntas
+                                + EXCLUDED.total_preguntas,
+                puntaje_total   = ROUND(
+                    (evaluacion_resultados.total_correctas
+                     + EXCLUDED.total_correctas)::NUMERIC
+                    / (evaluacion_resultados.total_preguntas
+                       + EXCLUDED.total_preguntas) * 100
+                )
+        """, [
+            (id_ev, id_estudiante, correctas, preguntas,
+             round(correctas / preguntas * 100))
+            for id_ev, (correctas, preguntas) in totales.items()
+        ], template="(%s, %s, 'en_progreso', %s, %s, %s)")
+
+
+def registrar_lote(cursor, id_estudiante, respuestas):
+    """
+    Flujo completo del lote: reclamo de los idCliente, una lectura, cálculo
+    en memoria e inserts masivos. `respuestas` ya normalizadas (ver
+    ws/tutor.py responder_lote). Retorna (resultados, previas):
+    resultados alineada con `respuestas` (None donde la opción no existe o
+    la respuesta ya estaba registrada) y previas {id_cliente: JSON guardado}
+    para las ya registradas. No hace commit.
+    """
+    reclamadas = reclamar_lote(cursor, id_estudiante, respuestas)
+    previas    = {}
+    if len(reclamadas) < len(respuestas):
+        previas = leer_previas(cursor, id_estudiante,
+                               [r["id_cliente"] for r in respuestas
+                                if r["id_cliente"] not in reclamadas])
+    nuevas = [r for r in respuestas if r["id_cliente"] in reclamadas]
+    por_id = dict(zip((r["id_cliente"] for r in nuevas), _registrar(cursor, id_estudiante, nuevas)))
+    return [por_id.get(r["id_cliente"]) for r in respuestas], previas
+
+
+def _registrar(cursor, id_estudiante, respuestas):
+    if not respuestas:
+        return []
+    datos = leer_contexto_lote(cursor, id_estudiante, respuestas)
+    # Material candidato de los fallos en repaso, desde el índice en memoria
+    ejercicios, competencias = set(), set()
+    for r in respuestas:
+        op = datos["opciones"].get(r["id_opcion"])
+        if op is not None and r["modo"] == "repaso" and not op["es_correcta"]:
+            ejercicios.add(r["id_ejercicio"])
+            competencias.add(op["id_competencia"])
+    if ejercicios:
+        indice = MATERIALES.indice(cursor, datos["version_materiales"])
+        datos["materiales"] = indice.candidatos_lote(sorted(ejercicios), sorted(competencias))
+    resultados = evaluar_lote(datos, respuestas)
+    escribir_lote(cursor, id_estudiante, respuestas, resultados)
+    guardar_resultados(cursor, id_estudiante, respuestas, resultados)
+    return resultados
@@ -0,0 +1,194 @@
+"""
+Registro versionado del modelo del tutor, con cambio en caliente.
+
+ws/tutor.py cargaba modelo_tutor.npz una sola vez al importarse: para poner
+en producción un modelo reentrenado había que reiniciar gunicorn, y las
+respuestas en curso se perdían. Ahora los modelos se publican en una
+carpeta de versiones:
+
+  <carpeta>/
+    ACTIVO                       → nombre de la versión vigente (una línea)
+    20261018-153000/
+        modelo_tutor.npz
+        meta.json                → origen, fecha y lo que quiera guardar el script
+
+publicar() copia el .npz a una carpeta temporal, la renombra a su versión
+y recién entonces reemplaza ACTIVO con os.replace (atómico): ningún worker
+ve una versión a medias. Volver atrás es activar() una versión anterior.
+
+Cada worker tiene un RegistroModelos. revisar() se llama en cada predicción
+pero solo mira el mtime de ACTIVO cada `intervalo_seg`; si cambió, carga la
+versión nueva en un hilo aparte, la valida con una predicción de prueba y
+recién ahí la activa (al_activar). Mientras tanto las peticiones siguen con
+el modelo anterior. Si la carga falla se conserva el anterior y se vuelve a
+intentar en la siguiente revisión.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from models.arbol_compilado import ArbolCompilado
+
+CARPETA = os.getenv(
+    "MODELOS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "modelos")
+)
+MARCADOR       = "ACTIVO"
+ARCHIVO_MODELO = "modelo_tutor.npz"
+INTERVALO_SEG  = 5
+
+
+def ruta_modelo(carpeta, version):
+    return os.path.join(carpeta, version, ARCHIVO_MODELO)
+
+
+def version_activa(carpeta=CARPETA):
+    """Versión que indica ACTIVO, o None si el registro está vacío."""
+    try:
+        with open(os.path.join(carpeta, MARCADOR), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def versiones(carpeta=CARPETA):
+    """Versiones publicadas, de la más antigua a la más nueva."""
+    if not os.path.isdir(carpeta):
+        return []
+    return sorted(v for v in os.listdir(carpeta)
+                  if not v.startswith(".") and os.path.isfile(ruta_modelo(carpeta, v)))
+
+
+def activar(version, carpeta=CARPETA):
+    """Apunta ACTIVO a `version` (ya publicada) de forma atómica."""
+    if not os.path.isfile(ruta_modelo(carpeta, version)):
+        raise FileNotFoundError(f"La versión {version} no existe en {carpeta}")
+    temporal = os.path.join(carpeta, f".{MARCADOR}.{os.getpid()}.tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(temporal, os.path.join(carpeta, MARCADOR))
+
+
+def publicar(ruta_npz, carpeta=CARPETA, version=None, meta=None, activar_ya=True):
+    """
+    Copia `ruta_npz` al registro como una versión nueva y (por defecto) la
+    activa. Retorna el nombre de la versión.
+    """
+    ArbolCompilado.cargar(ruta_npz)                # no publicar algo que no carga
+    os.makedirs(carpeta, exist_ok=True)
+    base    = version or time.strftime("%Y%m%d-%H%M%S")
+    version = base
+    n = 1
+    while os.path.exists(os.path.join(carpeta, version)):
+        n += 1
+        version = f"{base}-{n}"
+
+    temporal = os.path.join(carpeta, f".{version}.tmp")
+    os.makedirs(temporal)
+    try:
+        shutil.copyfile(ruta_npz, os.path.join(temporal, ARCHIVO_MODELO))
+        with open(os.path.join(temporal, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": version, "publicado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "origen": os.path.abspath(ruta_npz), **(meta or {})},
+                      f, ensure_ascii=False, indent=2, default=str)
+        os.rename(temporal, os.path.join(carpeta, version))
+    except Exception:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+    if activar_ya:
+        activar(version, carpeta)
+    return version
+
+
+class RegistroModelos:
+
+    def __init__(self, carpeta=CARPETA, intervalo_seg=INTERVALO_SEG,
+                 cargar=ArbolCompilado.cargar, al_activar=None):
+        self.carpeta       = carpeta
+        self.intervalo_seg = intervalo_seg
+        self._cargar       = cargar
+        self._al_activar   = al_activar
+        self._lock         = threading.Lock()
+        self.version       = None
+        self.modelo        = None
+        self._mtime        = None
+        self._proxima      = 0.0
+        self._hilo         = None
+        self._pid          = os.getpid()
+        self._metricas     = {"revisiones": 0, "recargas": 0, "errores": 0,
+                              "ultimo_error": None, "activado": None}
+
+    def _marcador(self):
+        return os.path.join(self.carpeta, MARCADOR)
+
+    def iniciar(self):
+        """Carga síncrona de la versión activa (al importar). None si no hay registro."""
+        try:
+            self._mtime = os.stat(self._marcador()).st_mtime_ns
+        except OSError:
+            return None
+        version = version_activa(self.carpeta)
+        if version is None:
+            return None
+        self._cargar_version(version)
+        return self.modelo
+
+    def revisar(self):
+        """Barato: como mucho un stat() cada intervalo_seg. Nunca bloquea ni lanza."""
+        ahora = time.monotonic()
+        if ahora < self._proxima:
+            return
+        with self._lock:
+            if self._pid != os.getpid():           # hilo del padre no existe tras fork
+                self._pid, self._hilo = os.getpid(), None
+            if ahora < self._proxima or (self._hilo is not None and self._hilo.is_alive()):
+                return
+            self._proxima = ahora + self.intervalo_seg
+            self._metricas["revisiones"] += 1
+            try:
+                mtime = os.stat(self._marcador()).st_mtime_ns
+            except OSError:
+                return
+            if mtime == self._mtime:
+                return
+            version = version_activa(self.carpeta)
+            self._mtime = mtime
+            if version is None or version == self.version:
+                return
+            self._hilo = threading.Thread(target=self._cargar_version, args=(version,),
+                                          name="recarga-modelo", daemon=True)
+            self._hilo.start()
+
+    def esperar_recarga(self, timeout=None):
+        hilo = self._hilo
+        if hilo is not None:
+            hilo.join(timeout)
+
+    def _cargar_version(self, version):
+        try:
+            modelo = self._cargar(ruta_modelo(self.carpeta, version))
+            # Una predicción de prueba antes de exponerlo a las peticiones
+            modelo.predict(np.zeros((1, modelo.n_features_in_)))
+        except Exception as e:
+            with self._lock:
+                self._mtime = None                 # reintentar en la próxima revisión
+                self._metricas["errores"] += 1
+                self._metricas["ultimo_error"] = f"{version}: {e}"
+            print(f"⚠️  No se pudo cargar la versión {version} del modelo: {e}")
+            return
+        with self._lock:
+            self.modelo, self.version = modelo, version
+            self._metricas["recargas"] += 1
+            self._metricas["activado"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        if self._al_activar is not None:
+            self._al_activar(modelo, version)
+
+    def metricas(self):
+        with self._lock:
+            return dict(self._metricas, version=self.version, carpeta=self.carpeta,
+                        recargando=self._hilo is not None and self._hilo.is_alive(),
+                        pid=os.getpid())
@@ -0,0 +1,449 @@
+"""
+Motor de registro de respuestas del tutor (POST /tutor/responder).
+
+Antes cada respuesta hacía ~10 sentencias secuenciales (opción, INSERT
+respuesta, leer_nec, INSERT progreso, INSERT puntajes, guardar_nec, AVG del
+nivel global, actualizar_progreso_estudiante, palabras clave, material,
+racha). Con la BD gestionada en la nube la latencia de ida y vuelta
+dominaba el endpoint. Ahora son DOS viajes al servidor:
+
+  1. leer_contexto()     → un SELECT trae opción, NEC de las 4 competencias,
+                           promedio de puntajes (si no hay NEC), racha en
+                           la competencia (por PK, models/rachas.py) y,
+                           si falló en repaso, la versión del material y lo
+                           que ya abrió (candidatos: models/indice_materiales.py).
+  2. evaluar_respuesta() → cálculo en memoria con models.scoring
+                           (delta → score → nivel, mensaje, alerta, material).
+  3. escribir_respuesta()→ un único INSERT ... con CTEs que modifican datos:
+                           respuestas_estudiantes, progreso, puntajes, NEC,
+                           estudiante.progreso_general y evaluación.
+
+La semántica es la misma que el flujo anterior (ver ws/tutor.py:
+leer_nec, guardar_nec, detectar_racha, actualizar_progreso_estudiante).
+"""
+import urllib.parse
+
+from models.indice_materiales import (
+    MATERIALES, SQL_VERSION as SQL_VERSION_MATERIALES, muestreo_ponderado,
+)
+from models.rachas import N_RACHA_ALERTA    # 3 fallos seguidos en repaso → alerta
+from models.scoring import (
+    calcular_delta, score_to_nivel, nivel_to_progreso,
+    nivel_display_texto, NIVEL_NOMBRE,
+)
+
+# Términos fijos por competencia cuando el docente no llenó palabras_clave
+KW_COMPETENCIA = {
+    1: "operaciones numéricas álgebra primaria",
+    2: "ecuaciones algebraicas patrones álgebra",
+    3: "geometría figuras movimiento espacial",
+    4: "estadística datos gráficos probabilidad",
+}
+
+
+def leer_contexto(cursor, id_estudiante, id_ejercicio, id_opcion, es_repaso):
+    """
+    Un solo SELECT con todo lo que el flujo de respuesta necesita leer.
+    Retorna None si la opción no existe.
+    """
+    cursor.execute(f"""
+        WITH op AS (
+            SELECT o.es_correcta,
+                   e.id_competencia,
+                   COALESCE(e.nivel_logro, e.nivel, 1) AS nivel_ejercicio,
+                   e.pista,
+                   e.palabras_clave
+            FROM opciones_ejercicio o
+            JOIN ejercicios e ON e.id_ejercicio = o.id_ejercicio
+            WHERE o.id_opcion = %(id_opcion)s
+        )
+        SELECT op.es_correcta,
+               op.id_competencia,
+               op.nivel_ejercicio,
+               op.pista,
+               op.palabras_clave,
+               nec.nivel_actual                     AS nec_nivel,
+               COALESCE(nec.promedio_puntaje, 0)   AS nec_score,
+               (nec.id_estudiante IS NOT NULL)     AS nec_existe,
+               CASE WHEN nec.id_estudiante IS NULL THEN (
+                   SELECT AVG(p.puntaje)
+                   FROM puntajes p
+                   WHERE p.id_estudiante  = %(id_estudiante)s
+                     AND p.id_competencia = op.id_competencia
+               ) END                               AS avg_puntajes,
+               (
+                   SELECT json_object_agg(n.id_competencia, COALESCE(n.nivel_actual, 1))
+                   FROM nivel_estudiante_competencia n
+                   WHERE n.id_estudiante = %(id_estudiante)s
+                     AND n.id_competencia BETWEEN 1 AND 4
+               )                                   AS niveles_nec,
+               (
+                   SELECT rc.racha
+                   FROM racha_estudiante_competencia rc
+                   WHERE rc.id_estudiante  = %(id_estudiante)s
+                     AND rc.id_competencia = op.id_competencia
+               )                                   AS racha,
+               -- El material candidato sale del índice en memoria
+               -- (models/indice_materiales.py): aquí solo su versión y lo
+               -- que el alumno ya abrió, para ponderar la sugerencia
+               CASE WHEN %(es_repaso)s AND NOT op.es_correcta THEN
+                   {SQL_VERSION_MATERIALES}
+               END                                 AS version_materiales,
+               CASE WHEN %(es_repaso)s AND NOT op.es_correcta THEN ARRAY(
+                   SELECT h.id_material
+                   FROM historial_material_estudio h
+                   WHERE h.id_estudiante = %(id_estudiante)s
+               ) END                               AS materiales_abiertos
+        FROM op
+        LEFT JOIN nivel_estudiante_competencia nec
+               ON nec.id_estudiante  = %(id_estudiante)s
+              AND nec.id_competencia = op.id_competencia
+    """, {
+        "id_opcion":     id_opcion,
+        "id_estudiante": id_estudiante,
+        "id_ejercicio":  id_ejercicio,
+        "es_repaso":     bool(es_repaso),
+    })
+    row = cursor.fetchone()
+    if not row:
+        return None
+
+    if row.get("nec_existe"):
+        nivel_actual = int(row.get("nec_nivel") or 1)
+        score_actual = float(row.get("nec_score") or 0)
+    else:
+        # Sin registro NEC: se inicializa desde los puntajes del docente (leer_nec)
+        score_actual = float(row.get("avg_puntajes") or 0)
+        nivel_actual = score_to_nivel(score_actual)
+
+    return {
+        "es_correcta":     bool(row["es_correcta"]),
+        "id_competencia":  row["id_competencia"],
+        "nivel_ejercicio": row["nivel_ejercicio"],
+        "pista":           (row.get("pista") or "").strip(),
+        "palabras_clave":  (row.get("palabras_clave") or "").strip(),
+        "nec_existe":      bool(row.get("nec_existe")),
+        "nivel_actual":    nivel_actual,
+        "score_actual":    score_actual,
+        "niveles_nec":     {int(k): int(v) for k, v in (row.get("niveles_nec") or {}).items()},
+        "racha":           int(row.get("racha") or 0),
+        "version_materiales":  row.get("version_materiales"),
+        "materiales_abiertos": set(row.get("materiales_abiertos") or ()),
+        "materiales":          [],
+    }
+
+
+def elegir_material(materiales, id_ejercicio, nivel_mat, abiertos=()):
+    """
+    Capa 1: material enlazado al ejercicio. Capa 2 (fallback): material
+    genérico de la competencia con nivel <= nivel_mat. Dentro de la capa,
+    muestreo ponderado que favorece lo que el alumno aún no abrió.
+    """
+    capa_1 = [m for m in materiales if m.get("id_ejercicio") == id_ejercicio]
+    if capa_1:
+        return muestreo_ponderado(capa_1, abiertos)
+    capa_2 = [
+        m for m in materiales
+        if not m.get("id_ejercicio")
+        and m.get("nivel") is not None and m["nivel"] <= nivel_mat
+    ]
+    return muestreo_ponderado(capa_2, abiertos)
+
+
+def recursos_busqueda(palabras_clave):
+    """URLs de búsqueda (YouTube · Web · PDF) con los términos conceptuales."""
+    q_yt  = urllib.parse.quote_plus(palabras_clave + " matemáticas")
+    q_web = urllib.parse.quote_plus(palabras_clave + " matemáticas ejercicio resuelto")
+    q_pdf = urllib.parse.quote_plus(
+        palabras_clave + " matemáticas recurso educativo filetype:pdf"
+    )
+    return {
+        "youtubeUrl": f"https://www.youtube.com/results?search_query={q_yt}",
+        "webUrl":     f"https://www.google.com/search?q={q_web}",
+        "pdfUrl":     f"https://www.google.com/search?q={q_pdf}",
+        "query":      palabras_clave,
+    }
+
+
+def evaluar_respuesta(ctx, id_ejercicio, tiempo_respuesta, uso_pista, es_repaso):
+    """
+    Cálculo puro (sin BD) del resultado de una respuesta a partir del
+    contexto leído. Retorna un dict con lo que se escribe y lo que se responde.
+    """
+    es_correcta     = ctx["es_correcta"]
+    id_competencia  = ctx["id_competencia"]
+    nivel_ejercicio = ctx["nivel_ejercicio"]
+    nivel_actual_bd = ctx["nivel_actual"]
+    score_actual    = ctx["score_actual"]
+
+    estado = "correcto" if es_correcta else "incorrecto"
+    if uso_pista and es_repaso:
+        estado += "_con_pista"
+
+    # uso_pista reduce el delta positivo: acertar con ayuda avanza menos
+    delta = calcular_delta(es_correcta, tiempo_respuesta, nivel_ejercicio,
+                           uso_pista=uso_pista and es_repaso)
+    if es_repaso:
+        nuevo_score = max(0.0, min(100.0, score_actual + delta))
+        nuevo_nivel = score_to_nivel(nuevo_score)
+    else:
+        # Evaluación: el NEC no se modifica; usamos el nivel real para la respuesta
+        nuevo_score = score_actual
+        nuevo_nivel = nivel_actual_bd
+
+    # Racha con signo DESPUÉS de esta respuesta, igual que el trigger de
+    # models/rachas.py (que registra el evento de alerta); solo cuenta el repaso
+    racha = ctx["racha"]
+    if es_repaso:
+        racha = max(racha, 0) + 1 if es_correcta else min(racha, 0) - 1
+    racha_negativa = es_repaso and racha <= -N_RACHA_ALERTA
+
+    if es_correcta:
+        if nuevo_nivel > nivel_actual_bd:
+            nuevo_ajuste = "mas_dificil"
+            mensaje = f"¡Subiste al nivel {NIVEL_NOMBRE.get(nuevo_nivel, str(nuevo_nivel))}!"
+        else:
+            nuevo_ajuste = "igual"
+            mensaje = "¡Correcto! Sigue practicando."
+        mostrar_pista = False
+    else:
+        if nuevo_nivel < nivel_actual_bd:
+            nuevo_ajuste = "mas_facil"
+            mensaje = "Ajustamos la dificultad para reforzar."
+        else:
+            nuevo_ajuste = "igual"
+            mensaje = "Sigue intentando, puedes lograrlo."
+        # Si ya está en N1 (mínimo posible) y tiene racha negativa (≥3 fallos seguidos)
+        # devolvemos "mas_facil" para que la app sepa que está atascado en el nivel base
+        if nuevo_nivel == 1 and nuevo_ajuste == "igual" and racha_negativa:
+            nuevo_ajuste = "mas_facil"
+            mensaje = "Repasa los materiales de apoyo. ¡Toma tu tiempo!"
+        mostrar_pista = es_repaso and bool(ctx["pista"])
+
+    # NEC de las 4 competencias DESPUÉS de esta respuesta
+    niveles = dict(ctx["niveles_nec"])
+    if 1 <= int(id_competencia) <= 4:
+        niveles[int(id_competencia)] = nuevo_nivel
+    prom_g = (sum(niveles.values()) / len(niveles)) if niveles else 1.0
+    nivel_global_texto = "bajo" if prom_g < 3 else "medio" if prom_g < 5 else "alto"
+
+    progreso_general = None
+    if es_repaso and niveles:
+        progreso_general = int(round(
+            sum(nivel_to_progreso(n) for n in niveles.values()) / 4
+        ))
+
+    material_sugerido    = None
+    recursos_adicionales = None
+    if es_repaso and not es_correcta:
+        nivel_mat = 1 if nuevo_nivel <= 2 else (2 if nuevo_nivel <= 4 else 3)
+        mat = elegir_material(ctx["materiales"], id_ejercicio, nivel_mat,
+                              ctx.get("materiales_abiertos") or ())
+        if mat:
+            material_sugerido = {
+                "idMaterial": mat["id_material"],
+                "titulo":     mat["titulo"],
+                "tipo":       mat["tipo"],
+                "url":        mat["url"],
+            }
+        palabras_clave = ctx["palabras_clave"] or KW_COMPETENCIA.get(
+            id_competencia, "matemáticas álgebra"
+        )
+        recursos_adicionales = recursos_busqueda(palabras_clave)
+
+    return {
+        "es_correcta":          es_correcta,
+        "id_competencia":       id_competencia,
+        "nivel_ejercicio":      nivel_ejercicio,
+        "estado":               estado,
+        "delta":                delta,
+        "nivel_anterior":       nivel_actual_bd,
+        "score_anterior":       score_actual,
+        "nuevo_score":          nuevo_score,
+        "nuevo_nivel":          nuevo_nivel,
+        "nuevo_ajuste":         nuevo_ajuste,
+        "mensaje":              mensaje,
+        "mostrar_pista":        mostrar_pista,
+        "nivel_global_texto":   nivel_global_texto,
+        "progreso_general":     progreso_general,
+        "docente_alertado":     racha_negativa,
+        "racha":                racha,
+        "racha_anterior":       ctx["racha"],
+        "material_sugerido":    material_sugerido,
+        "recursos_adicionales": recursos_adicionales,
+    }
+
+
+def escribir_respuesta(cursor, ctx, res, id_estudiante, id_ejercicio, id_opcion,
+                       tiempo_respuesta, uso_pista, modo, id_evaluacion=None):
+    """
+    Escribe todo el resultado en UNA sentencia con CTEs que modifican datos.
+    Retorna id_respuesta.
+    """
+    es_repaso = (modo == "repaso")
+    tiempo    = float(tiempo_respuesta) if tiempo_respuesta else None
+    params = {
+        "id_estudiante":   id_estudiante,
+        "id_ejercicio":    id_ejercicio,
+        "id_opcion":       id_opcion,
+        "id_competencia":  res["id_competencia"],
+        "tiempo":          tiempo,
+        "uso_pista":       bool(uso_pista),
+        "modo":            modo,
+        "nivel_progreso":  (f"Nivel {res['nivel_ejercicio']}"
+                            if res["nivel_ejercicio"] else None),
+        "estado":          res["estado"],
+        "puntaje_bin":     100 if res["es_correcta"] else 0,
+        "nec_nivel":       res["nuevo_nivel"],
+        "nec_score":       res["nuevo_score"],
+        "progreso_general": res["progreso_general"],
+        "id_evaluacion":   id_evaluacion,
+        "es_correcta":     res["es_correcta"],
+        "correctas":       1 if res["es_correcta"] else 0,
+        "puntaje_ev":      100 if res["es_correcta"] else 0,
+    }
+
+    ctes = ["""
+        resp AS (
+            INSERT INTO respuestas_estudiantes
+                (respuesta_texto, respuesta_imagen, fecha,
+                 tiempo_respuesta, uso_pista,
+                 id_estudiante, id_ejercicio, id_opcion,
+                 desarrollo_url, modo)
+            VALUES (NULL, NULL, CURRENT_TIMESTAMP, %(tiempo)s, %(uso_pista)s,
+                    %(id_estudiante)s, %(id_ejercicio)s, %(id_opcion)s,
+                    NULL, %(modo)s)
+            RETURNING id_respuesta
+        )""", """
+        prog AS (
+            INSERT INTO progreso
+                (nivel_actual, estado, tiempo_respuesta,
+                 id_estudiante, id_ejercicio, modo)
+            VALUES (%(nivel_progreso)s, %(estado)s, %(tiempo)s,
+                    %(id_estudiante)s, %(id_ejercicio)s, %(modo)s)
+        )"""]
+
+    if es_repaso:
+        # Puntaje binario → SOLO repaso alimenta el historial del ML.
+        ctes.append("""
+        punt AS (
+            INSERT INTO puntajes (puntaje, fecha_registro, id_competencia, id_estudiante)
+            VALUES (%(puntaje_bin)s, NOW(), %(id_competencia)s, %(id_estudiante)s)
+        )""")
+        ctes.append("""
+        nec AS (
+            INSERT INTO nivel_estudiante_competencia
+                (id_estudiante, id_competencia, nivel_actual,
+                 promedio_puntaje, ejercicios_considerados, fecha_ultimo_update)
+            VALUES (%(id_estudiante)s, %(id_competencia)s, %(nec_nivel)s,
+                    %(nec_score)s, 0, NOW())
+            ON CONFLICT (id_estudiante, id_competencia) DO UPDATE SET
+                nivel_actual        = EXCLUDED.nivel_actual,
+                promedio_puntaje    = EXCLUDED.promedio_puntaje,
+                fecha_ultimo_update = EXCLUDED.fecha_ultimo_update
+        )""")
+        if res["progreso_general"] is not None:
+            ctes.append("""
+        est AS (
+            UPDATE estudiante
+            SET progreso_general = %(progreso_general)s
+            WHERE id_estudiante = %(id_estudiante)s
+        )""")
+    elif not ctx["nec_existe"]:
+        # Evaluación de un alumno sin NEC: solo se inicializa (como leer_nec)
+        ctes.append("""
+        nec AS (
+            INSERT INTO nivel_estudiante_competencia
+                (id_estudiante, id_competencia, nivel_actual,
+                 promedio_puntaje, ejercicios_considerados, fecha_ultimo_update)
+            VALUES (%(id_estudiante)s, %(id_competencia)s, %(nec_nivel)s,
+                    %(nec_score)s, 0, NOW())
+            ON CONFLICT (id_estudiante, id_competencia) DO NOTHING
+        )""")
+
+    if not es_repaso and id_evaluacion:
+        ctes.append("""
+        ev_resp AS (
+            INSERT INTO evaluacion_respuestas
+                (id_evaluacion, id_estudiante, id_ejercicio, id_opcion, es_correcta, fecha)
+            VALUES (%(id_evaluacion)s, %(id_estudiante)s, %(id_ejercicio)s,
+                    %(id_opcion)s, %(es_correcta)s, NOW())
+            ON CONFLICT (id_evaluacion, id_estudiante, id_ejercicio) DO NOTHING
+        )""")
+        ctes.append("""
+        ev_res AS (
+            INSERT INTO evaluacion_resultados
+                (id_evaluacion, id_estudiante, estado,
+                 total_correctas, total_preguntas, puntaje_total)
+            VALUES (%(id_evaluacion)s, %(id_estudiante)s, 'en_progreso',
+                    %(correctas)s, 1, %(puntaje_ev)s)
+            ON CONFLICT (id_evaluacion, id_estudiante) DO UPDATE SET
+                total_correctas = evaluacion_resultados.total_correctas
+                                + EXCLUDED.total_correctas,
+                total_preguntas = evaluacion_resultados.total_preguntas
+                                + EXCLUDED.total_preguntas,
+                puntaje_total   = ROUND(
+                    (evaluacion_resultados.total_correctas
+                     + EXCLUDED.total_correctas)::NUMERIC
+                    / (evaluacion_resultados.total_preguntas
+                       + EXCLUDED.total_preguntas) * 100
+                )
+        )""")
+
+    cursor.execute(
+        "WITH " + ",".join(ctes) + "\nSELECT id_respuesta FROM resp",
+        params,
+    )
+    return cursor.fetchone()["id_respuesta"]
+
+
+def registrar_respuesta(cursor, id_estudiante, id_ejercicio, id_opcion,
+                        tiempo_respuesta, uso_pista, modo, id_evaluacion=None):
+    """
+    Flujo completo en dos viajes a la BD. Retorna None si la opción no existe;
+    si no, el dict de evaluar_respuesta() con 'id_respuesta' añadido.
+    No hace commit.
+    """
+    es_repaso = (modo == "repaso")
+    ctx = leer_contexto(cursor, id_estudiante, id_ejercicio, id_opcion, es_repaso)
+    if ctx is None:
+        return None
+    if es_repaso and not ctx["es_correcta"]:
+        ctx["materiales"] = MATERIALES.indice(cursor, ctx["version_materiales"]).candidatos(
+            id_ejercicio, ctx["id_competencia"])
+
+    res = evaluar_respuesta(ctx, id_ejercicio, tiempo_respuesta, uso_pista, es_repaso)
+    res["id_respuesta"] = escribir_respuesta(
+        cursor, ctx, res, id_estudiante, id_ejercicio, id_opcion,
+        tiempo_respuesta, uso_pista, modo, id_evaluacion,
+    )
+
+    if es_repaso:
+        print(f"📈 NEC comp={res['id_competencia']}: {res['score_anterior']:.1f}"
+              f"{res['delta']:+d}={res['nuevo_score']:.1f} → nivel {res['nuevo_nivel']}")
+    else:
+        print(f"📊 Evaluación comp={res['id_competencia']}: NEC sin cambio, "
+              f"nivel={res['nuevo_nivel']}")
+    if res["docente_alertado"]:
+        print(f"🔔 ALERTA DOCENTE: est={id_estudiante} comp={res['id_competencia']} "
+              f"— 3 fallos consecutivos")
+    return res
+
+
+def respuesta_json(res, modo):
+    """Cuerpo JSON de /tutor/responder (mismas claves que antes)."""
+    return {
+        "correcta":             res["es_correcta"],
+        "mostrarPista":         res["mostrar_pista"],
+        "mensaje":              res["mensaje"],
+        "nuevoAjuste":          res["nuevo_ajuste"],
+        "idRespuesta":          res["id_respuesta"],
+        "modo":                 modo,
+        "nivelMLCompetencia":   nivel_display_texto(res["nuevo_nivel"]),
+        "nivelCompetenciaInt":  res["nuevo_nivel"],
+        "scoreCompetencia":     round(res["nuevo_score"], 1),
+        "nivelGlobal":          res["nivel_global_texto"],
+        "materialSugerido":     res["material_sugerido"],
+        "recursosAdicionales":  res["recursos_adicionales"],
+        "docenteAlertado":      res["docente_alertado"],
+    }
@@ -21,7 +21,12 @@ Umbrales de tiempo por nivel del EJERCICIO (no del alumno):
   Ejercicio N3 (medio):    rápido ≤3 min  │ regular 3-10 min │ lento >10 min
   Ejercicio N4:            rápido ≤4 min  │ regular 4-12 min │ lento >12 min
   Ejercicio N5+ (difícil): rápido ≤5 min  │ regular 5-15 min │ lento >15 min
+
+Cada conversión tiene su versión por columnas (scores_to_niveles,
+clasificar_tiempos, calcular_deltas, niveles_to_progreso) para recalcular
+muchas respuestas a la vez; dan lo mismo que las escalares.
 """
+import numpy as np
 
 # ── Tramos score → nivel ────────────────────────────────────────────────────
 SCORE_BRACKETS = [
@@ -108,6 +113,18 @@ NIVEL_EJERCICIO_WHERE = {
     7: f"{DIFICULTAD_SQL} >= 6",             # Maestro: máximo disponible
 }
 
+# Misma banda que NIVEL_EJERCICIO_WHERE como rango cerrado (min, max) para
+# filtrar en memoria (models/banco_ejercicios.py). None = sin límite.
+NIVEL_EJERCICIO_RANGO = {
+    1: (None, 3),
+    2: (None, 3),
+    3: (2, 4),
+    4: (3, 5),
+    5: (4, 6),
+    6: (5, None),
+    7: (6, None),
+}
+
 # ── Dificultad (1-7) → banda de reporte (1-4) ───────────────────────────────
 # Los reportes "Tiempo por Dificultad" (Android + Web) usan 4 bandas con
 # nombres y colores fijos: 1=Fácil, 2=Básico, 3=Intermedio, 4=Avanzado.
@@ -234,3 +251,75 @@ def calcular_delta(es_correcta: bool, tiempo_respuesta, nivel_ejercicio=None,
 
 def nivel_display_texto(nivel_actual: int) -> str:
     return NIVEL_DISPLAY.get(int(nivel_actual or 1), "bajo")
+
+
+# ── Versiones por columnas (NumPy) ──────────────────────────────────────────
+# Mismas reglas que las funciones de arriba, sobre arrays de scores, tiempos
+# y niveles. Las tablas se leen en cada llamada (igual que las escalares).
+# None/NaN cuentan como dato ausente: score 0, tiempo "regular", nivel de
+# ejercicio por defecto.
+
+CATEGORIAS_TIEMPO = ("rapido", "regular", "lento")
+
+
+def _columna(valores):
+    return np.asarray(valores, dtype=float).reshape(-1)
+
+
+def scores_to_niveles(scores) -> np.ndarray:
+    """score_to_nivel por columnas: búsqueda binaria sobre SCORE_BRACKETS."""
+    s = np.clip(np.nan_to_num(_columna(scores), nan=0.0), 0.0, 100.0)
+    tramos  = sorted(SCORE_BRACKETS)
+    inicios = np.array([lo for lo, _, _ in tramos], dtype=float)
+    finales = np.array([hi for _, hi, _ in tramos], dtype=float)
+    niveles = np.array([n for _, _, n in tramos], dtype=np.int64)
+    i = np.clip(np.searchsorted(inicios, s, side="right") - 1, 0, len(tramos) - 1)
+    dentro = (s >= inicios[i]) & (s <= finales[i])
+    # Fuera de todo tramo (p. ej. 21.5, entre 21 y 22) → 7, como score_to_nivel
+    return np.where(dentro, niveles[i], 7)
+
+
+def niveles_to_progreso(niveles) -> np.ndarray:
+    """nivel_to_progreso por columnas (nivel desconocido → 0)."""
+    n = np.nan_to_num(_columna(niveles), nan=0.0).astype(np.int64)
+    n = np.where(n == 0, 1, n)
+    tabla = np.zeros(max(max(NIVEL_PROGRESO), 1) + 1, dtype=np.int64)
+    for nivel, pct in NIVEL_PROGRESO.items():
+        tabla[nivel] = pct
+    validos = (n >= 0) & (n < len(tabla))
+    return np.where(validos, tabla[np.where(validos, n, 0)], 0)
+
+
+def _codigos_tiempo(segundos, niveles_ejercicio=None) -> np.ndarray:
+    """Índice en CATEGORIAS_TIEMPO por respuesta."""
+    t = _columna(segundos)
+    if niveles_ejercicio is None:
+        n = np.full(t.shape, _NIVEL_DEFECTO, dtype=np.int64)
+    else:
+        n = np.broadcast_to(_columna(niveles_ejercicio), t.shape)
+        n = np.nan_to_num(n, nan=0.0).astype(np.int64)
+        n = np.where(n == 0, _NIVEL_DEFECTO, n)
+    umbrales = np.array([TIEMPO_THRESHOLDS[k] for k in range(1, 6)], dtype=float)
+    rapido, regular = umbrales[np.clip(n, 1, 5) - 1].T
+    codigos = np.where(t <= rapido, 0, np.where(t <= regular, 1, 2))
+    return np.where(np.isnan(t), 1, codigos)
+
+
+def clasificar_tiempos(segundos, niveles_ejercicio=None) -> np.ndarray:
+    """clasificar_tiempo por columnas: array de "rapido"/"regular"/"lento"."""
+    return np.array(CATEGORIAS_TIEMPO)[_codigos_tiempo(segundos, niveles_ejercicio)]
+
+
+def calcular_deltas(correctas, tiempos, niveles_ejercicio=None, usos_pista=None) -> np.ndarray:
+    """calcular_delta por columnas, con tabla de deltas [correcta, categoría]."""
+    codigos = _codigos_tiempo(tiempos, niveles_ejercicio)
+    tabla = np.array([[DELTA_SCORE.get((c, k), 0) for k in CATEGORIAS_TIEMPO]
+                      for c in (False, True)], dtype=np.int64)
+    fila  = np.broadcast_to(np.asarray(correctas, dtype=bool).reshape(-1), codigos.shape)
+    delta = tabla[fila.astype(np.int64), codigos]
+    if usos_pista is None:
+        return delta
+    pista = np.broadcast_to(np.asarray(usos_pista, dtype=bool).reshape(-1), codigos.shape)
+    return np.where(pista & (delta > 0),
+                    np.maximum(DELTA_MIN_CON_PISTA, delta - PENALIZACION_PISTA),
+                    delta)
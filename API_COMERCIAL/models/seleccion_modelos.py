@@ -0,0 +1,220 @@
+"""
+Selección de modelos: validación cruzada en paralelo, búsqueda de
+hiperparámetros del árbol y caché de folds.
+
+comparar_modelos.py entrenaba cada candidato y su cross_val_score uno tras
+otro en un solo núcleo, y train_model.py fijaba max_depth=6 a mano. Ahora
+cada (candidato, parámetros, fold) es una tarea independiente:
+
+  - las tareas se reparten en un ProcessPoolExecutor; X e y viajan una sola
+    vez a cada proceso (initializer), no con cada tarea;
+  - los folds son los de StratifiedKFold sin barajar (lo que usa
+    cross_val_score con cv=<int>), así el resultado no cambia con el número
+    de procesos;
+  - el accuracy de cada fold se guarda en cache_ml/folds.json con la clave
+    (modelo, parámetros, huella del dataset, folds): volver a correr con los
+    mismos datos solo entrena lo que falta;
+  - escribir_reporte() deja el ranking en JSON para comparar corridas.
+
+Los modelos se construyen en el proceso hijo a partir de su nombre en
+FABRICAS: solo viajan nombres y diccionarios de parámetros.
+"""
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from models.dataset_ml import CARPETA_CACHE
+
+# nombre → (clase, parámetros fijos)
+FABRICAS = {
+    "arbol":  (DecisionTreeClassifier, {"random_state": 42}),
+    "logreg": (LogisticRegression,     {"max_iter": 1000}),
+    "knn":    (KNeighborsClassifier,   {}),
+}
+
+# Espacio de búsqueda del árbol (profundidad y tamaño de hojas)
+ESPACIO_ARBOL = {
+    "max_depth":         [3, 4, 5, 6, 8, None],
+    "min_samples_leaf":  [1, 2, 4, 8],
+    "min_samples_split": [2, 4, 8],
+}
+
+RUTA_CACHE_FOLDS = os.path.join(CARPETA_CACHE, "folds.json")
+
+_X = _Y = None      # dataset del proceso hijo (ver _iniciar)
+
+
+def huella_dataset(X, y):
+    """sha256 de X, y (forma incluida): identifica el dataset en la caché."""
+    h = hashlib.sha256()
+    X = np.ascontiguousarray(X, dtype=float)
+    h.update(str(X.shape).encode())
+    h.update(X.tobytes())
+    h.update(json.dumps(np.asarray(y).tolist(), default=str).encode())
+    return h.hexdigest()[:16]
+
+
+def construir(modelo, params):
+    clase, fijos = FABRICAS[modelo]
+    return clase(**{**fijos, **params})
+
+
+def rejilla(espacio=None):
+    """Todas las combinaciones del espacio (búsqueda en rejilla)."""
+    espacio = espacio or ESPACIO_ARBOL
+    nombres = sorted(espacio)
+    return [dict(zip(nombres, valores))
+            for valores in itertools.product(*(espacio[n] for n in nombres))]
+
+
+def muestreo(iteraciones, espacio=None, semilla=42):
+    """`iteraciones` combinaciones distintas al azar (búsqueda aleatoria)."""
+    todas = rejilla(espacio)
+    if iteraciones >= len(todas):
+        return todas
+    return random.Random(semilla).sample(todas, iteraciones)
+
+
+def numero_folds(n_muestras, n_clases, maximo=3):
+    """Mismo criterio que tenía comparar_modelos: entre 2 y `maximo`."""
+    return max(min(maximo, n_muestras // max(n_clases, 1)), 2)
+
+
+def _clave(modelo, params, huella, n_folds, fold):
+    return f"{modelo}|{json.dumps(params, sort_keys=True)}|{huella}|{n_folds}|{fold}"
+
+
+def _iniciar(X, y):
+    global _X, _Y
+    _X, _Y = X, y
+
+
+def _evaluar_fold(tarea):
+    """(modelo, params, n_folds, fold) → (accuracy | None, error | None)."""
+    modelo, params, n_folds, fold = tarea
+    try:
+        divisiones = list(StratifiedKFold(n_splits=n_folds).split(_X, _Y))
+        entrenamiento, prueba = divisiones[fold]
+        estimador = construir(modelo, params)
+        estimador.fit(_X[entrenamiento], _Y[entrenamiento])
+        return float(estimador.score(_X[prueba], _Y[prueba])), None
+    except Exception as e:
+        return None, str(e)
+
+
+class CacheFolds:
+    """Accuracy por fold en un JSON. Sin ruta, solo en memoria."""
+
+    def __init__(self, ruta=RUTA_CACHE_FOLDS):
+        self.ruta  = ruta
+        self.datos = {}
+        if ruta and os.path.exists(ruta):
+            try:
+                with open(ruta, encoding="utf-8") as f:
+                    self.datos = json.load(f)
+            except (OSError, ValueError):
+                self.datos = {}
+
+    def get(self, clave):
+        return self.datos.get(clave)
+
+    def put(self, clave, valor):
+        self.datos[clave] = valor
+
+    def guardar(self):
+        if not self.ruta:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+            temporal = self.ruta + ".tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(self.datos, f)
+            os.replace(temporal, self.ruta)
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar la caché de folds ({self.ruta}): {e}")
+
+
+def evaluar(candidatos, X, y, n_folds=3, procesos=None, cache=None):
+    """
+    Validación cruzada de cada (modelo, params) de `candidatos`.
+    procesos=1 evalúa en este proceso; None usa todos los núcleos.
+    Retorna una lista de resultados ordenada por accuracy medio (mayor primero).
+    """
+    X = np.ascontiguousarray(X, dtype=float)
+    y = np.asarray(y)
+    cache  = cache if cache is not None else CacheFolds()
+    huella = huella_dataset(X, y)
+
+    pendientes = []
+    for modelo, params in candidatos:
+        for fold in range(n_folds):
+            if cache.get(_clave(modelo, params, huella, n_folds, fold)) is None:
+                pendientes.append((modelo, params, n_folds, fold))
+
+    inicio = time.perf_counter()
+    if pendientes:
+        if procesos == 1:
+            _iniciar(X, y)
+            salidas = [_evaluar_fold(t) for t in pendientes]
+        else:
+            with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar,
+                                     initargs=(X, y)) as ejecutor:
+                salidas = list(ejecutor.map(_evaluar_fold, pendientes,
+                                            chunksize=max(1, len(pendientes) // 32)))
+        for (modelo, params, _, fold), (acc, error) in zip(pendientes, salidas):
+            cache.put(_clave(modelo, params, huella, n_folds, fold),
+                      {"accuracy": acc, "error": error})
+        cache.guardar()
+    segundos = time.perf_counter() - inicio
+
+    resultados = []
+    for modelo, params in candidatos:
+        folds = [cache.get(_clave(modelo, params, huella, n_folds, f)) for f in range(n_folds)]
+        accs  = [f["accuracy"] for f in folds if f["accuracy"] is not None]
+        errores = sorted({f["error"] for f in folds if f["error"]})
+        resultados.append({
+            "modelo":   modelo,
+            "params":   params,
+            "cv_media": float(np.mean(accs)) if accs else None,
+            "cv_std":   float(np.std(accs)) if accs else None,
+            "folds":    [f["accuracy"] for f in folds],
+            "errores":  errores,
+        })
+    resultados.sort(key=lambda r: -1.0 if r["cv_media"] is None else r["cv_media"], reverse=True)
+    return {"huella": huella, "n_folds": n_folds, "entrenados": len(pendientes),
+            "desde_cache": len(candidatos) * n_folds - len(pendientes),
+            "segundos": round(segundos, 3), "resultados": resultados}
+
+
+def mejor(evaluacion, modelo=None):
+    """Mejor resultado (de un modelo, si se indica) o None."""
+    for r in evaluacion["resultados"]:
+        if r["cv_media"] is not None and (modelo is None or r["modelo"] == modelo):
+            return r
+    return None
+
+
+def escribir_reporte(ruta, evaluacion, **extra):
+    """Reporte JSON de la evaluación (ranking completo + mejor por modelo)."""
+    modelos = sorted({r["modelo"] for r in evaluacion["resultados"]})
+    reporte = {
+        "generado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **extra,
+        **{k: v for k, v in evaluacion.items() if k != "resultados"},
+        "mejor":           mejor(evaluacion),
+        "mejor_por_modelo": {m: mejor(evaluacion, m) for m in modelos},
+        "resultados":      evaluacion["resultados"],
+    }
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2, default=str)
+    return reporte
@@ -0,0 +1,284 @@
+"""
+Subida diferida de las fotos del desarrollo a Cloudinary.
+
+/tutor/subir_desarrollo llamaba a util_cloudinary.subir_imagen dentro de la
+petición: con 2 workers de gunicorn, una foto de 10 MB con mala conexión
+bloqueaba la mitad de la API. Ahora la petición solo:
+
+  1. guarda el archivo en el almacén por contenido (<sha256>.<ext>, ver
+     almacen_imagenes.py; el hash también es el public_id de Cloudinary),
+  2. deja desarrollo_url apuntando a esa copia (/imagenes/<archivo>),
+  3. encola la subida y responde con pendiente=True.
+
+Un pool de hilos por worker (SUBIDAS_WORKERS) sube a Cloudinary con
+reintentos y espera exponencial; al terminar actualiza desarrollo_url con la
+URL definitiva (solo si sigue siendo la pendiente: si el alumno volvió a
+subir, no se pisa la nueva). Los blobs del almacén se conservan (sirven las
+miniaturas y la deduplicación); otros archivos se borran al subirse.
+
+Cada trabajo deja un marcador JSON en <carpeta>/.pendientes/. El marcador
+se "reclama" con un rename atómico (.en_curso.<pid>) para que dos workers no
+suban el mismo archivo, y quien lo procesa le renueva el mtime al reclamarlo
+y cada lease_seg/3 mientras sube: es un lease. reanudar_pendientes() vuelve a
+encolar los marcadores libres y los reclamos cuyo lease venció
+(SUBIDAS_LEASE_SEG; el pid no sirve para saber si el dueño vive, en otro
+contenedor puede ser de otro proceso). Si otro worker recuperó el reclamo, el
+.en_curso ya no existe: el lease se perdió y el trabajo es del otro.
+Se llama al crear la cola y luego cada SUBIDAS_REVISION_SEG desde un hilo
+del worker, así las subidas que agotaron los reintentos vuelven a probarse
+sin esperar al próximo arranque.
+
+SubidorLocal imita a subir_imagen (copia a otra carpeta) para probar el
+flujo sin red ni credenciales.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from config import Config
+
+_SUFIJO_MARCADOR = ".json"
+_SUFIJO_EN_CURSO = ".en_curso"
+
+
+class SubidorLocal:
+    """Misma firma que util_cloudinary.subir_imagen, pero copia a `destino`."""
+
+    def __init__(self, destino, url_base, fallos=0):
+        self.destino  = destino
+        self.url_base = url_base.rstrip("/")
+        self.fallos   = fallos      # primeras N llamadas fallan (pruebas de reintento)
+        self.llamadas = 0
+        os.makedirs(destino, exist_ok=True)
+
+    def __call__(self, archivo, public_id):
+        self.llamadas += 1
+        if self.llamadas <= self.fallos:
+            raise ConnectionError(f"fallo simulado {self.llamadas}/{self.fallos}")
+        nombre = public_id.replace("/", "_") + ".jpg"
+        shutil.copyfile(archivo, os.path.join(self.destino, nombre))
+        return f"{self.url_base}/{nombre}"
+
+
+def _actualizar_url_bd(id_respuesta, url_final, url_pendiente, hash_contenido=None):
+    from conexionBD import Conexion
+    con    = Conexion()
+    cursor = con.cursor()
+    try:
+        cursor.execute(
+            "UPDATE respuestas_estudiantes SET desarrollo_url = %s "
+            "WHERE id_respuesta = %s AND desarrollo_url = %s",
+            (url_final, id_respuesta, url_pendiente)
+        )
+        if hash_contenido:
+            from models.almacen_imagenes import guardar_url_nube
+            guardar_url_nube(cursor, hash_contenido, url_final)
+        con.commit()
+    finally:
+        cursor.close()
+        con.close()
+
+
+class ColaSubidas:
+
+    def __init__(self, carpeta, subidor, workers=None, reintentos=None,
+                 espera_base_seg=None, lease_seg=None, revision_seg=None,
+                 actualizar_url=_actualizar_url_bd):
+        self.carpeta         = carpeta
+        self.subidor         = subidor
+        self.workers         = int(workers    or Config.SUBIDAS_WORKERS)
+        self.reintentos      = int(reintentos or Config.SUBIDAS_REINTENTOS)
+        self.espera_base_seg = float(Config.SUBIDAS_ESPERA_BASE_SEG
+                                     if espera_base_seg is None else espera_base_seg)
+        self.lease_seg       = float(lease_seg    or Config.SUBIDAS_LEASE_SEG)
+        self.revision_seg    = float(revision_seg or Config.SUBIDAS_REVISION_SEG)
+        self._actualizar_url = actualizar_url
+        self._pendientes_dir = os.path.join(carpeta, ".pendientes")
+        self._lock           = threading.Lock()
+        self._executor       = None
+        self._revision       = None
+        self._pid            = None
+        self._metricas       = {"encoladas": 0, "subidas": 0, "reintentos": 0, "fallidas": 0}
+        os.makedirs(self._pendientes_dir, exist_ok=True)
+
+    def _pool(self):
+        # Los hilos no sobreviven al fork: cada worker crea su propio pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="subida")
+                self._pid = os.getpid()
+                self._programar_revision()
+            return self._executor
+
+    def _programar_revision(self):
+        """Próxima pasada de reanudar_pendientes en este worker (con el lock tomado)."""
+        self._revision = threading.Timer(self.revision_seg, self._revisar)
+        self._revision.daemon = True
+        self._revision.start()
+
+    def _revisar(self):
+        try:
+            self.reanudar_pendientes()
+        except Exception as e:
+            print(f"⚠️  Revisión de subidas pendientes: {e}")
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._programar_revision()
+
+    def _ruta_marcador(self, nombre):
+        return os.path.join(self._pendientes_dir, nombre + _SUFIJO_MARCADOR)
+
+    def encolar(self, id_respuesta, nombre, public_id, url_pendiente, hash_contenido=None):
+        """
+        Registra el trabajo en disco y lo envía al pool. Retorna el Future.
+        Con hash_contenido el archivo es un blob del almacén por contenido
+        (models/almacen_imagenes.py): no se borra al terminar y la URL se
+        guarda también en imagenes_contenido.url_nube.
+        """
+        trabajo = {"id_respuesta": id_respuesta, "archivo": nombre,
+                   "public_id": public_id, "url_pendiente": url_pendiente,
+                   "hash": hash_contenido}
+        # Dos respuestas pueden compartir blob: el marcador lleva el id
+        marcador = self._ruta_marcador(f"{nombre}.{id_respuesta}")
+        with open(marcador + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(trabajo, f)
+        os.replace(marcador + ".tmp", marcador)
+        return self._enviar(marcador)
+
+    def _lease_vencido(self, ruta):
+        try:
+            return time.time() - os.path.getmtime(ruta) > self.lease_seg
+        except FileNotFoundError:
+            return False
+
+    def reanudar_pendientes(self):
+        """Re-encola los marcadores libres y los reclamos con el lease vencido."""
+        self._pool()            # deja programada la revisión periódica de este worker
+        futuros = []
+        for nombre in os.listdir(self._pendientes_dir):
+            # Nadie renovó el lease (el proceso murió o quedó colgado) → pendiente
+            base, sep, pid = nombre.rpartition(_SUFIJO_EN_CURSO + ".")
+            ruta = os.path.join(self._pendientes_dir, nombre)
+            if sep and pid.isdigit() and self._lease_vencido(ruta):
+                try:
+                    os.rename(ruta, os.path.join(self._pendientes_dir, base))
+                except FileNotFoundError:
+                    pass
+        for nombre in sorted(os.listdir(self._pendientes_dir)):
+            if nombre.endswith(_SUFIJO_MARCADOR):
+                futuros.append(self._enviar(os.path.join(self._pendientes_dir, nombre)))
+        return [f for f in futuros if f is not None]
+
+    def _enviar(self, marcador):
+        en_curso = f"{marcador}{_SUFIJO_EN_CURSO}.{os.getpid()}"
+        try:
+            os.rename(marcador, en_curso)   # reclamo atómico entre workers
+        except FileNotFoundError:
+            return None
+        # rename conserva el mtime: un marcador viejo nacería con el lease vencido
+        if not self._renovar_lease(en_curso):
+            return None
+        with self._lock:
+            self._metricas["encoladas"] += 1
+        return self._pool().submit(self._procesar, en_curso, marcador)
+
+    @staticmethod
+    def _renovar_lease(en_curso):
+        """False si el reclamo ya no existe: otro worker lo recuperó."""
+        try:
+            os.utime(en_curso)
+            return True
+        except FileNotFoundError:
+            return False
+
+    @contextmanager
+    def _renovando(self, en_curso):
+        """Renueva el lease cada lease_seg/3 mientras dura la subida."""
+        parar = threading.Event()
+
+        def renovar():
+            while not parar.wait(self.lease_seg / 3):
+                if not self._renovar_lease(en_curso):
+                    return
+
+        hilo = threading.Thread(target=renovar, name="subida-lease", daemon=True)
+        hilo.start()
+        try:
+            yield
+        finally:
+            parar.set()
+            hilo.join()
+
+    def _procesar(self, en_curso, marcador):
+        try:
+            with open(en_curso, encoding="utf-8") as f:
+                trabajo = json.load(f)
+        except FileNotFoundError:
+            return None                 # lease perdido mientras esperaba en el pool
+        ruta = os.path.join(self.carpeta, trabajo["archivo"])
+
+        for intento in range(1, self.reintentos + 1):
+            if not self._renovar_lease(en_curso):
+                return None
+            if not os.path.exists(ruta):
+                # La copia local ya no existe: no hay nada que subir
+                try:
+                    os.remove(en_curso)
+                except FileNotFoundError:
+                    pass
+                return None
+            try:
+                with self._renovando(en_curso):
+                    url = self.subidor(ruta, trabajo["public_id"])
+                extra = {"hash_contenido": trabajo["hash"]} if trabajo.get("hash") else {}
+                self._actualizar_url(trabajo["id_respuesta"], url, trabajo["url_pendiente"], **extra)
+                break
+            except Exception as e:
+                print(f"⚠️  Subida resp {trabajo['id_respuesta']} intento {intento}: {e}")
+                if intento == self.reintentos:
+                    # Se devuelve el marcador: lo retoma la próxima revisión
+                    try:
+                        os.rename(en_curso, marcador)
+                    except FileNotFoundError:
+                        return None
+                    with self._lock:
+                        self._metricas["fallidas"] += 1
+                    return None
+                with self._lock:
+                    self._metricas["reintentos"] += 1
+                time.sleep(self.espera_base_seg * (2 ** (intento - 1)))
+
+        with self._lock:
+            self._metricas["subidas"] += 1
+        try:
+            os.remove(en_curso)
+        except FileNotFoundError:
+            # Subida lenta: otro worker ya la retomó. La URL quedó guardada
+            # (el UPDATE es condicional); el archivo lo limpia el nuevo dueño.
+            return url
+        if not trabajo.get("hash"):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+        return url
+
+    def metricas(self):
+        with self._lock:
+            return dict(self._metricas, pid=os.getpid(), workers=self.workers)
+
+    def cerrar(self, esperar=True):
+        # shutdown fuera del lock: los hilos lo toman para las métricas
+        with self._lock:
+            executor, propio = self._executor, self._pid == os.getpid()
+            self._executor = None
+            if self._revision is not None and propio:
+                self._revision.cancel()
+            self._revision = None
+        if executor is not None and propio:
+            executor.shutdown(wait=esperar)
@@ -0,0 +1,58 @@
+"""
+Recalcula nivel_estudiante_competencia reproduciendo el historial de repaso
+con las reglas actuales de models/scoring.py (ver models/recalculo_nec.py).
+
+Por defecto es un ensayo: muestra cuántos niveles cambiarían y no escribe.
+Con --aplicar guarda los cambios (bloquea las respuestas mientras corre).
+
+Ejecución:
+    python recalcular_nec.py                      # ensayo
+    python recalcular_nec.py --estudiante 12 --estudiante 15
+    python recalcular_nec.py --aplicar
+"""
+import argparse
+import sys
+
+from conexionBD import Conexion
+from models.recalculo_nec import FILAS_POR_VIAJE, ejecutar
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recalcula el NEC desde el historial")
+    parser.add_argument("--aplicar", action="store_true",
+                        help="escribe los cambios (sin esto solo informa)")
+    parser.add_argument("--estudiante", type=int, action="append",
+                        help="limita el recálculo a este alumno (repetible)")
+    parser.add_argument("--filas", type=int, default=FILAS_POR_VIAJE,
+                        help="filas por viaje del cursor del servidor")
+    args = parser.parse_args(argv)
+
+    conn = Conexion()
+    try:
+        informe = ejecutar(conn, aplicar=args.aplicar, estudiantes=args.estudiante,
+                           filas_por_viaje=args.filas)
+    except Exception as e:
+        conn.rollback()
+        print("❌ Error al recalcular el NEC:", str(e))
+        return 1
+    finally:
+        conn.close()
+
+    for c in informe["detalle"][:20]:
+        print(f"   alumno {c['id_estudiante']} comp {c['id_competencia']}: "
+              f"nivel {c['nivel_anterior']} → {c['nivel']}, "
+              f"score {c['score_anterior']} → {c['score']:.1f} ({c['respuestas']} respuestas)")
+    if informe["cambios"] > 20:
+        print(f"   … y {informe['cambios'] - 20} más")
+
+    accion = "aplicado" if informe["aplicado"] else "ensayo, sin cambios guardados"
+    print(f"✅ Recálculo del NEC ({accion}): {informe['pares']} pares, "
+          f"{informe['cambios']} con cambios ({informe['niveles']} de nivel: "
+          f"{informe['suben']} suben, {informe['bajan']} bajan).")
+    print(f"   {informe['respuestas']} respuestas en {informe['segundos']} s "
+          f"({informe['filas_por_seg']} filas/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Reconstruye la tabla puntajes_estadisticas desde el historial de PUNTAJES.
+
+La tabla se mantiene sola con el trigger trg_puntajes_estadisticas (ver
+models/estadisticas_puntajes.py); este script es para recuperarla si se
+desactivó el trigger, se cargaron datos a mano o cambió UMBRAL_APROBADO.
+
+Ejecución:
+    python reconstruir_estadisticas.py
+"""
+
+from conexionBD import Conexion
+from models.estadisticas_puntajes import instalar, reconstruir
+
+
+def main():
+    conn = Conexion()
+    cur = conn.cursor()
+
+    try:
+        # Reinstala funciones/trigger por si cambió el umbral
+        instalar(cur)
+        claves = reconstruir(cur)
+        conn.commit()
+        print(f"✅ puntajes_estadisticas reconstruida: {claves} pares (estudiante, competencia).")
+
+    except Exception as e:
+        conn.rollback()
+        print("❌ Error al reconstruir estadísticas:", str(e))
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Reconstruye las rachas por competencia y el resumen de respuestas recientes
+desde el historial (respuestas_estudiantes y progreso).
+
+Las tablas se mantienen solas con los triggers trg_racha_respuesta y
+trg_resumen_progreso (ver models/rachas.py); este script es para
+recuperarlas si se borraron o corrigieron respuestas a mano. Los eventos de
+alertas_docente no se tocan.
+
+Ejecución:
+    python reconstruir_rachas.py
+"""
+
+from conexionBD import Conexion
+from models.rachas import instalar, reconstruir
+
+
+def main():
+    conn = Conexion()
+    cur = conn.cursor()
+
+    try:
+        instalar(cur)
+        rachas, resumenes = reconstruir(cur)
+        conn.commit()
+        print(f"✅ Rachas reconstruidas: {rachas} pares (estudiante, competencia), "
+              f"{resumenes} resúmenes de alumno.")
+
+    except Exception as e:
+        conn.rollback()
+        print("❌ Error al reconstruir rachas:", str(e))
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,23 +11,36 @@ El modelo:
 - Usa como features:
     total_intentos, promedio, mínimo, máximo, tasa_aprobados
 - Guarda (modelo, encoder, feature_names) en modelo_tutor.pkl
+- Compila el árbol a modelo_tutor.npz (lo que carga la API, sin sklearn)
+  y lo publica como versión nueva en el registro de modelos
 
 Ejecución:
     python train_model.py
+    python train_model.py --buscar      # profundidad/hojas por CV en paralelo
 """
 
+import argparse
 import pickle
 import numpy as np
-from sklearn.tree import DecisionTreeClassifier, export_text
+from sklearn.tree import export_text
 from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import classification_report, confusion_matrix
-from conexionBD import Conexion
+from models.dataset_ml import cargar_dataset, etiquetas_tutor, features_tutor
+from models.arbol_compilado import compilar, verificar_paridad
+from models.registro_modelos import CARPETA as CARPETA_MODELOS, publicar
+from models.seleccion_modelos import (
+    construir, escribir_reporte, evaluar, mejor, numero_folds, rejilla,
+)
 
 UMBRAL_APROBADO = 60.0
 UMBRAL_BAJO     = 40.0
 UMBRAL_MEDIO    = 70.0
 
+# Hiperparámetros del árbol sin búsqueda (python train_model.py --buscar
+# los elige por validación cruzada, ver models/seleccion_modelos.py)
+PARAMS_ARBOL = {"max_depth": 6, "min_samples_split": 4, "class_weight": "balanced"}
+
 
 def cargar_datos_desde_bd():
     """
@@ -48,90 +61,38 @@ def cargar_datos_desde_bd():
       - Un alumno inconsistente (std alto) con buen promedio puede necesitar
         más práctica antes de avanzar.
     """
-    con = Conexion()
-    cur = con.cursor()
-
-    cur.execute("""
-        SELECT
-            p.id_estudiante,
-            p.id_competencia,
-            COUNT(*)                                               AS total_intentos,
-            AVG(p.puntaje)                                        AS promedio_puntaje,
-            MIN(p.puntaje)                                        AS min_puntaje,
-            MAX(p.puntaje)                                        AS max_puntaje,
-            COALESCE(STDDEV(p.puntaje), 0)                       AS std_puntaje,
-            SUM(CASE WHEN p.puntaje >= %s THEN 1 ELSE 0 END)     AS num_aprobados,
-            CORR(EXTRACT(EPOCH FROM p.fecha_registro), p.puntaje) AS tendencia
-        FROM puntajes p
-        GROUP BY p.id_estudiante, p.id_competencia
-        HAVING COUNT(*) >= 1
-    """, (UMBRAL_APROBADO,))
-
-    rows = cur.fetchall()
-    cur.close()
-    con.close()
-
-    X = []
-    y = []
-
-    for row in rows:
-        total     = row["total_intentos"] or 0
-        promedio  = row["promedio_puntaje"]
-        min_p     = row["min_puntaje"]
-        max_p     = row["max_puntaje"]
-        std_p     = row["std_puntaje"] or 0.0
-        aprobados = row["num_aprobados"] or 0
-        tendencia = row["tendencia"]          # None si todos iguales
-
-        if promedio is None or total == 0:
-            continue
-
-        promedio  = max(0.0, min(100.0, float(promedio)))
-        min_p     = max(0.0, min(100.0, float(min_p)))
-        max_p     = max(0.0, min(100.0, float(max_p)))
-        std_p     = max(0.0, float(std_p))
-        tasa      = float(aprobados) / float(total)
-        tendencia = float(tendencia) if tendencia is not None else 0.0
-        tendencia = max(-1.0, min(1.0, tendencia))   # clamping por seguridad
-
-        # ── Etiqueta multi-feature (rompe la dependencia circular) ──────────
-        #
-        # Antes: nivel = f(promedio) únicamente → el árbol aprendía el umbral
-        #        de promedio, lo que es CIRCULAR (promedio ES la definición).
-        #
-        # Ahora: la etiqueta depende de TRES señales independientes:
-        #   · tasa_aprobados  (correctas / total)
-        #   · tendencia       (¿está mejorando o empeorando?)
-        #   · total_intentos  (¿tiene suficiente historial?)
-        #
-        # Reglas pedagógicas:
-        #   "alto"  → tasa ≥ 0.70  Y  no está empeorando claramente
-        #             → el alumno domina Y mantiene o mejora su rendimiento
-        #   "bajo"  → tasa < 0.35
-        #             O (tasa < 0.55 Y tendencia < -0.30)
-        #             → alumno con dificultades O que está retrocediendo
-        #   "medio" → todo lo demás (rendimiento aceptable / en transición)
-        #
-        # Efecto: dos alumnos con el mismo promedio pero trayectorias opuestas
-        # reciben etiquetas distintas, forzando al árbol a aprender de tendencia.
-        if tasa >= 0.70 and tendencia >= -0.30:
-            nivel = "alto"
-        elif tasa < 0.35 or (tasa < 0.55 and tendencia < -0.30):
-            nivel = "bajo"
-        else:
-            nivel = "medio"
-
-        X.append([float(total), promedio, min_p, max_p, std_p, tasa, tendencia])
-        y.append(nivel)
+    datos = cargar_dataset(UMBRAL_APROBADO)
+    X = features_tutor(datos)
+
+    # ── Etiqueta multi-feature (rompe la dependencia circular) ──────────────
+    #
+    # Antes: nivel = f(promedio) únicamente → el árbol aprendía el umbral
+    #        de promedio, lo que es CIRCULAR (promedio ES la definición).
+    #
+    # Ahora: la etiqueta depende de TRES señales independientes:
+    #   · tasa_aprobados  (correctas / total)
+    #   · tendencia       (¿está mejorando o empeorando?)
+    #   · total_intentos  (¿tiene suficiente historial?)
+    #
+    # Reglas pedagógicas (models/dataset_ml.etiquetas_tutor):
+    #   "alto"  → tasa ≥ 0.70  Y  no está empeorando claramente
+    #             → el alumno domina Y mantiene o mejora su rendimiento
+    #   "bajo"  → tasa < 0.35
+    #             O (tasa < 0.55 Y tendencia < -0.30)
+    #             → alumno con dificultades O que está retrocediendo
+    #   "medio" → todo lo demás (rendimiento aceptable / en transición)
+    #
+    # Efecto: dos alumnos con el mismo promedio pero trayectorias opuestas
+    # reciben etiquetas distintas, forzando al árbol a aprender de tendencia.
+    y = etiquetas_tutor(datos)
 
     # ── Balanceo con datos sintéticos si alguna clase tiene < MIN_MUESTRAS ────
-    conteo = {"bajo": 0, "medio": 0, "alto": 0}
-    for nivel in y:
-        conteo[nivel] += 1
+    conteo = {c: int(np.sum(y == c)) for c in ("bajo", "medio", "alto")}
 
     print("📊 Distribución REAL de datos:", conteo)
 
     MIN_MUESTRAS = 10
+    X_sint, y_sint = [], []
 
     def _sint(prom_range, min_range, max_range, std_range, tasa_range, tend_range):
         total_s    = np.random.randint(3, 20)
@@ -147,30 +108,31 @@ def cargar_datos_desde_bd():
         n = MIN_MUESTRAS - conteo["alto"]
         print(f"⚠️  Pocos datos 'alto' ({conteo['alto']}). Agregando {n} sintéticos...")
         for _ in range(n):
-            X.append(_sint((70,100),(55,80),(85,100),(0,20),(0.7,1.0),(0.0,1.0)))
-            y.append("alto")
+            X_sint.append(_sint((70,100),(55,80),(85,100),(0,20),(0.7,1.0),(0.0,1.0)))
+            y_sint.append("alto")
 
     if conteo["medio"] < MIN_MUESTRAS:
         n = MIN_MUESTRAS - conteo["medio"]
         print(f"⚠️  Pocos datos 'medio' ({conteo['medio']}). Agregando {n} sintéticos...")
         for _ in range(n):
-            X.append(_sint((40,70),(20,55),(60,85),(5,35),(0.3,0.7),(-0.3,0.3)))
-            y.append("medio")
+            X_sint.append(_sint((40,70),(20,55),(60,85),(5,35),(0.3,0.7),(-0.3,0.3)))
+            y_sint.append("medio")
 
     if conteo["bajo"] < MIN_MUESTRAS:
         n = MIN_MUESTRAS - conteo["bajo"]
         print(f"⚠️  Pocos datos 'bajo' ({conteo['bajo']}). Agregando {n} sintéticos...")
         for _ in range(n):
-            X.append(_sint((0,40),(0,25),(20,55),(0,15),(0.0,0.3),(-1.0,0.2)))
-            y.append("bajo")
+            X_sint.append(_sint((0,40),(0,25),(20,55),(0,15),(0.0,0.3),(-1.0,0.2)))
+            y_sint.append("bajo")
+
+    if X_sint:
+        X = np.vstack([X, np.array(X_sint, dtype=float)])
+        y = np.concatenate([y, np.array(y_sint, dtype=object)])
 
-    if sum(1 for nivel in y if nivel != y[0]) == 0:
+    if len(set(y)) < 2:
         print("Solo hay una clase. No se puede entrenar.")
         return np.array([], dtype=float), np.array([], dtype=object)
 
-    X = np.array(X, dtype=float)
-    y = np.array(y, dtype=object)
-
     print(f"✅ Total muestras (reales + sintéticas si hubo): {len(X)}")
     return X, y
 
@@ -181,7 +143,31 @@ def _barra(valor, maximo=1.0, ancho=20):
     return "█" * llenos + "░" * (ancho - llenos)
 
 
-def entrenar_modelo():
+def buscar_hiperparametros(X_train, y_train, procesos=None):
+    """Rejilla de profundidad/hojas (class_weight fijo) por CV en paralelo."""
+    candidatos = [("arbol", {**p, "class_weight": PARAMS_ARBOL["class_weight"]})
+                  for p in rejilla()]
+    n_folds    = numero_folds(len(X_train), len(set(y_train)))
+    evaluacion = evaluar(candidatos, X_train, y_train, n_folds=n_folds, procesos=procesos)
+    ganador    = mejor(evaluacion)
+
+    print(f"\n{'='*55}")
+    print(f"  BÚSQUEDA DE HIPERPARÁMETROS ({len(candidatos)} combinaciones x {n_folds} folds)")
+    print(f"{'='*55}")
+    print(f"  Entrenados: {evaluacion['entrenados']}  Desde caché: {evaluacion['desde_cache']}"
+          f"  Tiempo: {evaluacion['segundos']:.1f} s")
+    for r in evaluacion["resultados"][:5]:
+        if r["cv_media"] is not None:
+            print(f"  {r['cv_media']:.4f} ±{r['cv_std']:.4f}  {r['params']}")
+    escribir_reporte("reporte_entrenamiento.json", evaluacion, muestras=len(X_train))
+
+    if ganador is None:
+        print("  ⚠️  Ninguna combinación se pudo evaluar; se usan los parámetros por defecto.")
+        return dict(PARAMS_ARBOL)
+    return ganador["params"]
+
+
+def entrenar_modelo(buscar=False, procesos=None):
     X, y = cargar_datos_desde_bd()
 
     if X.size == 0:
@@ -219,12 +205,8 @@ def entrenar_modelo():
     print(f"  Prueba         : {len(X_test)}  muestras → {dist_test}")
 
     # ── Entrenar árbol ─────────────────────────────────────────
-    modelo = DecisionTreeClassifier(
-        random_state=42,
-        max_depth=6,
-        min_samples_split=4,
-        class_weight="balanced"
-    )
+    params = buscar_hiperparametros(X_train, y_train, procesos) if buscar else dict(PARAMS_ARBOL)
+    modelo = construir("arbol", params)
     modelo.fit(X_train, y_train)
 
     # ── Información básica del modelo ─────────────────────────
@@ -234,6 +216,7 @@ def entrenar_modelo():
     print(f"  Algoritmo      : Árbol de Decisión (DecisionTreeClassifier)")
     print(f"  max_depth      : {modelo.max_depth}")
     print(f"  min_samples_split: {modelo.min_samples_split}")
+    print(f"  min_samples_leaf : {modelo.min_samples_leaf}")
     print(f"  class_weight   : {modelo.class_weight}")
     print(f"  n_features_in_ : {modelo.n_features_in_}")
     print(f"  Clases         : {clases_str}")
@@ -343,11 +326,31 @@ def entrenar_modelo():
             "modelo":          modelo,
             "encoder":         encoder,
             "feature_names":   feature_names,
+            "params":          params,
             "umbral_aprobado": UMBRAL_APROBADO,
             "umbral_bajo":     UMBRAL_BAJO,
             "umbral_medio":    UMBRAL_MEDIO,
         }, f)
 
+    # ── Compilar para runtime (ws/tutor.py carga el .npz, sin sklearn) ──
+    compilado = compilar(modelo, encoder, feature_names)
+    total, distintos = verificar_paridad(modelo, encoder, compilado, X)
+    if distintos:
+        print(f"\n  ❌ Paridad árbol compilado FALLIDA: {len(distintos)}/{total} filas."
+              " modelo_tutor.npz NO se actualizó.")
+    else:
+        compilado.guardar("modelo_tutor.npz")
+        print(f"\n  ✅ modelo_tutor.npz compilado (paridad OK en {total} filas)")
+        try:
+            version = publicar("modelo_tutor.npz", meta={
+                "script": "train_model.py", "params": params, "muestras": len(X),
+                "clases": clases_str,
+            })
+            print(f"  ✅ Versión {version} publicada en {CARPETA_MODELOS}"
+                  " (los workers la toman sin reiniciar)")
+        except Exception as e:
+            print(f"  ⚠️  No se pudo publicar en el registro de modelos: {e}")
+
     print(f"\n{'='*55}")
     print("  ✅  modelo_tutor.pkl  GUARDADO CORRECTAMENTE")
     print(f"  Clases  : {clases_str}")
@@ -356,4 +359,10 @@ def entrenar_modelo():
 
 
 if __name__ == "__main__":
-    entrenar_modelo()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Entrena el árbol del tutor")
+    parser.add_argument("--buscar", action="store_true",
+                        help="elige profundidad y hojas por validación cruzada")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="procesos para la búsqueda (por defecto, todos los núcleos)")
+    args = parser.parse_args()
+    entrenar_modelo(args.buscar, args.procesos)
\ No newline at end of file
@@ -24,4 +24,18 @@ class CustomJsonEncoder(json.JSONEncoder):
         if isinstance(obj, datetime.date):
             return obj.isoformat()
 
-        return super(CustomJsonEncoder, self).default(obj)
\ No newline at end of file
+        return super(CustomJsonEncoder, self).default(obj)
+
+
+#Función jsonify_datos
+from flask import current_app
+
+def jsonify_datos(datos, status=200):
+    """
+    Respuesta JSON para lo que devuelven los models (dict/list nativos):
+    una sola serialización, con Decimal y date como CustomJsonEncoder.
+    Respeta la configuración JSON de Flask (sort_keys, ensure_ascii, ...).
+    """
+    cuerpo = current_app.json.dumps(datos, default=CustomJsonEncoder().default)
+    return current_app.response_class(cuerpo + "\n", status=status,
+                                      mimetype=current_app.json.mimetype)
@@ -19,7 +19,7 @@ from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score
 )
 from sklearn.model_selection import StratifiedKFold, cross_val_score
-from conexionBD import Conexion
+from models.dataset_ml import cargar_dataset, etiquetas_por_promedio, features_basicas
 
 SEP = "=" * 60
 
@@ -49,49 +49,16 @@ def cargar_modelo():
 
 
 def cargar_datos(umbral_aprobado, umbral_bajo, umbral_medio):
-    con = Conexion()
-    cur = con.cursor()
-    cur.execute("""
-        SELECT
-            p.id_estudiante,
-            p.id_competencia,
-            COUNT(*)       AS total_intentos,
-            AVG(p.puntaje) AS promedio_puntaje,
-            MIN(p.puntaje) AS min_puntaje,
-            MAX(p.puntaje) AS max_puntaje,
-            SUM(CASE WHEN p.puntaje >= %s THEN 1 ELSE 0 END) AS num_aprobados
-        FROM puntajes p
-        GROUP BY p.id_estudiante, p.id_competencia
-        HAVING COUNT(*) >= 1
-    """, (umbral_aprobado,))
-    rows = cur.fetchall()
-    cur.close()
-    con.close()
-
-    X, y, meta = [], [], []
-    for row in rows:
-        total    = row["total_intentos"] or 0
-        promedio = row["promedio_puntaje"]
-        min_p    = row["min_puntaje"]
-        max_p    = row["max_puntaje"]
-        aprobados = row["num_aprobados"] or 0
-        if promedio is None or total == 0:
-            continue
-        promedio = float(np.clip(promedio, 0, 100))
-        min_p    = float(np.clip(min_p,    0, 100))
-        max_p    = float(np.clip(max_p,    0, 100))
-        tasa     = float(aprobados) / float(total)
-        nivel    = ("bajo"  if promedio < umbral_bajo  else
-                    "medio" if promedio < umbral_medio else "alto")
-        X.append([float(total), promedio, min_p, max_p, tasa])
-        y.append(nivel)
-        meta.append({
-            "id_estudiante": row["id_estudiante"],
-            "id_competencia": row["id_competencia"],
-            "promedio": promedio,
-        })
-
-    return np.array(X, dtype=float), np.array(y, dtype=object), meta
+    datos = cargar_dataset(umbral_aprobado)
+    X = features_basicas(datos)
+    y = etiquetas_por_promedio(datos["promedio"], umbral_bajo, umbral_medio)
+    meta = [
+        {"id_estudiante": est, "id_competencia": comp, "promedio": prom}
+        for est, comp, prom in zip(datos["id_estudiante"].tolist(),
+                                   datos["id_competencia"].tolist(),
+                                   datos["promedio"].tolist())
+    ]
+    return X, y, meta
 
 
 # ─────────────────────────────────────────────────────────────
@@ -0,0 +1,29 @@
+"""
+Verifica la integridad del almacén de imágenes por contenido.
+
+Cada blob se llama <sha256>.<ext> (ver models/almacen_imagenes.py): basta
+recalcular el hash de cada archivo y compararlo con su nombre. No necesita
+la base de datos.
+
+Ejecución:
+    python verificar_imagenes.py
+"""
+import sys
+
+from models.almacen_imagenes import AlmacenImagenes, CARPETA
+
+
+def main():
+    almacen   = AlmacenImagenes(CARPETA)
+    corruptos = almacen.verificar()
+    if corruptos:
+        print(f"❌ {len(corruptos)} blob(s) no coinciden con su hash en {CARPETA}:")
+        for nombre in corruptos:
+            print("   -", nombre)
+        return 1
+    print(f"✅ Almacén íntegro: {CARPETA}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify
 from conexionBD import Conexion
 from models.scoring import nivel_to_progreso
+from models.dashboard_agregado import leer_dashboard_docente
+from models.cache_respuestas import cache_por_estudiante
 from flask_jwt_extended import jwt_required
 
 ws_dashboard = Blueprint('ws_dashboard', __name__, url_prefix='/dashboard')
@@ -12,6 +14,7 @@ ws_dashboard = Blueprint('ws_dashboard', __name__, url_prefix='/dashboard')
 # ========================================
 @ws_dashboard.route('/mini/<int:id_estudiante>', methods=['GET'])
 @jwt_required()
+@cache_por_estudiante
 def mini_dashboard(id_estudiante: int):
     """
     Mini dashboard para el estudiante.
@@ -143,101 +146,23 @@ def dashboard_docente(id_docente: int):
     cur = con.cursor()
 
     try:
-        # 1) Validar docente
-        cur.execute("""
-            SELECT u.nombre, u.apellidos
-            FROM docente d
-            JOIN usuarios u ON u.id_usuario = d.id_usuario
-            WHERE d.id_docente = %s
-            LIMIT 1
-        """, (id_docente,))
-        row_doc = cur.fetchone()
-        if not row_doc:
+        # Docente + agregados materializados en una sola consulta
+        # (ver models/dashboard_agregado.py)
+        row = leer_dashboard_docente(cur, id_docente)
+        if not row:
             return jsonify({
                 "status": False,
                 "message": "Docente no encontrado",
                 "data": None
             }), 404
+        con.commit()   # persiste el recálculo si la fila estaba sucia
 
-        # 2) Matriculados activos
-        cur.execute("""
-            SELECT COUNT(DISTINCT e.id_estudiante) AS activos
-            FROM docente_salones ds
-            JOIN salones s ON s.id_salon = ds.id_salon
-            JOIN estudiante_salones es ON es.id_salon = s.id_salon
-            JOIN estudiante e ON e.id_estudiante = es.id_estudiante
-            WHERE ds.id_docente = %s
-              AND e.estado_estudiante = 'activo'
-        """, (id_docente,))
-        row_activos        = cur.fetchone() or {}
-        estudiantes_activos = int(row_activos.get("activos", 0) or 0)
-
-        # 3) Progreso promedio real (promedio de las 4 competencias)
-        cur.execute("""
-            SELECT COALESCE(AVG(sub.prom_est), 0) AS promedio_general
-            FROM (
-                SELECT
-                    e.id_estudiante,
-                    AVG(p.puntaje) AS prom_est
-                FROM docente_salones ds
-                JOIN salones s ON s.id_salon = ds.id_salon
-                JOIN estudiante_salones es ON es.id_salon = s.id_salon
-                JOIN estudiante e ON e.id_estudiante = es.id_estudiante
-                LEFT JOIN puntajes p ON p.id_estudiante = e.id_estudiante
-                    AND p.id_competencia BETWEEN 1 AND 4
-                WHERE ds.id_docente = %s
-                  AND e.estado_estudiante = 'activo'
-                GROUP BY e.id_estudiante
-            ) sub
-        """, (id_docente,))
-        row_prom        = cur.fetchone() or {}
-        progreso_promedio = float(row_prom.get("promedio_general", 0) or 0)
-
-        # 4) Competencia con más dificultad
-        cur.execute("""
-            SELECT c.descripcion,
-                   AVG(nec.promedio_puntaje) AS promedio_comp
-            FROM docente_salones ds
-            JOIN salones s ON s.id_salon = ds.id_salon
-            JOIN estudiante_salones es ON es.id_salon = s.id_salon
-            JOIN nivel_estudiante_competencia nec
-                ON nec.id_estudiante = es.id_estudiante
-            JOIN competencias c ON c.id_competencia = nec.id_competencia
-            WHERE ds.id_docente = %s
-            GROUP BY c.descripcion
-            ORDER BY promedio_comp ASC
-            LIMIT 1
-        """, (id_docente,))
-        row_tema          = cur.fetchone()
-        tema_mas_dificultad = row_tema.get("descripcion") if row_tema else None
-
-        # 5) Actividad reciente — ✅ fechas formateadas
-        cur.execute("""
-            SELECT
-                -- ✅ Formato Apellidos, Nombre
-                TRIM(u.apellidos) || ', ' || TRIM(u.nombre) AS estudiante,
-                c.descripcion AS tema,
-                p.fecha,
-                p.estado
-            FROM progreso p
-            JOIN estudiante e  ON e.id_estudiante = p.id_estudiante
-            JOIN usuarios u    ON u.id_usuario    = e.id_usuario
-            JOIN ejercicios ej ON ej.id_ejercicio = p.id_ejercicio
-            JOIN competencias c ON c.id_competencia = ej.id_competencia
-            WHERE e.id_estudiante IN (
-                SELECT es.id_estudiante
-                FROM docente_salones ds
-                JOIN salones s ON s.id_salon = ds.id_salon
-                JOIN estudiante_salones es ON es.id_salon = s.id_salon
-                WHERE ds.id_docente = %s
-            )
-            ORDER BY p.fecha DESC
-            LIMIT 3
-        """, (id_docente,))
-        rows_act = cur.fetchall() or []
+        estudiantes_activos = int(row.get("estudiantes_activos", 0) or 0)
+        progreso_promedio   = float(row.get("progreso_promedio", 0) or 0)
+        tema_mas_dificultad = row.get("tema_mas_dificultad")
 
         actividad_reciente = []
-        for r in rows_act:
+        for r in row.get("actividad") or []:
             estado = (r.get("estado") or "").lower()
             if estado.startswith("correcto"):
                 tipo_texto = "completado"
@@ -249,7 +174,7 @@ def dashboard_docente(id_docente: int):
             # ✅ Formatear fecha ISO → "21 Abr 2026 · 10:09"
             fecha_raw = r.get("fecha")
             if fecha_raw:
-                fecha_iso = fecha_raw.isoformat()
+                fecha_iso = fecha_raw if isinstance(fecha_raw, str) else fecha_raw.isoformat()
                 try:
                     partes     = fecha_iso[:19].split("T")
                     fecha_p    = partes[0].split("-")
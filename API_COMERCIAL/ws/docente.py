@@ -1,8 +1,16 @@
-from flask import Blueprint, request, jsonify
+import threading
+import time
+
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from models.Docente import Docente
 from models.scoring import nivel_to_progreso
+from models.rachas import N_RACHA_ALERTA, contar_incorrectas
+from models.eventos_docente import BUS, formato_sse
+from models.prediccion_salon import predecir_salon
+from ws.tutor import modelo_vigente
+from config import Config
 from conexionBD import Conexion
-import json
+from util import jsonify_datos
 
 ws_docente = Blueprint('ws_docente', __name__)
 
@@ -17,17 +25,17 @@ def crear_docente():
     if 'especialidad' not in data or 'id_usuario' not in data:
         return jsonify({'status': False, 'message': 'Faltan parámetros'})
     obj = Docente(especialidad=data['especialidad'], id_usuario=data['id_usuario'])
-    return jsonify(json.loads(obj.crear()))
+    return jsonify_datos(obj.crear())
 
 
 @ws_docente.route('/docentes', methods=['GET'])
 def listar_docentes():
-    return jsonify(json.loads(Docente.listar()))
+    return jsonify_datos(Docente.listar())
 
 
 @ws_docente.route('/docentes/<int:id_docente>', methods=['GET'])
 def obtener_docente(id_docente):
-    return jsonify(json.loads(Docente.obtener(id_docente)))
+    return jsonify_datos(Docente.obtener(id_docente))
 
 
 @ws_docente.route('/docentes/<int:id_docente>', methods=['PUT'])
@@ -36,12 +44,12 @@ def actualizar_docente(id_docente):
     if 'especialidad' not in data:
         return jsonify({'status': False, 'message': 'Faltan parámetros'})
     obj = Docente(id_docente=id_docente, especialidad=data['especialidad'])
-    return jsonify(json.loads(obj.actualizar()))
+    return jsonify_datos(obj.actualizar())
 
 
 @ws_docente.route('/docentes/<int:id_docente>', methods=['DELETE'])
 def eliminar_docente(id_docente):
-    return jsonify(json.loads(Docente.eliminar(id_docente)))
+    return jsonify_datos(Docente.eliminar(id_docente))
 
 
 # ========================================
@@ -51,7 +59,7 @@ def eliminar_docente(id_docente):
 
 @ws_docente.route('/docentes/<int:id_docente>/dashboard', methods=['GET'])
 def docentes_dashboard(id_docente):
-    return jsonify(json.loads(Docente.dashboard(id_docente)))
+    return jsonify_datos(Docente.dashboard(id_docente))
 
 
 # ========================================
@@ -151,6 +159,8 @@ def docentes_estudiantes(id_docente):
 # Devuelve alumnos críticos:
 #   - promedio < 40 en alguna competencia (nivel bajo)
 #   - o >= 3 de sus últimas 5 respuestas fueron incorrectas
+#   - o lleva una racha de >= 3 fallos seguidos en alguna competencia
+# Errores y rachas se leen de los contadores de models/rachas.py.
 # ========================================
 
 @ws_docente.route('/docentes/<int:id_docente>/alertas', methods=['GET'])
@@ -199,32 +209,28 @@ def docentes_alertas(id_docente):
         """, (ids_est,))
         comp_rows = cur.fetchall() or []
 
-        # 3) Errores recientes — últimas 5 respuestas por alumno
+        # 3) Errores recientes (bits de las últimas 5 respuestas) y rachas
+        #    negativas activas: lecturas por PK, sin recorrer progreso
         cur.execute("""
             SELECT
-                id_estudiante,
-                COUNT(*) AS incorrectas,
-                MAX(fecha) AS ultima_actividad
-            FROM (
-                SELECT
-                    id_estudiante,
-                    estado,
-                    fecha,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY id_estudiante ORDER BY fecha DESC
-                    ) AS rn
-                FROM progreso
-                WHERE id_estudiante = ANY(%s)
-            ) sub
-            WHERE rn <= 5
-              AND estado ILIKE 'incorrecto%%'
-            GROUP BY id_estudiante
-        """, (ids_est,))
+                r.id_estudiante,
+                r.ultimas,
+                r.ultima_actividad,
+                (
+                    SELECT array_agg(rc.id_competencia ORDER BY rc.id_competencia)
+                    FROM racha_estudiante_competencia rc
+                    WHERE rc.id_estudiante = r.id_estudiante
+                      AND rc.racha <= -%s
+                ) AS rachas_negativas
+            FROM resumen_respuestas_estudiante r
+            WHERE r.id_estudiante = ANY(%s)
+        """, (N_RACHA_ALERTA, ids_est))
         errores_map = {
             r["id_estudiante"]: {
-                "incorrectas":      int(r["incorrectas"] or 0),
+                "incorrectas":      contar_incorrectas(r.get("ultimas")),
+                "rachas":           list(r.get("rachas_negativas") or []),
                 "ultima_actividad": r["ultima_actividad"].strftime("%d/%m/%Y")
-                                    if r["ultima_actividad"] else "Sin actividad"
+                                    if r.get("ultima_actividad") else "Sin actividad"
             }
             for r in (cur.fetchall() or [])
         }
@@ -247,23 +253,26 @@ def docentes_alertas(id_docente):
         alertas = []
         for id_est in ids_est:
             comps_problema  = comp_map.get(id_est, [])
-            err_data        = errores_map.get(id_est, {"incorrectas": 0, "ultima_actividad": "Sin actividad"})
+            err_data        = errores_map.get(id_est, {"incorrectas": 0, "rachas": [],
+                                                       "ultima_actividad": "Sin actividad"})
             incorrectas     = err_data["incorrectas"]
+            rachas          = err_data["rachas"]
             ultima_actividad = err_data["ultima_actividad"]
 
-            # Sin competencias en riesgo y menos de 3 fallos recientes → no alertar
-            if not comps_problema and incorrectas < 3:
+            # Sin competencias en riesgo, menos de 3 fallos recientes y sin racha → no alertar
+            if not comps_problema and incorrectas < 3 and not rachas:
                 continue
 
-            # muchos_errores tiene prioridad si hay ≥3 fallos recientes (más urgente)
+            # muchos_errores tiene prioridad si hay ≥3 fallos recientes o una racha (más urgente)
             # bajo_rendimiento si el nivel en las competencias es bajo aunque no falle tanto
-            tipo = "muchos_errores" if incorrectas >= 3 else "bajo_rendimiento"
+            tipo = "muchos_errores" if incorrectas >= 3 or rachas else "bajo_rendimiento"
             alertas.append({
                 "id_estudiante":        id_est,
                 "nombre":               nombres[id_est],
                 "tipoAlerta":           tipo,
                 "competenciasProblema": comps_problema,
                 "erroresRecientes":     incorrectas,
+                "rachaNegativa":        rachas,
                 "ultimaActividad":      ultima_actividad,
             })
 
@@ -274,4 +283,165 @@ def docentes_alertas(id_docente):
         return jsonify({"status": False, "message": str(e)}), 500
     finally:
         cur.close()
-        con.close()
\ No newline at end of file
+        con.close()
+
+
+# ========================================
+# NIVELES DEL SALÓN (NEC + ajuste del modelo)
+# GET /docentes/<id_docente>/salones/<id_salon>/niveles
+# El nivel que usaría el tutor para cada alumno y competencia, calculado
+# para todo el salón con una consulta y una llamada al modelo
+# (models/prediccion_salon.py).
+# ========================================
+
+@ws_docente.route('/docentes/<int:id_docente>/salones/<int:id_salon>/niveles', methods=['GET'])
+def docentes_niveles_salon(id_docente, id_salon):
+    con = Conexion()
+    cur = con.cursor()
+
+    try:
+        cur.execute("""
+            SELECT 1 FROM docente_salones
+            WHERE id_docente = %s AND id_salon = %s
+        """, (id_docente, id_salon))
+        if not cur.fetchone():
+            return jsonify({"status": False,
+                            "message": "El salón no está asignado al docente"}), 404
+
+        data = predecir_salon(cur, id_salon, modelo_vigente())
+        return jsonify({"status": True, "data": data}), 200
+
+    except Exception as e:
+        print("Error en /docentes/salones/niveles:", str(e))
+        return jsonify({"status": False, "message": str(e)}), 500
+    finally:
+        cur.close()
+        con.close()
+
+
+# ========================================
+# EVENTOS EN VIVO DEL DOCENTE (SSE)
+# GET /docentes/<id_docente>/eventos
+# Reemplaza el polling de /alertas y /dashboard/docente:
+#   event: inicio     → alumnos, competencias y últimas alertas registradas
+#   event: actividad  → cada respuesta de un alumno del docente
+#   event: alerta     → racha de N_RACHA_ALERTA fallos seguidos
+# Con Last-Event-ID se reciben los eventos perdidos durante la reconexión.
+# ========================================
+
+_CONEXIONES_SSE = {"abiertas": 0}
+_CONEXIONES_LOCK = threading.Lock()
+_ALERTAS_INICIO = 20
+
+
+def _reservar_conexion():
+    with _CONEXIONES_LOCK:
+        if _CONEXIONES_SSE["abiertas"] >= Config.EVENTOS_MAX_CONEXIONES:
+            return False
+        _CONEXIONES_SSE["abiertas"] += 1
+        return True
+
+
+def _liberar_conexion():
+    with _CONEXIONES_LOCK:
+        _CONEXIONES_SSE["abiertas"] -= 1
+
+
+def _contexto_eventos(id_docente):
+    """Alumnos activos, competencias y últimas alertas del docente. Una conexión, breve."""
+    con = Conexion()
+    cur = con.cursor()
+    try:
+        cur.execute("""
+            SELECT DISTINCT
+                e.id_estudiante,
+                TRIM(u.apellidos) || ', ' || TRIM(u.nombre) AS nombre
+            FROM estudiante e
+            JOIN usuarios u            ON u.id_usuario     = e.id_usuario
+            JOIN estudiante_salones es ON es.id_estudiante = e.id_estudiante
+            JOIN docente_salones ds    ON ds.id_salon      = es.id_salon
+            WHERE ds.id_docente = %s
+              AND e.estado_estudiante = 'activo'
+        """, (id_docente,))
+        alumnos = {r["id_estudiante"]: r["nombre"] for r in (cur.fetchall() or [])}
+
+        cur.execute("SELECT id_competencia, descripcion FROM competencias")
+        temas = {r["id_competencia"]: r["descripcion"] for r in (cur.fetchall() or [])}
+
+        alertas = []
+        if alumnos:
+            cur.execute("""
+                SELECT id_alerta, id_estudiante, id_competencia, tipo, longitud, creado
+                FROM alertas_docente
+                WHERE id_estudiante = ANY(%s)
+                ORDER BY id_alerta DESC
+                LIMIT %s
+            """, (list(alumnos), _ALERTAS_INICIO))
+            alertas = cur.fetchall() or []
+        return alumnos, temas, alertas
+    finally:
+        cur.close()
+        con.close()
+
+
+def _evento_docente(evento, alumnos, temas):
+    """Evento del bus → cuerpo para el panel (nombre del alumno y del tema)."""
+    datos = dict(evento["datos"])
+    datos["idEstudiante"] = evento["idEstudiante"]
+    datos["estudiante"]   = alumnos.get(evento["idEstudiante"])
+    datos["tema"]         = temas.get(datos.get("idCompetencia"))
+    return datos
+
+
+@ws_docente.route('/docentes/<int:id_docente>/eventos', methods=['GET'])
+def docentes_eventos(id_docente):
+    if not _reservar_conexion():
+        return jsonify({"status": False,
+                        "message": "Demasiadas conexiones de eventos, reintenta luego"}), 503
+    try:
+        alumnos, temas, alertas = _contexto_eventos(id_docente)
+        # Reconexión: continuar desde el último evento recibido
+        ultimo = request.headers.get("Last-Event-ID", type=int)
+        desde  = ultimo if ultimo is not None and ultimo <= BUS.ultimo() else BUS.ultimo()
+    except Exception as e:
+        _liberar_conexion()
+        print("Error en /docentes/eventos:", str(e))
+        return jsonify({"status": False, "message": str(e)}), 500
+
+    def generar(desde):
+        yield "retry: 3000\n\n"
+        yield formato_sse({
+            "alumnos": len(alumnos),
+            "alertas": [{
+                "idAlerta":      a["id_alerta"],
+                "idEstudiante":  a["id_estudiante"],
+                "estudiante":    alumnos.get(a["id_estudiante"]),
+                "idCompetencia": a["id_competencia"],
+                "tema":          temas.get(a["id_competencia"]),
+                "tipo":          a["tipo"],
+                "longitud":      a["longitud"],
+                "fecha":         a["creado"],
+            } for a in alertas],
+        }, nombre="inicio")
+        fin = time.monotonic() + Config.EVENTOS_DURACION_SEG
+        while time.monotonic() < fin:
+            espera = min(Config.EVENTOS_PING_SEG, fin - time.monotonic())
+            desde, eventos = BUS.esperar(desde, espera, set(alumnos))
+            for seq, evento in eventos:
+                yield formato_sse(_evento_docente(evento, alumnos, temas),
+                                  seq=seq, nombre=evento["tipo"])
+            if not eventos:
+                yield ": ping\n\n"
+
+    resp = Response(stream_with_context(generar(desde)), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # El servidor cierra la respuesta al terminar o si el cliente se desconecta
+    resp.call_on_close(_liberar_conexion)
+    return resp
+
+
+def metricas_eventos():
+    with _CONEXIONES_LOCK:
+        abiertas = _CONEXIONES_SSE["abiertas"]
+    return dict(BUS.metricas(), conexiones=abiertas,
+                max_conexiones=Config.EVENTOS_MAX_CONEXIONES)
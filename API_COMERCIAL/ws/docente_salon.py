@@ -2,7 +2,7 @@
 from flask import Blueprint, request, jsonify
 from conexionBD import Conexion
 from flask_jwt_extended import jwt_required
-import json
+from util import jsonify_datos
 
 ws_docente_salon = Blueprint('ws_docente_salon', __name__)
 
@@ -22,7 +22,7 @@ def asignar_docente():
 
     try:
         from models.DocenteSalon import DocenteSalon
-        return jsonify(json.loads(DocenteSalon.asignar(id_docente, id_salon)))
+        return jsonify_datos(DocenteSalon.asignar(id_docente, id_salon))
     except Exception as e:
         return jsonify({"status": False, "message": str(e)}), 500
 
@@ -35,7 +35,7 @@ def asignar_docente():
 def listar_docentes_salones():
     try:
         from models.DocenteSalon import DocenteSalon
-        return jsonify(json.loads(DocenteSalon.listar()))
+        return jsonify_datos(DocenteSalon.listar())
     except Exception as e:
         return jsonify({"status": False, "message": str(e)}), 500
 
@@ -48,7 +48,7 @@ def listar_docentes_salones():
 def eliminar_asignacion(id_docente, id_salon):
     try:
         from models.DocenteSalon import DocenteSalon
-        return jsonify(json.loads(DocenteSalon.eliminar(id_docente, id_salon)))
+        return jsonify_datos(DocenteSalon.eliminar(id_docente, id_salon))
     except Exception as e:
         return jsonify({"status": False, "message": str(e)}), 500
 
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify
 from conexionBD import Conexion
+from models.cache_respuestas import cache_por_estudiante
 
 ws_dominio = Blueprint("ws_dominio", __name__, url_prefix="/dominio")
 
@@ -10,6 +11,7 @@ ws_dominio = Blueprint("ws_dominio", __name__, url_prefix="/dominio")
 # ============================
 # ws_dominio.py
 @ws_dominio.route("/temas/<int:id_estudiante>", methods=["GET"])
+@cache_por_estudiante
 def listar_temas_dominio(id_estudiante):
     try:
         conn = Conexion()
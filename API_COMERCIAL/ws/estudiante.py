@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models.Estudiante import Estudiante
 from conexionBD import Conexion
-import json
+from util import jsonify_datos
 
 ws_estudiante = Blueprint('ws_estudiante', __name__)
 
@@ -19,7 +19,7 @@ def crear_estudiante():
         grado=data['grado'],
         id_usuario=data['id_usuario']
     )
-    return jsonify(json.loads(obj.crear()))
+    return jsonify_datos(obj.crear())
 
 
 # =========================================================
@@ -27,7 +27,7 @@ def crear_estudiante():
 # =========================================================
 @ws_estudiante.route('/estudiantes', methods=['GET'])
 def listar_estudiantes():
-    return jsonify(json.loads(Estudiante.listar()))
+    return jsonify_datos(Estudiante.listar())
 
 
 # =========================================================
@@ -35,7 +35,7 @@ def listar_estudiantes():
 # =========================================================
 @ws_estudiante.route('/estudiantes/<int:id_estudiante>', methods=['GET'])
 def obtener_estudiante(id_estudiante):
-    return jsonify(json.loads(Estudiante.obtener(id_estudiante)))
+    return jsonify_datos(Estudiante.obtener(id_estudiante))
 
 
 # =========================================================
@@ -51,7 +51,7 @@ def actualizar_estudiante(id_estudiante):
         id_estudiante=id_estudiante,
         grado=data['grado']
     )
-    return jsonify(json.loads(obj.actualizar()))
+    return jsonify_datos(obj.actualizar())
 
 
 # =========================================================
@@ -59,7 +59,7 @@ def actualizar_estudiante(id_estudiante):
 # =========================================================
 @ws_estudiante.route('/estudiantes/<int:id_estudiante>', methods=['DELETE'])
 def eliminar_estudiante(id_estudiante):
-    return jsonify(json.loads(Estudiante.eliminar(id_estudiante)))
+    return jsonify_datos(Estudiante.eliminar(id_estudiante))
 
 
 # =========================================================
@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify
 from models.HistorialMaterial import HistorialMaterial
 from conexionBD import Conexion
-import json
+from models.cache_respuestas import invalidar_estudiante
+from util import jsonify_datos
 
 ws_historial_material = Blueprint('ws_historial_material', __name__, url_prefix='/historial')
 
@@ -45,6 +46,7 @@ def registrar_historial():
                 fecha_acceso   = NOW()
         """, (id_estudiante, id_material, estado_calc, tiempo_visualizacion))
         con.commit()
+        invalidar_estudiante(id_estudiante)
         return jsonify({"status": True, "message": "Historial registrado"})
     except Exception as e:
         con.rollback()
@@ -59,13 +61,13 @@ def registrar_historial():
 # ================================
 @ws_historial_material.route("/<int:id_estudiante>", methods=["GET"])
 def listar_historial(id_estudiante):
-    return jsonify(json.loads(HistorialMaterial.listar(id_estudiante)))
+    return jsonify_datos(HistorialMaterial.listar(id_estudiante))
 
 # Actualizar historial
 @ws_historial_material.route('/<int:id_historial>', methods=['PUT'])
 def actualizar_historial(id_historial):
     data = request.get_json()
-    return jsonify(json.loads(HistorialMaterial.actualizar(id_historial, data)))
+    return jsonify_datos(HistorialMaterial.actualizar(id_historial, data))
 
 
 # ============================================================
@@ -1,6 +1,6 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from models.Material import Material
-import json
+from util import jsonify_datos
 
 ws_material = Blueprint("ws_material", __name__, url_prefix="/material")
 
@@ -10,7 +10,7 @@ ws_material = Blueprint("ws_material", __name__, url_prefix="/material")
 # ================================
 @ws_material.route("", methods=["GET"])
 def listar_material():
-    return jsonify(json.loads(Material.listar()))
+    return jsonify_datos(Material.listar())
 
 
 # ================================
@@ -32,7 +32,7 @@ def crear_material():
         id_competencia=id_competencia
     )
 
-    return jsonify(json.loads(obj.crear()))
+    return jsonify_datos(obj.crear())
 
 
 # ================================
@@ -40,7 +40,7 @@ def crear_material():
 # ================================
 @ws_material.route("/<int:id_material>", methods=["GET"])
 def obtener_material(id_material):
-    return jsonify(json.loads(Material.obtener(id_material)))
+    return jsonify_datos(Material.obtener(id_material))
 
 
 # ================================
@@ -58,7 +58,7 @@ def actualizar_material(id_material):
         id_competencia=data.get("id_competencia")
     )
 
-    return jsonify(json.loads(obj.actualizar()))
+    return jsonify_datos(obj.actualizar())
 
 
 # ================================
@@ -66,4 +66,4 @@ def actualizar_material(id_material):
 # ================================
 @ws_material.route("/<int:id_material>", methods=["DELETE"])
 def eliminar_material(id_material):
-    return jsonify(json.loads(Material.eliminar(id_material)))
+    return jsonify_datos(Material.eliminar(id_material))
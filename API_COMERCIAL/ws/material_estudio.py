@@ -1,6 +1,6 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from models.MaterialEstudio import MaterialEstudio
-import json
+from util import jsonify_datos
 
 ws_material = Blueprint('ws_material', __name__, url_prefix='/material')
 
@@ -8,33 +8,33 @@ ws_material = Blueprint('ws_material', __name__, url_prefix='/material')
 @ws_material.route('', methods=['POST'])
 def registrar_material():
     data = request.get_json()
-    return jsonify(json.loads(MaterialEstudio.registrar(
+    return jsonify_datos(MaterialEstudio.registrar(
         data['titulo'],
         data['tipo'],
         data['url'],
         data['tiempo_estimado'],
         data['id_competencia'],
         data.get('nivel')  # opcional
-    )))
+    ))
 
 
 # Listar todos
 @ws_material.route('', methods=['GET'])
 def listar_materiales():
-    return jsonify(json.loads(MaterialEstudio.listar_todos()))
+    return jsonify_datos(MaterialEstudio.listar_todos())
 
 # Obtener uno por ID
 @ws_material.route('/<int:id_material>', methods=['GET'])
 def obtener_material(id_material):
-    return jsonify(json.loads(MaterialEstudio.obtener(id_material)))
+    return jsonify_datos(MaterialEstudio.obtener(id_material))
 
 # Actualizar
 @ws_material.route('/<int:id_material>', methods=['PUT'])
 def actualizar_material(id_material):
     data = request.get_json()
-    return jsonify(json.loads(MaterialEstudio.actualizar(id_material, data)))
+    return jsonify_datos(MaterialEstudio.actualizar(id_material, data))
 
 # Eliminar
 @ws_material.route('/<int:id_material>', methods=['DELETE'])
 def eliminar_material(id_material):
-    return jsonify(json.loads(MaterialEstudio.eliminar(id_material)))
+    return jsonify_datos(MaterialEstudio.eliminar(id_material))
@@ -2,8 +2,9 @@ from flask import Blueprint, request, jsonify
 from models.Progreso import Progreso
 from models.scoring import nivel_to_progreso, NIVEL_NOMBRE, BANDA_DIFICULTAD_SQL
 from conexionBD import Conexion
+from models.cache_respuestas import cache_por_estudiante, invalidar_estudiante
 from flask_jwt_extended import jwt_required
-import json
+from util import jsonify_datos
 
 ws_progreso = Blueprint('ws_progreso', __name__, url_prefix='/progreso')
 
@@ -32,7 +33,9 @@ def registrar_progreso():
             id_estudiante, id_ejercicio,
             nivel_actual, estado, tiempo_respuesta
         )
-        return jsonify(json.loads(resp))
+        if resp.get("status"):
+            invalidar_estudiante(id_estudiante)
+        return jsonify_datos(resp)
 
     except Exception as e:
         return jsonify({"status": False, "mensaje": str(e)}), 500
@@ -45,7 +48,7 @@ def registrar_progreso():
 @jwt_required()
 def listar_progreso():
     try:
-        return jsonify(json.loads(Progreso.listar_todos()))
+        return jsonify_datos(Progreso.listar_todos())
     except Exception as e:
         return jsonify({"status": False, "mensaje": str(e)}), 500
 
@@ -57,6 +60,7 @@ def listar_progreso():
 # ==========================
 @ws_progreso.route('/resumen', methods=['GET'])
 @jwt_required()
+@cache_por_estudiante
 def resumen_progreso():
     id_estudiante = request.args.get('idEstudiante', type=int)
     if not id_estudiante:
@@ -158,6 +162,7 @@ def resumen_progreso():
 # ==========================
 @ws_progreso.route('/por_competencia', methods=['GET'])
 @jwt_required()
+@cache_por_estudiante
 def progreso_por_competencia():
     id_estudiante = request.args.get('idEstudiante', type=int)
     if not id_estudiante:
@@ -229,71 +234,127 @@ def progreso_por_competencia():
 
 # ==========================
 #  GET /progreso/historial?idEstudiante=4&limite=5&offset=0
+#  GET /progreso/historial?idEstudiante=4&limite=5&cursor=<siguienteCursor>
 #  ✅ Devuelve modo en cada item
-#  ✅ Soporta paginación
+#  ✅ Paginación por cursor (id_progreso): costo constante sin importar la página.
+#     offset se mantiene para clientes antiguos.
+#  ✅ total acotado a HISTORIAL_TOPE_TOTAL (totalExacto=false si se llegó al
+#     tope); ?total=no lo omite.
 # ==========================
+HISTORIAL_MAX_LIMITE = 100
+HISTORIAL_TOPE_TOTAL = 1000
+
+# Página de progreso + intentos incorrectos + último desarrollo_url.
+# Antes eran dos subconsultas correlacionadas por fila; ahora las respuestas
+# del alumno se leen una vez, solo para los ejercicios de la página, y los
+# intentos salen de una suma acumulada (ventana) por ejercicio. En empate de
+# fecha la respuesta va antes que el progreso (r.fecha <= p.fecha).
+SQL_HISTORIAL = """
+    WITH pagina AS (
+        SELECT p.id_progreso, p.id_ejercicio, p.estado, p.fecha, p.modo
+        FROM progreso p
+        WHERE p.id_estudiante = %(id)s
+          AND (%(cursor)s::INT IS NULL OR p.id_progreso < %(cursor)s::INT)
+        ORDER BY p.id_progreso DESC
+        LIMIT %(limite)s OFFSET %(offset)s
+    ),
+    resp AS (
+        SELECT r.id_respuesta, r.id_ejercicio, r.fecha, r.desarrollo_url,
+               (op.es_correcta IS FALSE)::INT AS incorrecta
+        FROM respuestas_estudiantes r
+        LEFT JOIN opciones_ejercicio op ON op.id_opcion = r.id_opcion
+        WHERE r.id_estudiante = %(id)s
+          AND r.id_ejercicio IN (SELECT id_ejercicio FROM pagina)
+    ),
+    eventos AS (
+        SELECT id_ejercicio, fecha, 0 AS orden, incorrecta, NULL::INT AS id_progreso
+        FROM resp
+        WHERE fecha IS NOT NULL
+        UNION ALL
+        SELECT id_ejercicio, fecha, 1, 0, id_progreso
+        FROM pagina
+        WHERE fecha IS NOT NULL
+    ),
+    intentos AS (
+        SELECT id_progreso, acumulado AS intentos_incorrectos
+        FROM (
+            SELECT id_progreso,
+                   SUM(incorrecta) OVER (PARTITION BY id_ejercicio
+                                         ORDER BY fecha, orden
+                                         ROWS UNBOUNDED PRECEDING) AS acumulado
+            FROM eventos
+        ) w
+        WHERE id_progreso IS NOT NULL
+    ),
+    desarrollo AS (
+        SELECT DISTINCT ON (id_ejercicio) id_ejercicio, desarrollo_url
+        FROM resp
+        WHERE desarrollo_url IS NOT NULL
+        ORDER BY id_ejercicio, id_respuesta DESC
+    )
+    SELECT
+        pg.id_progreso,
+        pg.id_ejercicio,
+        pg.estado,
+        pg.fecha,
+        pg.modo,
+        e.descripcion AS ejercicio,
+        e.id_competencia,
+        d.desarrollo_url,
+        COALESCE(i.intentos_incorrectos, 0) AS intentos_incorrectos
+    FROM pagina pg
+    JOIN ejercicios e       ON e.id_ejercicio = pg.id_ejercicio
+    LEFT JOIN intentos i    ON i.id_progreso  = pg.id_progreso
+    LEFT JOIN desarrollo d  ON d.id_ejercicio = pg.id_ejercicio
+    ORDER BY pg.id_progreso DESC
+"""
+
+
 @ws_progreso.route('/historial', methods=['GET'])
 @jwt_required()
 def historial_progreso():
     id_estudiante = request.args.get('idEstudiante', type=int)
     limite        = request.args.get('limite', default=5, type=int)
     offset        = request.args.get('offset', default=0, type=int)
+    cursor_id     = request.args.get('cursor', type=int)
+    modo_total    = (request.args.get('total') or "").strip().lower()
 
     if not id_estudiante:
         return jsonify({"status": False, "mensaje": "idEstudiante es obligatorio"}), 400
 
+    limite = max(1, min(limite or 5, HISTORIAL_MAX_LIMITE))
+    offset = 0 if cursor_id is not None else max(offset or 0, 0)
+
     con = Conexion()
     cur = con.cursor()
     try:
-        # Total de registros para saber si hay más
-        cur.execute("""
-            SELECT COUNT(*) AS total
-            FROM progreso
-            WHERE id_estudiante = %s
-        """, (id_estudiante,))
-        total_registros = int((cur.fetchone() or {}).get("total", 0) or 0)
-
-        cur.execute("""
-            SELECT
-                p.id_progreso,
-                p.id_ejercicio,
-                p.estado,
-                p.fecha,
-                p.modo,
-                e.descripcion AS ejercicio,
-                e.id_competencia,
-                r2.desarrollo_url,
-                -- Solo cuenta las respuestas incorrectas ANTERIORES a este registro
-                -- de progreso para reflejar los intentos de este intento específico.
-                (
-                    SELECT COUNT(*)
-                    FROM respuestas_estudiantes r
-                    JOIN opciones_ejercicio op ON op.id_opcion = r.id_opcion
-                    WHERE r.id_estudiante = p.id_estudiante
-                      AND r.id_ejercicio  = p.id_ejercicio
-                      AND op.es_correcta  = FALSE
-                      AND r.fecha        <= p.fecha
-                ) AS intentos_incorrectos
-            FROM progreso p
-            JOIN ejercicios e
-                ON e.id_ejercicio = p.id_ejercicio
-            LEFT JOIN respuestas_estudiantes r2
-                ON r2.id_respuesta = (
-                    SELECT r3.id_respuesta
-                    FROM respuestas_estudiantes r3
-                    WHERE r3.id_estudiante  = p.id_estudiante
-                      AND r3.id_ejercicio   = p.id_ejercicio
-                      AND r3.desarrollo_url IS NOT NULL
-                    ORDER BY r3.id_respuesta DESC
-                    LIMIT 1
-                )
-            WHERE p.id_estudiante = %s
-            ORDER BY p.id_progreso DESC
-            LIMIT %s OFFSET %s
-        """, (id_estudiante, limite, offset))
-
-        rows  = cur.fetchall() or []
-        items = []
+        # Total acotado: se cuentan como máximo HISTORIAL_TOPE_TOTAL filas
+        total_registros = None
+        total_exacto    = False
+        if modo_total != "no":
+            cur.execute("""
+                SELECT COUNT(*) AS total
+                FROM (
+                    SELECT 1 FROM progreso
+                    WHERE id_estudiante = %s
+                    LIMIT %s
+                ) t
+            """, (id_estudiante, HISTORIAL_TOPE_TOTAL))
+            total_registros = int((cur.fetchone() or {}).get("total", 0) or 0)
+            total_exacto    = total_registros < HISTORIAL_TOPE_TOTAL
+
+        # Se pide una fila extra para saber si hay más sin contar
+        cur.execute(SQL_HISTORIAL, {
+            "id":     id_estudiante,
+            "cursor": cursor_id,
+            "limite": limite + 1,
+            "offset": offset,
+        })
+
+        rows    = cur.fetchall() or []
+        hay_mas = len(rows) > limite
+        rows    = rows[:limite]
+        items   = []
 
         for r in rows:
             estado_raw = (r.get("estado") or "").strip().lower()
@@ -327,15 +388,18 @@ def historial_progreso():
                 "intentosIncorrectos": intentos
             })
 
-        hay_mas = (offset + limite) < total_registros
+        if cursor_id is None and total_registros is not None:
+            hay_mas = hay_mas or (offset + limite) < total_registros
 
         return jsonify({
-            "status":   True,
-            "items":    items,
-            "total":    total_registros,
-            "hayMas":   hay_mas,
-            "offset":   offset,
-            "limite":   limite
+            "status":          True,
+            "items":           items,
+            "total":           total_registros,
+            "totalExacto":     total_exacto,
+            "hayMas":          hay_mas,
+            "siguienteCursor": items[-1]["idProgreso"] if hay_mas and items else None,
+            "offset":          offset,
+            "limite":          limite
         }), 200
 
     except Exception as e:
@@ -353,7 +417,10 @@ def historial_progreso():
 @jwt_required()
 def eliminar_progreso(id_progreso):
     try:
-        return jsonify(json.loads(Progreso.eliminar(id_progreso)))
+        resp = Progreso.eliminar(id_progreso)
+        if resp.get("id_estudiante") is not None:
+            invalidar_estudiante(resp["id_estudiante"])
+        return jsonify_datos(resp)
     except Exception as e:
         return jsonify({"status": False, "mensaje": str(e)}), 500
     
@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify
 from models.Puntaje import Puntaje
 from models.scoring import score_to_nivel
-import json
 from conexionBD import Conexion
+from models.cache_respuestas import invalidar_estudiante
+from models.cola_ejercicios import COLA
+from models.recalculo_nec import SQL_REGISTRAR_ASIGNACION
 import datetime
+from util import jsonify_datos
 
 ws_puntaje = Blueprint('ws_puntaje', __name__, url_prefix='/puntaje')
 
@@ -13,18 +16,24 @@ def _sync_nec_desde_puntaje(cursor, id_estudiante, id_competencia, score_directo
     """
     Cuando el docente asigna un puntaje directamente (0-100), lo
     convierte a nivel usando la fórmula unificada y actualiza NEC.
+    La asignación queda registrada para el recálculo del NEC
+    (models/recalculo_nec.py), que la aplica en su fecha.
     """
     nivel_nuevo = score_to_nivel(float(score_directo))
-    cursor.execute("""
-        INSERT INTO nivel_estudiante_competencia
-            (id_estudiante, id_competencia, nivel_actual,
-             promedio_puntaje, ejercicios_considerados, fecha_ultimo_update)
-        VALUES (%s, %s, %s, %s, 0, NOW())
-        ON CONFLICT (id_estudiante, id_competencia) DO UPDATE SET
-            nivel_actual        = EXCLUDED.nivel_actual,
-            promedio_puntaje    = EXCLUDED.promedio_puntaje,
-            fecha_ultimo_update = EXCLUDED.fecha_ultimo_update
-    """, (id_estudiante, id_competencia, nivel_nuevo, float(score_directo)))
+    cursor.execute(f"""
+        WITH nec AS (
+            INSERT INTO nivel_estudiante_competencia
+                (id_estudiante, id_competencia, nivel_actual,
+                 promedio_puntaje, ejercicios_considerados, fecha_ultimo_update)
+            VALUES (%(id_estudiante)s, %(id_competencia)s, %(nivel)s, %(score)s, 0, NOW())
+            ON CONFLICT (id_estudiante, id_competencia) DO UPDATE SET
+                nivel_actual        = EXCLUDED.nivel_actual,
+                promedio_puntaje    = EXCLUDED.promedio_puntaje,
+                fecha_ultimo_update = EXCLUDED.fecha_ultimo_update
+        )
+        {SQL_REGISTRAR_ASIGNACION}
+    """, {"id_estudiante": id_estudiante, "id_competencia": id_competencia,
+          "nivel": nivel_nuevo, "score": float(score_directo)})
     return nivel_nuevo
 
 
@@ -32,13 +41,13 @@ def _sync_nec_desde_puntaje(cursor, id_estudiante, id_competencia, score_directo
 @ws_puntaje.route('', methods=['GET'])
 @ws_puntaje.route('/', methods=['GET'])
 def listar_puntajes():
-    return jsonify(json.loads(Puntaje.listar()))
+    return jsonify_datos(Puntaje.listar())
 
 
 # ── Obtener puntajes por estudiante ─────────────────────────────────────────
 @ws_puntaje.route('/<int:id_estudiante>', methods=['GET'])
 def obtener_puntaje(id_estudiante):
-    return jsonify(json.loads(Puntaje.obtener_por_estudiante(id_estudiante)))
+    return jsonify_datos(Puntaje.obtener_por_estudiante(id_estudiante))
 
 
 # ── Crear puntaje (asignación docente) ───────────────────────────────────────
@@ -69,6 +78,8 @@ def crear_puntaje():
         )
 
         con.commit()
+        invalidar_estudiante(id_estudiante)
+        COLA.invalidar_estudiante(id_estudiante)
         return jsonify({
             'status':    True,
             'message':   'Puntaje creado',
@@ -128,6 +139,8 @@ def actualizar_puntaje(id_puntaje):
         )
 
         con.commit()
+        invalidar_estudiante(id_estudiante)
+        COLA.invalidar_estudiante(id_estudiante)
         return jsonify({
             'status':  True,
             'message': 'Puntaje actualizado',
@@ -1,6 +1,6 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from models.Recomendacion import Recomendacion
-import json
+from util import jsonify_datos
 
 ws_recomendacion = Blueprint('ws_recomendacion', __name__, url_prefix='/recomendacion')
 
@@ -8,20 +8,20 @@ ws_recomendacion = Blueprint('ws_recomendacion', __name__, url_prefix='/recomend
 @ws_recomendacion.route('', methods=['POST'])
 def registrar_recomendacion():
     data = request.get_json()
-    return jsonify(json.loads(Recomendacion.registrar(
+    return jsonify_datos(Recomendacion.registrar(
         data['id_estudiante'],
         data['id_ejercicio'],
         data.get('id_respuesta'),
         data['tipo_recomendacion'],
         data['mensaje']
-    )))
+    ))
 
 # Listar recomendaciones de un estudiante
 @ws_recomendacion.route('/<int:id_estudiante>', methods=['GET'])
 def listar_recomendaciones(id_estudiante):
-    return jsonify(json.loads(Recomendacion.listar(id_estudiante)))
+    return jsonify_datos(Recomendacion.listar(id_estudiante))
 
 # Eliminar recomendación
 @ws_recomendacion.route('/<int:id_recomendacion>', methods=['DELETE'])
 def eliminar_recomendacion(id_recomendacion):
-    return jsonify(json.loads(Recomendacion.eliminar(id_recomendacion)))
+    return jsonify_datos(Recomendacion.eliminar(id_recomendacion))
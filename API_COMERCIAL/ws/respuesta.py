@@ -2,7 +2,8 @@ from flask import Blueprint, request, jsonify
 from models.Respuesta import Respuesta
 from models.Puntaje import Puntaje
 from conexionBD import Conexion
-import json
+from util import jsonify_datos
+from models.cache_respuestas import invalidar_estudiante
 
 ws_respuesta = Blueprint('ws_respuesta', __name__)
 
@@ -31,7 +32,7 @@ def crear_respuesta():
         )
 
         # Registrar respuesta
-        resultado = json.loads(obj.crear())
+        resultado = obj.crear()
 
         # Si la respuesta se registró correctamente, actualizar puntaje
         if resultado.get('status'):
@@ -41,8 +42,9 @@ def crear_respuesta():
                 id_opcion=data['id_opcion']
             )
             resultado['message'] = resultado.get('message', '') + ' y puntaje actualizado'
+            invalidar_estudiante(data['id_estudiante'])
 
-        return jsonify(resultado), 200
+        return jsonify_datos(resultado), 200
 
     except Exception as e:
         return jsonify({'status': False, 'message': str(e)}), 500
@@ -55,7 +57,7 @@ def crear_respuesta():
 @ws_respuesta.route('/respuestas', methods=['GET'])
 def listar_respuestas():
     try:
-        return jsonify(json.loads(Respuesta.listar())), 200
+        return jsonify_datos(Respuesta.listar()), 200
     except Exception as e:
         return jsonify({'status': False, 'message': str(e)}), 500
 
@@ -67,7 +69,7 @@ def listar_respuestas():
 @ws_respuesta.route('/respuestas/<int:id_respuesta>', methods=['GET'])
 def obtener_respuesta(id_respuesta):
     try:
-        return jsonify(json.loads(Respuesta.obtener(id_respuesta))), 200
+        return jsonify_datos(Respuesta.obtener(id_respuesta)), 200
     except Exception as e:
         return jsonify({'status': False, 'message': str(e)}), 500
 
@@ -79,7 +81,7 @@ def obtener_respuesta(id_respuesta):
 @ws_respuesta.route('/respuestas/<int:id_respuesta>', methods=['DELETE'])
 def eliminar_respuesta(id_respuesta):
     try:
-        return jsonify(json.loads(Respuesta.eliminar(id_respuesta))), 200
+        return jsonify_datos(Respuesta.eliminar(id_respuesta)), 200
     except Exception as e:
         return jsonify({'status': False, 'message': str(e)}), 500
 
@@ -1,6 +1,6 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from models.Salon import Salon
-import json
+from util import jsonify_datos
 
 ws_salon = Blueprint('ws_salon', __name__, url_prefix='/salon')
 
@@ -8,23 +8,23 @@ ws_salon = Blueprint('ws_salon', __name__, url_prefix='/salon')
 @ws_salon.route('', methods=['POST'])
 def registrar_salon():
     data = request.get_json()
-    return jsonify(json.loads(Salon.registrar(
+    return jsonify_datos(Salon.registrar(
         data['nombre_salon'],
         data['grado']
-    )))
+    ))
 
 # Listar todos los salones
 @ws_salon.route('', methods=['GET'])
 def listar_salones():
-    return jsonify(json.loads(Salon.listar()))
+    return jsonify_datos(Salon.listar())
 
 # Actualizar salón
 @ws_salon.route('/<int:id_salon>', methods=['PUT'])
 def actualizar_salon(id_salon):
     data = request.get_json()
-    return jsonify(json.loads(Salon.actualizar(id_salon, data)))
+    return jsonify_datos(Salon.actualizar(id_salon, data))
 
 # Eliminar salón
 @ws_salon.route('/<int:id_salon>', methods=['DELETE'])
 def eliminar_salon(id_salon):
-    return jsonify(json.loads(Salon.eliminar(id_salon)))
+    return jsonify_datos(Salon.eliminar(id_salon))
@@ -1,9 +1,9 @@
 from flask import Blueprint, request, jsonify
 from models.Sesion import Sesion
-import json
 import jwt
 import datetime
 from config import SecretKey
+from util import jsonify_datos
 
 # Crear blueprint
 ws_sesion = Blueprint('ws_sesion', __name__)
@@ -18,7 +18,7 @@ def login():
     # Llamar al modelo
     obj = Sesion(data['correo'], data['contrasena'])
     resultado = obj.iniciarSesion()
-    res_json = json.loads(resultado)
+    res_json = resultado
 
     # Generar token si todo está OK
     if res_json['status']:
@@ -29,4 +29,4 @@ def login():
 
         res_json['token'] = token
 
-    return jsonify(res_json)
+    return jsonify_datos(res_json)
@@ -2,17 +2,33 @@
 import os
 import json
 import pickle
-import urllib.parse
+import uuid
+from datetime import datetime
 import numpy as np
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
 from flask_jwt_extended import jwt_required
 from conexionBD import Conexion
+from config import Config
 from models.scoring import (
-    calcular_delta, score_to_nivel, nivel_to_progreso,
-    nivel_display_texto, NIVEL_EJERCICIO_WHERE, NIVEL_NOMBRE,
-    DIFICULTAD_SQL,
+    score_to_nivel, nivel_to_progreso,
+    nivel_display_texto, NIVEL_EJERCICIO_WHERE,
 )
+from models.registro_respuesta import registrar_respuesta, respuesta_json
+from models.registro_lote import (registrar_lote, LOTE_MAX, ID_CLIENTE_MAX,
+                                  RESULTADO_OPCION_INVALIDA)
+from models.banco_ejercicios import BANCO, leer_estado_estudiante
+from models.estadisticas_puntajes import SQL_FEATURES
+from models.arbol_compilado import ArbolCompilado, compilar
+from models.registro_modelos import RegistroModelos
+from models.cache_respuestas import cache_por_estudiante, invalidar_estudiante
+from models.cola_ejercicios import COLA
+from models.subidas_desarrollo import ColaSubidas
+from models.imagenes_desarrollo import normalizar, nombre_variante, TAMANOS
+from models.indice_imagenes import registrar as registrar_imagen
+from models.almacen_imagenes import AlmacenImagenes, CARPETA as ALMACEN_FOLDER
+from models.rachas import leer_racha
+from models.eventos_docente import publicar_respuesta
 
 ws_tutor = Blueprint("ws_tutor", __name__, url_prefix="/tutor")
 
@@ -26,28 +42,61 @@ DESARROLLOS_FOLDER = os.getenv(
     os.path.join(BASE_DIR, "static", "desarrollos_alumno")
 )
 os.makedirs(DESARROLLOS_FOLDER, exist_ok=True)
+ALMACEN = AlmacenImagenes(ALMACEN_FOLDER)
 
-UMBRAL_APROBADO = 60.0
 
-MODEL_PATH    = os.path.join(BASE_DIR, "modelo_tutor.pkl")
-MODELO_TUTOR  = None
-ENCODER_NIVEL = None
+MODEL_PATH    = os.path.join(BASE_DIR, "modelo_tutor.npz")
+PICKLE_PATH   = os.path.join(BASE_DIR, "modelo_tutor.pkl")
+MODELO_TUTOR   = None   # el árbol compilado ya devuelve la etiqueta decodificada
+MODELO_VERSION = None
 
-try:
-    with open(MODEL_PATH, "rb") as f:
-        data = pickle.load(f)
-        if isinstance(data, dict):
-            MODELO_TUTOR  = data.get("modelo")
-            ENCODER_NIVEL = data.get("encoder")
-        else:
-            MODELO_TUTOR, ENCODER_NIVEL = data
-    print("✅ Modelo de tutor cargado desde:", MODEL_PATH)
+
+def _activar_modelo(modelo, version):
+    """Cambio en caliente: lo llama REGISTRO_MODELOS al terminar de cargar una versión."""
+    global MODELO_TUTOR, MODELO_VERSION
+    MODELO_TUTOR, MODELO_VERSION = modelo, version
+    print(f"✅ Modelo de tutor activo: versión {version}")
+
+
+# Registro versionado (models/registro_modelos.py); sin versiones publicadas
+# se usa modelo_tutor.npz / .pkl de la raíz como antes.
+REGISTRO_MODELOS = RegistroModelos(intervalo_seg=Config.MODELO_REVISION_SEG,
+                                   al_activar=_activar_modelo)
+
+if REGISTRO_MODELOS.iniciar() is None:
     try:
+        MODELO_TUTOR = ArbolCompilado.cargar(MODEL_PATH)
+        MODELO_VERSION = os.path.basename(MODEL_PATH)
+        print("✅ Modelo de tutor (compilado) cargado desde:", MODEL_PATH)
         print("👉 n_features_in_:", MODELO_TUTOR.n_features_in_)
-    except Exception:
-        pass
-except Exception as e:
-    print("⚠️ No se pudo cargar modelo_tutor.pkl:", e)
+    except Exception as e:
+        # Sin .npz: compilar en memoria desde el pickle (requiere sklearn instalado)
+        print("⚠️ No se pudo cargar modelo_tutor.npz:", e)
+        try:
+            with open(PICKLE_PATH, "rb") as f:
+                data = pickle.load(f)
+            if isinstance(data, dict):
+                MODELO_TUTOR = compilar(data.get("modelo"), data.get("encoder"),
+                                        data.get("feature_names"))
+            else:
+                MODELO_TUTOR = compilar(*data)
+            MODELO_VERSION = os.path.basename(PICKLE_PATH)
+            print("✅ Modelo de tutor compilado desde:", PICKLE_PATH,
+                  "(ejecuta compilar_modelo.py para no cargar sklearn)")
+        except Exception as e:
+            print("⚠️ No se pudo cargar modelo_tutor.pkl:", e)
+
+
+def modelo_vigente():
+    """Modelo a usar ahora, tras revisar si hay una versión nueva."""
+    REGISTRO_MODELOS.revisar()
+    return MODELO_TUTOR
+
+
+def metricas_modelo():
+    """Versión activa del modelo en este worker y estado de las recargas."""
+    return dict(REGISTRO_MODELOS.metricas(), version=MODELO_VERSION,
+                cargado=MODELO_TUTOR is not None)
 
 
 # =========================================
@@ -64,19 +113,10 @@ def calcular_features_competencia(cursor, id_estudiante, id_competencia):
       std_puntaje      — consistencia (std=0 → muy consistente)
       tasa_aprobados   — fracción de intentos correctos
       tendencia        — CORR(orden_temporal, puntaje): +1 mejorando / -1 empeorando
+    Sin fila en puntajes_estadisticas → el alumno no tiene puntajes → None.
     """
-    # ── Estadísticas globales ────────────────────────────────────────────
-    cursor.execute("""
-        SELECT COUNT(*)                                              AS total_intentos,
-               AVG(puntaje)                                         AS promedio_puntaje,
-               MIN(puntaje)                                         AS min_puntaje,
-               MAX(puntaje)                                         AS max_puntaje,
-               COALESCE(STDDEV(puntaje), 0)                        AS std_puntaje,
-               SUM(CASE WHEN puntaje >= %s THEN 1 ELSE 0 END)      AS num_aprobados,
-               CORR(EXTRACT(EPOCH FROM fecha_registro), puntaje)   AS tendencia
-        FROM puntajes
-        WHERE id_estudiante = %s AND id_competencia = %s
-    """, (UMBRAL_APROBADO, id_estudiante, id_competencia))
+    # ── Estadísticas acumuladas (una lectura por PK, ver models/estadisticas_puntajes.py) ──
+    cursor.execute(SQL_FEATURES, (id_estudiante, id_competencia))
 
     row = cursor.fetchone()
     if not row:
@@ -159,44 +199,36 @@ def detectar_racha(cursor, id_estudiante, id_competencia, n=3):
       'positiva' → últimas n respuestas todas correctas → dar ejercicio más difícil
       'negativa' → últimas n respuestas todas incorrectas → dar ejercicio más fácil
       None       → mixto
-    Solo considera respuestas en modo 'repaso' para no contaminar con evaluaciones.
+    Solo considera respuestas en modo 'repaso' para no contaminar con evaluaciones
+    (el contador racha_estudiante_competencia solo sigue el repaso, models/rachas.py).
     """
-    cursor.execute("""
-        SELECT op.es_correcta
-        FROM respuestas_estudiantes r
-        JOIN opciones_ejercicio op ON op.id_opcion = r.id_opcion
-        JOIN ejercicios e ON e.id_ejercicio = r.id_ejercicio
-        WHERE r.id_estudiante = %s AND e.id_competencia = %s
-          AND r.modo = 'repaso'
-        ORDER BY r.fecha DESC
-        LIMIT %s
-    """, (id_estudiante, id_competencia, n))
-    rows = cursor.fetchall()
-    if len(rows) < n:
-        return None
-    if all(r["es_correcta"] for r in rows):
+    racha = leer_racha(cursor, id_estudiante, id_competencia)
+    if racha >= n:
         return "positiva"
-    if not any(r["es_correcta"] for r in rows):
+    if racha <= -n:
         return "negativa"
     return None
 
 
-def predecir_nivel_competencia(cursor, id_estudiante, id_competencia):
+def predecir_nivel_competencia(cursor, id_estudiante, id_competencia, estado_nec=None):
     """
     Devuelve el nivel de dificultad a usar ('bajo'/'medio'/'alto')
     basándose en NEC (fuente autoritativa) con ajuste ±1 del modelo ML.
+    Con estado_nec (EstadoNEC de la petición) no vuelve a leer NEC.
     """
-    nivel_actual, _ = leer_nec(cursor, id_estudiante, id_competencia)
+    if estado_nec is not None:
+        nivel_actual, _ = estado_nec.leer(id_competencia)
+    else:
+        nivel_actual, _ = leer_nec(cursor, id_estudiante, id_competencia)
     nivel_base = nivel_display_texto(nivel_actual)
     print(f"📋 NEC comp={id_competencia}: nivel_actual={nivel_actual} → base='{nivel_base}'")
 
-    if MODELO_TUTOR is not None:
+    modelo = modelo_vigente()
+    if modelo is not None:
         X = calcular_features_competencia(cursor, id_estudiante, id_competencia)
         if X is not None:
             try:
-                y_pred   = MODELO_TUTOR.predict(X)[0]
-                nivel_ml = (ENCODER_NIVEL.inverse_transform([y_pred])[0]
-                            if ENCODER_NIVEL else str(y_pred))
+                nivel_ml = str(modelo.predict(X)[0])
                 print(f"🤖 ML predijo '{nivel_ml}' est={id_estudiante} comp={id_competencia}")
 
                 _orden   = {"bajo": 0, "medio": 1, "alto": 2}
@@ -248,25 +280,34 @@ def ejercicio_siguiente():
     id_evaluacion        = request.args.get("idEvaluacion",      type=int)
     post_refuerzo        = request.args.get("postRefuerzo",      "").lower() == "true"
     id_ejercicio_fallado = request.args.get("idEjercicioFallado", type=int)
+    tamano_cola          = min(request.args.get("cola", 0, type=int) or 0, Config.COLA_TAMANO_MAX)
 
     if not id_estudiante:
         return jsonify({"error": "idEstudiante es obligatorio", "status": False}), 400
 
+    # ── Cola de la sesión: sin cambios de nivel ni de racha, el siguiente ya
+    #    está elegido y no hace falta ir a la BD (models/cola_ejercicios.py) ──
+    usar_cola = (tamano_cola > 1 and modo == "repaso" and not post_refuerzo
+                 and ajuste not in ("mas_dificil", "mas_facil"))
+    if usar_cola:
+        generacion_cola = COLA.generacion(id_estudiante)
+        servido = COLA.tomar(id_estudiante, id_dominio, BANCO.version_cargada())
+        if servido is not None:
+            (ejercicio, nivel_est), restantes = servido
+            print(f"📥 Ejercicio desde la cola: id={ejercicio['id_ejercicio']} "
+                  f"quedan={len(restantes)}")
+            return jsonify(_ejercicio_json(ejercicio, modo, nivel_est, False,
+                                           siguientes=restantes)), 200
+
     con    = Conexion()
     cursor = con.cursor()
+    estado = None
+    cola   = []
 
     try:
-        # ── Verificar que el docente haya asignado el diagnóstico inicial ──
-        cursor.execute("""
-            SELECT (cantidad IS NULL
-                    AND regularidad_equivalencia_cambio IS NULL
-                    AND forma_movimiento_localizacion   IS NULL
-                    AND gestion_datos_incertidumbre     IS NULL) AS sin_diagnostico
-            FROM estudiante
-            WHERE id_estudiante = %s
-        """, (id_estudiante,))
-        row_diag = cursor.fetchone()
-        if row_diag and row_diag.get("sin_diagnostico"):
+        # ── Diagnóstico + versión del banco + ya resueltos + NEC (1 consulta) ──
+        estado = leer_estado_estudiante(cursor, id_estudiante)
+        if estado["sin_diagnostico"]:
             return jsonify({
                 "status":         False,
                 "sinEjercicios":  True,
@@ -277,6 +318,9 @@ def ejercicio_siguiente():
                 ),
             }), 200
 
+        banco = BANCO.indice(cursor, estado["version_banco"])
+        nec   = estado["nec"]
+
         # ── Evaluación: verificar límite y usar ejercicios pre-seleccionados ──
         if modo == "evaluacion" and id_evaluacion:
             cursor.execute("""
@@ -312,55 +356,14 @@ def ejercicio_siguiente():
                         grupos_dict = json.loads(grupos_json) if isinstance(grupos_json, str) else grupos_json
                         ids_grupo   = [int(x) for x in (grupos_dict.get(grupo) or [])]
                         if ids_grupo:
-                            cursor.execute("""
-                                SELECT e.id_ejercicio,
-                                       e.descripcion  AS enunciado,
-                                       e.imagen_url,
-                                       e.pista,
-                                       COALESCE(e.nivel_logro, e.nivel, 1) AS nivel_ejercicio,
-                                       c.id_competencia,
-                                       c.descripcion  AS competencia
-                                FROM ejercicios e
-                                JOIN competencias c ON e.id_competencia = c.id_competencia
-                                WHERE e.id_ejercicio = ANY(%s)
-                                  AND NOT EXISTS (
-                                      SELECT 1 FROM respuestas_estudiantes r
-                                      WHERE r.id_ejercicio  = e.id_ejercicio
-                                        AND r.id_estudiante = %s
-                                        AND r.modo          = 'evaluacion'
-                                  )
-                                  AND EXISTS (
-                                      SELECT 1 FROM opciones_ejercicio oe
-                                      WHERE oe.id_ejercicio = e.id_ejercicio
-                                  )
-                                ORDER BY RANDOM()
-                                LIMIT 1
-                            """, (ids_grupo, id_estudiante))
-                            ej_pre = cursor.fetchone()
+                            ej_pre = banco.elegir_de(
+                                ids_grupo, banco.bitset(estado["respondidos_evaluacion"])
+                            )
                             if ej_pre:
                                 id_ej_pre   = ej_pre["id_ejercicio"]
                                 id_comp_pre = ej_pre["id_competencia"]
-                                nivel_pre   = ej_pre["nivel_ejercicio"]
-
-                                imagen_url_pre = None
-                                img_bd = ej_pre.get("imagen_url")
-                                if img_bd:
-                                    base           = request.host_url.rstrip("/")
-                                    nombre         = os.path.basename(img_bd)
-                                    imagen_url_pre = f"{base}/ejercicios/imagen/{nombre}"
-
-                                cursor.execute("""
-                                    SELECT id_opcion, letra, descripcion
-                                    FROM opciones_ejercicio
-                                    WHERE id_ejercicio = %s
-                                    ORDER BY letra
-                                """, (id_ej_pre,))
-                                opciones_pre = [
-                                    {"idOpcion": o["id_opcion"], "letra": o["letra"], "texto": o["descripcion"]}
-                                    for o in cursor.fetchall()
-                                ]
-
-                                nivel_nec_pre, _ = leer_nec(cursor, id_estudiante, id_comp_pre)
+
+                                nivel_nec_pre, _ = nec.leer(id_comp_pre)
                                 nivel_est_pre    = nivel_display_texto(nivel_nec_pre)
 
                                 print(f"📋 Evaluación: ejercicio pre-seleccionado id={id_ej_pre} grupo={grupo}")
@@ -370,11 +373,11 @@ def ejercicio_siguiente():
                                     "idEjercicio":                id_ej_pre,
                                     "idCompetencia":              id_comp_pre,
                                     "enunciado":                  ej_pre["enunciado"],
-                                    "imagenUrl":                  imagen_url_pre,
-                                    "opciones":                   opciones_pre,
+                                    "imagenUrl":                  _url_imagen_ejercicio(ej_pre.get("imagen_url")),
+                                    "opciones":                   ej_pre["opciones"],
                                     "pista":                      None,
                                     "modo":                       modo,
-                                    "nivelEjercicio":             nivel_pre,
+                                    "nivelEjercicio":             ej_pre["nivel_ejercicio"],
                                     "nivelEstudianteCompetencia": nivel_est_pre,
                                     "mensaje":                    None,
                                 }), 200
@@ -382,62 +385,37 @@ def ejercicio_siguiente():
                         print(f"⚠️ Error leyendo ejercicios_grupos: {e_grupo}")
                 # Sin pre-selección → caer en selección aleatoria normal
 
-        where  = []
-        params = []
-
-        if id_dominio:
-            where.append("e.id_competencia = %s")
-            params.append(id_dominio)
-
         # ── Selección de dificultad ───────────────────────────────────────
         if post_refuerzo:
             # Verificación post-refuerzo: misma competencia, un nivel más fácil
             if id_dominio:
-                nivel_base_ver, _ = leer_nec(cursor, id_estudiante, id_dominio)
+                nivel_base_ver, _ = nec.leer(id_dominio)
             else:
-                cursor.execute("""
-                    SELECT COALESCE(ROUND(AVG(nivel_actual))::int, 1) AS nivel_min
-                    FROM nivel_estudiante_competencia
-                    WHERE id_estudiante = %s AND id_competencia BETWEEN 1 AND 4
-                """, (id_estudiante,))
-                nivel_base_ver = int((cursor.fetchone() or {}).get("nivel_min") or 1)
-
-            nivel_ver   = max(1, nivel_base_ver - 1)
-            nivel_where = NIVEL_EJERCICIO_WHERE.get(nivel_ver, f"{DIFICULTAD_SQL} <= 3")
-            where.append(nivel_where)
-            print(f"🔍 postRefuerzo: base={nivel_base_ver} → nivel_ver={nivel_ver} filtro={nivel_where}")
+                nivel_base_ver = nec.nivel_promedio()
+
+            nivel_filtro = max(1, nivel_base_ver - 1)
+            print(f"🔍 postRefuerzo: base={nivel_base_ver} → nivel_ver={nivel_filtro} "
+                  f"filtro={NIVEL_EJERCICIO_WHERE[nivel_filtro]}")
         elif ajuste in ("mas_dificil", "mas_facil"):
             # Leer NEC para ajuste relativo al nivel real del estudiante
             if id_dominio:
-                nivel_base_ajuste, _ = leer_nec(cursor, id_estudiante, id_dominio)
+                nivel_base_ajuste, _ = nec.leer(id_dominio)
             else:
-                cursor.execute("""
-                    SELECT COALESCE(ROUND(AVG(nivel_actual))::int, 1) AS nivel_min
-                    FROM nivel_estudiante_competencia
-                    WHERE id_estudiante = %s AND id_competencia BETWEEN 1 AND 4
-                """, (id_estudiante,))
-                nivel_base_ajuste = int((cursor.fetchone() or {}).get("nivel_min") or 1)
-
-            nivel_adj = (min(7, nivel_base_ajuste + 1) if ajuste == "mas_dificil"
-                         else max(1, nivel_base_ajuste - 1))
-            nivel_where = NIVEL_EJERCICIO_WHERE.get(nivel_adj, f"{DIFICULTAD_SQL} <= 3")
-            where.append(nivel_where)
-            print(f"⚙️ ajuste='{ajuste}' base={nivel_base_ajuste} → nivel_adj={nivel_adj} filtro={nivel_where}")
+                nivel_base_ajuste = nec.nivel_promedio()
+
+            nivel_filtro = (min(7, nivel_base_ajuste + 1) if ajuste == "mas_dificil"
+                            else max(1, nivel_base_ajuste - 1))
+            print(f"⚙️ ajuste='{ajuste}' base={nivel_base_ajuste} → nivel_adj={nivel_filtro} "
+                  f"filtro={NIVEL_EJERCICIO_WHERE[nivel_filtro]}")
         else:
             # 1) Determinar nivel base desde NEC + predicción ML
             if id_dominio:
-                nivel_actual_int, _ = leer_nec(cursor, id_estudiante, id_dominio)
+                nivel_actual_int, _ = nec.leer(id_dominio)
                 nivel_predicho_texto = predecir_nivel_competencia(
-                    cursor, id_estudiante, id_dominio
+                    cursor, id_estudiante, id_dominio, nec
                 )
             else:
-                cursor.execute("""
-                    SELECT COALESCE(ROUND(AVG(nivel_actual))::int, 1) AS nivel_min
-                    FROM nivel_estudiante_competencia
-                    WHERE id_estudiante = %s AND id_competencia BETWEEN 1 AND 4
-                """, (id_estudiante,))
-                row_min = cursor.fetchone() or {}
-                nivel_actual_int = int(row_min.get("nivel_min") or 1)
+                nivel_actual_int = nec.nivel_promedio()
                 nivel_predicho_texto = nivel_display_texto(nivel_actual_int)
                 print(f"📊 Nivel global mínimo={nivel_actual_int} → '{nivel_predicho_texto}'")
 
@@ -470,128 +448,50 @@ def ejercicio_siguiente():
                     nivel_para_ejercicio = max(1, nivel_para_ejercicio - 1)
                     print(f"❄️ Racha negativa → nivel_ejercicio={nivel_para_ejercicio}")
 
-            nivel_where = NIVEL_EJERCICIO_WHERE.get(nivel_para_ejercicio, f"{DIFICULTAD_SQL} <= 3")
-            where.append(nivel_where)
-            print(f"🎯 ML='{nivel_predicho_texto}'→{nivel_para_ejercicio} | Filtro: {nivel_where}")
+            nivel_filtro = max(1, min(7, nivel_para_ejercicio))
+            print(f"🎯 ML='{nivel_predicho_texto}'→{nivel_para_ejercicio} | "
+                  f"Filtro: {NIVEL_EJERCICIO_WHERE[nivel_filtro]}")
 
         # ── Excluir el ejercicio que causó el refuerzo (evita repetirlo en verificación) ──
-        if post_refuerzo and id_ejercicio_fallado:
-            where.append("e.id_ejercicio != %s")
-            params.append(id_ejercicio_fallado)
+        excluir_id = id_ejercicio_fallado if post_refuerzo else None
 
         # ── Excluir ejercicios ya respondidos ─────────────────────────────
+        # En evaluación cada pregunta se responde UNA sola vez. En repaso
+        # (repetición espaciada) solo se excluyen los respondidos CORRECTAMENTE:
+        # los fallados vuelven a estar disponibles, pero salen después de los
+        # NUNCA intentados del nivel.
         if modo == "evaluacion":
-            # En evaluación cada pregunta se responde UNA sola vez
-            where.append("""
-                NOT EXISTS(
-                    SELECT 1 FROM respuestas_estudiantes r
-                    WHERE r.id_ejercicio  = e.id_ejercicio
-                      AND r.id_estudiante = %s
-                      AND r.modo          = 'evaluacion'
-                )
-            """)
+            ya_resueltos = banco.bitset(estado["respondidos_evaluacion"])
+            ejercicio = banco.elegir(id_dominio, nivel_filtro, ya_resueltos, excluir_id)
         else:
-            # Repetición espaciada: solo se excluyen los ejercicios ya
-            # respondidos CORRECTAMENTE en repaso. Los fallados vuelven a
-            # estar disponibles para verificar que el alumno ya domina el
-            # concepto (antes un ejercicio fallado no volvía a salir nunca).
-            where.append("""
-                NOT EXISTS(
-                    SELECT 1 FROM respuestas_estudiantes r
-                    JOIN opciones_ejercicio op_r ON op_r.id_opcion = r.id_opcion
-                    WHERE r.id_ejercicio  = e.id_ejercicio
-                      AND r.id_estudiante = %s
-                      AND r.modo          = 'repaso'
-                      AND op_r.es_correcta
-                )
-            """)
-        params.append(id_estudiante)
-
-        where.append("""
-            EXISTS(
-                SELECT 1 FROM opciones_ejercicio oe
-                WHERE oe.id_ejercicio = e.id_ejercicio
+            ya_resueltos = banco.bitset(estado["resueltos_repaso"])
+            intentados   = banco.bitset(estado["intentados_repaso"])
+            ejercicio = (
+                banco.elegir(id_dominio, nivel_filtro, ya_resueltos | intentados, excluir_id)
+                or banco.elegir(id_dominio, nivel_filtro, ya_resueltos, excluir_id)
             )
-        """)
-
-        where_clause = "WHERE " + " AND ".join(where) if where else ""
-
-        # En repaso: priorizar ejercicios NUNCA intentados; los fallados
-        # (disponibles por la repetición espaciada) salen cuando se agota
-        # el contenido nuevo del nivel.
-        orden_sql   = "ORDER BY RANDOM()"
-        params_main = list(params)
-        if modo != "evaluacion":
-            orden_sql = """
-                ORDER BY EXISTS(
-                    SELECT 1 FROM respuestas_estudiantes r2
-                    WHERE r2.id_ejercicio  = e.id_ejercicio
-                      AND r2.id_estudiante = %s
-                      AND r2.modo          = 'repaso'
-                ) ASC, RANDOM()
-            """
-            params_main.append(id_estudiante)
-
-        cursor.execute(f"""
-            SELECT e.id_ejercicio,
-                   e.descripcion  AS enunciado,
-                   e.imagen_url,
-                   e.pista,
-                   COALESCE(e.nivel_logro, e.nivel, 1) AS nivel_ejercicio,
-                   c.id_competencia,
-                   c.descripcion  AS competencia
-            FROM ejercicios e
-            JOIN competencias c ON e.id_competencia = c.id_competencia
-            {where_clause}
-            {orden_sql}
-            LIMIT 1
-        """, tuple(params_main))
-
-        ejercicio = cursor.fetchone()
-
-        # Fallback 1 (solo repaso): misma dificultad, permite repetir ejercicios ya respondidos
-        if not ejercicio and modo != "evaluacion":
-            print("⚠️ Ejercicios del nivel agotados. Permitiendo repetición en repaso...")
-            params_sin_exists = params[:-1]  # eliminar el id_estudiante del NOT EXISTS
-            where_sin_exists  = [w for w in where if "NOT EXISTS" not in w]
-            wc_sin_exists = ("WHERE " + " AND ".join(where_sin_exists)) if where_sin_exists else ""
-            cursor.execute(f"""
-                SELECT e.id_ejercicio,
-                       e.descripcion  AS enunciado,
-                       e.imagen_url,
-                       e.pista,
-                       COALESCE(e.nivel_logro, e.nivel, 1) AS nivel_ejercicio,
-                       c.id_competencia,
-                       c.descripcion  AS competencia
-                FROM ejercicios e
-                JOIN competencias c ON e.id_competencia = c.id_competencia
-                {wc_sin_exists}
-                ORDER BY RANDOM()
-                LIMIT 1
-            """, tuple(params_sin_exists))
-            ejercicio = cursor.fetchone()
+
+            # Los siguientes del mismo nivel y en el mismo orden de preferencia
+            # quedan en la cola de la sesión (solo si el nivel aún tiene ejercicios)
+            if usar_cola and ejercicio:
+                cola = []
+                usados = banco.bitset([ejercicio["id_ejercicio"]])
+                for excluir in (ya_resueltos | intentados, ya_resueltos):
+                    for ej in banco.muestrear(id_dominio, nivel_filtro,
+                                              tamano_cola - 1 - len(cola), excluir | usados):
+                        usados |= banco.bitset([ej["id_ejercicio"]])
+                        cola.append((ej, nivel_display_texto(nec.leer(ej["id_competencia"])[0])))
+                COLA.guardar(id_estudiante, id_dominio, generacion_cola, banco.version, cola)
+
+            # Fallback 1 (solo repaso): misma dificultad, permite repetir ejercicios ya respondidos
+            if not ejercicio:
+                print("⚠️ Ejercicios del nivel agotados. Permitiendo repetición en repaso...")
+                ejercicio = banco.elegir(id_dominio, nivel_filtro, 0, excluir_id)
 
         # Fallback 2: cualquier dificultad, sin repetir (mantiene filtro de competencia)
         if not ejercicio:
             print("⚠️ Sin ejercicios del nivel predicho. Intentando sin filtro de nivel...")
-            where_sin_nivel  = [w for w in where if "e.nivel" not in w]
-            where_clause_sin = ("WHERE " + " AND ".join(where_sin_nivel) if where_sin_nivel else "")
-
-            cursor.execute(f"""
-                SELECT e.id_ejercicio,
-                       e.descripcion  AS enunciado,
-                       e.imagen_url,
-                       e.pista,
-                       COALESCE(e.nivel_logro, e.nivel, 1) AS nivel_ejercicio,
-                       c.id_competencia,
-                       c.descripcion  AS competencia
-                FROM ejercicios e
-                JOIN competencias c ON e.id_competencia = c.id_competencia
-                {where_clause_sin}
-                ORDER BY RANDOM()
-                LIMIT 1
-            """, tuple(params))
-            ejercicio = cursor.fetchone()
+            ejercicio = banco.elegir(id_dominio, None, ya_resueltos, excluir_id)
 
         if not ejercicio:
             return jsonify({
@@ -607,52 +507,13 @@ def ejercicio_siguiente():
         print(f"✅ Ejercicio seleccionado: id={id_ejercicio} nivel={nivel_ej} comp={id_competencia}")
 
         # Nivel del estudiante para esta competencia (para mostrar en UI)
-        nivel_nec_ej, _     = leer_nec(cursor, id_estudiante, id_competencia)
+        nivel_nec_ej, _     = nec.leer(id_competencia)
         nivel_est_competencia = nivel_display_texto(nivel_nec_ej)
 
-        imagen_url_bd = ejercicio.get("imagen_url")
-        if imagen_url_bd:
-            base       = request.host_url.rstrip("/")
-            nombre     = os.path.basename(imagen_url_bd)
-            imagen_url = f"{base}/ejercicios/imagen/{nombre}"
-        else:
-            imagen_url = None
-
-        cursor.execute("""
-            SELECT id_opcion, letra, descripcion
-            FROM opciones_ejercicio
-            WHERE id_ejercicio = %s
-            ORDER BY letra
-        """, (id_ejercicio,))
-        opciones = [
-            {"idOpcion": o["id_opcion"], "letra": o["letra"], "texto": o["descripcion"]}
-            for o in cursor.fetchall()
-        ]
-
-        if not opciones:
-            return jsonify({
-                "status":        False,
-                "sinEjercicios": True,
-                "mensaje":       "El ejercicio no tiene opciones.",
-            }), 200
-
-        pista = ejercicio["pista"] if modo == "repaso" else None
-
-        return jsonify({
-            "status":                     True,
-            "sinEjercicios":              False,
-            "idEjercicio":                id_ejercicio,
-            "idCompetencia":              id_competencia,
-            "enunciado":                  ejercicio["enunciado"],
-            "imagenUrl":                  imagen_url,
-            "opciones":                   opciones,
-            "pista":                      pista,
-            "modo":                       modo,
-            "nivelEjercicio":             nivel_ej,
-            "nivelEstudianteCompetencia": nivel_est_competencia,
-            "mensaje":                    None,
-            "esVerificacion":             post_refuerzo,
-        }), 200
+        return jsonify(_ejercicio_json(
+            ejercicio, modo, nivel_est_competencia, post_refuerzo,
+            siguientes=cola if usar_cola else None,
+        )), 200
 
     except Exception as e:
         print("ERROR en ejercicio_siguiente:", e)
@@ -660,13 +521,51 @@ def ejercicio_siguiente():
 
     finally:
         try:
-            con.commit()   # persiste el INSERT de NEC hecho por leer_nec()
+            # persiste en un solo INSERT las inicializaciones de NEC hechas en memoria
+            if estado is not None:
+                estado["nec"].guardar(cursor)
+            con.commit()
         except Exception:
             pass
         cursor.close()
         con.close()
 
 
+def _ejercicio_json(ejercicio, modo, nivel_est_competencia, post_refuerzo, siguientes=None):
+    """Cuerpo de ejercicio_siguiente; con cola, `siguientes` son (ejercicio, nivel) en orden."""
+    cuerpo = {
+        "status":                     True,
+        "sinEjercicios":              False,
+        "idEjercicio":                ejercicio["id_ejercicio"],
+        "idCompetencia":              ejercicio["id_competencia"],
+        "enunciado":                  ejercicio["enunciado"],
+        "imagenUrl":                  _url_imagen_ejercicio(ejercicio.get("imagen_url")),
+        "opciones":                   ejercicio["opciones"],
+        "pista":                      ejercicio["pista"] if modo == "repaso" else None,
+        "modo":                       modo,
+        "nivelEjercicio":             ejercicio["nivel_ejercicio"],
+        "nivelEstudianteCompetencia": nivel_est_competencia,
+        "mensaje":                    None,
+        "esVerificacion":             post_refuerzo,
+    }
+    if siguientes is not None:
+        # Para que la app precargue enunciados e imágenes; el servidor los
+        # sirve en este orden mientras la cola siga vigente
+        cuerpo["siguientes"] = [
+            {k: v for k, v in _ejercicio_json(ej, modo, nivel, False).items()
+             if k not in ("status", "sinEjercicios", "mensaje", "esVerificacion")}
+            for ej, nivel in siguientes
+        ]
+    return cuerpo
+
+
+def _url_imagen_ejercicio(imagen_url_bd):
+    if not imagen_url_bd:
+        return None
+    base = request.host_url.rstrip("/")
+    return f"{base}/ejercicios/imagen/{os.path.basename(imagen_url_bd)}"
+
+
 # =========================================================
 #  POST /tutor/responder
 # =========================================================
@@ -682,7 +581,6 @@ def responder():
     uso_pista        = bool(data.get("usoPista", False))
     modo             = (data.get("modo") or "repaso").lower().strip()
     id_evaluacion    = data.get("idEvaluacion")
-    es_repaso        = (modo == "repaso")
 
     if not id_estudiante or not id_ejercicio or not id_opcion_sel:
         return jsonify({"status": False, "error": "Faltan campos obligatorios"}), 400
@@ -691,274 +589,118 @@ def responder():
     cursor = con.cursor()
 
     try:
-        # 1) Verificar opción
-        cursor.execute("""
-            SELECT o.es_correcta,
-                   e.id_competencia,
-                   COALESCE(e.nivel_logro, e.nivel, 1) AS nivel_ejercicio,
-                   e.pista
-            FROM opciones_ejercicio o
-            JOIN ejercicios e ON e.id_ejercicio = o.id_ejercicio
-            WHERE o.id_opcion = %s
-        """, (id_opcion_sel,))
-        row = cursor.fetchone()
-        if not row:
+        # Dos viajes a la BD: lectura de contexto + escritura con CTEs
+        # (ver models/registro_respuesta.py)
+        res = registrar_respuesta(
+            cursor, id_estudiante, id_ejercicio, id_opcion_sel,
+            tiempo_respuesta, uso_pista, modo, id_evaluacion,
+        )
+        if res is None:
             return jsonify({"status": False, "error": "Opción no válida"}), 404
 
-        es_correcta     = bool(row["es_correcta"])
-        id_competencia  = row["id_competencia"]
-        nivel_ejercicio = row["nivel_ejercicio"]
-        pista_ejercicio = (row.get("pista") or "").strip()
-
-        # 2) Registrar respuesta
-        cursor.execute("""
-            INSERT INTO respuestas_estudiantes
-                (respuesta_texto, respuesta_imagen, fecha,
-                 tiempo_respuesta, uso_pista,
-                 id_estudiante, id_ejercicio, id_opcion,
-                 desarrollo_url, modo)
-            VALUES (%s, %s, CURRENT_TIMESTAMP, %s, %s,
-                    %s, %s, %s, %s, %s)
-            RETURNING id_respuesta
-        """, (None, None,
-              float(tiempo_respuesta) if tiempo_respuesta else None,
-              uso_pista,
-              id_estudiante, id_ejercicio, id_opcion_sel,
-              None, modo))
-        id_respuesta = cursor.fetchone()["id_respuesta"]
-
-        # 3) ── NÚCLEO: leer NEC ────────────────────────────────────────────
-        nivel_actual_bd, score_actual = leer_nec(cursor, id_estudiante, id_competencia)
-
-        # 4) Progreso (registro de actividad — siempre, independiente del modo)
-        estado = "correcto" if es_correcta else "incorrecto"
-        if uso_pista and es_repaso:
-            estado += "_con_pista"
+        con.commit()
+        invalidar_estudiante(id_estudiante)
+        COLA.invalidar_si_cambia(id_estudiante, [res])
+        # Alertas / actividad en vivo para el docente (models/eventos_docente.py)
+        publicar_respuesta(id_estudiante, res, modo)
+        return jsonify(respuesta_json(res, modo)), 200
 
-        cursor.execute("""
-            INSERT INTO progreso
-                (nivel_actual, estado, tiempo_respuesta,
-                 id_estudiante, id_ejercicio, modo)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (f"Nivel {nivel_ejercicio}" if nivel_ejercicio else None,
-              estado,
-              float(tiempo_respuesta) if tiempo_respuesta else None,
-              id_estudiante, id_ejercicio, modo))
-
-        # uso_pista reduce el delta positivo: acertar con ayuda avanza menos
-        delta       = calcular_delta(es_correcta, tiempo_respuesta, nivel_ejercicio,
-                                     uso_pista=uso_pista and es_repaso)
-        nuevo_score = max(0.0, min(100.0, score_actual + delta))
-        nuevo_nivel = score_to_nivel(nuevo_score)
-
-        if es_repaso:
-            # 5a) Puntaje binario → SOLO repaso alimenta el historial del ML.
-            #     Evaluación es medición, no entrenamiento: no debe contaminar puntajes.
-            puntaje_bin = 100 if es_correcta else 0
-            cursor.execute("""
-                INSERT INTO puntajes (puntaje, fecha_registro, id_competencia, id_estudiante)
-                VALUES (%s, NOW(), %s, %s)
-            """, (puntaje_bin, id_competencia, id_estudiante))
-            # 5b) Actualizar nivel adaptativo del alumno
-            guardar_nec(cursor, id_estudiante, id_competencia, nuevo_score, nuevo_nivel)
-            print(f"📈 NEC comp={id_competencia}: {score_actual:.1f}{delta:+d}={nuevo_score:.1f} → nivel {nuevo_nivel}")
-        else:
-            # Evaluación: el NEC no se modifica; usamos el nivel real para la respuesta
-            nuevo_nivel = nivel_actual_bd
-            nuevo_score = score_actual
-            print(f"📊 Evaluación comp={id_competencia}: NEC sin cambio, nivel={nivel_actual_bd}")
-
-        # Determinar ajuste y mensaje
-        if es_correcta:
-            if nuevo_nivel > nivel_actual_bd:
-                nuevo_ajuste = "mas_dificil"
-                mensaje = f"¡Subiste al nivel {NIVEL_NOMBRE.get(nuevo_nivel, str(nuevo_nivel))}!"
-            else:
-                nuevo_ajuste = "igual"
-                mensaje = "¡Correcto! Sigue practicando."
-            mostrar_pista = False
-        else:
-            if nuevo_nivel < nivel_actual_bd:
-                nuevo_ajuste = "mas_facil"
-                mensaje = "Ajustamos la dificultad para reforzar."
-            else:
-                nuevo_ajuste = "igual"
-                mensaje = "Sigue intentando, puedes lograrlo."
-            # Si ya está en N1 (mínimo posible) y tiene racha negativa (≥3 fallos seguidos)
-            # devolvemos "mas_facil" para que la app sepa que está atascado en el nivel base
-            if nuevo_nivel == 1 and nuevo_ajuste == "igual" and es_repaso:
-                racha_n1 = detectar_racha(cursor, id_estudiante, id_competencia, n=3)
-                if racha_n1 == "negativa":
-                    nuevo_ajuste = "mas_facil"
-                    mensaje = "Repasa los materiales de apoyo. ¡Toma tu tiempo!"
-            mostrar_pista = es_repaso and bool(pista_ejercicio)
-
-        # Nivel global (promedio de las 4 competencias)
-        cursor.execute("""
-            SELECT COALESCE(AVG(nivel_actual), 1) AS prom
-            FROM nivel_estudiante_competencia
-            WHERE id_estudiante = %s AND id_competencia BETWEEN 1 AND 4
-        """, (id_estudiante,))
-        prom_g             = float((cursor.fetchone() or {}).get("prom") or 1)
-        nivel_global_texto = "bajo" if prom_g < 3 else "medio" if prom_g < 5 else "alto"
+    except Exception as e:
+        con.rollback()
+        print("ERROR en /tutor/responder:", e)
+        return jsonify({"status": False, "error": str(e)}), 500
 
-        nivel_display_str = nivel_display_texto(nuevo_nivel)
+    finally:
+        cursor.close()
+        con.close()
 
-        # 6) Progreso general del estudiante (solo repaso actualiza NEC y progreso)
-        if es_repaso:
-            actualizar_progreso_estudiante(cursor, id_estudiante)
 
-        # 7) Evaluación oficial
-        if not es_repaso and id_evaluacion:
-            cursor.execute("""
-                INSERT INTO evaluacion_respuestas
-                    (id_evaluacion, id_estudiante, id_ejercicio, id_opcion, es_correcta, fecha)
-                VALUES (%s, %s, %s, %s, %s, NOW())
-                ON CONFLICT (id_evaluacion, id_estudiante, id_ejercicio) DO NOTHING
-            """, (id_evaluacion, id_estudiante, id_ejercicio, id_opcion_sel, es_correcta))
-            cursor.execute("""
-                INSERT INTO evaluacion_resultados
-                    (id_evaluacion, id_estudiante, estado,
-                     total_correctas, total_preguntas, puntaje_total)
-                VALUES (%s, %s, 'en_progreso', %s, 1, %s)
-                ON CONFLICT (id_evaluacion, id_estudiante) DO UPDATE SET
-                    total_correctas = evaluacion_resultados.total_correctas
-                                    + EXCLUDED.total_correctas,
-                    total_preguntas = evaluacion_resultados.total_preguntas
-                                    + EXCLUDED.total_preguntas,
-                    puntaje_total   = ROUND(
-                        (evaluacion_resultados.total_correctas
-                         + EXCLUDED.total_correctas)::NUMERIC
-                        / (evaluacion_resultados.total_preguntas
-                           + EXCLUDED.total_preguntas) * 100
-                    )
-            """, (id_evaluacion, id_estudiante,
-                  1 if es_correcta else 0,
-                  100 if es_correcta else 0))
-
-        # 8) Material sugerido + recursos de búsqueda (solo repaso + respuesta incorrecta)
-        material_sugerido    = None
-        recursos_adicionales = None
-        if es_repaso and not es_correcta:
+# =========================================================
+#  POST /tutor/responder_lote
+#  Respuestas acumuladas sin conexión, en el orden en que se dieron:
+#  { "idEstudiante": 5, "respuestas": [ {idCliente, idEjercicio,
+#    idOpcionSeleccionada, tiempoRespuesta, usoPista, modo, idEvaluacion,
+#    fecha}, ... ] }
+#  Misma evaluación que /responder, una lectura y un commit para todo el lote.
+#  idCliente (único por alumno) hace idempotente el reenvío: una respuesta ya
+#  registrada no se vuelve a escribir y devuelve su resultado original.
+# =========================================================
+def _normalizar_lote(lista):
+    """Valida y normaliza las respuestas del lote. Retorna (respuestas, error)."""
+    if not isinstance(lista, list) or not lista:
+        return None, "respuestas debe ser una lista no vacía"
+    if len(lista) > LOTE_MAX:
+        return None, f"Máximo {LOTE_MAX} respuestas por lote"
+    respuestas, ids_cliente = [], set()
+    for i, item in enumerate(lista):
+        if not isinstance(item, dict) or not item.get("idEjercicio") \
+                or not item.get("idOpcionSeleccionada"):
+            return None, f"Respuesta {i}: faltan campos obligatorios"
+        id_cliente = str(item.get("idCliente") or "").strip()
+        if not id_cliente or len(id_cliente) > ID_CLIENTE_MAX:
+            return None, f"Respuesta {i}: idCliente obligatorio (máximo {ID_CLIENTE_MAX} caracteres)"
+        if id_cliente in ids_cliente:
+            return None, f"Respuesta {i}: idCliente repetido en el lote"
+        ids_cliente.add(id_cliente)
+        fecha = item.get("fecha")
+        if fecha:
             try:
-                nivel_mat = 1 if nuevo_nivel <= 2 else (2 if nuevo_nivel <= 4 else 3)
+                datetime.fromisoformat(str(fecha))
+            except ValueError:
+                return None, f"Respuesta {i}: fecha inválida"
+        respuestas.append({
+            "id_cliente":       id_cliente,
+            "id_ejercicio":     item["idEjercicio"],
+            "id_opcion":        item["idOpcionSeleccionada"],
+            "tiempo_respuesta": item.get("tiempoRespuesta"),
+            "uso_pista":        bool(item.get("usoPista", False)),
+            "modo":             (item.get("modo") or "repaso").lower().strip(),
+            "id_evaluacion":    item.get("idEvaluacion"),
+            "fecha":            fecha or None,
+        })
+    return respuestas, None
+
+
+@ws_tutor.route("/responder_lote", methods=["POST"])
+@jwt_required()
+def responder_lote():
+    data          = request.get_json() or {}
+    id_estudiante = data.get("idEstudiante")
+    if not id_estudiante:
+        return jsonify({"status": False, "error": "Faltan campos obligatorios"}), 400
+    respuestas, error = _normalizar_lote(data.get("respuestas"))
+    if error:
+        return jsonify({"status": False, "error": error}), 400
 
-                # ── Palabras clave del ejercicio (puestas por el docente) ────────
-                cursor.execute(
-                    "SELECT palabras_clave FROM ejercicios WHERE id_ejercicio = %s",
-                    (id_ejercicio,)
-                )
-                ej_row     = cursor.fetchone() or {}
-                palabras_clave = (ej_row.get("palabras_clave") or "").strip()
-
-                # Si el docente no llenó el campo, usamos términos fijos por competencia
-                if not palabras_clave:
-                    _KW_COMP = {
-                        1: "operaciones numéricas álgebra primaria",
-                        2: "ecuaciones algebraicas patrones álgebra",
-                        3: "geometría figuras movimiento espacial",
-                        4: "estadística datos gráficos probabilidad",
-                    }
-                    palabras_clave = _KW_COMP.get(id_competencia, "matemáticas álgebra")
-
-                # ── Capa 1: material específico enlazado al ejercicio ────────────
-                cursor.execute("""
-                    SELECT id_material, titulo, tipo, url
-                    FROM material_estudio
-                    WHERE id_ejercicio = %s
-                    ORDER BY RANDOM() LIMIT 1
-                """, (id_ejercicio,))
-                mat = cursor.fetchone()
-
-                # ── Capa 2 (fallback): material genérico de la competencia ───────
-                if not mat:
-                    cursor.execute("""
-                        SELECT id_material, titulo, tipo, url
-                        FROM material_estudio
-                        WHERE id_competencia = %s
-                          AND nivel <= %s
-                          AND (id_ejercicio IS NULL OR id_ejercicio = 0)
-                        ORDER BY RANDOM() LIMIT 1
-                    """, (id_competencia, nivel_mat))
-                    mat = cursor.fetchone()
-
-                if mat:
-                    material_sugerido = {
-                        "idMaterial": mat["id_material"],
-                        "titulo":     mat["titulo"],
-                        "tipo":       mat["tipo"],
-                        "url":        mat["url"],
-                    }
-
-                # ── URLs de búsqueda (YouTube · Web · PDF) ───────────────────────
-                # Se construyen con los términos conceptuales, NO con el enunciado
-                q_yt  = urllib.parse.quote_plus(palabras_clave + " matemáticas")
-                q_web = urllib.parse.quote_plus(
-                    palabras_clave + " matemáticas ejercicio resuelto"
-                )
-                q_pdf = urllib.parse.quote_plus(
-                    palabras_clave + " matemáticas recurso educativo filetype:pdf"
-                )
-                recursos_adicionales = {
-                    "youtubeUrl": f"https://www.youtube.com/results?search_query={q_yt}",
-                    "webUrl":     f"https://www.google.com/search?q={q_web}",
-                    "pdfUrl":     f"https://www.google.com/search?q={q_pdf}",
-                    "query":      palabras_clave,
-                }
-
-            except Exception as e_mat:
-                print("Error buscando material/recursos:", e_mat)
-
-        # 9) Detectar 3 fallos consecutivos en la misma competencia → alerta al docente
-        docente_alertado = False
-        if es_repaso and not es_correcta:
-            try:
-                cursor.execute("""
-                    WITH ultimas AS (
-                        SELECT op2.es_correcta
-                        FROM respuestas_estudiantes r2
-                        JOIN opciones_ejercicio op2 ON op2.id_opcion  = r2.id_opcion
-                        JOIN ejercicios e2           ON e2.id_ejercicio = r2.id_ejercicio
-                        WHERE r2.id_estudiante = %s
-                          AND e2.id_competencia = %s
-                          AND r2.modo = 'repaso'
-                        ORDER BY r2.fecha DESC
-                        LIMIT 3
-                    )
-                    SELECT COUNT(*) AS total,
-                           SUM(CASE WHEN NOT es_correcta THEN 1 ELSE 0 END) AS incorrectas
-                    FROM ultimas
-                """, (id_estudiante, id_competencia))
-                row_al       = cursor.fetchone() or {}
-                total_ul     = int(row_al.get("total") or 0)
-                incorrectas_ul = int(row_al.get("incorrectas") or 0)
-                if total_ul >= 3 and incorrectas_ul >= 3:
-                    docente_alertado = True
-                    print(f"🔔 ALERTA DOCENTE: est={id_estudiante} comp={id_competencia} — 3 fallos consecutivos")
-            except Exception as e_al:
-                print("Error detectando alerta docente:", e_al)
+    con    = Conexion()
+    cursor = con.cursor()
 
+    try:
+        resultados, previas = registrar_lote(cursor, id_estudiante, respuestas)
         con.commit()
-
-        return jsonify({
-            "correcta":             es_correcta,
-            "mostrarPista":         mostrar_pista,
-            "mensaje":              mensaje,
-            "nuevoAjuste":          nuevo_ajuste,
-            "idRespuesta":          id_respuesta,
-            "modo":                 modo,
-            "nivelMLCompetencia":   nivel_display_str,
-            "nivelCompetenciaInt":  nuevo_nivel,
-            "scoreCompetencia":     round(nuevo_score, 1),
-            "nivelGlobal":          nivel_global_texto,
-            "materialSugerido":     material_sugerido,
-            "recursosAdicionales":  recursos_adicionales,
-            "docenteAlertado":      docente_alertado,
-        }), 200
+        if len(previas) < len(respuestas):
+            invalidar_estudiante(id_estudiante)
+            COLA.invalidar_si_cambia(id_estudiante, resultados)
+
+        salida = []
+        for r, res in zip(respuestas, resultados):
+            if r["id_cliente"] in previas:
+                salida.append(previas[r["id_cliente"]] or RESULTADO_OPCION_INVALIDA)
+                continue
+            if res is None:
+                salida.append(RESULTADO_OPCION_INVALIDA)
+                continue
+            publicar_respuesta(id_estudiante, res, r["modo"])
+            salida.append(respuesta_json(res, r["modo"]))
+        registradas = sum(1 for res in resultados if res is not None)
+        print(f"📦 Lote est={id_estudiante}: {registradas}/{len(respuestas)} respuestas"
+              f" ({len(previas)} ya registradas)")
+        return jsonify({"status": True, "registradas": registradas,
+                        "duplicadas": len(previas), "resultados": salida}), 200
 
     except Exception as e:
         con.rollback()
-        print("ERROR en /tutor/responder:", e)
+        print("ERROR en /tutor/responder_lote:", e)
         return jsonify({"status": False, "error": str(e)}), 500
 
     finally:
@@ -971,6 +713,33 @@ def responder():
 # =========================================================
 _ALLOWED_DESARROLLO_EXT = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".pdf"}
 _MAX_DESARROLLO_BYTES   = 10 * 1024 * 1024  # 10 MB
+_COLA_SUBIDAS           = None
+
+
+def _almacenar_desarrollo(archivo, id_respuesta, ext):
+    """
+    Guarda la foto normalizada (models/imagenes_desarrollo.py) en el almacén
+    por contenido (models/almacen_imagenes.py). Retorna el nombre del blob.
+    """
+    temporal = secure_filename(f"tmp_{id_respuesta}_{uuid.uuid4().hex[:12]}{ext}")
+    archivo.save(ALMACEN.ruta(temporal))
+    base     = os.path.splitext(temporal)[0]
+    nombre   = normalizar(ALMACEN.ruta(temporal), ALMACEN.carpeta, base) or temporal
+    blob, _  = ALMACEN.guardar(ALMACEN.ruta(nombre))
+    # Índice de /imagenes/ de este worker (models/indice_imagenes.py)
+    for registrado in {blob, *(nombre_variante(blob, t) for t in TAMANOS)}:
+        registrar_imagen(ALMACEN.carpeta, registrado, inmutable=True)
+    return blob
+
+
+def _cola_subidas():
+    """Cola de subidas a Cloudinary de este worker (models/subidas_desarrollo.py)."""
+    global _COLA_SUBIDAS
+    if _COLA_SUBIDAS is None or _COLA_SUBIDAS._pid not in (None, os.getpid()):
+        from util_cloudinary import subir_imagen
+        _COLA_SUBIDAS = ColaSubidas(ALMACEN.carpeta, subir_imagen)
+        _COLA_SUBIDAS.reanudar_pendientes()
+    return _COLA_SUBIDAS
 
 
 @ws_tutor.route("/subir_desarrollo", methods=["POST"])
@@ -999,32 +768,38 @@ def subir_desarrollo():
             "message": "El archivo supera el tamaño máximo permitido (10 MB).",
         }), 400
 
-    filename    = secure_filename(f"resp_{id_respuesta}{ext}")
-    ruta_fisica = os.path.join(DESARROLLOS_FOLDER, filename)
-
+    con    = Conexion()
+    cursor = con.cursor()
     try:
-        # ── Subida a Cloudinary (Railway) o filesystem (local) ──────────
-        from util_cloudinary import cloudinary_configurado, subir_imagen
-        if cloudinary_configurado():
-            public_id = f"tutormath/desarrollos/resp_{id_respuesta}"
-            url_abs   = subir_imagen(archivo, public_id)
-        else:
-            # Modo local: guardar en disco
-            archivo.save(ruta_fisica)
-            url_abs = (request.host_url.rstrip("/") + f"/static/desarrollos_alumno/{filename}")
+        # ── Almacén por contenido: la misma foto se guarda una sola vez ──
+        filename  = _almacenar_desarrollo(archivo, id_respuesta, ext)
+        digest    = os.path.splitext(filename)[0]
+        url_nube  = ALMACEN.registrar(cursor, filename, id_respuesta)
+        url_local = request.host_url.rstrip("/") + f"/imagenes/{filename}"
+
+        # ── Cloudinary (Railway): subida en segundo plano, salvo que ese
+        #    contenido ya se haya subido antes ──
+        from util_cloudinary import cloudinary_configurado
+        pendiente = not url_nube and cloudinary_configurado()
+        url_abs   = url_nube or url_local
 
-        con    = Conexion()
-        cursor = con.cursor()
         cursor.execute(
             "UPDATE respuestas_estudiantes SET desarrollo_url = %s WHERE id_respuesta = %s",
             (url_abs, id_respuesta)
         )
         con.commit()
 
+        # Se encola después del commit: el worker solo reemplaza la URL pendiente
+        if pendiente:
+            _cola_subidas().encolar(id_respuesta, filename, f"tutormath/desarrollos/{digest}",
+                                    url_abs, hash_contenido=digest)
+
         return jsonify({
             "status": True,
-            "message": "Desarrollo subido correctamente",
-            "desarrolloUrl": url_abs
+            "message": ("Desarrollo recibido, subiendo en segundo plano"
+                        if pendiente else "Desarrollo subido correctamente"),
+            "desarrolloUrl": url_abs,
+            "pendiente": pendiente
         }), 200
 
     except Exception as e:
@@ -1045,6 +820,7 @@ def subir_desarrollo():
 # =========================================================
 @ws_tutor.route("/nivel_actual", methods=["GET"])
 @jwt_required()
+@cache_por_estudiante
 def nivel_actual():
     id_estudiante  = request.args.get("idEstudiante",  type=int)
     id_competencia = request.args.get("idCompetencia", type=int)
@@ -1090,55 +866,23 @@ def sugerencias_ejercicios(id_estudiante: int, id_competencia: int):
     cursor = con.cursor()
 
     try:
-        nivel_ml = predecir_nivel_competencia(cursor, id_estudiante, id_competencia)
+        estado   = leer_estado_estudiante(cursor, id_estudiante)
+        nivel_ml = predecir_nivel_competencia(cursor, id_estudiante, id_competencia,
+                                              estado["nec"])
 
         # Usar los mismos umbrales que ejercicio_siguiente() para consistencia
         _MAP = {"bajo": 1, "medio": 3, "alto": 5}
         nivel_int = _MAP.get(nivel_ml, 1)
-        filtro = "AND " + NIVEL_EJERCICIO_WHERE.get(nivel_int, f"{DIFICULTAD_SQL} <= 3")
-
-        cursor.execute(f"""
-            SELECT e.id_ejercicio,
-                   e.descripcion  AS enunciado,
-                   e.imagen_url,
-                   COALESCE(e.nivel_logro, e.nivel, 1) AS nivel_ejercicio,
-                   c.id_competencia,
-                   c.descripcion  AS competencia
-            FROM ejercicios e
-            JOIN competencias c ON e.id_competencia = c.id_competencia
-            WHERE e.id_competencia = %s
-              AND NOT EXISTS (
-                SELECT 1 FROM respuestas_estudiantes r
-                JOIN opciones_ejercicio op_r ON op_r.id_opcion = r.id_opcion
-                WHERE r.id_ejercicio  = e.id_ejercicio
-                  AND r.id_estudiante = %s
-                  AND r.modo          = 'repaso'
-                  AND op_r.es_correcta
-              )
-              {filtro}
-            ORDER BY RANDOM()
-            LIMIT %s
-        """, (id_competencia, id_estudiante, limite))
-
-        ejercicios = cursor.fetchall()
+
+        banco  = BANCO.indice(cursor, estado["version_banco"])
+        ejercicios = banco.muestrear(
+            id_competencia, nivel_int, max(0, limite),
+            banco.bitset(estado["resueltos_repaso"]),
+        )
         if not ejercicios:
             return jsonify({"status": True, "nivelML": nivel_ml, "ejercicios": [],
                             "mensaje": "No hay ejercicios recomendados."}), 200
 
-        ids = [e["id_ejercicio"] for e in ejercicios]
-        cursor.execute("""
-            SELECT id_opcion, letra, descripcion, id_ejercicio
-            FROM opciones_ejercicio
-            WHERE id_ejercicio = ANY(%s)
-            ORDER BY id_ejercicio, letra
-        """, (ids,))
-
-        opc_map = {}
-        for o in cursor.fetchall():
-            opc_map.setdefault(o["id_ejercicio"], []).append({
-                "idOpcion": o["id_opcion"], "letra": o["letra"], "texto": o["descripcion"]
-            })
-
         return jsonify({
             "status":  True,
             "nivelML": nivel_ml,
@@ -1148,7 +892,7 @@ def sugerencias_ejercicios(id_estudiante: int, id_competencia: int):
                 "enunciado":      e["enunciado"],
                 "imagenUrl":      e["imagen_url"],
                 "nivelEjercicio": e["nivel_ejercicio"],
-                "opciones":       opc_map.get(e["id_ejercicio"], []),
+                "opciones":       e["opciones"],
                 "pista":          None,
             } for e in ejercicios]
         }), 200
@@ -1290,6 +1034,7 @@ def registrar_apertura_material():
                 fecha_acceso   = NOW()
         """, (id_estudiante, id_material))
         con.commit()
+        invalidar_estudiante(id_estudiante)
         return jsonify({"ok": True}), 200
     except Exception as e:
         con.rollback()
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models.Usuario import Usuario
 from werkzeug.security import generate_password_hash
-import json
+from util import jsonify_datos
 
 ws_usuario = Blueprint('ws_usuario', __name__)
 
@@ -31,7 +31,7 @@ def actualizar_usuario(id_usuario):
         rol=data['rol'],
         estado_usuario=data['estado_usuario']
     )
-    return jsonify(json.loads(obj.actualizar()))
+    return jsonify_datos(obj.actualizar())
 
 
 # =========================================================
@@ -71,7 +71,7 @@ def obtener_usuario(id_usuario):
 # =========================================================
 @ws_usuario.route('/usuarios/<int:id_usuario>', methods=['DELETE'])
 def eliminar_usuario(id_usuario):
-    return jsonify(json.loads(Usuario.eliminar(id_usuario)))
+    return jsonify_datos(Usuario.eliminar(id_usuario))
 
 
 # =========================================================
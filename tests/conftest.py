@@ -122,6 +122,8 @@ def mock_cursor():
     _DB_CURSOR.fetchall.return_value  = []
     _DB_CURSOR.fetchall.side_effect   = None
     _DB_CURSOR.rowcount               = 1
+    from models.cache_respuestas import CACHE
+    CACHE.limpiar()   # respuestas cacheadas de otro test no deben servirse
     yield _DB_CURSOR
     _DB_CURSOR.reset_mock()
 
@@ -13,6 +13,8 @@ Cobertura
 • calcular_delta()       → 6 combinaciones base + penalización por pista
 • nivel_to_minedu()      → mapeo STI→MINEDU (5 niveles oficiales)
 • nivel_display_texto()  → texto UI bajo/medio/alto
+• versiones por columnas → paridad con las escalares (scores_to_niveles,
+                           clasificar_tiempos, calcular_deltas, niveles_to_progreso)
 """
 
 import pytest
@@ -352,4 +354,70 @@ class TestConsistenciaConstantes:
         delta_min_pos = min(v for v in DELTA_SCORE.values() if v > 0)
         # Verificar que la fórmula max(1, delta - 3) tiene sentido
         assert DELTA_MIN_CON_PISTA >= 1
-        assert PENALIZACION_PISTA == 3
\ No newline at end of file
+        assert PENALIZACION_PISTA == 3
+
+    def test_rango_en_memoria_coincide_con_filtro_sql(self):
+        """NIVEL_EJERCICIO_RANGO (banco en memoria) = NIVEL_EJERCICIO_WHERE (SQL)."""
+        from models.scoring import NIVEL_EJERCICIO_RANGO, NIVEL_EJERCICIO_WHERE, DIFICULTAD_SQL
+        assert set(NIVEL_EJERCICIO_RANGO) == set(NIVEL_EJERCICIO_WHERE)
+        for nivel, (minimo, maximo) in NIVEL_EJERCICIO_RANGO.items():
+            if minimo is None:
+                sql = f"{DIFICULTAD_SQL} <= {maximo}"
+            elif maximo is None:
+                sql = f"{DIFICULTAD_SQL} >= {minimo}"
+            else:
+                sql = f"{DIFICULTAD_SQL} BETWEEN {minimo} AND {maximo}"
+            assert NIVEL_EJERCICIO_WHERE[nivel] == sql
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Versiones por columnas  ──  mismas respuestas que las funciones escalares
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestVersionesPorColumnas:
+
+    SCORES  = [None, -10, 0, 0.5, 21, 21.5, 22, 35, 35.9, 36, 49, 50, 64.2,
+               65, 78, 78.5, 79, 92, 92.1, 93, 99.9, 100, 120]
+    TIEMPOS = [None, 0, 60, 120, 120.5, 150, 180, 240, 300, 360, 361,
+               480, 600, 720, 900, 901, 5000]
+    NIVELES = [None, 0, 1, 2, 2.7, 3, 4, 5, 6, 7]
+
+    def test_scores_to_niveles(self):
+        from models.scoring import scores_to_niveles
+        assert scores_to_niveles(self.SCORES).tolist() == [score_to_nivel(s) for s in self.SCORES]
+
+    def test_hueco_entre_tramos_da_7_como_la_escalar(self):
+        """21.5 no cae en ningún tramo entero: score_to_nivel retorna 7."""
+        from models.scoring import scores_to_niveles
+        assert score_to_nivel(21.5) == 7
+        assert scores_to_niveles([21.5]).tolist() == [7]
+
+    def test_niveles_to_progreso(self):
+        from models.scoring import niveles_to_progreso
+        niveles = [None, 0, 1, 2, 3, 4, 5, 6, 7, 8]
+        assert niveles_to_progreso(niveles).tolist() == [nivel_to_progreso(n) for n in niveles]
+
+    def test_clasificar_tiempos(self):
+        from models.scoring import clasificar_tiempos
+        casos = [(t, n) for t in self.TIEMPOS for n in self.NIVELES]
+        tiempos, niveles = zip(*casos)
+        assert clasificar_tiempos(tiempos, niveles).tolist() == \
+               [clasificar_tiempo(t, n) for t, n in casos]
+        assert clasificar_tiempos(self.TIEMPOS).tolist() == \
+               [clasificar_tiempo(t) for t in self.TIEMPOS]
+
+    def test_calcular_deltas(self):
+        from models.scoring import calcular_deltas
+        casos = [(c, t, n, p) for c in (True, False) for t in self.TIEMPOS
+                 for n in self.NIVELES for p in (True, False)]
+        obtenidos = calcular_deltas(*zip(*casos))
+        assert obtenidos.tolist() == [calcular_delta(*caso) for caso in casos]
+
+    def test_tablas_se_leen_en_cada_llamada(self, monkeypatch):
+        from models import scoring
+        monkeypatch.setitem(scoring.DELTA_SCORE, (True, "rapido"), 10)
+        monkeypatch.setitem(scoring.TIEMPO_THRESHOLDS, 3, (100, 200))
+        casos = [(True, 90, 3, False), (True, 150, 3, True), (False, 250, 3, False)]
+        assert scoring.calcular_deltas(*zip(*casos)).tolist() == \
+               [scoring.calcular_delta(*caso) for caso in casos]
+
@@ -26,8 +26,8 @@ from ws.tutor import (
     actualizar_progreso_estudiante,
     calcular_features_competencia,
     predecir_nivel_competencia,
-    UMBRAL_APROBADO,
 )
+from models.estadisticas_puntajes import UMBRAL_APROBADO
 from models.scoring import score_to_nivel
 
 pytestmark = pytest.mark.component
@@ -49,50 +49,37 @@ def cur(mock_cursor):
 class TestDetectarRacha:
 
     def test_racha_positiva_3_correctas(self, cur):
-        """Últimas 3 respuestas todas correctas → 'positiva'."""
-        cur.fetchall.return_value = [
-            {'es_correcta': True},
-            {'es_correcta': True},
-            {'es_correcta': True},
-        ]
+        """Últimas 3 respuestas todas correctas (contador +3) → 'positiva'."""
+        cur.fetchone.return_value = {'racha': 3}
         assert detectar_racha(cur, id_estudiante=1, id_competencia=2) == 'positiva'
 
     def test_racha_negativa_3_incorrectas(self, cur):
-        """Últimas 3 respuestas todas incorrectas → 'negativa'."""
-        cur.fetchall.return_value = [
-            {'es_correcta': False},
-            {'es_correcta': False},
-            {'es_correcta': False},
-        ]
+        """Últimas 3 respuestas todas incorrectas (contador -3) → 'negativa'."""
+        cur.fetchone.return_value = {'racha': -3}
         assert detectar_racha(cur, id_estudiante=1, id_competencia=2) == 'negativa'
 
     def test_racha_mixta_retorna_none(self, cur):
-        """Respuestas mixtas (correcto + incorrecto) → None."""
-        cur.fetchall.return_value = [
-            {'es_correcta': True},
-            {'es_correcta': False},
-            {'es_correcta': True},
-        ]
+        """La última respuesta rompió la racha (contador ±1) → None."""
+        cur.fetchone.return_value = {'racha': 1}
+        assert detectar_racha(cur, id_estudiante=1, id_competencia=2) is None
+        cur.fetchone.return_value = {'racha': -1}
         assert detectar_racha(cur, id_estudiante=1, id_competencia=2) is None
 
     def test_menos_de_n_respuestas_retorna_none(self, cur):
-        """Menos de 3 respuestas → sin racha → None."""
-        cur.fetchall.return_value = [
-            {'es_correcta': True},
-            {'es_correcta': True},
-        ]
+        """Solo 2 correctas seguidas → sin racha → None."""
+        cur.fetchone.return_value = {'racha': 2}
         assert detectar_racha(cur, id_estudiante=1, id_competencia=2) is None
 
     def test_sin_respuestas_retorna_none(self, cur):
-        """Sin respuestas → None."""
-        cur.fetchall.return_value = []
+        """Sin fila de racha → None."""
+        cur.fetchone.return_value = None
         assert detectar_racha(cur, id_estudiante=1, id_competencia=2) is None
 
     def test_n_personalizado_5(self, cur):
-        """Con n=5, necesita exactamente 5 consecutivas para detectar racha."""
-        cur.fetchall.return_value = [{'es_correcta': True}] * 5
+        """Con n=5, necesita 5 consecutivas para detectar racha."""
+        cur.fetchone.return_value = {'racha': 5}
         assert detectar_racha(cur, 1, 2, n=5) == 'positiva'
-        cur.fetchall.return_value = [{'es_correcta': True}] * 4
+        cur.fetchone.return_value = {'racha': 4}
         assert detectar_racha(cur, 1, 2, n=5) is None
 
 
@@ -304,19 +291,15 @@ class TestPredecirNivelCompetencia:
             },
         ]
         mock_modelo  = MagicMock()
-        mock_encoder = MagicMock()
-        mock_modelo.predict.return_value    = [1]     # encoded 'alto'
-        mock_encoder.inverse_transform.return_value = ['alto']
+        mock_modelo.predict.return_value    = ['alto']
 
         import ws.tutor as tutor_mod
-        orig_m, orig_e = tutor_mod.MODELO_TUTOR, tutor_mod.ENCODER_NIVEL
+        orig_m = tutor_mod.MODELO_TUTOR
         tutor_mod.MODELO_TUTOR  = mock_modelo
-        tutor_mod.ENCODER_NIVEL = mock_encoder
         try:
             resultado = predecir_nivel_competencia(cur, 10, 1)
         finally:
             tutor_mod.MODELO_TUTOR  = orig_m
-            tutor_mod.ENCODER_NIVEL = orig_e
 
         # base=medio(1), ml=alto(2): acotado a min(2, 1+1)=2 → 'alto'
         assert resultado == 'alto'
@@ -335,19 +318,15 @@ class TestPredecirNivelCompetencia:
             },
         ]
         mock_modelo  = MagicMock()
-        mock_encoder = MagicMock()
-        mock_modelo.predict.return_value    = [1]
-        mock_encoder.inverse_transform.return_value = ['alto']
+        mock_modelo.predict.return_value    = ['alto']
 
         import ws.tutor as tutor_mod
-        orig_m, orig_e = tutor_mod.MODELO_TUTOR, tutor_mod.ENCODER_NIVEL
+        orig_m = tutor_mod.MODELO_TUTOR
         tutor_mod.MODELO_TUTOR  = mock_modelo
-        tutor_mod.ENCODER_NIVEL = mock_encoder
         try:
             resultado = predecir_nivel_competencia(cur, 10, 1)
         finally:
             tutor_mod.MODELO_TUTOR  = orig_m
-            tutor_mod.ENCODER_NIVEL = orig_e
 
         # base=bajo(0), ml_idx acotado a min(2, 0+1)=1 → 'medio'
         assert resultado == 'medio'
\ No newline at end of file
@@ -4,11 +4,12 @@ test_04_caja_negra_tutor.py — Pruebas de CAJA NEGRA: endpoints del tutor STI
 Tipo  : Funcional / Caja Negra
 Rutas : GET /tutor/ejercicio_siguiente | POST /tutor/responder
         GET /tutor/evaluacion/activa   | POST /tutor/evaluacion/finalizar
-        POST /tutor/subir_desarrollo
+        POST /tutor/subir_desarrollo   | POST /tutor/responder_lote
 """
 
 import pytest
 import json
+from unittest.mock import patch
 from werkzeug.security import generate_password_hash
 
 pytestmark = pytest.mark.black_box
@@ -30,9 +31,21 @@ _OPCIONES = [
 ]
 
 
-def _base_nec(nivel=3):
-    """NEC estándar para los tests."""
-    return {'nivel_actual': nivel, 'score': 40.0}
+def _estado(sin_diagnostico=False, nivel=3):
+    """Fila de leer_estado_estudiante (diagnóstico + versión del banco + NEC)."""
+    return {'sin_diagnostico': sin_diagnostico, 'version_banco': 1,
+            'resueltos_repaso': [], 'intentados_repaso': [],
+            'respondidos_evaluacion': [],
+            'nec': [{'id_competencia': c, 'nivel': nivel, 'score': 40.0, 'existe': True}
+                    for c in range(1, 5)]}
+
+
+def _banco():
+    """fetchall de la carga del banco en memoria: ejercicios + opciones."""
+    return [
+        [dict(_EJERCICIO, competencia='C2')],
+        [dict(o, id_ejercicio=101) for o in _OPCIONES],
+    ]
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -41,6 +54,13 @@ def _base_nec(nivel=3):
 
 class TestEjercicioSiguiente:
 
+    @pytest.fixture(autouse=True)
+    def _banco_vacio(self):
+        from models.banco_ejercicios import BANCO
+        BANCO.invalidar()
+        yield
+        BANCO.invalidar()
+
     def test_sin_id_estudiante_retorna_400(self, client):
         r = client.get('/tutor/ejercicio_siguiente')
         assert r.status_code == 400
@@ -58,16 +78,11 @@ class TestEjercicioSiguiente:
 
     def test_modo_por_defecto_es_repaso(self, client, mock_cursor):
         """Sin parámetro modo → se usa 'repaso' por defecto."""
-        # Sin idDominio → secuencia: sin_diag, nivel_min AVG, exercise, leer_nec display
+        # Sin idDominio → una sola lectura: estado (NEC incluido, nivel promedio en memoria)
         mock_cursor.fetchone.side_effect = [
-            {'sin_diagnostico': False},
-            {'nivel_min': 3},            # AVG nivel_min (sin idDominio)
-            _EJERCICIO,
-            _base_nec(3),                # leer_nec display
-        ]
-        mock_cursor.fetchall.side_effect = [
-            _OPCIONES,     # solo opciones (sin racha cuando no hay idDominio)
+            _estado(nivel=3),
         ]
+        mock_cursor.fetchall.side_effect = _banco()  # sin racha cuando no hay idDominio
         r = client.get('/tutor/ejercicio_siguiente?idEstudiante=10')
         assert r.status_code == 200
         data = r.get_json()
@@ -77,12 +92,9 @@ class TestEjercicioSiguiente:
     def test_retorna_campos_obligatorios(self, client, mock_cursor):
         """La respuesta contiene los campos necesarios para el cliente Android."""
         mock_cursor.fetchone.side_effect = [
-            {'sin_diagnostico': False},
-            {'nivel_min': 3},
-            _EJERCICIO,
-            _base_nec(3),
+            _estado(nivel=3),
         ]
-        mock_cursor.fetchall.side_effect = [_OPCIONES]
+        mock_cursor.fetchall.side_effect = _banco()
         r = client.get('/tutor/ejercicio_siguiente?idEstudiante=10')
         data = r.get_json()
         if data.get('status'):
@@ -90,35 +102,27 @@ class TestEjercicioSiguiente:
 
     def test_modo_evaluacion_con_id_evaluacion(self, client, mock_cursor):
         """En modo evaluación con idEvaluacion → sirve ejercicio de la evaluación."""
-        # evaluacion sin idDominio → sin_diag, ev_row, nivel_min, exercise, leer_nec display
+        # evaluacion sin idDominio → estado, ev_row
         mock_cursor.fetchone.side_effect = [
-            {'sin_diagnostico': False},
+            _estado(nivel=2),
             {'num_preguntas': 5, 'ya_respondidas': 0, 'ejercicios_grupos': None},
-            {'nivel_min': 2},
-            _EJERCICIO,
-            _base_nec(2),
-        ]
-        mock_cursor.fetchall.side_effect = [
-            _OPCIONES,    # opciones (sin racha porque no hay idDominio)
         ]
+        mock_cursor.fetchall.side_effect = _banco()  # sin racha porque no hay idDominio
         r = client.get('/tutor/ejercicio_siguiente'
                        '?idEstudiante=10&modo=evaluacion&idEvaluacion=5')
         assert r.status_code == 200
 
     def test_id_dominio_filtra_competencia(self, client, mock_cursor):
         """Con idDominio se filtra por competencia específica."""
-        # Con idDominio → sin_diag, leer_nec(1), leer_nec(2-predecir), calcular_features, exercise, leer_nec(display)
+        # Con idDominio → estado (NEC en memoria para base, predecir y display), calcular_features, racha
         _stats = {'total_intentos': 0, 'promedio_puntaje': None, 'min_puntaje': None,
                   'max_puntaje': None, 'std_puntaje': 0, 'num_aprobados': 0, 'tendencia': None}
         mock_cursor.fetchone.side_effect = [
-            {'sin_diagnostico': False},
-            _base_nec(3),   # leer_nec #1 (direct)
-            _base_nec(3),   # leer_nec #2 (inside predecir)
+            _estado(nivel=3),
             _stats,          # calcular_features_competencia (returns None: total=0)
-            _EJERCICIO,
-            _base_nec(3),   # leer_nec #3 (display)
+            {'racha': 0},    # leer_racha
         ]
-        mock_cursor.fetchall.side_effect = [[], _OPCIONES]  # racha vacía + opciones
+        mock_cursor.fetchall.side_effect = _banco()
         r = client.get('/tutor/ejercicio_siguiente?idEstudiante=10&idDominio=2')
         assert r.status_code == 200
 
@@ -137,15 +141,10 @@ class TestResponder:
         """Respuesta correcta en repaso → correcta=True + nuevoAjuste."""
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': True, 'id_competencia': 2,
-             'nivel_ejercicio': 3, 'pista': 'Despeja x.'},
-            {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-            {'nivel_actual': 3, 'score': 40.0},   # leer_nec
-            {'prom': 3.0},                  # COALESCE AVG prom_g
-            {'nivel_actual': 3, 'score': 45.0},   # extra para try/except material
-        ]
-        mock_cursor.fetchall.side_effect = [
-            [],                   # racha: sin historial
-            [{'nivel_actual': 3, 'id_competencia': 2}],  # progreso_general
+             'nivel_ejercicio': 3, 'pista': 'Despeja x.',
+             'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0,
+             'niveles_nec': {'2': 3}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
         r = client.post('/tutor/responder', json={
             'idEstudiante': 10, 'idEjercicio': 101,
@@ -160,15 +159,10 @@ class TestResponder:
         """Respuesta incorrecta → correcta=False."""
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': False, 'id_competencia': 1,
-             'nivel_ejercicio': 2, 'pista': None},
-            {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-            {'nivel_actual': 2, 'score': 25.0},   # leer_nec
-            {'prom': 2.0},                  # prom_g
-            {'nivel_actual': 2, 'score': 22.0},   # extra para try/except material
-        ]
-        mock_cursor.fetchall.side_effect = [
-            [],
-            [{'nivel_actual': 2, 'id_competencia': 1}],
+             'nivel_ejercicio': 2, 'pista': None,
+             'nec_existe': True, 'nec_nivel': 2, 'nec_score': 25.0,
+             'niveles_nec': {'1': 2}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
         r = client.post('/tutor/responder', json={
             'idEstudiante': 10, 'idEjercicio': 102,
@@ -183,10 +177,10 @@ class TestResponder:
         """En modo evaluación → status OK pero sin actualización de NEC."""
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': True, 'id_competencia': 2,
-             'nivel_ejercicio': 3, 'pista': None},
-            {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-            {'nivel_actual': 3, 'score': 40.0},   # leer_nec
-            {'prom': 3.0},                  # prom_g (evaluacion también lee prom)
+             'nivel_ejercicio': 3, 'pista': None,
+             'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0,
+             'niveles_nec': {'2': 3}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
         mock_cursor.fetchall.return_value = []
         r = client.post('/tutor/responder', json={
@@ -208,13 +202,11 @@ class TestResponder:
         """mostrar_pista=True solo cuando el ejercicio tiene texto de pista Y es repaso."""
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': False, 'id_competencia': 2,
-             'nivel_ejercicio': 3, 'pista': 'Recuerda: ax + b = 0'},
-            {'id_respuesta': 5},
-            {'nivel_actual': 3, 'score': 40.0},
-            {'prom': 3.0},
-            {'nivel_actual': 3, 'score': 35.0},
+             'nivel_ejercicio': 3, 'pista': 'Recuerda: ax + b = 0',
+             'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0,
+             'niveles_nec': {'2': 3}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
-        mock_cursor.fetchall.side_effect = [[], [{'nivel_actual': 3, 'id_competencia': 2}]]
         r = client.post('/tutor/responder', json={
             'idEstudiante': 10, 'idEjercicio': 101,
             'idOpcionSeleccionada': 3,
@@ -227,13 +219,11 @@ class TestResponder:
         """Ejercicio SIN pista → mostrarPista=False aunque sea repaso."""
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': False, 'id_competencia': 2,
-             'nivel_ejercicio': 3, 'pista': None},  # sin pista
-            {'id_respuesta': 5},
-            {'nivel_actual': 3, 'score': 40.0},
-            {'prom': 3.0},
-            {'nivel_actual': 3, 'score': 35.0},
+             'nivel_ejercicio': 3, 'pista': None,
+             'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0,
+             'niveles_nec': {'2': 3}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
-        mock_cursor.fetchall.side_effect = [[], [{'nivel_actual': 3, 'id_competencia': 2}]]
         r = client.post('/tutor/responder', json={
             'idEstudiante': 10, 'idEjercicio': 101,
             'idOpcionSeleccionada': 3,
@@ -243,6 +233,114 @@ class TestResponder:
         assert data.get('mostrarPista') is False
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# POST /tutor/responder_lote
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _contexto_lote():
+    """Fila de leer_contexto_lote: opciones del lote + NEC + rachas."""
+    return {
+        'opciones': [
+            {'id_opcion': 1, 'es_correcta': True, 'id_competencia': 2,
+             'nivel_ejercicio': 3, 'pista': 'Despeja x.', 'palabras_clave': None},
+            {'id_opcion': 3, 'es_correcta': False, 'id_competencia': 2,
+             'nivel_ejercicio': 3, 'pista': 'Despeja x.', 'palabras_clave': None},
+        ],
+        'nec': [{'id_competencia': 2, 'nivel': 3, 'score': 40.0}],
+        'avg_puntajes': None, 'rachas': {'2': -1}, 'materiales': None,
+    }
+
+
+class TestResponderLote:
+
+    def _insertar(self, llamadas, previas=()):
+        def execute_values(cur, sql, filas, template=None, page_size=100, fetch=False):
+            filas = list(filas)
+            if 'respuestas_lote_cliente' in sql:
+                # Reclamo de idCliente: los de `previas` ya estaban registrados
+                return [{'id_cliente': f[1]} for f in filas if f[1] not in previas] if fetch else None
+            llamadas.append((sql, filas))
+            if fetch:
+                return [{'id_respuesta': 500 + i} for i in range(len(filas))]
+        return execute_values
+
+    def test_lista_vacia_retorna_400(self, client, auth_headers):
+        r = client.post('/tutor/responder_lote', headers=auth_headers,
+                        json={'idEstudiante': 10, 'respuestas': []})
+        assert r.status_code == 400
+
+    def test_fecha_invalida_retorna_400(self, client, auth_headers):
+        r = client.post('/tutor/responder_lote', headers=auth_headers, json={
+            'idEstudiante': 10,
+            'respuestas': [{'idCliente': 'a', 'idEjercicio': 101, 'idOpcionSeleccionada': 1,
+                            'fecha': 'ayer'}],
+        })
+        assert r.status_code == 400
+        assert 'fecha' in r.get_json()['error']
+
+    def test_id_cliente_obligatorio_y_unico(self, client, auth_headers):
+        for respuestas in ([{'idEjercicio': 101, 'idOpcionSeleccionada': 1}],
+                           [{'idCliente': 'a', 'idEjercicio': 101, 'idOpcionSeleccionada': 1},
+                            {'idCliente': 'a', 'idEjercicio': 102, 'idOpcionSeleccionada': 1}]):
+            r = client.post('/tutor/responder_lote', headers=auth_headers,
+                            json={'idEstudiante': 10, 'respuestas': respuestas})
+            assert r.status_code == 400
+            assert 'idCliente' in r.get_json()['error']
+
+    def test_lote_en_orden_con_resultados_por_respuesta(self, client, auth_headers, mock_cursor):
+        mock_cursor.fetchone.return_value = _contexto_lote()
+        llamadas = []
+        with patch('models.registro_lote.execute_values', self._insertar(llamadas)):
+            r = client.post('/tutor/responder_lote', headers=auth_headers, json={
+                'idEstudiante': 10,
+                'respuestas': [
+                    {'idCliente': 'r1', 'idEjercicio': 101, 'idOpcionSeleccionada': 3,
+                     'tiempoRespuesta': 200, 'fecha': '2026-05-04T10:00:00'},
+                    {'idCliente': 'r2', 'idEjercicio': 101, 'idOpcionSeleccionada': 3,
+                     'tiempoRespuesta': 200},
+                    {'idCliente': 'r3', 'idEjercicio': 101, 'idOpcionSeleccionada': 999},
+                    {'idCliente': 'r4', 'idEjercicio': 101, 'idOpcionSeleccionada': 1,
+                     'tiempoRespuesta': 60},
+                ],
+            })
+        assert r.status_code == 200
+        data = r.get_json()
+        assert data['registradas'] == 3 and data['duplicadas'] == 0
+        res = data['resultados']
+        assert [x.get('idRespuesta') for x in res] == [500, 501, None, 502]
+        assert res[2] == {'status': False, 'error': 'Opción no válida'}
+        # racha previa -1: el 2.º fallo del lote completa los 3 seguidos
+        assert [x.get('docenteAlertado') for x in res] == [False, True, None, False]
+        assert [x.get('correcta') for x in res] == [False, False, None, True]
+        tablas = [sql.split('INTO')[1].split()[0] for sql, _ in llamadas]
+        assert tablas == ['respuestas_estudiantes', 'progreso', 'puntajes',
+                          'nivel_estudiante_competencia']
+        assert llamadas[0][1][0][0] == '2026-05-04T10:00:00'
+        assert len(llamadas[3][1]) == 1          # un solo upsert de NEC por competencia
+
+    def test_reenvio_devuelve_el_resultado_original(self, client, auth_headers, mock_cursor):
+        original = {'correcta': True, 'idRespuesta': 480, 'modo': 'repaso'}
+        mock_cursor.fetchone.return_value = _contexto_lote()
+        mock_cursor.fetchall.return_value = [{'id_cliente': 'r1', 'resultado': original}]
+        llamadas = []
+        with patch('models.registro_lote.execute_values', self._insertar(llamadas, {'r1'})):
+            r = client.post('/tutor/responder_lote', headers=auth_headers, json={
+                'idEstudiante': 10,
+                'respuestas': [
+                    {'idCliente': 'r1', 'idEjercicio': 101, 'idOpcionSeleccionada': 1},
+                    {'idCliente': 'r2', 'idEjercicio': 101, 'idOpcionSeleccionada': 3},
+                ],
+            })
+        data = r.get_json()
+        assert r.status_code == 200
+        assert data['registradas'] == 1 and data['duplicadas'] == 1
+        assert data['resultados'][0] == original
+        assert data['resultados'][1]['idRespuesta'] == 500
+        # Solo la respuesta nueva se escribe
+        assert [len(filas) for sql, filas in llamadas
+                if 'INTO respuestas_estudiantes' in sql] == [1]
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # GET /tutor/evaluacion/activa
 # ─────────────────────────────────────────────────────────────────────────────
@@ -144,6 +144,42 @@ class TestProgresoHistorial:
             val = item.get('intentosIncorrectos', 0) or 0
             assert val >= 0
 
+    def test_cursor_pide_fila_extra_y_devuelve_siguiente(self, client, auth_headers, mock_cursor):
+        """Con cursor: una consulta por id_progreso < cursor, limite+1 filas y siguienteCursor."""
+        mock_cursor.fetchone.return_value = {'total': 40}
+        mock_cursor.fetchall.return_value = [
+            {'id_progreso': i, 'id_ejercicio': i * 10, 'ejercicio': f'Ej {i}',
+             'estado': 'correcto', 'modo': 'repaso',
+             'fecha': '2026-06-13T10:00:00', 'id_competencia': 1,
+             'desarrollo_url': None, 'intentos_incorrectos': 0}
+            for i in (30, 29, 28, 27)
+        ]
+        r = client.get(f'/progreso/historial?idEstudiante={ID_EST}&limite=3&cursor=31',
+                       headers=auth_headers)
+        data = r.get_json()
+        assert r.status_code == 200
+        assert [it['idProgreso'] for it in data['items']] == [30, 29, 28]
+        assert data['hayMas'] is True
+        assert data['siguienteCursor'] == 28
+        params = mock_cursor.execute.call_args_list[-1][0][1]
+        assert params['cursor'] == 31 and params['limite'] == 4 and params['offset'] == 0
+
+    def test_ultima_pagina_sin_total(self, client, auth_headers, mock_cursor):
+        """total=no no cuenta; sin fila extra no hay más páginas."""
+        mock_cursor.fetchall.return_value = [{
+            'id_progreso': 2, 'id_ejercicio': 10, 'ejercicio': 'Ej 1',
+            'estado': 'incorrecto', 'modo': 'evaluacion',
+            'fecha': '2026-06-13T10:00:00', 'id_competencia': 1,
+            'desarrollo_url': None, 'intentos_incorrectos': 2,
+        }]
+        r = client.get(f'/progreso/historial?idEstudiante={ID_EST}&limite=5&cursor=3&total=no',
+                       headers=auth_headers)
+        data = r.get_json()
+        assert mock_cursor.execute.call_count == 1
+        assert data['total'] is None
+        assert data['hayMas'] is False and data['siguienteCursor'] is None
+        assert data['items'][0]['intentosIncorrectos'] == 2
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # GET /progreso/tiempo_por_nivel
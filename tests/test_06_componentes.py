@@ -11,6 +11,29 @@ C3  Racha Detector      — detectar_racha en diferentes secuencias
 C4  ML Prediction       — predecir_nivel_competencia con/sin modelo
 C5  Seguridad auth.py   — path traversal, cambiar_password sin JWT
 C6  Flujo de scoring    — delta → score acumulado → nivel → progreso
+C7  Pool de conexiones  — checkout/devolución, vida máxima, ping, fork
+C8  Registro respuesta  — contexto + cálculo en memoria + escritura en 2 viajes
+C9  Banco de ejercicios — índice por competencia/banda, bitset, versión
+C10 Estadísticas puntajes — features por PK + actualización incremental (Welford)
+C11 Árbol compilado     — paridad con sklearn, umbrales float32, .npz
+C12 Estado NEC          — lectura única por petición, inicialización en 1 escritura
+C13 Dashboard docente   — agregados materializados, triggers de mantenimiento
+C14 Caché de respuestas — TTL, LRU, invalidación por alumno entre procesos
+C15 Serialización única — models devuelven dict, jsonify_datos (Decimal/date)
+C16 Subidas diferidas  — cola de subidas a Cloudinary, reintentos, reanudación
+C17 Imágenes desarrollo — reducción, sin EXIF, WebP, variantes por tamaño
+C18 Índice de imágenes — ETag por contenido, 304, Range, sin sondeos al disco
+C19 Almacén por contenido — deduplicación, blobs inmutables, verificación
+C20 Rachas y alertas   — contadores O(1) por trigger, eventos, alertas sin ventanas
+C21 Eventos del docente — anillo compartido entre workers, bus, stream SSE
+C22 Registro en lote   — misma evaluación que una a una, inserts masivos
+C23 Recálculo del NEC  — deltas vectorizados, acumulación con recorte, ensayo
+C24 Dataset de ML     — cursor del servidor a arreglos, reglas por columnas, caché .npz
+C25 Selección modelos — CV en paralelo, búsqueda del árbol, caché por fold, reporte
+C26 Registro modelos  — versiones, marcador atómico, recarga en caliente, /health
+C27 Niveles del salón  — features por salón en una consulta, predicción por lote, ±1
+C28 Cola de ejercicios — siguientes servidos sin BD, invalidación por nivel/racha/banco
+C29 Índice de materiales — material por ejercicio/competencia en memoria, peso a lo no abierto
 """
 
 import pytest
@@ -131,34 +154,27 @@ class TestRachaDetector:
 
     def test_racha_positiva_dispara_con_3(self, mock_cursor):
         from ws.tutor import detectar_racha
-        mock_cursor.fetchall.return_value = [
-            {'es_correcta': True},
-            {'es_correcta': True},
-            {'es_correcta': True},
-        ]
+        mock_cursor.fetchone.return_value = {'racha': 3}
         assert detectar_racha(mock_cursor, 10, 1) == 'positiva'
 
     def test_racha_negativa_dispara_con_3(self, mock_cursor):
         from ws.tutor import detectar_racha
-        mock_cursor.fetchall.return_value = [{'es_correcta': False}] * 3
+        mock_cursor.fetchone.return_value = {'racha': -4}
         assert detectar_racha(mock_cursor, 10, 1) == 'negativa'
 
     def test_una_correcta_rompe_racha_negativa(self, mock_cursor):
         from ws.tutor import detectar_racha
-        mock_cursor.fetchall.return_value = [
-            {'es_correcta': False},
-            {'es_correcta': True},  # una correcta → mixto
-            {'es_correcta': False},
-        ]
+        mock_cursor.fetchone.return_value = {'racha': 1}   # la correcta reinicia el contador
         assert detectar_racha(mock_cursor, 10, 1) is None
 
-    def test_racha_solo_considera_modo_repaso(self, mock_cursor):
-        """Solo respuestas de modo repaso entran en la racha (verificado en SQL)."""
+    def test_racha_se_lee_por_pk_sin_recorrer_respuestas(self, mock_cursor):
+        """El contador solo sigue el repaso (trigger); la lectura es por PK."""
         from ws.tutor import detectar_racha
-        mock_cursor.fetchall.return_value = []
         detectar_racha(mock_cursor, 10, 1)
         sql = str(mock_cursor.execute.call_args[0][0])
-        assert "repaso" in sql.lower()
+        assert "racha_estudiante_competencia" in sql
+        assert "respuestas_estudiantes" not in sql
+        assert mock_cursor.execute.call_args[0][1] == (10, 1)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -196,19 +212,15 @@ class TestMLPipeline:
              'std_puntaje': 10.0, 'num_aprobados': 4, 'tendencia': 0.5},
         ]
         mock_mod = MagicMock()
-        mock_enc = MagicMock()
-        mock_mod.predict.return_value    = [1]
-        mock_enc.inverse_transform.return_value = ['medio']
+        mock_mod.predict.return_value    = ['medio']
 
         import ws.tutor as t
-        orig_m, orig_e = t.MODELO_TUTOR, t.ENCODER_NIVEL
+        orig_m = t.MODELO_TUTOR
         t.MODELO_TUTOR  = mock_mod
-        t.ENCODER_NIVEL = mock_enc
         try:
             resultado = predecir_nivel_competencia(mock_cursor, 10, 1)
         finally:
             t.MODELO_TUTOR  = orig_m
-            t.ENCODER_NIVEL = orig_e
 
         # El ML debe haber sido consultado (predict llamado)
         mock_mod.predict.assert_called_once()
@@ -285,4 +297,1743 @@ class TestFlujoScoring:
         # El resultado máximo con ajuste_ml=+1 y racha positiva = nivel_para_ejercicio+1
         # Pero si ajuste_ml > 0, racha NO actúa (fix L7)
         # Verificamos la lógica: nivel base + max 1 = nivel base + 1
-        assert nivel_base + 1 <= 7  # lógica de clamping
\ No newline at end of file
+        assert nivel_base + 1 <= 7  # lógica de clamping
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C7 — Pool de conexiones (conexionBD.PoolConexiones)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _cargar_conexion_bd_real():
+    """conftest sustituye conexionBD por un mock: se carga el archivo real aparte."""
+    import importlib.util
+    import os
+    ruta = os.path.join(os.path.dirname(__file__), '..', 'API_COMERCIAL', 'conexionBD.py')
+    spec = importlib.util.spec_from_file_location('conexionBD_real', ruta)
+    mod  = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+class _ConexionFalsa:
+    def __init__(self, idle):
+        self.closed  = 0
+        self._idle   = idle
+        self._estado = idle
+        self.cerrada = False
+        self.falla_ping = False
+
+    def get_transaction_status(self):
+        return self._estado
+
+    def rollback(self):
+        self._estado = self._idle
+
+    def cursor(self, *a, **k):
+        conexion = self
+        cur = MagicMock()
+        def _execute(*_a, **_k):
+            if conexion.falla_ping:
+                raise RuntimeError('server closed the connection')
+        cur.execute.side_effect = _execute
+        return cur
+
+    def close(self):
+        self.closed  = 1
+        self.cerrada = True
+
+
+class TestPoolConexiones:
+
+    @pytest.fixture
+    def mod(self):
+        return _cargar_conexion_bd_real()
+
+    def _pool(self, mod, **kw):
+        idle = mod.psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        creadas = []
+        def fabrica():
+            c = _ConexionFalsa(idle)
+            creadas.append(c)
+            return c
+        kw.setdefault('max_conexiones', 2)
+        kw.setdefault('max_ociosas', 2)
+        kw.setdefault('vida_max_seg', 1000)
+        kw.setdefault('ping_ocioso_seg', 1000)
+        kw.setdefault('timeout_espera', 0.05)
+        return mod.PoolConexiones(fabrica=fabrica, **kw), creadas
+
+    def test_reutiliza_conexion_devuelta(self, mod):
+        pool, creadas = self._pool(mod)
+        c1 = pool.obtener()
+        pool.devolver(c1)
+        c2 = pool.obtener()
+        assert c2 is c1
+        assert len(creadas) == 1
+        assert pool.metricas()['checkouts'] == 2
+
+    def test_devolver_hace_rollback_de_transaccion_abierta(self, mod):
+        pool, _ = self._pool(mod)
+        c1 = pool.obtener()
+        c1._estado = 'en_transaccion'
+        pool.devolver(c1)
+        assert c1.get_transaction_status() == c1._idle
+        assert pool.metricas()['ociosas'] == 1
+
+    def test_recicla_por_vida_maxima(self, mod):
+        pool, creadas = self._pool(mod, vida_max_seg=0.000001)
+        c1 = pool.obtener()
+        pool.devolver(c1)
+        c2 = pool.obtener()
+        assert c2 is not c1 and c1.cerrada
+        assert pool.metricas()['recicladas_vida_max'] == 1
+
+    def test_descarta_conexion_que_no_responde_ping(self, mod):
+        pool, _ = self._pool(mod, ping_ocioso_seg=0.000001)
+        c1 = pool.obtener()
+        pool.devolver(c1)
+        c1.falla_ping = True
+        c2 = pool.obtener()
+        assert c2 is not c1 and c1.cerrada
+        assert pool.metricas()['descartadas_ping'] == 1
+
+    def test_pool_agotado_lanza_error_tras_timeout(self, mod):
+        pool, _ = self._pool(mod, max_conexiones=1)
+        pool.obtener()
+        with pytest.raises(mod.PoolAgotado):
+            pool.obtener()
+        assert pool.metricas()['timeouts'] == 1
+
+    def test_conexion_devuelve_al_pool_al_cerrar(self, mod):
+        pool, _ = self._pool(mod)
+        mod._pool = pool
+        con = mod.Conexion()
+        assert pool.metricas()['prestadas'] == 1
+        con.close()
+        con.close()   # doble close no debe descontar dos veces
+        assert pool.metricas()['prestadas'] == 0
+        assert pool.metricas()['ociosas'] == 1
+
+    def test_tras_fork_el_hijo_no_reutiliza_el_pool_del_padre(self, mod):
+        pool, _ = self._pool(mod)
+        mod._pool = pool
+        pool.pid = -1          # simula un pool heredado de otro proceso
+        nuevo = mod.obtener_pool()
+        assert nuevo is not pool
+        assert pool in mod._heredadas
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C8 — Motor de registro de respuestas (models/registro_respuesta.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _ctx(es_correcta=False, comp=2, nivel=3, score=40.0, racha=0,
+         niveles=None, materiales=None, pista='', nec_existe=True):
+    return {
+        'es_correcta': es_correcta, 'id_competencia': comp,
+        'nivel_ejercicio': 3, 'pista': pista, 'palabras_clave': '',
+        'nec_existe': nec_existe, 'nivel_actual': nivel, 'score_actual': score,
+        'niveles_nec': niveles if niveles is not None else {comp: nivel},
+        'racha': racha, 'materiales': materiales or [],
+    }
+
+
+class TestRegistroRespuesta:
+    """El flujo de /tutor/responder hace UNA lectura y UNA escritura."""
+
+    def test_dos_viajes_a_la_bd_en_repaso(self, mock_cursor):
+        from models.registro_respuesta import registrar_respuesta
+        mock_cursor.fetchone.side_effect = [
+            {'es_correcta': True, 'id_competencia': 2, 'nivel_ejercicio': 3,
+             'pista': None, 'palabras_clave': None, 'nec_existe': True,
+             'nec_nivel': 3, 'nec_score': 40.0, 'avg_puntajes': None,
+             'niveles_nec': {'2': 3}, 'racha': None, 'materiales': None},
+            {'id_respuesta': 77},
+        ]
+        res = registrar_respuesta(mock_cursor, 10, 101, 1, 60, False, 'repaso')
+        assert mock_cursor.execute.call_count == 2
+        assert res['id_respuesta'] == 77
+        sql_escritura = mock_cursor.execute.call_args_list[1][0][0]
+        for tabla in ('respuestas_estudiantes', 'progreso', 'puntajes',
+                      'nivel_estudiante_competencia', 'estudiante'):
+            assert tabla in sql_escritura
+
+    def test_evaluacion_no_escribe_puntajes_ni_nec(self, mock_cursor):
+        from models.registro_respuesta import escribir_respuesta, evaluar_respuesta
+        ctx = _ctx(es_correcta=True)
+        res = evaluar_respuesta(ctx, 101, 90, False, es_repaso=False)
+        mock_cursor.fetchone.return_value = {'id_respuesta': 5}
+        escribir_respuesta(mock_cursor, ctx, res, 10, 101, 1, 90, False,
+                           'evaluacion', id_evaluacion=7)
+        sql = mock_cursor.execute.call_args[0][0]
+        assert 'puntajes' not in sql
+        assert 'nivel_estudiante_competencia' not in sql
+        assert 'evaluacion_resultados' in sql
+        assert res['nuevo_nivel'] == 3 and res['nuevo_score'] == 40.0
+
+    def test_evaluacion_sin_nec_solo_inicializa(self, mock_cursor):
+        from models.registro_respuesta import escribir_respuesta, evaluar_respuesta
+        ctx = _ctx(nec_existe=False)
+        res = evaluar_respuesta(ctx, 101, 90, False, es_repaso=False)
+        mock_cursor.fetchone.return_value = {'id_respuesta': 5}
+        escribir_respuesta(mock_cursor, ctx, res, 10, 101, 1, 90, False, 'evaluacion')
+        sql = mock_cursor.execute.call_args[0][0]
+        assert 'DO NOTHING' in sql and 'DO UPDATE' not in sql
+
+    def test_tercer_fallo_seguido_alerta_al_docente(self):
+        from models.registro_respuesta import evaluar_respuesta
+        res = evaluar_respuesta(_ctx(racha=-2), 101, 300, False, True)
+        assert res['docente_alertado'] is True
+        res = evaluar_respuesta(_ctx(racha=-5), 101, 300, False, True)
+        assert res['docente_alertado'] is True
+        res = evaluar_respuesta(_ctx(racha=2), 101, 300, False, True)
+        assert res['docente_alertado'] is False
+        res = evaluar_respuesta(_ctx(racha=-1), 101, 300, False, True)
+        assert res['docente_alertado'] is False
+
+    def test_racha_negativa_en_n1_devuelve_mas_facil(self):
+        from models.registro_respuesta import evaluar_respuesta
+        res = evaluar_respuesta(_ctx(nivel=1, score=0.0, racha=-2),
+                                101, 300, False, True)
+        assert res['nuevo_ajuste'] == 'mas_facil'
+
+    def test_progreso_general_usa_nec_actualizado(self):
+        from models.registro_respuesta import evaluar_respuesta
+        from models.scoring import nivel_to_progreso
+        ctx = _ctx(es_correcta=True, comp=2, nivel=3, score=34.0,
+                   niveles={1: 5, 2: 3})
+        res = evaluar_respuesta(ctx, 101, 60, False, True)
+        esperado = int(round((nivel_to_progreso(5)
+                              + nivel_to_progreso(res['nuevo_nivel'])) / 4))
+        assert res['progreso_general'] == esperado
+
+    def test_material_prioriza_el_enlazado_al_ejercicio(self):
+        from models.registro_respuesta import elegir_material
+        materiales = [
+            {'id_material': 1, 'nivel': 1, 'id_ejercicio': None},
+            {'id_material': 2, 'nivel': 3, 'id_ejercicio': 101},
+        ]
+        assert elegir_material(materiales, 101, 1)['id_material'] == 2
+        assert elegir_material(materiales, 999, 1)['id_material'] == 1
+        assert elegir_material(materiales[1:], 999, 3) is None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C9 — Banco de ejercicios en memoria (models/banco_ejercicios.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _filas_banco():
+    ejercicios = [
+        {'id_ejercicio': i, 'enunciado': f'Ej {i}', 'imagen_url': None,
+         'pista': None, 'nivel_ejercicio': dif, 'id_competencia': comp,
+         'competencia': f'C{comp}'}
+        for i, comp, dif in [(1, 1, 2), (2, 1, 3), (3, 1, 5), (4, 2, 3),
+                             (5, 2, 6), (6, 1, 3)]
+    ]
+    opciones = [
+        {'id_opcion': 10 * i + k, 'letra': 'AB'[k], 'descripcion': f'op{k}',
+         'id_ejercicio': i}
+        for i in range(1, 6) for k in range(2)
+    ]   # el ejercicio 6 no tiene opciones → no entra al índice
+    return ejercicios, opciones
+
+
+class TestBancoEjercicios:
+
+    @pytest.fixture
+    def indice(self):
+        from models.banco_ejercicios import _Indice
+        return _Indice(1, *_filas_banco())
+
+    def test_solo_ejercicios_con_opciones(self, indice):
+        assert set(indice.ejercicios) == {1, 2, 3, 4, 5}
+        assert indice.ejercicios[1]['opciones'][0] == {
+            'idOpcion': 10, 'letra': 'A', 'texto': 'op0'}
+
+    def test_grupos_respetan_banda_de_dificultad(self, indice):
+        assert set(indice.grupos[(1, 1)]) == {1, 2}      # nivel 1: dificultad <= 3
+        assert set(indice.grupos[(1, 4)]) == {2, 3}      # nivel 4: 3..5
+        assert set(indice.grupos[(None, 7)]) == {5}      # nivel 7: >= 6
+        assert set(indice.grupos[(2, None)]) == {4, 5}   # sin banda
+
+    def test_elegir_excluye_resueltos_del_bitset(self, indice):
+        resueltos = indice.bitset([1])
+        for _ in range(20):
+            assert indice.elegir(1, 1, resueltos)['id_ejercicio'] == 2
+        assert indice.elegir(1, 1, indice.bitset([1, 2])) is None
+
+    def test_elegir_excluye_ejercicio_fallado(self, indice):
+        for _ in range(20):
+            assert indice.elegir(1, 1, 0, excluir_id=2)['id_ejercicio'] == 1
+
+    def test_muestrear_devuelve_distintos(self, indice):
+        ids = [e['id_ejercicio'] for e in indice.muestrear(None, None, 10)]
+        assert sorted(ids) == [1, 2, 3, 4, 5]
+        assert indice.muestrear(1, 1, 5, indice.bitset([2])) == [indice.ejercicios[1]]
+
+    def test_recarga_solo_cuando_cambia_la_version(self, mock_cursor):
+        from models.banco_ejercicios import BancoEjercicios
+        banco = BancoEjercicios()
+        mock_cursor.fetchall.side_effect = list(_filas_banco()) * 2
+        i1 = banco.indice(mock_cursor, version=1)
+        assert banco.indice(mock_cursor, version=1) is i1
+        assert mock_cursor.execute.call_count == 2
+        i2 = banco.indice(mock_cursor, version=2)
+        assert i2 is not i1 and i2.version == 2
+
+    def test_estado_alumno_inexistente_no_bloquea(self, mock_cursor):
+        from models.banco_ejercicios import leer_estado_estudiante
+        mock_cursor.fetchone.return_value = None
+        estado = leer_estado_estudiante(mock_cursor, 99)
+        assert estado['sin_diagnostico'] is False
+        assert estado['resueltos_repaso'] == []
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C10 — Estadísticas incrementales de puntajes (models/estadisticas_puntajes.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _acumular(pares):
+    """Misma actualización que fn_puntajes_estadisticas (por cada INSERT)."""
+    s = {'n_p': 0, 'media_p': 0.0, 'media_t': 0.0, 'm2_p': 0.0, 'm2_t': 0.0, 'c_tp': 0.0}
+    for x, y in pares:
+        s['n_p'] += 1
+        dy = y - s['media_p']
+        dx = x - s['media_t']
+        s['media_p'] += dy / s['n_p']
+        s['media_t'] += dx / s['n_p']
+        s['m2_p'] += dy * (y - s['media_p'])
+        s['m2_t'] += dx * (x - s['media_t'])
+        s['c_tp'] += dx * (y - s['media_p'])
+    return s
+
+
+class TestEstadisticasPuntajes:
+
+    def test_features_es_una_lectura_por_pk(self, mock_cursor):
+        from ws.tutor import calcular_features_competencia
+        mock_cursor.fetchone.return_value = {
+            'total_intentos': 4, 'promedio_puntaje': 55.0, 'min_puntaje': 20.0,
+            'max_puntaje': 90.0, 'std_puntaje': 25.0, 'num_aprobados': 2,
+            'tendencia': 0.8,
+        }
+        X = calcular_features_competencia(mock_cursor, 1, 2)
+        assert mock_cursor.execute.call_count == 1
+        sql, params = mock_cursor.execute.call_args[0]
+        assert 'FROM puntajes_estadisticas' in sql
+        assert 'GROUP BY' not in sql
+        assert params == (1, 2)
+        assert X.tolist() == [[4.0, 55.0, 20.0, 90.0, 25.0, 0.5, 0.8]]
+
+    def test_acumulado_coincide_con_agregado_completo(self):
+        import numpy as np
+        t = [1.7e9 + 37.0 * i + (i % 3) for i in range(40)]
+        y = [float((i * 37) % 101) for i in range(40)]
+        s = _acumular(zip(t, y))
+        assert s['media_p'] == pytest.approx(np.mean(y))
+        # std_puntaje de SQL_FEATURES = STDDEV muestral (ddof=1)
+        assert (s['m2_p'] / (s['n_p'] - 1)) ** 0.5 == pytest.approx(np.std(y, ddof=1))
+        corr = s['c_tp'] / (s['m2_t'] * s['m2_p']) ** 0.5
+        assert corr == pytest.approx(np.corrcoef(t, y)[0, 1], abs=1e-9)
+
+    def test_instalar_crea_trigger_y_backfill(self, mock_cursor):
+        from models.estadisticas_puntajes import instalar
+        instalar(mock_cursor)
+        sqls = ' '.join(c[0][0] for c in mock_cursor.execute.call_args_list)
+        assert 'CREATE TABLE IF NOT EXISTS puntajes_estadisticas' in sqls
+        assert 'CREATE TRIGGER trg_puntajes_estadisticas' in sqls
+        assert 'NOT EXISTS (SELECT 1 FROM puntajes_estadisticas)' in sqls
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C11 — Árbol de decisión compilado (models/arbol_compilado.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestArbolCompilado:
+
+    @pytest.fixture
+    def sk(self):
+        """Árbol sklearn pequeño entrenado sobre perfiles aleatorios."""
+        import numpy as np
+        tree = pytest.importorskip('sklearn.tree')
+        rng = np.random.default_rng(0)
+        X = rng.uniform(0, 100, (300, 7))
+        y = np.where(X[:, 1] > 66.6, 2, np.where(X[:, 5] < 33.3, 0, 1))
+        modelo = tree.DecisionTreeClassifier(max_depth=5, random_state=0).fit(X, y)
+        encoder = MagicMock()
+        encoder.inverse_transform = lambda v: np.array(['bajo', 'medio', 'alto'])[np.asarray(v)]
+        return modelo, encoder, X
+
+    def test_paridad_con_sklearn(self, sk):
+        from models.arbol_compilado import compilar, verificar_paridad
+        modelo, encoder, X = sk
+        compilado = compilar(modelo, encoder)
+        total, distintos = verificar_paridad(modelo, encoder, compilado, X)
+        assert total > len(X)          # incluye los puntos frontera
+        assert distintos == []
+
+    def test_guardar_y_cargar_npz(self, sk, tmp_path):
+        from models.arbol_compilado import compilar, ArbolCompilado
+        modelo, encoder, X = sk
+        compilado = compilar(modelo, encoder, ['f%d' % i for i in range(7)])
+        ruta = tmp_path / 'modelo.npz'
+        compilado.guardar(ruta)
+        cargado = ArbolCompilado.cargar(ruta)
+        assert cargado.n_features_in_ == 7
+        assert cargado.feature_names[0] == 'f0'
+        assert list(cargado.predict(X[:50])) == list(compilado.predict(X[:50]))
+
+    def test_compara_en_float32_como_sklearn(self):
+        import numpy as np
+        from models.arbol_compilado import ArbolCompilado
+        # raíz: X[0] <= 0.1 (float64) → 'bajo', si no 'alto'
+        arbol = ArbolCompilado([0, 0, 0], [0.1, -2, -2], [1, -1, -1], [2, -1, -1],
+                               ['', 'bajo', 'alto'], [], 1)
+        # 0.1 en float32 es mayor que 0.1 en float64 → va a la derecha
+        assert float(np.float32(0.1)) > 0.1
+        assert arbol.predecir_fila([0.1]) == 'alto'
+        assert arbol.predecir_fila([0.0999]) == 'bajo'
+
+    def test_modelo_del_repo_compilado_coincide(self):
+        import os
+        import pickle
+        import numpy as np
+        pytest.importorskip('sklearn')
+        from models.arbol_compilado import ArbolCompilado, verificar_paridad
+        base = os.path.join(os.path.dirname(__file__), '..', 'API_COMERCIAL')
+        with open(os.path.join(base, 'modelo_tutor.pkl'), 'rb') as f:
+            datos = pickle.load(f)
+        compilado = ArbolCompilado.cargar(os.path.join(base, 'modelo_tutor.npz'))
+        X = np.random.default_rng(1).uniform(-1, 100, (500, 7))
+        _, distintos = verificar_paridad(datos['modelo'], datos['encoder'], compilado, X)
+        assert distintos == []
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C12 — Estado NEC por petición (models/estado_nec.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _filas_nec(**niveles):
+    return [{'id_competencia': int(c[1:]), 'nivel': n, 'score': 40.0, 'existe': True}
+            for c, n in niveles.items()]
+
+
+class TestEstadoNEC:
+
+    def test_leer_existente_no_deja_pendientes(self, mock_cursor):
+        from models.estado_nec import EstadoNEC
+        nec = EstadoNEC(10, _filas_nec(c1=3, c2=5))
+        assert nec.leer(2) == (5, 40.0)
+        assert not nec.pendiente
+        nec.guardar(mock_cursor)
+        mock_cursor.execute.assert_not_called()
+
+    def test_sin_fila_inicializa_desde_puntajes(self):
+        from models.estado_nec import EstadoNEC
+        from models.scoring import score_to_nivel
+        filas = [{'id_competencia': 2, 'existe': False, 'avg_p': 55.0}]
+        nec = EstadoNEC(10, filas)
+        assert nec.leer(2) == (score_to_nivel(55.0), 55.0)
+        assert nec.leer(3) == (score_to_nivel(0.0), 0.0)   # sin puntajes ni NEC
+        assert nec.pendiente
+
+    def test_nivel_promedio_redondea_como_postgres(self):
+        from models.estado_nec import EstadoNEC
+        assert EstadoNEC(10, _filas_nec(c1=2, c2=3)).nivel_promedio() == 3   # 2.5 → 3
+        assert EstadoNEC(10, _filas_nec(c1=2, c2=2, c5=7)).nivel_promedio() == 2
+        assert EstadoNEC(10, []).nivel_promedio() == 1
+
+    def test_guardar_es_una_sola_sentencia(self, mock_cursor):
+        from models.estado_nec import EstadoNEC
+        nec = EstadoNEC(10, _filas_nec(c1=3, c2=3))
+        nec.leer(5)                       # inicializaciones pendientes
+        nec.leer(4)
+        nec.guardar(mock_cursor)
+        assert mock_cursor.execute.call_count == 1
+        sql, params = mock_cursor.execute.call_args[0]
+        assert 'DO NOTHING' in sql and 'DO UPDATE' not in sql
+        assert params['c0'] == 4 and params['c1'] == 5
+        nec.guardar(mock_cursor)          # ya no queda nada pendiente
+        assert mock_cursor.execute.call_count == 1
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C13 — Agregados del dashboard docente (models/dashboard_agregado.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestDashboardAgregado:
+
+    def test_lectura_es_una_consulta(self, mock_cursor):
+        from models.dashboard_agregado import leer_dashboard_docente, SEG_REFRESCO
+        mock_cursor.fetchone.return_value = {'nombre': 'Ana', 'estudiantes_activos': 12}
+        row = leer_dashboard_docente(mock_cursor, 7)
+        assert row['estudiantes_activos'] == 12
+        assert mock_cursor.execute.call_count == 1
+        sql, params = mock_cursor.execute.call_args[0]
+        assert 'fn_dashboard_docente' in sql
+        assert params == (SEG_REFRESCO, 7)
+
+    def test_docente_inexistente_retorna_none(self, mock_cursor):
+        from models.dashboard_agregado import leer_dashboard_docente
+        mock_cursor.fetchone.return_value = None
+        assert leer_dashboard_docente(mock_cursor, 999) is None
+
+    def test_instalar_crea_triggers_de_mantenimiento(self, mock_cursor):
+        from models.dashboard_agregado import instalar, TRIGGERS
+        instalar(mock_cursor)
+        sqls = ' '.join(c[0][0] for c in mock_cursor.execute.call_args_list)
+        assert 'CREATE TABLE IF NOT EXISTS dashboard_docente_agregado' in sqls
+        for nombre, tabla, *_ in TRIGGERS:
+            assert f'CREATE TRIGGER {nombre}' in sqls
+        # estudiante.progreso_general cambia en cada respuesta: no debe ensuciar todo
+        assert 'UPDATE OF estado_estudiante ON estudiante' in sqls
+
+    def test_triggers_no_tocan_filas_de_docente(self):
+        from models import dashboard_agregado as d
+        # El camino de /tutor/responder solo agrega eventos
+        for sql in (d.SQL_FN_PROGRESO, d.SQL_FN_SUCIO_ALUMNO, d.SQL_FN_SUCIO_TODOS):
+            assert 'INSERT INTO dashboard_docente_eventos' in sql
+            assert 'dashboard_docente_agregado' not in sql
+        assert 'FOR UPDATE' not in d.SQL_FN_REFRESCAR
+        assert 'pg_try_advisory_xact_lock' in d.SQL_FN_LEER
+
+    def test_poda_de_eventos_no_depende_de_lecturas(self):
+        from models import dashboard_agregado as d
+        # Con el dashboard apagado la tabla igual se poda, y de a PODA_MAX
+        assert 'DELETE FROM dashboard_docente_eventos' not in d.SQL_FN_LEER
+        assert 'DELETE FROM dashboard_docente_eventos' in d.SQL_FN_PROGRESO
+        assert f'LIMIT {d.PODA_MAX}' in d.SQL_FN_PROGRESO
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C14 — Caché de respuestas por alumno (models/cache_respuestas.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestCacheRespuestas:
+
+    @pytest.fixture
+    def cache(self):
+        from models.cache_respuestas import CacheRespuestas
+        return CacheRespuestas(ttl_seg=60, max_entradas=2)
+
+    def _guardar(self, cache, clave, id_est, cuerpo=b'{}'):
+        cache.guardar(clave, id_est, cache.generacion(id_est), cuerpo, 200, 'application/json')
+
+    def test_hit_y_miss(self, cache):
+        assert cache.obtener(('e', 10, ''), 10) is None
+        self._guardar(cache, ('e', 10, ''), 10, b'{"a":1}')
+        assert cache.obtener(('e', 10, ''), 10) == (b'{"a":1}', 200, 'application/json')
+        m = cache.metricas()
+        assert (m['hits'], m['misses'], m['tasa_hits']) == (1, 1, 0.5)
+
+    def test_ttl_expira(self, cache):
+        with patch('models.cache_respuestas.time.monotonic', return_value=1000.0):
+            self._guardar(cache, ('e', 10, ''), 10)
+        with patch('models.cache_respuestas.time.monotonic', return_value=1061.0):
+            assert cache.obtener(('e', 10, ''), 10) is None
+        assert cache.metricas()['expiradas'] == 1
+
+    def test_lru_desaloja_la_menos_usada(self, cache):
+        self._guardar(cache, ('e', 1, ''), 1)
+        self._guardar(cache, ('e', 2, ''), 2)
+        cache.obtener(('e', 1, ''), 1)            # 1 pasa a ser la más reciente
+        self._guardar(cache, ('e', 3, ''), 3)
+        assert cache.obtener(('e', 2, ''), 2) is None
+        assert cache.obtener(('e', 1, ''), 1) is not None
+        assert cache.metricas()['desalojadas'] == 1
+
+    def test_invalidar_solo_afecta_al_alumno(self, cache):
+        self._guardar(cache, ('e', 10, ''), 10)
+        self._guardar(cache, ('e', 11, ''), 11)
+        cache.invalidar_estudiante(10)
+        assert cache.obtener(('e', 10, ''), 10) is None
+        assert cache.obtener(('e', 11, ''), 11) is not None
+
+    def test_no_guarda_si_se_invalido_mientras_calculaba(self, cache):
+        gen = cache.generacion(10)
+        cache.invalidar_estudiante(10)            # /tutor/responder en paralelo
+        cache.guardar(('e', 10, ''), 10, gen, b'{}', 200, 'application/json')
+        assert cache.obtener(('e', 10, ''), 10) is None
+
+    def test_invalidacion_visible_en_otro_proceso(self, cache):
+        import multiprocessing
+        self._guardar(cache, ('e', 10, ''), 10)
+        ctx = multiprocessing.get_context('fork')
+        hijo = ctx.Process(target=cache.invalidar_estudiante, args=(10,))
+        hijo.start()
+        hijo.join(10)
+        assert cache.obtener(('e', 10, ''), 10) is None
+
+    def test_endpoint_cacheado_no_vuelve_a_la_bd(self, client, mock_cursor):
+        from models.cache_respuestas import invalidar_estudiante
+        mock_cursor.fetchall.return_value = []
+        assert client.get('/dominio/temas/10').status_code == 200
+        assert client.get('/dominio/temas/10').status_code == 200
+        assert mock_cursor.execute.call_count == 1
+        invalidar_estudiante(10)
+        client.get('/dominio/temas/10')
+        assert mock_cursor.execute.call_count == 2
+
+    def test_post_respuestas_invalida_al_alumno(self, client, mock_cursor):
+        from models.cache_respuestas import CACHE
+        antes = CACHE.generacion(10)
+        mock_cursor.fetchone.side_effect = [
+            {'id_respuesta': 1},                          # INSERT respuestas_estudiantes
+            {'es_correcta': True, 'id_competencia': 2},   # opción del puntaje
+        ]
+        r = client.post('/respuestas', json={'respuesta_texto': 'A', 'id_estudiante': 10,
+                                             'id_ejercicio': 101, 'id_opcion': 1})
+        assert r.status_code == 200
+        assert CACHE.generacion(10) != antes
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C15 — Serialización única (models → dict → jsonify_datos)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestSerializacionUnica:
+    """Los models devuelven dict/list y el blueprint serializa una sola vez."""
+
+    def test_model_devuelve_dict(self, mock_cursor):
+        from models.Puntaje import Puntaje
+        mock_cursor.fetchall.return_value = [{'id_puntaje': 1, 'puntaje': 15}]
+        resultado = Puntaje.listar()
+        assert isinstance(resultado, dict)
+        assert resultado['status'] is True
+
+    def test_jsonify_datos_decimal_y_fecha(self, app):
+        import datetime
+        from decimal import Decimal
+        from util import jsonify_datos
+        with app.app_context():
+            resp = jsonify_datos({'p': Decimal('12.5'), 'f': datetime.date(2025, 3, 1)}, status=201)
+        assert resp.status_code == 201
+        assert resp.mimetype == 'application/json'
+        assert resp.get_json() == {'p': 12.5, 'f': '2025-03-01'}
+
+    def test_endpoint_responde_json(self, client, mock_cursor):
+        mock_cursor.fetchall.return_value = [{'id_puntaje': 1, 'puntaje': 15}]
+        resp = client.get('/puntaje')
+        assert resp.status_code == 200
+        assert resp.get_json()['data'] == [{'id_puntaje': 1, 'puntaje': 15}]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C16 — Subidas diferidas (models/subidas_desarrollo.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestSubidasDesarrollo:
+    """La foto se guarda local y un hilo la sube con reintentos (SubidorLocal)."""
+
+    def _cola(self, tmp_path, fallos=0, reintentos=3):
+        from models.subidas_desarrollo import ColaSubidas, SubidorLocal
+        actualizaciones = []
+        subidor = SubidorLocal(str(tmp_path / 'nube'), 'https://cdn.test', fallos=fallos)
+        cola = ColaSubidas(str(tmp_path / 'local'), subidor, workers=1,
+                           reintentos=reintentos, espera_base_seg=0,
+                           actualizar_url=lambda *a, **k: actualizaciones.append(a + tuple(k.values())))
+        return cola, subidor, actualizaciones
+
+    def _archivo(self, cola, nombre):
+        ruta = f"{cola.carpeta}/{nombre}"
+        with open(ruta, 'wb') as f:
+            f.write(b'foto')
+        return ruta
+
+    def test_sube_con_reintento_y_limpia(self, tmp_path):
+        import os
+        cola, subidor, actualizaciones = self._cola(tmp_path, fallos=1)
+        ruta = self._archivo(cola, 'resp_5_ab.jpg')
+        url = cola.encolar(5, 'resp_5_ab.jpg', 'tutormath/desarrollos/resp_5_ab',
+                           'http://api/desarrollos/imagen/resp_5_ab.jpg').result(5)
+        assert url == 'https://cdn.test/tutormath_desarrollos_resp_5_ab.jpg'
+        assert actualizaciones == [(5, url, 'http://api/desarrollos/imagen/resp_5_ab.jpg')]
+        assert subidor.llamadas == 2
+        assert not os.path.exists(ruta)
+        assert os.listdir(tmp_path / 'local' / '.pendientes') == []
+        assert cola.metricas()['reintentos'] == 1
+
+    def test_agotar_reintentos_deja_pendiente_y_se_reanuda(self, tmp_path):
+        import os
+        cola, subidor, actualizaciones = self._cola(tmp_path, fallos=2, reintentos=2)
+        ruta = self._archivo(cola, 'resp_6_cd.jpg')
+        assert cola.encolar(6, 'resp_6_cd.jpg', 'p/resp_6_cd', 'pend').result(5) is None
+        assert os.path.exists(ruta) and actualizaciones == []
+        assert os.listdir(tmp_path / 'local' / '.pendientes') == ['resp_6_cd.jpg.6.json']
+        # Próximo arranque (el subidor ya responde)
+        futuros = cola.reanudar_pendientes()
+        assert [f.result(5) for f in futuros] == ['https://cdn.test/p_resp_6_cd.jpg']
+        assert actualizaciones[0][0] == 6
+
+    def test_reclamo_con_lease_vencido_se_reanuda(self, tmp_path):
+        import json
+        import os
+        import time
+        cola, _, actualizaciones = self._cola(tmp_path)
+        self._archivo(cola, 'resp_7_ef.jpg')
+        huerfano = tmp_path / 'local' / '.pendientes' / 'resp_7_ef.jpg.json.en_curso.999999999'
+        huerfano.write_text(json.dumps({'id_respuesta': 7, 'archivo': 'resp_7_ef.jpg',
+                                        'public_id': 'p/resp_7_ef', 'url_pendiente': 'pend'}))
+        # Lease recién renovado: otro worker la está subiendo, no se toca
+        assert cola.reanudar_pendientes() == []
+        vencido = time.time() - cola.lease_seg - 1
+        os.utime(huerfano, (vencido, vencido))
+        futuros = cola.reanudar_pendientes()
+        assert len(futuros) == 1 and futuros[0].result(5)
+        assert actualizaciones == [(7, 'https://cdn.test/p_resp_7_ef.jpg', 'pend')]
+
+    def test_revision_periodica_reintenta_fallidas(self, tmp_path):
+        import threading
+        from models.subidas_desarrollo import ColaSubidas, SubidorLocal
+        subidor = SubidorLocal(str(tmp_path / 'nube'), 'https://cdn.test', fallos=1)
+        hecho = threading.Event()
+        cola = ColaSubidas(str(tmp_path / 'local'), subidor, workers=1, reintentos=1,
+                           espera_base_seg=0, revision_seg=0.05,
+                           actualizar_url=lambda *a, **k: hecho.set())
+        self._archivo(cola, 'resp_8_gh.jpg')
+        assert cola.encolar(8, 'resp_8_gh.jpg', 'p/resp_8_gh', 'pend').result(5) is None
+        assert hecho.wait(5)            # sin reiniciar el proceso
+        cola.cerrar(esperar=True)
+
+    def test_lease_perdido_durante_la_subida_termina_sin_error(self, tmp_path):
+        import os
+        cola, subidor, actualizaciones = self._cola(tmp_path)
+        pendientes = tmp_path / 'local' / '.pendientes'
+        original = cola.subidor
+
+        def subida_lenta(archivo, public_id):
+            # Mientras tanto otro worker dio el lease por vencido y lo recuperó
+            (reclamo,) = os.listdir(pendientes)
+            os.rename(pendientes / reclamo, pendientes / 'resp_9_ij.jpg.9.json')
+            return original(archivo, public_id)
+
+        cola.subidor = subida_lenta
+        ruta = self._archivo(cola, 'resp_9_ij.jpg')
+        url = cola.encolar(9, 'resp_9_ij.jpg', 'p/resp_9_ij', 'pend').result(5)
+        assert url == 'https://cdn.test/p_resp_9_ij.jpg'
+        assert actualizaciones == [(9, url, 'pend')]
+        # El marcador y la copia local quedan para el nuevo dueño
+        assert os.listdir(pendientes) == ['resp_9_ij.jpg.9.json']
+        assert os.path.exists(ruta)
+
+    def test_lease_se_renueva_durante_la_subida(self, tmp_path):
+        import os
+        import time
+        from models.subidas_desarrollo import ColaSubidas
+        pendientes = tmp_path / 'local' / '.pendientes'
+        edades = []
+
+        def subida_lenta(archivo, public_id):
+            time.sleep(0.5)
+            (reclamo,) = os.listdir(pendientes)
+            edades.append(time.time() - os.path.getmtime(pendientes / reclamo))
+            return 'https://cdn.test/x.jpg'
+
+        cola = ColaSubidas(str(tmp_path / 'local'), subida_lenta, workers=1,
+                           reintentos=1, espera_base_seg=0, lease_seg=0.3,
+                           actualizar_url=lambda *a, **k: None)
+        self._archivo(cola, 'resp_11_kl.jpg')
+        assert cola.encolar(11, 'resp_11_kl.jpg', 'p/resp_11_kl', 'pend').result(5)
+        assert edades and edades[0] < cola.lease_seg
+
+    def test_sin_copia_local_descarta_el_trabajo(self, tmp_path):
+        import os
+        cola, subidor, actualizaciones = self._cola(tmp_path)
+        assert cola.encolar(10, 'no_existe.jpg', 'p/no_existe', 'pend').result(5) is None
+        assert subidor.llamadas == 0 and actualizaciones == []
+        assert os.listdir(tmp_path / 'local' / '.pendientes') == []
+
+    def test_endpoint_responde_sin_esperar_la_subida(self, client, auth_headers, mock_cursor, tmp_path):
+        import hashlib
+        import io
+        import os
+        import ws.tutor as tutor
+        from models.almacen_imagenes import AlmacenImagenes
+        cola, _, actualizaciones = self._cola(tmp_path)
+        digest = hashlib.sha256(b'foto').hexdigest()
+        with patch('util_cloudinary.cloudinary_configurado', return_value=True), \
+             patch.object(tutor, 'ALMACEN', AlmacenImagenes(cola.carpeta)), \
+             patch.object(tutor, '_cola_subidas', return_value=cola):
+            r = client.post('/tutor/subir_desarrollo', headers=auth_headers,
+                            data={'idRespuesta': '5', 'archivo': (io.BytesIO(b'foto'), 'f.png')},
+                            content_type='multipart/form-data')
+        data = r.get_json()
+        assert r.status_code == 200 and data['pendiente'] is True
+        assert data['desarrolloUrl'].endswith(f'/imagenes/{digest}.png')
+        sql, params = mock_cursor.execute.call_args[0]
+        assert 'UPDATE respuestas_estudiantes' in sql and params == (data['desarrolloUrl'], 5)
+        cola.cerrar(esperar=True)
+        assert actualizaciones[0] == (5, f'https://cdn.test/tutormath_desarrollos_{digest}.jpg',
+                                      data['desarrolloUrl'], digest)
+        assert os.path.exists(os.path.join(cola.carpeta, f'{digest}.png'))   # el blob se conserva
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C17 — Imágenes del desarrollo (models/imagenes_desarrollo.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestImagenesDesarrollo:
+    """Normalización al recibir la foto y variantes servidas con ?tam=."""
+
+    def _foto(self, ruta, ancho=3000, alto=2000, orientacion=None):
+        Image = pytest.importorskip('PIL.Image')
+        img = Image.new('RGB', (ancho, alto), (200, 30, 30))
+        exif = Image.Exif()
+        exif[0x010F] = 'CelularX'                 # Make
+        if orientacion:
+            exif[0x0112] = orientacion            # Orientation
+        img.save(ruta, 'JPEG', exif=exif.tobytes())
+
+    def test_normaliza_reduce_y_quita_exif(self, tmp_path):
+        from PIL import Image
+        from models.imagenes_desarrollo import normalizar, TAMANOS
+        origen = tmp_path / 'resp_5.jpg'
+        self._foto(origen, orientacion=6)         # rotada 90°: queda vertical
+        assert normalizar(str(origen), str(tmp_path), 'resp_5') == 'resp_5.webp'
+        assert not origen.exists()
+        with Image.open(tmp_path / 'resp_5.webp') as img:
+            assert img.format == 'WEBP'
+            assert img.size[1] == TAMANOS['original'] and img.size[0] < img.size[1]
+            assert not img.getexif()
+        for tam in ('media', 'mini'):
+            with Image.open(tmp_path / f'resp_5__{tam}.webp') as img:
+                assert max(img.size) == TAMANOS[tam]
+
+    def test_pdf_y_sin_pillow_quedan_igual(self, tmp_path):
+        from models import imagenes_desarrollo as m
+        pdf = tmp_path / 'resp_6.pdf'
+        pdf.write_bytes(b'%PDF-1.4')
+        assert m.normalizar(str(pdf), str(tmp_path), 'resp_6') is None
+        jpg = tmp_path / 'resp_7.jpg'
+        jpg.write_bytes(b'no es imagen')
+        with patch.object(m, 'Image', None):
+            assert m.normalizar(str(jpg), str(tmp_path), 'resp_7') is None
+        assert m.normalizar(str(jpg), str(tmp_path), 'resp_7') is None   # ilegible
+        assert pdf.exists() and jpg.exists()
+
+    def test_variante_se_genera_para_fotos_antiguas(self, tmp_path):
+        from models.imagenes_desarrollo import variante
+        self._foto(tmp_path / 'resp_1.jpg', 1200, 900)
+        assert variante(str(tmp_path), 'resp_1.jpg', 'mini') == 'resp_1__mini.webp'
+        assert (tmp_path / 'resp_1__mini.webp').exists()
+        assert variante(str(tmp_path), 'resp_1.jpg', 'gigante') == 'resp_1.jpg'
+
+    def test_ruta_sirve_variante(self, client, tmp_path):
+        import app as app_mod
+        self._foto(tmp_path / 'resp_2.jpg', 1200, 900)
+        with patch.object(app_mod, '_DESARROLLOS_ALUMNO', str(tmp_path)):
+            r = client.get('/desarrollos/imagen/resp_2.jpg?tam=media')
+            assert r.status_code == 200 and r.mimetype == 'image/webp'
+            r = client.get('/desarrollos/imagen/resp_2.jpg')
+            assert r.mimetype == 'image/jpeg'
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C18 — Índice de imágenes (models/indice_imagenes.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestIndiceImagenes:
+    """Rutas de imágenes con ETag fuerte, 304, Range e índice en memoria."""
+
+    @pytest.fixture
+    def carpeta(self, tmp_path):
+        import app as app_mod
+        (tmp_path / 'fig_1.png').write_bytes(b'0123456789' * 10)
+        with patch.object(app_mod, '_EJERCICIOS_AYUDA', str(tmp_path)):
+            yield tmp_path
+
+    def test_etag_fuerte_por_contenido_y_304(self, client, carpeta):
+        import hashlib
+        r = client.get('/ejercicios/imagen/fig_1.png')
+        modificado = r.headers['Last-Modified']
+        etag = hashlib.sha256(b'0123456789' * 10).hexdigest()[:32]
+        assert r.status_code == 200 and r.headers['ETag'] == f'"{etag}"'
+        assert r.headers['Accept-Ranges'] == 'bytes'
+        r = client.get('/ejercicios/imagen/fig_1.png', headers={'If-None-Match': f'"{etag}"'})
+        assert r.status_code == 304 and r.data == b''
+        r = client.get('/ejercicios/imagen/fig_1.png',
+                       headers={'If-Modified-Since': modificado})
+        assert r.status_code == 304
+
+    def test_range(self, client, carpeta):
+        r = client.get('/ejercicios/imagen/fig_1.png', headers={'Range': 'bytes=10-19'})
+        assert r.status_code == 206 and r.data == b'0123456789'
+        assert r.headers['Content-Range'] == 'bytes 10-19/100'
+
+    def test_aciertos_no_tocan_el_disco(self, carpeta):
+        from models.indice_imagenes import IndiceCarpeta
+        idx = IndiceCarpeta(str(carpeta))
+        assert idx.buscar('fig_1.png').tamano == 100
+        with patch('models.indice_imagenes.os.stat', side_effect=AssertionError('sondeo')):
+            assert idx.buscar('fig_1.png') is not None
+        assert idx.buscar('no_existe.png') is None
+        with patch('models.indice_imagenes.os.stat', side_effect=AssertionError('sondeo')):
+            assert idx.buscar('no_existe.png') is None
+
+    def test_archivo_reemplazado_se_detecta(self, carpeta):
+        import os
+        from models.indice_imagenes import IndiceCarpeta
+        idx = IndiceCarpeta(str(carpeta), revalidar_seg=0)
+        etag = idx.buscar('fig_1.png').etag
+        (carpeta / 'fig_1.png').write_bytes(b'otra imagen')
+        os.utime(carpeta / 'fig_1.png', ns=(1, 1))
+        assert idx.buscar('fig_1.png').etag != etag
+        (carpeta / 'fig_1.png').unlink()
+        assert idx.buscar('fig_1.png') is None
+
+    def test_registrar_respeta_inmutable(self, tmp_path):
+        from models.indice_imagenes import indice, registrar
+        (tmp_path / 'abc.png').write_bytes(b'blob')
+        assert registrar(str(tmp_path), 'abc.png', inmutable=True).inmutable
+        assert indice(str(tmp_path), True).inmutable
+        with pytest.raises(ValueError):
+            indice(str(tmp_path))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C19 — Almacén de imágenes por contenido (models/almacen_imagenes.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestAlmacenImagenes:
+    """Blobs <sha256>.<ext>: misma foto → un solo archivo y una sola subida."""
+
+    def _temporal(self, carpeta, nombre, contenido=b'foto'):
+        (carpeta / nombre).write_bytes(contenido)
+        (carpeta / nombre.replace('.webp', '__mini.webp')).write_bytes(b'mini')
+        return str(carpeta / nombre)
+
+    def test_deduplica(self, tmp_path):
+        import hashlib
+        import os
+        from models.almacen_imagenes import AlmacenImagenes
+        almacen = AlmacenImagenes(str(tmp_path))
+        digest  = hashlib.sha256(b'foto').hexdigest()
+        assert almacen.guardar(self._temporal(tmp_path, 'tmp_a.webp')) == (f'{digest}.webp', True)
+        assert almacen.guardar(self._temporal(tmp_path, 'tmp_b.webp')) == (f'{digest}.webp', False)
+        assert sorted(os.listdir(tmp_path)) == [f'{digest}.webp', f'{digest}__mini.webp']
+
+    def test_verificar_detecta_corrupcion(self, tmp_path):
+        from models.almacen_imagenes import AlmacenImagenes
+        almacen = AlmacenImagenes(str(tmp_path))
+        nombre, _ = almacen.guardar(self._temporal(tmp_path, 'tmp_a.webp'))
+        assert almacen.verificar() == []
+        (tmp_path / nombre).write_bytes(b'bits cambiados')
+        assert almacen.verificar() == [nombre]
+
+    def test_ruta_inmutable(self, client, tmp_path):
+        import models.almacen_imagenes as m
+        almacen = m.AlmacenImagenes(str(tmp_path))
+        nombre, _ = almacen.guardar(self._temporal(tmp_path, 'tmp_a.webp'))
+        with patch.object(m, 'CARPETA', str(tmp_path)):
+            r = client.get(f'/imagenes/{nombre}')
+            assert r.status_code == 200
+            assert r.headers['ETag'] == f'"{nombre[:-5]}"'
+            assert 'immutable' in r.headers['Cache-Control']
+            assert client.get(f'/imagenes/{nombre}?tam=mini').data == b'mini'
+            assert client.get('/imagenes/resp_5.jpg').status_code == 400
+
+    def test_contenido_ya_subido_no_se_encola(self, client, auth_headers, mock_cursor, tmp_path):
+        import io
+        import ws.tutor as tutor
+        from models.almacen_imagenes import AlmacenImagenes
+        mock_cursor.fetchone.return_value = {'url_nube': 'https://cdn.test/ya.jpg'}
+        cola = MagicMock()
+        with patch('util_cloudinary.cloudinary_configurado', return_value=True), \
+             patch.object(tutor, 'ALMACEN', AlmacenImagenes(str(tmp_path))), \
+             patch.object(tutor, '_cola_subidas', return_value=cola):
+            r = client.post('/tutor/subir_desarrollo', headers=auth_headers,
+                            data={'idRespuesta': '8', 'archivo': (io.BytesIO(b'foto'), 'f.pdf')},
+                            content_type='multipart/form-data')
+        data = r.get_json()
+        assert data['pendiente'] is False and data['desarrolloUrl'] == 'https://cdn.test/ya.jpg'
+        cola.encolar.assert_not_called()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C20 — Rachas por competencia y alertas al docente (models/rachas.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestRachasAlertas:
+
+    def test_contar_incorrectas_solo_ultimas_5(self):
+        from models.rachas import contar_incorrectas
+        assert contar_incorrectas(0b10110) == 3
+        assert contar_incorrectas(0b1100000) == 0      # bits fuera de la ventana
+        assert contar_incorrectas(None) == 0
+
+    def test_instalar_crea_tablas_y_triggers(self, mock_cursor):
+        from models.rachas import instalar, TRIGGERS, N_RACHA_ALERTA
+        instalar(mock_cursor)
+        sqls = ' '.join(c[0][0] for c in mock_cursor.execute.call_args_list)
+        for tabla in ('racha_estudiante_competencia', 'alertas_docente',
+                      'resumen_respuestas_estudiante'):
+            assert f'CREATE TABLE IF NOT EXISTS {tabla}' in sqls
+        for nombre, tabla, *_ in TRIGGERS:
+            assert f'CREATE TRIGGER {nombre}' in sqls
+        # el evento se registra una sola vez, al llegar al umbral
+        assert f'IF v_racha = -{N_RACHA_ALERTA} THEN' in sqls
+        assert "IS DISTINCT FROM 'repaso'" in sqls
+
+    def test_contexto_lee_racha_por_pk(self, mock_cursor):
+        from models.registro_respuesta import leer_contexto
+        mock_cursor.fetchone.return_value = {
+            'es_correcta': False, 'id_competencia': 2, 'nivel_ejercicio': 3,
+            'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0, 'racha': -2}
+        ctx = leer_contexto(mock_cursor, 10, 101, 1, True)
+        assert ctx['racha'] == -2
+        sql = mock_cursor.execute.call_args[0][0]
+        assert 'racha_estudiante_competencia' in sql
+        assert 'respuestas_estudiantes' not in sql
+
+    def test_alertas_docente_sin_funciones_ventana(self, client, mock_cursor):
+        from datetime import datetime
+        mock_cursor.fetchall.side_effect = [
+            [{'id_estudiante': 1, 'nombre': 'A, Ana'},
+             {'id_estudiante': 2, 'nombre': 'B, Beto'},
+             {'id_estudiante': 3, 'nombre': 'C, Ceci'}],
+            [],                                           # NEC: nadie en nivel bajo
+            [{'id_estudiante': 1, 'ultimas': 0b00111, 'rachas_negativas': None,
+              'ultima_actividad': datetime(2026, 5, 4)},
+             {'id_estudiante': 2, 'ultimas': 0b00001, 'rachas_negativas': [3],
+              'ultima_actividad': datetime(2026, 5, 5)},
+             {'id_estudiante': 3, 'ultimas': 0b10001, 'rachas_negativas': None,
+              'ultima_actividad': datetime(2026, 5, 6)}],
+        ]
+        data = client.get('/docentes/7/alertas').get_json()['data']
+        assert [(a['id_estudiante'], a['erroresRecientes'], a['rachaNegativa'])
+                for a in data] == [(1, 3, []), (2, 1, [3])]
+        assert all(a['tipoAlerta'] == 'muchos_errores' for a in data)
+        assert data[0]['ultimaActividad'] == '04/05/2026'
+        sqls = ' '.join(c[0][0] for c in mock_cursor.execute.call_args_list)
+        assert 'ROW_NUMBER' not in sqls and 'resumen_respuestas_estudiante' in sqls
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C21 — Eventos en vivo del docente (models/eventos_docente.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestEventosDocente:
+
+    def test_anillo_conserva_los_ultimos(self):
+        from models.eventos_docente import AnilloCompartido
+        anillo = AnilloCompartido(ranuras=4, tam_ranura=64)
+        for i in range(6):
+            anillo.publicar(b'e%d' % i)
+        hasta, eventos = anillo.leer_desde(0)
+        assert hasta == 6
+        assert [d for _, d in eventos] == [b'e2', b'e3', b'e4', b'e5']
+        assert anillo.publicar(b'x' * 100) is None        # no cabe en la ranura
+
+    def test_evento_de_otro_proceso_llega(self):
+        import multiprocessing
+        from models.eventos_docente import BusEventos
+        bus = BusEventos(espera_seg=0.05)
+        desde = bus.ultimo()
+        hijo = multiprocessing.get_context('fork').Process(
+            target=bus.publicar, args=('actividad', 5, {'estado': 'correcto'}))
+        hijo.start()
+        hijo.join(5)
+        _, eventos = bus.esperar(desde, 1.0, {5})
+        assert [e['datos'] for _, e in eventos] == [{'estado': 'correcto'}]
+
+    def test_esperar_filtra_y_despierta_al_publicar(self):
+        import threading
+        import time
+        from models.eventos_docente import BusEventos
+        bus = BusEventos(espera_seg=5)
+        desde = bus.ultimo()
+        bus.publicar('actividad', 99, {})                  # alumno de otro docente
+        threading.Timer(0.05, bus.publicar, ('alerta', 1, {'longitud': 3})).start()
+        inicio = time.monotonic()
+        _, eventos = bus.esperar(desde, 5, {1})
+        assert time.monotonic() - inicio < 2
+        assert [(e['tipo'], e['idEstudiante']) for _, e in eventos] == [('alerta', 1)]
+
+    def test_alerta_solo_al_llegar_al_umbral(self):
+        from models.registro_respuesta import evaluar_respuesta
+        from models.eventos_docente import BUS, publicar_respuesta
+        res = evaluar_respuesta(_ctx(racha=-2), 101, 300, False, True)
+        assert res['racha'] == -3
+        desde = BUS.ultimo()
+        publicar_respuesta(10, res, 'repaso')
+        publicar_respuesta(10, evaluar_respuesta(_ctx(racha=-3), 101, 300, False, True), 'repaso')
+        # evaluación no mueve la racha ni alerta aunque ya esté en el umbral
+        res_eval = evaluar_respuesta(_ctx(racha=-3), 101, 300, False, False)
+        assert res_eval['racha'] == -3
+        publicar_respuesta(10, res_eval, 'evaluacion')
+        _, eventos = BUS.esperar(desde, 0, {10})
+        assert [e['tipo'] for _, e in eventos] == ['actividad', 'alerta', 'actividad', 'actividad']
+
+    def test_stream_sse_del_docente(self, client, mock_cursor):
+        from config import Config
+        from models.eventos_docente import BUS
+        mock_cursor.fetchall.side_effect = [
+            [{'id_estudiante': 1, 'nombre': 'A, Ana'}],
+            [{'id_competencia': 2, 'descripcion': 'Regularidad'}],
+            [{'id_alerta': 9, 'id_estudiante': 1, 'id_competencia': 2,
+              'tipo': 'racha_negativa', 'longitud': 3, 'creado': '2026-05-04'}],
+        ]
+        desde = BUS.ultimo()
+        BUS.publicar('actividad', 1, {'idCompetencia': 2, 'estado': 'incorrecto'})
+        BUS.publicar('actividad', 99, {'idCompetencia': 2, 'estado': 'correcto'})
+        with patch.object(Config, 'EVENTOS_DURACION_SEG', 0.2), \
+             patch.object(Config, 'EVENTOS_PING_SEG', 0.1):
+            r = client.get('/docentes/7/eventos', headers={'Last-Event-ID': str(desde)})
+            cuerpo = r.get_data(as_text=True)
+            r.close()                                     # el servidor libera la conexión
+        assert r.mimetype == 'text/event-stream'
+        assert 'event: inicio' in cuerpo and '"idAlerta": 9' in cuerpo
+        assert f'id: {desde + 1}\nevent: actividad' in cuerpo
+        assert '"estudiante": "A, Ana"' in cuerpo and '"tema": "Regularidad"' in cuerpo
+        assert '"idEstudiante": 99' not in cuerpo
+        assert client.get('/health/eventos').get_json()['eventos']['conexiones'] == 0
+
+    def test_limite_de_conexiones(self, client, mock_cursor):
+        from config import Config
+        with patch.object(Config, 'EVENTOS_MAX_CONEXIONES', 0):
+            assert client.get('/docentes/7/eventos').status_code == 503
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C22 — Registro de respuestas en lote (models/registro_lote.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestRegistroLote:
+
+    def _respuesta(self, id_opcion, modo='repaso', tiempo=120):
+        return {'id_ejercicio': 101, 'id_opcion': id_opcion, 'tiempo_respuesta': tiempo,
+                'uso_pista': False, 'modo': modo, 'id_evaluacion': 7, 'fecha': None}
+
+    def _datos(self):
+        op = {'es_correcta': False, 'id_competencia': 2, 'nivel_ejercicio': 3,
+              'pista': '', 'palabras_clave': ''}
+        return {'opciones': {1: dict(op, es_correcta=True), 2: op,
+                             3: dict(op, id_competencia=4)},
+                'nec': {2: {'nivel': 3, 'score': 40.0}},
+                'avg_puntajes': {4: 60.0}, 'rachas': {}, 'materiales': []}
+
+    def test_igual_que_una_a_una(self):
+        from models.registro_lote import evaluar_lote
+        from models.registro_respuesta import evaluar_respuesta
+        secuencia = [2, 2, 1, 1, 1, 2]
+        lote = evaluar_lote(self._datos(), [self._respuesta(o) for o in secuencia])
+
+        ctx = _ctx(comp=2, nivel=3, score=40.0, niveles={2: 3})
+        for id_opcion, res in zip(secuencia, lote):
+            ctx['es_correcta'] = id_opcion == 1
+            esperado = evaluar_respuesta(ctx, 101, 120, False, True)
+            assert (res['nuevo_score'], res['nuevo_nivel'], res['racha'], res['docente_alertado']) == \
+                   (esperado['nuevo_score'], esperado['nuevo_nivel'], esperado['racha'],
+                    esperado['docente_alertado'])
+            ctx.update(nivel_actual=esperado['nuevo_nivel'], score_actual=esperado['nuevo_score'],
+                       racha=esperado['racha'], niveles_nec={2: esperado['nuevo_nivel']})
+
+    def test_competencia_sin_nec_se_inicializa_desde_puntajes(self):
+        from models.registro_lote import evaluar_lote
+        from models.scoring import score_to_nivel
+        res = evaluar_lote(self._datos(), [self._respuesta(3, modo='evaluacion'),
+                                           self._respuesta(3)])
+        assert res[0]['nec_existia'] is False and res[1]['nec_existia'] is True
+        assert res[0]['nuevo_nivel'] == score_to_nivel(60.0)
+        assert res[1]['score_anterior'] == 60.0
+
+    def test_evaluacion_acumula_resultado_por_evaluacion(self, mock_cursor):
+        from models.registro_lote import escribir_lote, evaluar_lote
+        respuestas = [self._respuesta(1, modo='evaluacion'), self._respuesta(2, modo='evaluacion')]
+        resultados = evaluar_lote(self._datos(), respuestas)
+        llamadas = []
+        def execute_values(cur, sql, filas, template=None, page_size=100, fetch=False):
+            llamadas.append((sql, filas))
+            return [{'id_respuesta': i} for i in range(len(filas))] if fetch else None
+        with patch('models.registro_lote.execute_values', execute_values):
+            escribir_lote(mock_cursor, 10, respuestas, resultados)
+        sqls = ' '.join(sql for sql, _ in llamadas)
+        assert 'puntajes' not in sqls and 'nivel_estudiante_competencia' not in sqls
+        assert llamadas[-1][1] == [(7, 10, 1, 2, 50)]     # 1 de 2 correctas
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C23 — Recálculo del NEC desde el historial (models/recalculo_nec.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestRecalculoNEC:
+
+    def _fila(self, est, comp, correcta, tiempo=200, pista=False, nivel=3, reinicio=None):
+        return (est, comp, correcta, tiempo, pista, nivel, reinicio)
+
+    def _reproducir(self, filas):
+        """Referencia escalar: calcular_delta + recorte, respuesta por respuesta."""
+        from models.scoring import calcular_delta, score_to_nivel
+        scores = {}
+        for est, comp, correcta, tiempo, pista, nivel, reinicio in filas:
+            if reinicio is not None:
+                scores[(est, comp)] = reinicio
+                continue
+            s = scores.get((est, comp), 0.0) + calcular_delta(correcta, tiempo, nivel, pista)
+            scores[(est, comp)] = max(0.0, min(100.0, s))
+        return {k: (s, score_to_nivel(s)) for k, s in scores.items()}
+
+    def test_par_partido_entre_bloques_y_recorte(self):
+        from models.recalculo_nec import recalcular
+        filas = ([self._fila(1, 1, False)] * 3 + [self._fila(1, 1, True, tiempo=60)] * 15
+                 + [self._fila(1, 2, True)] * 4 + [self._fila(2, 1, False, pista=True)] * 2)
+        esperado = self._reproducir(filas)
+        bloques = [filas[i:i + 5] for i in range(0, len(filas), 5)]
+        obtenido = {(e, c): (s, n) for e, c, s, n, _ in recalcular(bloques)}
+        assert obtenido == esperado
+        assert obtenido[(1, 1)] == (100.0, 7)          # fallos en 0, aciertos topan en 100
+
+    def test_semilla_y_asignacion_del_docente_reinician_el_score(self):
+        from models.recalculo_nec import recalcular
+        filas = ([self._fila(1, 1, False, reinicio=55.0)]          # AVG(puntajes) previos
+                 + [self._fila(1, 1, True)] * 3
+                 + [self._fila(1, 1, False, reinicio=20.0)]        # el docente asigna 20
+                 + [self._fila(1, 1, False)] * 2)
+        esperado = self._reproducir(filas)
+        bloques = [filas[i:i + 3] for i in range(0, len(filas), 3)]
+        (est, comp, score, nivel, n), = recalcular(bloques)
+        assert (score, nivel) == esperado[(1, 1)]
+        assert n == 5                                   # los reinicios no son respuestas
+        assert self._reproducir(filas[4:])[(1, 1)] == (score, nivel)
+
+    def test_ensayo_no_escribe(self, mock_cursor):
+        from models.recalculo_nec import ejecutar
+        mock_cursor.fetchall.return_value = [
+            {'id_estudiante': 1, 'id_competencia': 1, 'nivel_actual': 1, 'promedio_puntaje': 0},
+            {'id_estudiante': 1, 'id_competencia': 2, 'nivel_actual': 1, 'promedio_puntaje': 15},
+        ]
+        servidor = MagicMock()
+        servidor.fetchmany.side_effect = [[self._fila(1, 1, True, tiempo=60)] * 3, []]
+        con = MagicMock()
+        con.cursor.return_value = mock_cursor
+        con.cursor_servidor.return_value = servidor
+        with patch('models.recalculo_nec.execute_values') as ev:
+            informe = ejecutar(con)
+        ev.assert_not_called()
+        con.commit.assert_not_called()
+        con.rollback.assert_called_once()
+        assert (informe['respuestas'], informe['pares'], informe['cambios']) == (3, 1, 1)
+        assert informe['suben'] == 1 and informe['detalle'][0]['score'] == 24.0
+
+    def test_aplicar_escribe_solo_los_cambios(self, mock_cursor):
+        from models.recalculo_nec import ejecutar
+        mock_cursor.fetchall.return_value = [
+            {'id_estudiante': 1, 'id_competencia': 1, 'nivel_actual': 2, 'promedio_puntaje': 24},
+        ]
+        servidor = MagicMock()
+        servidor.fetchmany.side_effect = [[self._fila(1, 1, True, tiempo=60)] * 3
+                                          + [self._fila(2, 1, False)], []]
+        con = MagicMock()
+        con.cursor.return_value = mock_cursor
+        con.cursor_servidor.return_value = servidor
+        with patch('models.recalculo_nec.execute_values') as ev:
+            informe = ejecutar(con, aplicar=True)
+        filas = ev.call_args[0][2]
+        assert filas == [(2, 1, 1, 0.0, 1)]
+        con.commit.assert_called_once()
+        assert informe['cambios'] == 1
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C24 — Dataset de entrenamiento (models/dataset_ml.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestDatasetML:
+
+    # id_est, id_comp, total, promedio, min, max, std, aprobados, tendencia
+    FILAS = [
+        (1, 1, 4, 85.0, 70, 100, 10.0, 4, 0.5),
+        (1, 2, 5, 50.0, 20, 80, 20.0, 2, -0.6),
+        (2, 1, 3, 20.0, -5, 40, 5.0, 0, None),
+        (2, 2, 2, None, None, None, 0, 0, None),          # sin puntajes → fuera
+        (3, 1, 6, 110.0, 90, 130, 15.0, 6, 1.5),
+    ]
+
+    def _servidor(self, tam):
+        servidor = MagicMock()
+        bloques = [self.FILAS[i:i + tam] for i in range(0, len(self.FILAS), tam)]
+        servidor.fetchmany.side_effect = bloques + [[]]
+        return servidor
+
+    def _etiqueta_bucle(self, fila):
+        """Reglas originales de train_model.py, fila por fila."""
+        total, aprobados, tendencia = fila[2], fila[7], fila[8]
+        tasa = aprobados / total
+        tendencia = max(-1.0, min(1.0, tendencia if tendencia is not None else 0.0))
+        if tasa >= 0.70 and tendencia >= -0.30:
+            return "alto"
+        if tasa < 0.35 or (tasa < 0.55 and tendencia < -0.30):
+            return "bajo"
+        return "medio"
+
+    def test_bloques_y_crecimiento_sobre_lo_reservado(self):
+        import numpy as np
+        from models.dataset_ml import leer_agregados
+        crudos = leer_agregados(self._servidor(2), grupos=3, filas_por_viaje=2)
+        assert len(crudos['total']) == 5
+        assert crudos['promedio'][1] == 50.0 and np.isnan(crudos['promedio'][3])
+
+    def test_limpieza_y_etiquetas_por_columnas(self):
+        from models.dataset_ml import (leer_agregados, limpiar, features_tutor,
+                                       etiquetas_tutor, etiquetas_por_promedio)
+        datos = limpiar(leer_agregados(self._servidor(5), grupos=5))
+        assert datos['id_estudiante'].tolist() == [1, 1, 2, 3]
+        X = features_tutor(datos)
+        assert X.shape == (4, 7)
+        assert X[:, 1].tolist() == [85.0, 50.0, 20.0, 100.0]       # promedio recortado
+        assert X[2, 2] == 0.0 and X[3, 3] == 100.0                  # min / max recortados
+        assert X[:, 6].tolist() == [0.5, -0.6, 0.0, 1.0]            # tendencia
+        validas = [f for f in self.FILAS if f[3] is not None]
+        assert etiquetas_tutor(datos).tolist() == [self._etiqueta_bucle(f) for f in validas]
+        assert etiquetas_por_promedio(datos['promedio'], 40, 70).tolist() == \
+               ['alto', 'medio', 'bajo', 'alto']
+
+    def test_cache_se_invalida_con_la_instantanea(self, tmp_path):
+        import numpy as np
+        from models import dataset_ml
+        instantanea = {'filas': 20, 'grupos': 5, 'max_id': 20,
+                       'actualizado': '2026-05-04 10:00:00'}
+        conexiones = []
+
+        def conexion():
+            con = MagicMock()
+            con.cursor.return_value.fetchone.return_value = dict(instantanea)
+            con.cursor_servidor.return_value = self._servidor(5)
+            conexiones.append(con)
+            return con
+
+        with patch('models.dataset_ml.Conexion', side_effect=conexion):
+            primero = dataset_ml.cargar_dataset(60, carpeta_cache=str(tmp_path))
+            segundo = dataset_ml.cargar_dataset(60, carpeta_cache=str(tmp_path))
+            assert conexiones[0].cursor_servidor.called
+            assert not conexiones[1].cursor_servidor.called          # vigente: sin GROUP BY
+            assert np.array_equal(primero['promedio'], segundo['promedio'])
+
+            instantanea['actualizado'] = '2026-05-04 10:05:00'        # corrección del docente
+            dataset_ml.cargar_dataset(60, carpeta_cache=str(tmp_path))
+            assert conexiones[2].cursor_servidor.called              # cambió: se relee
+            dataset_ml.cargar_dataset(70, carpeta_cache=str(tmp_path))
+            assert conexiones[3].cursor_servidor.called              # otro umbral, otro .npz
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C25 — Selección de modelos (models/seleccion_modelos.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestSeleccionModelos:
+
+    def _dataset(self):
+        import numpy as np
+        rng = np.random.default_rng(1)
+        X = rng.uniform(0, 100, size=(90, 5))
+        y = np.where(X[:, 1] > 66, 2, np.where(X[:, 4] < 33, 0, 1))
+        return X, y
+
+    def test_igual_que_cross_val_score(self):
+        from sklearn.model_selection import cross_val_score
+        from models.seleccion_modelos import CacheFolds, construir, evaluar
+        X, y = self._dataset()
+        params = {"max_depth": 3}
+        ev = evaluar([("arbol", params)], X, y, n_folds=3, procesos=1,
+                     cache=CacheFolds(ruta=None))
+        esperado = cross_val_score(construir("arbol", params), X, y, cv=3)
+        assert ev["resultados"][0]["folds"] == pytest.approx(esperado.tolist())
+
+    def test_procesos_y_cache_por_fold(self, tmp_path):
+        from models.seleccion_modelos import CacheFolds, evaluar, muestreo
+        X, y = self._dataset()
+        candidatos = [("arbol", p) for p in muestreo(4)] + [("knn", {"n_neighbors": 3})]
+        ruta = str(tmp_path / "folds.json")
+        en_paralelo = evaluar(candidatos, X, y, n_folds=3, procesos=2, cache=CacheFolds(ruta))
+        assert en_paralelo["entrenados"] == 15
+
+        otra = evaluar(candidatos, X, y, n_folds=3, procesos=1, cache=CacheFolds(ruta))
+        assert otra["entrenados"] == 0 and otra["desde_cache"] == 15
+        assert otra["resultados"] == en_paralelo["resultados"]
+
+        y2 = y.copy(); y2[0] = (y2[0] + 1) % 3                    # otro dataset → otra huella
+        assert evaluar(candidatos[:1], X, y2, n_folds=3, procesos=1,
+                       cache=CacheFolds(ruta))["entrenados"] == 3
+
+    def test_rejilla_muestreo_y_reporte(self, tmp_path):
+        import json
+        from models.seleccion_modelos import (CacheFolds, ESPACIO_ARBOL, escribir_reporte,
+                                              evaluar, muestreo, rejilla)
+        total = 1
+        for valores in ESPACIO_ARBOL.values():
+            total *= len(valores)
+        assert len(rejilla()) == total
+        assert muestreo(5) == muestreo(5) and len({json.dumps(p, sort_keys=True)
+                                                   for p in muestreo(5)}) == 5
+        X, y = self._dataset()
+        ev = evaluar([("arbol", {"max_depth": 2}), ("arbol", {"max_depth": 5}),
+                      ("knn", {"n_neighbors": 500})], X, y, n_folds=3, procesos=1,
+                     cache=CacheFolds(ruta=None))
+        assert ev["resultados"][-1]["cv_media"] is None           # k > muestras: error registrado
+        assert ev["resultados"][-1]["errores"]
+        reporte = escribir_reporte(str(tmp_path / "r.json"), ev, busqueda="rejilla")
+        with open(tmp_path / "r.json", encoding="utf-8") as f:
+            assert json.load(f)["mejor"] == reporte["mejor"] == ev["resultados"][0]
+        assert set(reporte["mejor_por_modelo"]) == {"arbol", "knn"}
+        assert reporte["mejor_por_modelo"]["knn"] is None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# C26 — Registro versionado del modelo (models/registro_modelos.py)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class TestRegistroModelos:
+
+    def _npz(self, tmp_path, nombre, etiqueta):
+        """Árbol de una sola hoja que siempre predice `etiqueta`."""
+        from models.arbol_compilado import ArbolCompilado
+        ruta = str(tmp_path / nombre)
+        ArbolCompilado([-2], [0.0], [-1], [-1], [etiqueta],
+                       ['f%d' % i for i in range(7)], 7).guardar(ruta)
+        return ruta
+
+    def test_publicar_y_activar(self, tmp_path):
+        from models import registro_modelos as rm
+        carpeta = str(tmp_path / 'modelos')
+        v1 = rm.publicar(self._npz(tmp_path, 'a.npz', 'bajo'), carpeta, version='v1')
+        v2 = rm.publicar(self._npz(tmp_path, 'b.npz', 'alto'), carpeta, version='v1')
+        assert (v1, v2) == ('v1', 'v1-2')
+        assert rm.version_activa(carpeta) == 'v1-2' and rm.versiones(carpeta) == ['v1', 'v1-2']
+        rm.activar('v1', carpeta)
+        assert rm.version_activa(carpeta) == 'v1'
+        with pytest.raises(FileNotFoundError):
+            rm.activar('no-existe', carpeta)
+
+    def test_recarga_en_caliente(self, tmp_path):
+        from models import registro_modelos as rm
+        carpeta  = str(tmp_path / 'modelos')
+        activados = []
+        rm.publicar(self._npz(tmp_path, 'a.npz', 'bajo'), carpeta, version='v1')
+        registro = rm.RegistroModelos(carpeta, intervalo_seg=0,
+                                      al_activar=lambda m, v: activados.append(v))
+        assert registro.iniciar().predict([[0] * 7])[0] == 'bajo'
+
+        rm.publicar(self._npz(tmp_path, 'b.npz', 'alto'), carpeta, version='v2')
+        registro.revisar()
+        registro.esperar_recarga(5)
+        assert registro.version == 'v2' and activados == ['v1', 'v2']
+        assert registro.modelo.predict([[0] * 7])[0] == 'alto'
+
+        registro.revisar()                     # sin cambios: no recarga
+        registro.esperar_recarga(5)
+        assert registro.metricas()['recargas'] == 2
+
+    def test_intervalo_y_version_rota(self, tmp_path):
+        from models import registro_modelos as rm
+        carpeta = str(tmp_path / 'modelos')
+        rm.publicar(self._npz(tmp_path, 'a.npz', 'bajo'), carpeta, version='v1')
+        registro = rm.RegistroModelos(carpeta, intervalo_seg=3600)
+        registro.iniciar()
+        registro.revisar()                     # primera revisión; la siguiente en 1 h
+        rm.publicar(self._npz(tmp_path, 'b.npz', 'alto'), carpeta, version='v2')
+        registro.revisar()
+        assert registro.version == 'v1'
+
+        registro.intervalo_seg, registro._proxima = 0, 0
+        with open(rm.ruta_modelo(carpeta, 'v2'), 'wb') as f:
+            f.write(b'roto')
+        registro.revisar()
+        registro.esperar_recarga(5)
+        assert registro.version == 'v1' and registro.metricas()['errores'] == 1
+        assert registro.metricas()['ultimo_error'].startswith('v2:')
+
+    def test_health_expone_la_version(self, client):
+        import ws.tutor as t
+        orig = t.MODELO_VERSION
+        t.MODELO_VERSION = 'v-test'
+        try:
+            assert client.get('/health').get_json()['modelo'] == 'v-test'
+            assert client.get('/health/modelo').get_json()['modelo']['version'] == 'v-test'
+        finally:
+            t.MODELO_VERSION = orig
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# C27 — Niveles del salón (models/prediccion_salon.py)
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _fila_salon(id_est, comp, nivel=None, total=None, promedio=None, aprobados=0):
+    return {'id_estudiante': id_est, 'nombre': f'Alumno {id_est}', 'id_competencia': comp,
+            'tiene_nec': nivel is not None, 'nivel_actual': nivel,
+            'total_intentos': total, 'promedio_puntaje': promedio,
+            'min_puntaje': promedio, 'max_puntaje': promedio, 'std_puntaje': 0,
+            'num_aprobados': aprobados, 'tendencia': None}
+
+
+class TestPrediccionSalon:
+
+    def test_predict_por_lote_igual_a_fila_por_fila(self):
+        import numpy as np
+        from sklearn.tree import DecisionTreeClassifier
+        from models.arbol_compilado import compilar
+        rng = np.random.default_rng(0)
+        X = rng.uniform(0, 100, size=(400, 7))
+        y = np.where(X[:, 1] < 40, 'bajo', np.where(X[:, 5] < 60, 'medio', 'alto'))
+        arbol = compilar(DecisionTreeClassifier(random_state=0).fit(X, y))
+        lote = arbol.predict(X)
+        assert list(lote) == [arbol.predecir_fila(f) for f in X.astype(np.float32)]
+        assert list(lote) == list(y)
+
+    def test_acotado_y_filas_sin_features(self):
+        import numpy as np
+        from models.prediccion_salon import predecir
+        modelo = MagicMock()
+        modelo.predict.side_effect = lambda X: np.array(['alto'] * len(X))
+        filas = [_fila_salon(1, 1, nivel=1, total=5, promedio=90, aprobados=5),   # bajo → medio
+                 _fila_salon(1, 2, nivel=4, total=5, promedio=90, aprobados=5),   # medio → alto
+                 _fila_salon(1, 3, nivel=6),                                      # sin puntajes
+                 _fila_salon(1, 4, total=3, promedio=75, aprobados=3)]            # sin NEC
+        nivel_nec, base, ml, final = predecir(filas, modelo)
+        assert modelo.predict.call_count == 1
+        assert modelo.predict.call_args[0][0].shape == (3, 7)
+        assert list(nivel_nec) == [1, 4, 6, 5]
+        assert list(base)  == ['bajo', 'medio', 'alto', 'alto']
+        assert list(ml)    == ['alto', 'alto', None, 'alto']
+        assert list(final) == ['medio', 'alto', 'alto', 'alto']
+
+    def test_igual_que_predecir_nivel_competencia(self, mock_cursor):
+        import numpy as np
+        import ws.tutor as t
+        from models.prediccion_salon import predecir
+        modelo = MagicMock()
+        modelo.predict.side_effect = lambda X: np.array(['bajo' if x[1] < 50 else 'alto'
+                                                         for x in X])
+        filas = [_fila_salon(1, 1, nivel=5, total=4, promedio=30, aprobados=1),
+                 _fila_salon(1, 2, nivel=2, total=4, promedio=80, aprobados=4)]
+        _, _, _, final = predecir(filas, modelo)
+        orig = t.MODELO_TUTOR
+        t.MODELO_TUTOR = modelo
+        try:
+            for fila, esperado in zip(filas, final):
+                mock_cursor.fetchone.side_effect = [
+                    {'nivel_actual': fila['nivel_actual'], 'score': 0}, fila]
+                assert t.predecir_nivel_competencia(mock_cursor, 1, fila['id_competencia']) \
+                    == esperado
+        finally:
+            t.MODELO_TUTOR = orig
+
+    def test_endpoint_agrupa_por_alumno(self, client, mock_cursor):
+        import ws.tutor as t
+        mock_cursor.fetchone.return_value = {'?column?': 1}
+        mock_cursor.fetchall.return_value = [
+            _fila_salon(7, c, nivel=3, total=2, promedio=60, aprobados=1) for c in (1, 2)
+        ] + [_fila_salon(8, c) for c in (1, 2)]
+        orig = t.MODELO_TUTOR
+        t.MODELO_TUTOR = None
+        try:
+            data = client.get('/docentes/1/salones/2/niveles').get_json()['data']
+        finally:
+            t.MODELO_TUTOR = orig
+        assert [a['id_estudiante'] for a in data] == [7, 8]
+        assert data[0]['competencias'][1] == {'idCompetencia': 2, 'nivelNec': 3,
+                                              'nivelBase': 'medio', 'nivelMl': None,
+                                              'nivelFinal': 'medio'}
+        assert data[1]['competencias'][0]['nivelNec'] == 1
+
+    def test_endpoint_salon_ajeno(self, client, mock_cursor):
+        mock_cursor.fetchone.return_value = None
+        resp = client.get('/docentes/1/salones/99/niveles')
+        assert resp.status_code == 404
+        assert mock_cursor.fetchall.call_count == 0
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# C28 — Cola de próximos ejercicios por sesión (models/cola_ejercicios.py)
+# ═════════════════════════════════════════════════════════════════════════════
+
+class TestColaEjercicios:
+
+    @pytest.fixture
+    def cola(self):
+        from models.cola_ejercicios import ColaEjercicios
+        return ColaEjercicios(ttl_seg=60, max_entradas=2)
+
+    @pytest.fixture
+    def cola_global(self):
+        from models.banco_ejercicios import BANCO
+        from models.cola_ejercicios import COLA
+        BANCO.invalidar()
+        COLA.limpiar()
+        yield COLA
+        BANCO.invalidar()
+        COLA.limpiar()
+
+    def test_sirve_en_orden_y_se_vacia(self, cola):
+        gen = cola.generacion(5)
+        cola.guardar(5, 1, gen, 'v1', ['a', 'b'])
+        assert cola.tomar(5, 1, 'v1') == ('a', ['b'])
+        assert cola.tomar(5, 1, 'v1') == ('b', [])
+        assert cola.tomar(5, 1, 'v1') is None
+        assert cola.tomar(5, 2, 'v1') is None            # otra competencia, otra sesión
+        assert cola.metricas()['servidos'] == 2
+
+    def test_invalida_por_generacion_y_version(self, cola):
+        gen = cola.generacion(5)
+        cola.invalidar_estudiante(5)
+        cola.guardar(5, None, gen, 'v1', ['a'])          # respuesta mientras se elegía
+        assert cola.tomar(5, None, 'v1') is None
+
+        cola.guardar(5, None, cola.generacion(5), 'v1', ['a', 'b'])
+        assert cola.tomar(5, None, 'v2') is None         # el banco cambió
+        cola.guardar(5, None, cola.generacion(5), 'v1', ['a', 'b'])
+        cola.invalidar_estudiante(5)
+        assert cola.tomar(5, None, 'v1') is None
+        assert cola.metricas()['invalidadas'] == 2
+
+    def test_solo_nivel_o_categoria_de_racha_invalidan(self, cola):
+        from models.cola_ejercicios import cambia_seleccion
+        res = {'nivel_anterior': 3, 'nuevo_nivel': 3, 'racha_anterior': 1, 'racha': 2}
+        assert not cambia_seleccion(res)
+        assert cambia_seleccion(dict(res, racha=3))                   # entra en racha positiva
+        assert cambia_seleccion(dict(res, racha_anterior=-3, racha=1))
+        assert cambia_seleccion(dict(res, nuevo_nivel=4))
+        gen = cola.generacion(5)
+        cola.invalidar_si_cambia(5, [None, res])
+        assert cola.generacion(5) == gen
+        cola.invalidar_si_cambia(5, [res, dict(res, nuevo_nivel=2)])
+        assert cola.generacion(5) != gen
+
+    def test_evaluar_respuesta_informa_racha_anterior(self):
+        from models.registro_respuesta import evaluar_respuesta
+        ctx = {'es_correcta': True, 'id_competencia': 1, 'nivel_ejercicio': 3, 'pista': '',
+               'palabras_clave': '', 'nec_existe': True, 'nivel_actual': 3,
+               'score_actual': 30.0, 'niveles_nec': {1: 3}, 'racha': 2, 'materiales': []}
+        res = evaluar_respuesta(ctx, 1, 20, False, True)
+        assert (res['racha_anterior'], res['racha']) == (2, 3)
+
+    def test_endpoint_sirve_desde_la_cola_sin_bd(self, client, mock_cursor, auth_headers,
+                                                 cola_global):
+        estado = {'sin_diagnostico': False, 'version_banco': 1, 'resueltos_repaso': [],
+                  'intentados_repaso': [], 'respondidos_evaluacion': [],
+                  'nec': [{'id_competencia': c, 'nivel': 3, 'score': 40.0, 'existe': True}
+                          for c in range(1, 5)]}
+        mock_cursor.fetchone.side_effect = [estado]
+        mock_cursor.fetchall.side_effect = list(_filas_banco())
+        url = '/tutor/ejercicio_siguiente?idEstudiante=10&cola=3'
+        primero = client.get(url, headers=auth_headers).get_json()
+        siguientes = [e['idEjercicio'] for e in primero['siguientes']]
+        assert len(siguientes) == 2                       # nivel 3: ejercicios 1, 2 y 4
+        assert {primero['idEjercicio'], *siguientes} == {1, 2, 4}
+        assert primero['siguientes'][0]['opciones']
+
+        llamadas = mock_cursor.execute.call_count
+        segundo = client.get(url, headers=auth_headers).get_json()
+        assert segundo['idEjercicio'] == siguientes[0]
+        assert [e['idEjercicio'] for e in segundo['siguientes']] == siguientes[1:]
+        assert mock_cursor.execute.call_count == llamadas
+
+        cola_global.invalidar_estudiante(10)
+        mock_cursor.fetchone.side_effect = [estado]
+        client.get(url, headers=auth_headers)
+        assert mock_cursor.execute.call_count > llamadas
+
+    def test_sin_parametro_cola_no_cambia_la_respuesta(self, client, mock_cursor,
+                                                       auth_headers, cola_global):
+        mock_cursor.fetchone.side_effect = [{
+            'sin_diagnostico': False, 'version_banco': 1, 'resueltos_repaso': [],
+            'intentados_repaso': [], 'respondidos_evaluacion': [],
+            'nec': [{'id_competencia': 1, 'nivel': 3, 'score': 40.0, 'existe': True}]}]
+        mock_cursor.fetchall.side_effect = list(_filas_banco())
+        data = client.get('/tutor/ejercicio_siguiente?idEstudiante=10',
+                          headers=auth_headers).get_json()
+        assert data['status'] is True and 'siguientes' not in data
+        assert cola_global.metricas()['colas'] == 0
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# C29 — Índice de materiales sugeridos tras un error (models/indice_materiales.py)
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _filas_material():
+    return [
+        {'id_material': i, 'titulo': f'M{i}', 'tipo': 'video', 'url': f'u{i}',
+         'nivel': nivel, 'id_ejercicio': ej, 'id_competencia': comp}
+        for i, comp, nivel, ej in [(1, 2, 2, None), (2, 2, 1, 0), (3, 2, None, None),
+                                   (4, 2, 3, 101), (5, 3, 1, None), (6, 2, 1, 101)]
+    ]
+
+
+class TestIndiceMateriales:
+
+    @pytest.fixture
+    def materiales(self):
+        from models.indice_materiales import MATERIALES
+        MATERIALES.invalidar()
+        yield MATERIALES
+        MATERIALES.invalidar()
+
+    def test_agrupa_por_ejercicio_y_competencia(self):
+        from models.indice_materiales import _Indice
+        indice = _Indice(1, _filas_material())
+        assert [m['id_material'] for m in indice.por_ejercicio[101]] == [4, 6]
+        # id_ejercicio 0 cuenta como genérico; por nivel y sin nivel al final
+        assert [m['id_material'] for m in indice.por_competencia[2]] == [2, 1, 3]
+        assert [m['id_material'] for m in indice.candidatos(101, 3)] == [4, 6, 5]
+        assert [m['id_material'] for m in indice.candidatos_lote([101, 999], [3])] == [4, 6, 5]
+
+    def test_muestreo_favorece_lo_no_abierto(self):
+        import random
+        from models.indice_materiales import PESO_NO_ABIERTO, muestreo_ponderado
+        capa = [{'id_material': 1}, {'id_material': 2}]
+        random.seed(0)
+        elegidos = [muestreo_ponderado(capa, {1})['id_material'] for _ in range(2000)]
+        proporcion = elegidos.count(2) / len(elegidos)
+        assert abs(proporcion - PESO_NO_ABIERTO / (PESO_NO_ABIERTO + 1)) < 0.05
+        assert muestreo_ponderado([], {1}) is None
+
+    def test_elegir_material_mantiene_las_capas(self):
+        from models.indice_materiales import _Indice
+        from models.registro_respuesta import elegir_material
+        candidatos = _Indice(1, _filas_material()).candidatos(999, 2)
+        for _ in range(20):
+            assert elegir_material(candidatos, 999, 1, abiertos={2})['id_material'] == 2
+        assert elegir_material(candidatos, 999, 2)['id_material'] in (1, 2)
+
+    def test_recarga_solo_cuando_cambia_la_version(self, mock_cursor, materiales):
+        mock_cursor.fetchall.return_value = _filas_material()
+        i1 = materiales.indice(mock_cursor, 7)
+        assert materiales.indice(mock_cursor, 7) is i1
+        assert mock_cursor.execute.call_count == 1
+        assert materiales.indice(mock_cursor, 8) is not i1
+        assert mock_cursor.execute.call_count == 2
+
+    def test_responder_fallado_sin_consultar_material(self, mock_cursor, materiales):
+        from models.registro_respuesta import registrar_respuesta
+        mock_cursor.fetchall.return_value = _filas_material()
+        materiales.indice(mock_cursor, 7)
+        mock_cursor.reset_mock()
+        mock_cursor.fetchone.side_effect = [
+            {'es_correcta': False, 'id_competencia': 2, 'nivel_ejercicio': 3,
+             'pista': None, 'palabras_clave': None, 'nec_existe': True,
+             'nec_nivel': 3, 'nec_score': 40.0, 'avg_puntajes': None,
+             'niveles_nec': {'2': 3}, 'racha': None,
+             'version_materiales': 7, 'materiales_abiertos': [4]},
+            {'id_respuesta': 77},
+        ]
+        res = registrar_respuesta(mock_cursor, 10, 101, 1, 60, False, 'repaso')
+        assert mock_cursor.execute.call_count == 2
+        assert 'material_estudio m' not in mock_cursor.execute.call_args_list[0][0][0]
+        assert res['material_sugerido']['idMaterial'] in (4, 6)
+
+    def test_lote_toma_candidatos_del_indice(self, mock_cursor, materiales):
+        from models.registro_lote import registrar_lote
+        mock_cursor.fetchall.return_value = _filas_material()
+        mock_cursor.fetchone.return_value = {
+            'opciones': [{'id_opcion': 2, 'es_correcta': False, 'id_competencia': 3,
+                          'nivel_ejercicio': 1, 'pista': '', 'palabras_clave': ''}],
+            'nec': [{'id_competencia': 3, 'nivel': 1, 'score': 5.0}],
+            'avg_puntajes': None, 'rachas': {}, 'version_materiales': 1,
+            'materiales_abiertos': []}
+        respuesta = {'id_cliente': 'c1', 'id_ejercicio': 55, 'id_opcion': 2,
+                     'tiempo_respuesta': 30, 'uso_pista': False, 'modo': 'repaso',
+                     'id_evaluacion': None, 'fecha': None}
+        with patch('models.registro_lote.execute_values',
+                   lambda *a, fetch=False, **k: [{'id_respuesta': 1, 'id_cliente': 'c1'}]
+                   if fetch else None):
+            res, previas = registrar_lote(mock_cursor, 10, [respuesta])
+        assert res[0]['material_sugerido']['idMaterial'] == 5 and previas == {}
@@ -47,42 +47,44 @@ class TestFlujoRapaso:
         headers = {'Authorization': f'Bearer {token}'}
 
         # ── Paso 2: ejercicio_siguiente (sin idDominio) ───────────────────
+        from models.banco_ejercicios import BANCO
+        BANCO.invalidar()
         mock_cursor.reset_mock()
         mock_cursor.fetchone.side_effect = [
-            {'sin_diagnostico': False},
-            {'nivel_min': 3},           # AVG nivel_min (sin idDominio)
-            {'id_ejercicio': 101, 'enunciado': '2x+3=7', 'imagen_url': None,
-             'pista': 'Despeja x.', 'id_competencia': 2, 'nivel_ejercicio': 3},
-            {'nivel_actual': 3, 'score': 40.0},   # leer_nec display
+            {'sin_diagnostico': False, 'version_banco': 1,   # leer_estado_estudiante
+             'resueltos_repaso': [], 'intentados_repaso': [],
+             'respondidos_evaluacion': [],
+             'nec': [{'id_competencia': c, 'nivel': 3, 'score': 40.0, 'existe': True}
+                     for c in range(1, 5)]},
         ]
         mock_cursor.fetchall.side_effect = [
-            [   # opciones (solo fetchall cuando no hay idDominio)
-                {'id_opcion': 1, 'letra': 'A', 'descripcion': 'x=2', 'es_correcta': True},
-                {'id_opcion': 2, 'letra': 'B', 'descripcion': 'x=3', 'es_correcta': False},
+            [   # banco en memoria: ejercicios
+                {'id_ejercicio': 101, 'enunciado': '2x+3=7', 'imagen_url': None,
+                 'pista': 'Despeja x.', 'id_competencia': 2, 'nivel_ejercicio': 3,
+                 'competencia': 'C2'},
+            ],
+            [   # banco en memoria: opciones
+                {'id_opcion': 1, 'letra': 'A', 'descripcion': 'x=2', 'id_ejercicio': 101},
+                {'id_opcion': 2, 'letra': 'B', 'descripcion': 'x=3', 'id_ejercicio': 101},
             ],
         ]
         r_ej = client.get('/tutor/ejercicio_siguiente'
                           '?idEstudiante=10&modo=repaso',
                           headers=headers)
+        BANCO.invalidar()
         assert r_ej.status_code == 200
         data_ej = r_ej.get_json()
         assert data_ej['status'] is True
+        assert data_ej['idEjercicio'] == 101
 
         # ── Paso 3: responder ──────────────────────────────────────────────
         mock_cursor.reset_mock()
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': True, 'id_competencia': 2,
-             'nivel_ejercicio': 3, 'pista': 'Despeja x.'},
-            {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-            {'nivel_actual': 3, 'score': 40.0},
-            {'total_intentos': 0, 'promedio_puntaje': None,
-             'min_puntaje': None, 'max_puntaje': None,
-             'std_puntaje': 0, 'num_aprobados': 0, 'tendencia': None},
-            {'nivel_actual': 3, 'score': 48.0},
-        ]
-        mock_cursor.fetchall.side_effect = [
-            [],
-            [{'nivel_actual': 3, 'id_competencia': 2}],
+             'nivel_ejercicio': 3, 'pista': 'Despeja x.',
+             'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0,
+             'niveles_nec': {'2': 3}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
         r_resp = client.post('/tutor/responder', json={
             'idEstudiante': 10, 'idEjercicio': 101,
@@ -107,10 +109,10 @@ class TestEvaluacionNoModificaNEC:
         """
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': True, 'id_competencia': 2,
-             'nivel_ejercicio': 3, 'pista': None},
-            {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-            {'nivel_actual': 3, 'score': 40.0},  # leer_nec
-            {'prom': 3.0},                  # nivel global AVG
+             'nivel_ejercicio': 3, 'pista': None,
+             'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0,
+             'niveles_nec': {'2': 3}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
         mock_cursor.fetchall.return_value = []
 
@@ -164,20 +166,22 @@ class TestDiagnosticoBloqueado:
 
     def test_i3_con_diagnostico_no_bloquea(self, client, mock_cursor):
         """Con diagnóstico → permite acceder a ejercicios."""
+        from models.banco_ejercicios import BANCO
+        BANCO.invalidar()
         mock_cursor.fetchone.side_effect = [
-            {'sin_diagnostico': False},
-            {'nivel_actual': 2, 'score': 25.0},
-            {'total_intentos': 0, 'promedio_puntaje': None,
-             'min_puntaje': None, 'max_puntaje': None,
-             'std_puntaje': 0, 'num_aprobados': 0, 'tendencia': None},
-            {'id_ejercicio': 101, 'enunciado': 'Test', 'imagen_url': None,
-             'pista': None, 'id_competencia': 1, 'nivel_logro': 2, 'nivel': 1},
+            {'sin_diagnostico': False, 'version_banco': 1,   # leer_estado_estudiante
+             'resueltos_repaso': [], 'intentados_repaso': [],
+             'respondidos_evaluacion': [],
+             'nec': [{'id_competencia': c, 'nivel': 2, 'score': 25.0, 'existe': True}
+                     for c in range(1, 5)]},
         ]
         mock_cursor.fetchall.side_effect = [
-            [],   # racha
-            [{'id_opcion': 1, 'texto': 'A', 'es_correcta': True}],
+            [{'id_ejercicio': 101, 'enunciado': 'Test', 'imagen_url': None, 'pista': None,
+              'id_competencia': 1, 'nivel_ejercicio': 2, 'competencia': 'C1'}],
+            [{'id_opcion': 1, 'letra': 'A', 'descripcion': 'x', 'id_ejercicio': 101}],
         ]
         r = client.get('/tutor/ejercicio_siguiente?idEstudiante=10')
+        BANCO.invalidar()
         data = r.get_json()
         # No debe estar bloqueado
         assert data.get('bloqueado') is not True
@@ -33,10 +33,10 @@ class TestPuntajesSoloRepaso:
         """POST /tutor/responder modo=evaluacion → NO INSERT en puntajes."""
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': True, 'id_competencia': 2,
-             'nivel_ejercicio': 3, 'pista': None},
-            {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-            {'nivel_actual': 3, 'score': 40.0},  # leer_nec
-            {'prom': 3.0},                  # nivel global AVG
+             'nivel_ejercicio': 3, 'pista': None,
+             'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0,
+             'niveles_nec': {'2': 3}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
         mock_cursor.fetchall.return_value = []
 
@@ -60,17 +60,10 @@ class TestPuntajesSoloRepaso:
         """POST /tutor/responder modo=repaso + correcto → INSERT puntaje=100."""
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': True, 'id_competencia': 2,
-             'nivel_ejercicio': 3, 'pista': None},
-            {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-            {'nivel_actual': 3, 'score': 40.0},
-            {'total_intentos': 0, 'promedio_puntaje': None,
-             'min_puntaje': None, 'max_puntaje': None,
-             'std_puntaje': 0, 'num_aprobados': 0, 'tendencia': None},
-            {'nivel_actual': 3, 'score': 48.0},
-        ]
-        mock_cursor.fetchall.side_effect = [
-            [],
-            [{'nivel_actual': 3, 'id_competencia': 2}],
+             'nivel_ejercicio': 3, 'pista': None,
+             'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0,
+             'niveles_nec': {'2': 3}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
         client.post('/tutor/responder', json={
             'idEstudiante': 10, 'idEjercicio': 101,
@@ -90,17 +83,10 @@ class TestPuntajesSoloRepaso:
         """POST /tutor/responder modo=repaso + incorrecto → INSERT puntaje=0."""
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': False, 'id_competencia': 1,
-             'nivel_ejercicio': 2, 'pista': None},
-            {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-            {'nivel_actual': 2, 'score': 25.0},
-            {'total_intentos': 0, 'promedio_puntaje': None,
-             'min_puntaje': None, 'max_puntaje': None,
-             'std_puntaje': 0, 'num_aprobados': 0, 'tendencia': None},
-            {'nivel_actual': 2, 'score': 22.0},
-        ]
-        mock_cursor.fetchall.side_effect = [
-            [],
-            [{'nivel_actual': 2, 'id_competencia': 1}],
+             'nivel_ejercicio': 2, 'pista': None,
+             'nec_existe': True, 'nec_nivel': 2, 'nec_score': 25.0,
+             'niveles_nec': {'1': 2}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
         client.post('/tutor/responder', json={
             'idEstudiante': 10, 'idEjercicio': 102,
@@ -126,10 +112,10 @@ class TestNECSoloRepaso:
         """En evaluación, NEC permanece intacto."""
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': True, 'id_competencia': 2,
-             'nivel_ejercicio': 3, 'pista': None},
-            {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-            {'nivel_actual': 3, 'score': 40.0},  # leer_nec
-            {'prom': 3.0},                  # nivel global AVG
+             'nivel_ejercicio': 3, 'pista': None,
+             'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0,
+             'niveles_nec': {'2': 3}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
         mock_cursor.fetchall.return_value = []
         client.post('/tutor/responder', json={
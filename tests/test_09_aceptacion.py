@@ -27,67 +27,72 @@ pytestmark = pytest.mark.acceptance
 
 class TestHU1EjerciciosAdaptados:
 
-    def test_alumno_nivel_alto_recibe_ejercicio_dificil(self, client, mock_cursor):
+    @pytest.fixture(autouse=True)
+    def _banco_vacio(self):
+        from models.banco_ejercicios import BANCO
+        BANCO.invalidar()
+        yield
+        BANCO.invalidar()
+
+    @staticmethod
+    def _mocks(mock_cursor, nivel, score, comp):
         """
-        DADO  un estudiante con NEC nivel 6 en competencia 2
-        CUANDO solicita ejercicio siguiente en modo repaso
-        ENTONCES la query filtra ejercicios de dificultad ≥ 5 (nivel_logro ≥ 5)
+        Con idDominio → estado (NEC incluido), calcular_features (total=0 → None)
+        y racha; el banco en memoria trae un ejercicio fácil (106) y uno difícil (120).
         """
-        # Con idDominio=2 → sin_diag, nec(1), nec(2-predecir), calcular_features, exercise, nec(display)
         _stats = {'total_intentos': 0, 'promedio_puntaje': None, 'min_puntaje': None,
                   'max_puntaje': None, 'std_puntaje': 0, 'num_aprobados': 0, 'tendencia': None}
         mock_cursor.fetchone.side_effect = [
-            {'sin_diagnostico': False},
-            {'nivel_actual': 6, 'score': 80.0},   # leer_nec #1
-            {'nivel_actual': 6, 'score': 80.0},   # leer_nec #2 (predecir)
-            _stats,                                 # calcular_features (total=0 → None)
-            {'id_ejercicio': 120, 'enunciado': 'Problema avanzado',
-             'imagen_url': None, 'pista': None,
-             'id_competencia': 2, 'nivel_ejercicio': 6},
-            {'nivel_actual': 6, 'score': 80.0},   # leer_nec display
+            {'sin_diagnostico': False, 'version_banco': 1,
+             'resueltos_repaso': [], 'intentados_repaso': [],
+             'respondidos_evaluacion': [],
+             'nec': [{'id_competencia': c, 'nivel': nivel, 'score': score, 'existe': True}
+                     for c in range(1, 5)]},
+            _stats,           # calcular_features_competencia
+            {'racha': 0},     # leer_racha
         ]
         mock_cursor.fetchall.side_effect = [
-            [],   # racha
-            [{'id_opcion': 1, 'letra': 'A', 'descripcion': 'Correcta', 'es_correcta': True}],
+            [   # banco en memoria: ejercicios
+                {'id_ejercicio': 106, 'enunciado': 'Suma básica', 'imagen_url': None,
+                 'pista': 'Recuerda sumar', 'nivel_ejercicio': 2,
+                 'id_competencia': comp, 'competencia': f'C{comp}'},
+                {'id_ejercicio': 120, 'enunciado': 'Problema avanzado', 'imagen_url': None,
+                 'pista': None, 'nivel_ejercicio': 6,
+                 'id_competencia': comp, 'competencia': f'C{comp}'},
+            ],
+            [   # banco en memoria: opciones
+                {'id_opcion': 1, 'letra': 'A', 'descripcion': 'Correcta', 'id_ejercicio': 106},
+                {'id_opcion': 2, 'letra': 'A', 'descripcion': 'Correcta', 'id_ejercicio': 120},
+            ],
         ]
+
+    def test_alumno_nivel_alto_recibe_ejercicio_dificil(self, client, mock_cursor):
+        """
+        DADO  un estudiante con NEC nivel 6 en competencia 2
+        CUANDO solicita ejercicio siguiente en modo repaso
+        ENTONCES recibe un ejercicio de dificultad ≥ 5 (nivel_logro ≥ 5)
+        """
+        self._mocks(mock_cursor, nivel=6, score=80.0, comp=2)
         r = client.get('/tutor/ejercicio_siguiente?idEstudiante=10&idDominio=2')
         assert r.status_code == 200
         data = r.get_json()
         assert data['status'] is True
-
-        # Verificar que el SQL usó el filtro correcto para NEC 6
-        all_sql = ' '.join(str(c) for c in mock_cursor.execute.call_args_list)
-        assert '>= 5' in all_sql or '>= 6' in all_sql or 'nivel_logro' in all_sql.lower()
+        assert data['idEjercicio'] == 120
+        assert data['nivelEjercicio'] >= 5
 
     def test_alumno_nivel_bajo_recibe_ejercicio_facil(self, client, mock_cursor):
         """
         DADO  un estudiante con NEC nivel 1
         CUANDO solicita ejercicio siguiente
-        ENTONCES la query filtra ejercicios de dificultad ≤ 3
+        ENTONCES recibe un ejercicio de dificultad ≤ 3
         """
-        # Con idDominio=1 → sin_diag, nec(1), nec(2-predecir), calcular_features, exercise, nec(display)
-        _stats = {'total_intentos': 0, 'promedio_puntaje': None, 'min_puntaje': None,
-                  'max_puntaje': None, 'std_puntaje': 0, 'num_aprobados': 0, 'tendencia': None}
-        mock_cursor.fetchone.side_effect = [
-            {'sin_diagnostico': False},
-            {'nivel_actual': 1, 'score': 10.0},   # leer_nec #1
-            {'nivel_actual': 1, 'score': 10.0},   # leer_nec #2 (predecir)
-            _stats,                                 # calcular_features (total=0 → None)
-            {'id_ejercicio': 106, 'enunciado': 'Suma básica',
-             'imagen_url': None, 'pista': 'Recuerda sumar',
-             'id_competencia': 1, 'nivel_ejercicio': 2},
-            {'nivel_actual': 1, 'score': 10.0},   # leer_nec display
-        ]
-        mock_cursor.fetchall.side_effect = [
-            [],   # racha
-            [{'id_opcion': 1, 'letra': 'A', 'descripcion': 'Correcta', 'es_correcta': True}],
-        ]
+        self._mocks(mock_cursor, nivel=1, score=10.0, comp=1)
         r = client.get('/tutor/ejercicio_siguiente?idEstudiante=10&idDominio=1')
         assert r.status_code == 200
-        assert r.get_json()['status'] is True
-
-        all_sql = ' '.join(str(c) for c in mock_cursor.execute.call_args_list)
-        assert '<= 3' in all_sql or 'nivel_logro' in all_sql.lower()
+        data = r.get_json()
+        assert data['status'] is True
+        assert data['idEjercicio'] == 106
+        assert data['nivelEjercicio'] <= 3
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -146,7 +151,10 @@ class TestHU3EvaluacionSinCambioNivel:
         """
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': True, 'id_competencia': 2,
-             'nivel_ejercicio': 3, 'pista': None},
+             'nivel_ejercicio': 3, 'pista': None,
+             'nec_existe': True, 'nec_nivel': 4, 'nec_score': 55.0,
+             'niveles_nec': {'2': 4}},
+            {'id_respuesta': 5},
         ]
         mock_cursor.fetchall.return_value = []
 
@@ -157,11 +165,13 @@ class TestHU3EvaluacionSinCambioNivel:
             'modo': 'evaluacion', 'idEvaluacion': 5,
         })
 
-        nec_touches = [
+        # El NEC se LEE en la consulta de contexto; lo que no debe haber es escritura
+        nec_writes = [
             c for c in mock_cursor.execute.call_args_list
             if 'nivel_estudiante_competencia' in str(c).lower()
+            and 'INSERT' in str(c).upper()
         ]
-        assert len(nec_touches) == 0
+        assert len(nec_writes) == 0
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -208,15 +218,11 @@ class TestHU5PistaConTexto:
         """
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': False, 'id_competencia': 2,
-             'nivel_ejercicio': 3, 'pista': 'Recuerda: ax+b=0 → x=-b/a'},
-            {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-            {'nivel_actual': 3, 'score': 40.0},
-            {'total_intentos': 0, 'promedio_puntaje': None,
-             'min_puntaje': None, 'max_puntaje': None,
-             'std_puntaje': 0, 'num_aprobados': 0, 'tendencia': None},
-            {'nivel_actual': 3, 'score': 35.0},
+             'nivel_ejercicio': 3, 'pista': 'Recuerda: ax+b=0 → x=-b/a',
+             'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0,
+             'niveles_nec': {'2': 3}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
-        mock_cursor.fetchall.side_effect = [[], [{'nivel_actual': 3, 'id_competencia': 2}]]
         r = client.post('/tutor/responder', json={
             'idEstudiante': 10, 'idEjercicio': 101, 'idOpcionSeleccionada': 3,
             'tiempoRespuesta': 200, 'usoPista': False, 'modo': 'repaso',
@@ -231,15 +237,11 @@ class TestHU5PistaConTexto:
         """
         mock_cursor.fetchone.side_effect = [
             {'es_correcta': False, 'id_competencia': 2,
-             'nivel_ejercicio': 3, 'pista': ''},   # pista vacía
-            {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-            {'nivel_actual': 3, 'score': 40.0},
-            {'total_intentos': 0, 'promedio_puntaje': None,
-             'min_puntaje': None, 'max_puntaje': None,
-             'std_puntaje': 0, 'num_aprobados': 0, 'tendencia': None},
-            {'nivel_actual': 3, 'score': 35.0},
+             'nivel_ejercicio': 3, 'pista': '',
+             'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0,
+             'niveles_nec': {'2': 3}},
+            {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
         ]
-        mock_cursor.fetchall.side_effect = [[], [{'nivel_actual': 3, 'id_competencia': 2}]]
         r = client.post('/tutor/responder', json={
             'idEstudiante': 10, 'idEjercicio': 101, 'idOpcionSeleccionada': 3,
             'tiempoRespuesta': 200, 'usoPista': False, 'modo': 'repaso',
@@ -28,14 +28,6 @@ def _nec_row(nivel: int, score: float = None):
     return {'nivel_actual': nivel, 'score': score}
 
 
-def _stats_row(total=0):
-    return {
-        'total_intentos': total, 'promedio_puntaje': None if not total else 65.0,
-        'min_puntaje': None, 'max_puntaje': None,
-        'std_puntaje': 0, 'num_aprobados': 0, 'tendencia': None,
-    }
-
-
 def _ej_row(id_ej=101, nivel_ejercicio=3, comp=2):
     return {
         'id_ejercicio': id_ej, 'enunciado': f'Ej {id_ej}',
@@ -44,6 +36,23 @@ def _ej_row(id_ej=101, nivel_ejercicio=3, comp=2):
     }
 
 
+def _estado_row(nivel):
+    """leer_estado_estudiante: diagnóstico + versión del banco + NEC del alumno."""
+    return {'sin_diagnostico': False, 'version_banco': 1,
+            'resueltos_repaso': [], 'intentados_repaso': [],
+            'respondidos_evaluacion': [],
+            'nec': [{'id_competencia': c, 'nivel': nivel, 'score': _nec_row(nivel)['score'],
+                     'existe': True} for c in range(1, 5)]}
+
+
+def _banco_rows(id_ej=101):
+    """fetchall de la recarga del banco en memoria: ejercicios + opciones."""
+    from models.banco_ejercicios import BANCO
+    BANCO.invalidar()
+    return [[dict(_ej_row(id_ej), competencia='C2')],
+            [dict(o, id_ejercicio=id_ej) for o in _opciones()]]
+
+
 def _opciones(id_correcta=1):
     return [
         {'id_opcion': id_correcta, 'letra': 'A', 'descripcion': 'Correcta', 'es_correcta': True},
@@ -86,12 +95,9 @@ class TestE1SesionRepaso:
             # ── GET ejercicio (sin idDominio) ─────────────────────────────
             mock_cursor.reset_mock()
             mock_cursor.fetchone.side_effect = [
-                {'sin_diagnostico': False},
-                {'nivel_min': 3},              # AVG nivel_min
-                _ej_row(id_ej=100 + i),
-                _nec_row(nivel=3),             # leer_nec display
+                _estado_row(nivel=3),          # estado + NEC (nivel promedio en memoria)
             ]
-            mock_cursor.fetchall.side_effect = [_opciones()]  # solo opciones
+            mock_cursor.fetchall.side_effect = _banco_rows(100 + i)
             r_ej = client.get('/tutor/ejercicio_siguiente?idEstudiante=10&modo=repaso')
             assert r_ej.status_code == 200
 
@@ -99,15 +105,10 @@ class TestE1SesionRepaso:
             mock_cursor.reset_mock()
             mock_cursor.fetchone.side_effect = [
                 {'es_correcta': True, 'id_competencia': 2,
-                 'nivel_ejercicio': 3, 'pista': 'Pista X'},
-                {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-                _nec_row(nivel=3, score=40.0 + i * 8),
-                _stats_row(),
-                _nec_row(nivel=3, score=48.0 + i * 8),
-            ]
-            mock_cursor.fetchall.side_effect = [
-                [],   # racha
-                [_nec_row(nivel=3)],  # progreso_general
+                 'nivel_ejercicio': 3, 'pista': 'Pista X',
+                 'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0 + i * 8,
+                 'niveles_nec': {'2': 3}},
+                {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
             ]
             r_resp = client.post('/tutor/responder', json={
                 'idEstudiante': 10, 'idEjercicio': 100 + i,
@@ -135,10 +136,10 @@ class TestE2SesionEvaluacion:
             mock_cursor.reset_mock()
             mock_cursor.fetchone.side_effect = [
                 {'es_correcta': es_correcta, 'id_competencia': 1,
-                 'nivel_ejercicio': 3, 'pista': None},
-                {'id_respuesta': 5},            # INSERT RETURNING id_respuesta
-                {'nivel_actual': 3, 'score': 40.0},  # leer_nec
-                {'prom': 3.0},                  # nivel global AVG
+                 'nivel_ejercicio': 3, 'pista': None,
+                 'nec_existe': True, 'nec_nivel': 3, 'nec_score': 40.0,
+                 'niveles_nec': {'1': 3}},
+                {'id_respuesta': 5},            # WITH resp AS (INSERT …) RETURNING
             ]
             mock_cursor.fetchall.return_value = []
 
@@ -187,12 +188,9 @@ class TestE3EstudianteBloqueado:
         # ── Estado 2: docente asignó diagnóstico (sin idDominio) ─────────
         mock_cursor.reset_mock()
         mock_cursor.fetchone.side_effect = [
-            {'sin_diagnostico': False},
-            {'nivel_min': 2},          # AVG nivel_min
-            _ej_row(),
-            _nec_row(nivel=2),         # leer_nec display
+            _estado_row(nivel=2),      # estado + NEC (nivel promedio en memoria)
         ]
-        mock_cursor.fetchall.side_effect = [_opciones()]  # solo opciones
+        mock_cursor.fetchall.side_effect = _banco_rows()
         r2 = client.get('/tutor/ejercicio_siguiente?idEstudiante=10')
         assert r2.status_code == 200
         assert r2.get_json()['status'] is True
@@ -227,18 +225,14 @@ class TestE4CicloML:
             },
         ]
         mock_mod = MagicMock()
-        mock_enc = MagicMock()
-        mock_mod.predict.return_value       = [1]
-        mock_enc.inverse_transform.return_value = ['alto']
+        mock_mod.predict.return_value       = ['alto']
 
-        orig_m, orig_e = t.MODELO_TUTOR, t.ENCODER_NIVEL
+        orig_m = t.MODELO_TUTOR
         t.MODELO_TUTOR  = mock_mod
-        t.ENCODER_NIVEL = mock_enc
         try:
             resultado = predecir_nivel_competencia(mock_cursor, 10, 2)
         finally:
             t.MODELO_TUTOR  = orig_m
-            t.ENCODER_NIVEL = orig_e
 
         mock_mod.predict.assert_called_once()
         assert resultado in ('bajo', 'medio', 'alto')